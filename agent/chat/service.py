@@ -160,6 +160,7 @@ class ChatService:
 
         from config import conf
         max_context_turns = conf().get("agent_max_context_turns", 20)
+        tool_parallelism = conf().get("agent_tool_parallelism", 4)
 
         # Get full system prompt with skills
         full_system_prompt = agent.get_full_system_prompt()
@@ -180,6 +181,7 @@ class ChatService:
             on_event=on_event,
             messages=messages_copy,
             max_context_turns=max_context_turns,
+            tool_parallelism=tool_parallelism,
         )
 
         try:
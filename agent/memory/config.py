@@ -41,12 +41,26 @@ class MemoryConfig:
     vector_weight: float = 0.7
     keyword_weight: float = 0.3
     
+    # Vector index: "flat" (exact), "ivf" (approximate) or "auto"
+    # (switch to ivf once a partition reaches vector_ivf_min_size chunks)
+    vector_index_mode: str = "auto"
+    vector_ivf_min_size: int = 50000
+    
+    # On-disk embedding encoding: "float32" or "int8" (per-row scale, 4x smaller)
+    embedding_storage_format: str = "float32"
+    
+    # Persistent embedding cache size (entries), 0 disables the cache
+    embedding_cache_max_entries: int = 50000
+    
     # Memory sources
     sources: List[str] = field(default_factory=lambda: ["memory", "session"])
     
     # Sync config
     enable_auto_sync: bool = True
     sync_on_search: bool = True
+    # Threads used to read/chunk changed files and embed them during sync
+    # (1 = sequential)
+    sync_workers: int = 4
     
     
     def get_workspace(self) -> Path:
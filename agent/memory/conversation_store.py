@@ -2,22 +2,28 @@
 Conversation history persistence using SQLite.
 
 Design:
-- sessions table: per-session metadata (channel_type, last_active, msg_count)
+- sessions table: per-session metadata (channel_type, last_active, msg_count,
+  next_seq); the counters are maintained on write so appends never scan history
 - messages table: individual messages stored as JSON, append-only
 - Pruning: age-based only (sessions not updated within N days are deleted)
-- Thread-safe via a single in-process lock
+- Concurrency: per-thread read connections kept open; a single writer
+  thread applies queued writes from all sessions as group commits
 
 Storage path: ~/cow/sessions/conversations.db
 """
 
 from __future__ import annotations
 
+import atexit
 import json
+import queue
 import sqlite3
 import threading
 import time
+import weakref
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from common.log import logger
 
@@ -34,7 +40,8 @@ CREATE TABLE IF NOT EXISTS sessions (
     context_start_seq INTEGER NOT NULL DEFAULT 0,
     created_at        INTEGER NOT NULL,
     last_active       INTEGER NOT NULL,
-    msg_count         INTEGER NOT NULL DEFAULT 0
+    msg_count         INTEGER NOT NULL DEFAULT 0,
+    next_seq          INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE TABLE IF NOT EXISTS messages (
@@ -44,6 +51,9 @@ CREATE TABLE IF NOT EXISTS messages (
     role         TEXT    NOT NULL,
     content      TEXT    NOT NULL,
     created_at   INTEGER NOT NULL,
+    turn_flags   INTEGER NOT NULL DEFAULT 0,
+    items_before INTEGER NOT NULL DEFAULT 0,
+    items_before_thinking INTEGER NOT NULL DEFAULT 0,
     UNIQUE (session_id, seq)
 );
 
@@ -67,6 +77,49 @@ _MIGRATION_ADD_CONTEXT_START_SEQ = """
 ALTER TABLE sessions ADD COLUMN context_start_seq INTEGER NOT NULL DEFAULT 0;
 """
 
+_MIGRATION_ADD_NEXT_SEQ = """
+ALTER TABLE sessions ADD COLUMN next_seq INTEGER NOT NULL DEFAULT 0;
+"""
+
+# Re-derive both counters from the messages table (after adding next_seq)
+_BACKFILL_SESSION_COUNTERS = """
+UPDATE sessions SET
+    next_seq = COALESCE(
+        (SELECT MAX(seq) + 1 FROM messages m WHERE m.session_id = sessions.session_id), 0),
+    msg_count = (SELECT COUNT(*) FROM messages m WHERE m.session_id = sessions.session_id);
+"""
+
+_MIGRATION_ADD_TURN_FLAGS = """
+ALTER TABLE messages ADD COLUMN turn_flags INTEGER NOT NULL DEFAULT 0;
+"""
+
+# Display items rendered by the session's earlier turns, without / with
+# thinking steps, kept on each turn row so a UI page is a range lookup.
+_MIGRATION_ADD_TURN_ITEMS = """
+ALTER TABLE messages ADD COLUMN items_before INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE messages ADD COLUMN items_before_thinking INTEGER NOT NULL DEFAULT 0;
+"""
+
+# Visible-turn index: one entry per visible user message, i.e. per turn.
+# Created after the turn_flags migration so it also applies to old databases.
+_TURN_INDEX_DDL = """
+CREATE INDEX IF NOT EXISTS idx_messages_turns
+    ON messages (session_id, seq, turn_flags) WHERE turn_flags > 0;
+CREATE INDEX IF NOT EXISTS idx_messages_turn_items
+    ON messages (session_id, items_before, seq) WHERE turn_flags > 0;
+CREATE INDEX IF NOT EXISTS idx_messages_turn_items_thinking
+    ON messages (session_id, items_before_thinking, seq) WHERE turn_flags > 0;
+"""
+
+# turn_flags bits. Only visible user messages (the first row of a turn) carry
+# flags; every other row stays 0 and is left out of the partial index. The
+# reply bits summarize the turn's assistant rows so a UI page can be located
+# from the index alone, without decoding message JSON.
+_TURN_VISIBLE = 1          # visible user message: starts a turn
+_TURN_HAS_TEXT = 2         # ... with non-empty display text (renders a user bubble)
+_TURN_REPLY = 4            # turn has an assistant text / tool_use step
+_TURN_REPLY_THINKING = 8   # turn has a non-empty thinking step
+
 DEFAULT_MAX_AGE_DAYS: int = 30
 
 
@@ -85,6 +138,75 @@ def _is_visible_user_message(content: Any) -> bool:
     return False
 
 
+def _user_turn_flags(content: Any) -> int:
+    """turn_flags for a user-role message (0 when it is a tool_result)."""
+    if not _is_visible_user_message(content):
+        return 0
+    return _TURN_VISIBLE | (_TURN_HAS_TEXT if _extract_display_text(content) else 0)
+
+
+def _reply_turn_flags(content: Any) -> int:
+    """Reply bits an assistant-role message contributes to its turn."""
+    if isinstance(content, str):
+        return _TURN_REPLY if content.strip() else 0
+    flags = 0
+    if isinstance(content, list):
+        for block in content:
+            if not isinstance(block, dict):
+                continue
+            btype = block.get("type")
+            if btype == "tool_use" or (btype == "text" and block.get("text", "").strip()):
+                flags |= _TURN_REPLY
+            elif btype == "thinking" and block.get("thinking", "").strip():
+                flags |= _TURN_REPLY_THINKING
+    return flags
+
+
+def _display_items(flags: int, include_thinking: bool) -> int:
+    """Number of display turns (user bubble + assistant bubble) a turn renders."""
+    items = 1 if flags & _TURN_HAS_TEXT else 0
+    if flags & _TURN_REPLY or (include_thinking and flags & _TURN_REPLY_THINKING):
+        items += 1
+    return items
+
+
+def _cumulative_items(turns, before: int = 0, before_thinking: int = 0) -> List[tuple]:
+    """
+    (seq, flags, items_before, items_before_thinking) for a session's
+    (seq, flags) turns in seq order, counting on from the given totals.
+    """
+    result = []
+    for seq, flags in turns:
+        result.append((seq, flags, before, before_thinking))
+        before += _display_items(flags, False)
+        before_thinking += _display_items(flags, True)
+    return result
+
+
+def _compute_turn_flags(rows) -> Dict[int, int]:
+    """
+    Compute turn_flags for a session's (seq, role, raw_content) rows in seq
+    order. Returns {seq: flags} for the visible user rows.
+    """
+    flags: Dict[int, int] = {}
+    turn_seq = None
+    for seq, role, raw_content in rows:
+        if role not in ("user", "assistant"):
+            continue
+        try:
+            content = json.loads(raw_content)
+        except Exception:
+            content = raw_content
+        if role == "user":
+            user_flags = _user_turn_flags(content)
+            if user_flags:
+                turn_seq = seq
+                flags[seq] = user_flags
+        elif turn_seq is not None:
+            flags[turn_seq] |= _reply_turn_flags(content)
+    return flags
+
+
 def _extract_display_text(content: Any) -> str:
     """
     Extract the human-readable text portion from a message content value.
@@ -256,20 +378,74 @@ def _group_into_display_turns(
     return turns
 
 
+class _WriteOp:
+    """A unit of work for the writer thread: fn(conn) and the future for its result."""
+
+    __slots__ = ("fn", "future")
+
+    def __init__(self, fn: Callable[[sqlite3.Connection], Any]):
+        self.fn = fn
+        self.future: Future = Future()
+
+
+class _ReaderSlot:
+    """Holds one thread's read connection; closes it when the thread goes away."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def close(self) -> None:
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def __del__(self):
+        self.close()
+
+
 class ConversationStore:
     """
     SQLite-backed store for per-session conversation history.
 
+    Reads use a long-lived connection per calling thread (WAL readers never
+    block each other or the writer). All writes are funnelled through one
+    writer thread that drains whatever is queued and commits it as a single
+    transaction, so many sessions appending at once cost one commit instead
+    of one each. Each queued operation runs inside its own SAVEPOINT, so a
+    failing operation does not take the rest of the group down with it.
+
     Usage:
         store = ConversationStore(db_path)
         store.append_messages("user_123", new_messages, channel_type="feishu")
         msgs = store.load_messages("user_123", max_turns=30)
+
+        # fire-and-forget / overlap with other work:
+        future = store.append_messages_async("user_123", new_messages)
+        future.result()  # committed
     """
 
+    # Upper bound on operations folded into one group commit
+    _MAX_BATCH = 256
+
     def __init__(self, db_path: Path):
         self._db_path = db_path
-        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: "weakref.WeakSet[_ReaderSlot]" = weakref.WeakSet()
+        self._readers_lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[Optional[_WriteOp]]" = queue.SimpleQueue()
+        self._closed = False
+        self._commits = 0
+        self._ops_committed = 0
         self._init_db()
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="conversation-store-writer", daemon=True
+        )
+        self._writer.start()
 
     # ------------------------------------------------------------------
     # Public API
@@ -297,51 +473,41 @@ class ConversationStore:
         Returns:
             Chronologically ordered list of message dicts (role, content).
         """
-        with self._lock:
-            conn = self._connect()
-            try:
-                # Respect context_start_seq: only load messages at or after the boundary
-                ctx_row = conn.execute(
-                    "SELECT context_start_seq FROM sessions WHERE session_id = ?",
-                    (session_id,),
-                ).fetchone()
-                ctx_start = ctx_row[0] if ctx_row else 0
-
-                rows = conn.execute(
-                    """
-                    SELECT seq, role, content
-                    FROM messages
-                    WHERE session_id = ? AND seq >= ?
-                    ORDER BY seq DESC
-                    """,
-                    (session_id, ctx_start),
-                ).fetchall()
-            finally:
-                conn.close()
-
-        if not rows:
-            return []
-
-        visible_turn_seqs: List[int] = []
-        for seq, role, raw_content in rows:
-            if role != "user":
-                continue
-            try:
-                content = json.loads(raw_content)
-            except Exception:
-                content = raw_content
-            if _is_visible_user_message(content):
-                visible_turn_seqs.append(seq)
-
-        if len(visible_turn_seqs) <= max_turns:
-            cutoff_seq = None
-        else:
-            cutoff_seq = visible_turn_seqs[max_turns - 1]
+        conn = self._reader()
+        # Respect context_start_seq: only load messages at or after the boundary
+        ctx_row = conn.execute(
+            "SELECT context_start_seq FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        ctx_start = ctx_row[0] if ctx_row else 0
+
+        # The max_turns-th most recent turn start, straight from the turn index,
+        # plus the turn before it if any.  Only when that older turn exists is
+        # history cut; otherwise everything since the boundary is loaded,
+        # including rows that precede the first turn.
+        cutoff_rows = conn.execute(
+            """
+            SELECT seq FROM messages
+            WHERE session_id = ? AND turn_flags > 0 AND seq >= ?
+            ORDER BY seq DESC
+            LIMIT 2 OFFSET ?
+            """,
+            (session_id, ctx_start, max_turns - 1),
+        ).fetchall() if max_turns > 0 else []
+        start_seq = cutoff_rows[0][0] if len(cutoff_rows) == 2 else ctx_start
+
+        rows = conn.execute(
+            """
+            SELECT role, content
+            FROM messages
+            WHERE session_id = ? AND seq >= ?
+            ORDER BY seq ASC
+            """,
+            (session_id, start_seq),
+        ).fetchall()
 
         result = []
-        for seq, role, raw_content in reversed(rows):
-            if cutoff_seq is not None and seq < cutoff_seq:
-                continue
+        for role, raw_content in rows:
             try:
                 content = json.loads(raw_content)
             except Exception:
@@ -361,8 +527,9 @@ class ConversationStore:
         """
         Append new messages to a session's history.
 
-        Seq numbers continue from the session's current maximum, so
-        concurrent callers on distinct sessions never collide.
+        Seq numbers continue from the session's next_seq counter, so the
+        cost of an append does not depend on how long the session is.
+        Blocks until the group commit containing these messages is durable.
 
         Args:
             session_id: Unique session identifier.
@@ -372,80 +539,145 @@ class ConversationStore:
         """
         if not messages:
             return
+        self.append_messages_async(session_id, messages, channel_type).result()
 
+    def append_messages_async(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        channel_type: str = "",
+    ) -> Future:
+        """
+        Queue messages for the writer thread and return immediately.
+
+        The returned Future resolves to None once the messages are committed
+        (or raises the write error). Appends to one session are applied in
+        submission order; reads issued before the future resolves may not
+        see them yet.
+        """
+        if not messages:
+            future: Future = Future()
+            future.set_result(None)
+            return future
+        # Serialize on the caller's thread so the writer only does SQL
         now = int(time.time())
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn:
-                    # INSERT OR IGNORE creates the row on first visit;
-                    # the UPDATE always refreshes last_active.
-                    # Avoids ON CONFLICT...DO UPDATE (requires SQLite >= 3.24).
-                    conn.execute(
-                        """
-                        INSERT OR IGNORE INTO sessions
-                            (session_id, channel_type, created_at, last_active, msg_count)
-                        VALUES (?, ?, ?, ?, 0)
-                        """,
-                        (session_id, channel_type, now, now),
-                    )
+        rows = []
+        for msg in messages:
+            role = msg.get("role", "")
+            content = msg.get("content", "")
+            turn_flags = _user_turn_flags(content) if role == "user" else 0
+            reply_flags = _reply_turn_flags(content) if role == "assistant" else 0
+            rows.append((role, json.dumps(content, ensure_ascii=False), turn_flags, reply_flags))
+        title = ""
+        for msg in messages:
+            if msg.get("role") == "user":
+                text = _extract_display_text(msg.get("content", ""))
+                if text:
+                    title = text[:50].split("\n")[0]
+                    break
+
+        def _append(conn: sqlite3.Connection) -> None:
+            # INSERT OR IGNORE creates the row on first visit; the counters
+            # are bumped by the UPDATE below once the messages are in.
+            # Avoids ON CONFLICT...DO UPDATE (requires SQLite >= 3.24).
+            created = conn.execute(
+                """
+                INSERT OR IGNORE INTO sessions
+                    (session_id, channel_type, created_at, last_active, msg_count, next_seq)
+                VALUES (?, ?, ?, ?, 0, 0)
+                """,
+                (session_id, channel_type, now, now),
+            ).rowcount
+            if created:
+                # Messages may outlive their session row (e.g. written by an
+                # older build); continue after them rather than collide.
+                row = conn.execute(
+                    "SELECT COALESCE(MAX(seq), -1) + 1, COUNT(*) FROM messages WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                next_seq, existing = row
+                if existing:
                     conn.execute(
-                        "UPDATE sessions SET last_active = ? WHERE session_id = ?",
-                        (now, session_id),
+                        "UPDATE sessions SET next_seq = ?, msg_count = ? WHERE session_id = ?",
+                        (next_seq, existing, session_id),
                     )
+            else:
+                next_seq = conn.execute(
+                    "SELECT next_seq FROM sessions WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()[0]
 
-                    # Determine starting seq for the new batch.
-                    row = conn.execute(
-                        "SELECT COALESCE(MAX(seq), -1) FROM messages WHERE session_id = ?",
-                        (session_id,),
-                    ).fetchone()
-                    next_seq = row[0] + 1
-
-                    for msg in messages:
-                        role = msg.get("role", "")
-                        content = json.dumps(
-                            msg.get("content", ""), ensure_ascii=False
-                        )
+            # Fold assistant reply bits into the turn they belong to: a turn
+            # started in this batch, or the session's latest stored turn
+            insert_flags = []
+            open_turn = None
+            prior_turn_bits = 0
+            for i, (_role, _content, turn_flags, reply_flags) in enumerate(rows):
+                insert_flags.append(turn_flags)
+                if turn_flags:
+                    open_turn = i
+                elif reply_flags:
+                    if open_turn is not None:
+                        insert_flags[open_turn] |= reply_flags
+                    else:
+                        prior_turn_bits |= reply_flags
+            # New turns count their display items on from the latest stored
+            # turn, whose reply bits are final once a newer turn starts
+            before = before_thinking = 0
+            if prior_turn_bits or open_turn is not None:
+                last_turn = conn.execute(
+                    """
+                    SELECT seq, turn_flags, items_before, items_before_thinking
+                    FROM messages
+                    WHERE session_id = ? AND turn_flags > 0
+                    ORDER BY seq DESC LIMIT 1
+                    """,
+                    (session_id,),
+                ).fetchone()
+                if last_turn:
+                    last_seq, last_flags, before, before_thinking = last_turn
+                    if prior_turn_bits:
+                        last_flags |= prior_turn_bits
                         conn.execute(
-                            """
-                            INSERT OR IGNORE INTO messages
-                                (session_id, seq, role, content, created_at)
-                            VALUES (?, ?, ?, ?, ?)
-                            """,
-                            (session_id, next_seq, role, content, now),
+                            "UPDATE messages SET turn_flags = ? WHERE session_id = ? AND seq = ?",
+                            (last_flags, session_id, last_seq),
                         )
-                        next_seq += 1
+                    before += _display_items(last_flags, False)
+                    before_thinking += _display_items(last_flags, True)
+            insert_items = {
+                i: (b, bt) for i, _flags, b, bt in _cumulative_items(
+                    [(i, f) for i, f in enumerate(insert_flags) if f], before, before_thinking)
+            }
 
-                    conn.execute(
-                        """
-                        UPDATE sessions
-                        SET msg_count = (
-                            SELECT COUNT(*) FROM messages WHERE session_id = ?
-                        )
-                        WHERE session_id = ?
-                        """,
-                        (session_id, session_id),
-                    )
+            inserted = conn.executemany(
+                """
+                INSERT OR IGNORE INTO messages
+                    (session_id, seq, role, content, created_at, turn_flags,
+                     items_before, items_before_thinking)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (session_id, next_seq + i, role, content, now, insert_flags[i],
+                     *insert_items.get(i, (0, 0)))
+                    for i, (role, content, _turn, _reply) in enumerate(rows)
+                ],
+            ).rowcount
+
+            # Counters, last_active and the auto-title (first visible user
+            # message) in one statement
+            conn.execute(
+                """
+                UPDATE sessions
+                SET last_active = ?,
+                    next_seq = ?,
+                    msg_count = msg_count + ?,
+                    title = CASE WHEN title = '' THEN ? ELSE title END
+                WHERE session_id = ?
+                """,
+                (now, next_seq + len(rows), inserted, title, session_id),
+            )
 
-                    # Auto-generate title from the first visible user message
-                    cur_title = conn.execute(
-                        "SELECT title FROM sessions WHERE session_id = ?",
-                        (session_id,),
-                    ).fetchone()
-                    if cur_title and not cur_title[0]:
-                        for msg in messages:
-                            if msg.get("role") == "user":
-                                content = msg.get("content", "")
-                                text = _extract_display_text(content)
-                                if text:
-                                    title = text[:50].split("\n")[0]
-                                    conn.execute(
-                                        "UPDATE sessions SET title = ? WHERE session_id = ?",
-                                        (title, session_id),
-                                    )
-                                    break
-            finally:
-                conn.close()
+        return self._submit(_append)
 
     def clear_context(self, session_id: str) -> int:
         """
@@ -454,50 +686,39 @@ class ConversationStore:
 
         Returns the new context_start_seq value.
         """
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn:
-                    row = conn.execute(
-                        "SELECT COALESCE(MAX(seq), -1) FROM messages WHERE session_id = ?",
-                        (session_id,),
-                    ).fetchone()
-                    new_start = row[0] + 1
-                    conn.execute(
-                        "UPDATE sessions SET context_start_seq = ? WHERE session_id = ?",
-                        (new_start, session_id),
-                    )
-                    return new_start
-            finally:
-                conn.close()
+        def _clear(conn: sqlite3.Connection) -> int:
+            row = conn.execute(
+                "SELECT next_seq FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            new_start = row[0] if row else 0
+            conn.execute(
+                "UPDATE sessions SET context_start_seq = ? WHERE session_id = ?",
+                (new_start, session_id),
+            )
+            return new_start
+
+        return self._write(_clear)
 
     def get_context_start_seq(self, session_id: str) -> int:
         """Return the context_start_seq for a session (0 if not set)."""
-        with self._lock:
-            conn = self._connect()
-            try:
-                row = conn.execute(
-                    "SELECT context_start_seq FROM sessions WHERE session_id = ?",
-                    (session_id,),
-                ).fetchone()
-                return row[0] if row else 0
-            finally:
-                conn.close()
+        row = self._reader().execute(
+            "SELECT context_start_seq FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        return row[0] if row else 0
 
     def clear_session(self, session_id: str) -> None:
         """Delete all messages and the session record for a given session_id."""
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn:
-                    conn.execute(
-                        "DELETE FROM messages WHERE session_id = ?", (session_id,)
-                    )
-                    conn.execute(
-                        "DELETE FROM sessions WHERE session_id = ?", (session_id,)
-                    )
-            finally:
-                conn.close()
+        def _delete(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "DELETE FROM messages WHERE session_id = ?", (session_id,)
+            )
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            )
+
+        self._write(_delete)
 
     def prune_scheduled_messages(
         self,
@@ -541,64 +762,61 @@ class ConversationStore:
                 return False
             return any(text.startswith(m) for m in markers)
 
-        with self._lock:
-            conn = self._connect()
-            try:
-                rows = conn.execute(
-                    """
-                    SELECT seq, role, content
-                    FROM messages
-                    WHERE session_id = ?
-                    ORDER BY seq ASC
-                    """,
-                    (session_id,),
-                ).fetchall()
-
-                # Find scheduler pairs: each is (user_seq, assistant_seq?)
-                pairs: List[tuple] = []  # list of (user_seq, assistant_seq_or_None)
-                for idx, (seq, role, raw_content) in enumerate(rows):
-                    if role != "user" or not _matches_marker(raw_content):
-                        continue
-                    assistant_seq = None
-                    # Pair with the very next message if it's an assistant turn.
-                    if idx + 1 < len(rows):
-                        next_seq, next_role, _ = rows[idx + 1]
-                        if next_role == "assistant":
-                            assistant_seq = next_seq
-                    pairs.append((seq, assistant_seq))
-
-                if len(pairs) <= keep_last_n:
-                    return 0
-
-                to_delete_pairs = pairs[: len(pairs) - keep_last_n]
-                seqs_to_delete: List[int] = []
-                for user_seq, assistant_seq in to_delete_pairs:
-                    seqs_to_delete.append(user_seq)
-                    if assistant_seq is not None:
-                        seqs_to_delete.append(assistant_seq)
-
-                if not seqs_to_delete:
-                    return 0
-
-                placeholders = ",".join("?" * len(seqs_to_delete))
-                with conn:
-                    conn.execute(
-                        f"DELETE FROM messages WHERE session_id = ? AND seq IN ({placeholders})",
-                        (session_id, *seqs_to_delete),
-                    )
-                    conn.execute(
-                        """
-                        UPDATE sessions
-                        SET msg_count = (
-                            SELECT COUNT(*) FROM messages WHERE session_id = ?
-                        )
-                        WHERE session_id = ?
-                        """,
-                        (session_id, session_id),
-                    )
-                return len(seqs_to_delete)
-            finally:
-                conn.close()
+        def _prune(conn: sqlite3.Connection) -> int:
+            rows = conn.execute(
+                """
+                SELECT seq, role, content
+                FROM messages
+                WHERE session_id = ?
+                ORDER BY seq ASC
+                """,
+                (session_id,),
+            ).fetchall()
+
+            # Find scheduler pairs: each is (user_seq, assistant_seq?)
+            pairs: List[tuple] = []  # list of (user_seq, assistant_seq_or_None)
+            for idx, (seq, role, raw_content) in enumerate(rows):
+                if role != "user" or not _matches_marker(raw_content):
+                    continue
+                assistant_seq = None
+                # Pair with the very next message if it's an assistant turn.
+                if idx + 1 < len(rows):
+                    next_seq, next_role, _ = rows[idx + 1]
+                    if next_role == "assistant":
+                        assistant_seq = next_seq
+                pairs.append((seq, assistant_seq))
+
+            if len(pairs) <= keep_last_n:
+                return 0
+
+            to_delete_pairs = pairs[: len(pairs) - keep_last_n]
+            seqs_to_delete: List[int] = []
+            for user_seq, assistant_seq in to_delete_pairs:
+                seqs_to_delete.append(user_seq)
+                if assistant_seq is not None:
+                    seqs_to_delete.append(assistant_seq)
+
+            if not seqs_to_delete:
+                return 0
+
+            placeholders = ",".join("?" * len(seqs_to_delete))
+            deleted_count = conn.execute(
+                f"DELETE FROM messages WHERE session_id = ? AND seq IN ({placeholders})",
+                (session_id, *seqs_to_delete),
+            ).rowcount
+            # Rows left behind by a removed turn now belong to the previous one
+            deleted = set(seqs_to_delete)
+            self._write_turn_flags(
+                conn, session_id, [r for r in rows if r[0] not in deleted]
+            )
+            # next_seq is left alone: seqs are never reused
+            conn.execute(
+                "UPDATE sessions SET msg_count = msg_count - ? WHERE session_id = ?",
+                (deleted_count, session_id),
+            )
+            return len(seqs_to_delete)
+
+        return self._write(_prune)
 
     def cleanup_old_sessions(self, max_age_days: Optional[int] = None) -> int:
         """
@@ -620,28 +838,23 @@ class ConversationStore:
             max_age = max_age_days or DEFAULT_MAX_AGE_DAYS
 
         cutoff = int(time.time()) - max_age * 86400
-        deleted = 0
-
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn:
-                    stale = conn.execute(
-                        "SELECT session_id FROM sessions "
-                        "WHERE last_active < ? AND channel_type != 'web'",
-                        (cutoff,),
-                    ).fetchall()
-                    for (sid,) in stale:
-                        conn.execute(
-                            "DELETE FROM messages WHERE session_id = ?", (sid,)
-                        )
-                        conn.execute(
-                            "DELETE FROM sessions WHERE session_id = ?", (sid,)
-                        )
-                        deleted += 1
-            finally:
-                conn.close()
 
+        def _cleanup(conn: sqlite3.Connection) -> int:
+            stale = conn.execute(
+                "SELECT session_id FROM sessions "
+                "WHERE last_active < ? AND channel_type != 'web'",
+                (cutoff,),
+            ).fetchall()
+            for (sid,) in stale:
+                conn.execute(
+                    "DELETE FROM messages WHERE session_id = ?", (sid,)
+                )
+                conn.execute(
+                    "DELETE FROM sessions WHERE session_id = ?", (sid,)
+                )
+            return len(stale)
+
+        deleted = self._write(_cleanup)
         if deleted:
             logger.info(f"[ConversationStore] Pruned {deleted} expired sessions")
         return deleted
@@ -684,26 +897,12 @@ class ConversationStore:
             }
         """
         page = max(1, page)
-        with self._lock:
-            conn = self._connect()
-            try:
-                ctx_row = conn.execute(
-                    "SELECT context_start_seq FROM sessions WHERE session_id = ?",
-                    (session_id,),
-                ).fetchone()
-                ctx_start = ctx_row[0] if ctx_row else 0
-
-                rows = conn.execute(
-                    """
-                    SELECT seq, role, content, created_at
-                    FROM messages
-                    WHERE session_id = ?
-                    ORDER BY seq ASC
-                    """,
-                    (session_id,),
-                ).fetchall()
-            finally:
-                conn.close()
+        conn = self._reader()
+        ctx_row = conn.execute(
+            "SELECT context_start_seq FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        ctx_start = ctx_row[0] if ctx_row else 0
 
         # Honour the current enable_thinking switch when building display turns
         # so that toggling it off hides previously-saved thinking blocks too.
@@ -713,35 +912,69 @@ class ConversationStore:
         except Exception:
             include_thinking = False
 
-        # Strip seq for display grouping, but record max seq per visible user group
-        plain_rows = [(role, content, created_at) for _seq, role, content, created_at in rows]
-        visible = _group_into_display_turns(plain_rows, include_thinking=include_thinking)
-
-        # Build a mapping: find the seq of each visible user message to annotate context boundary.
-        # Walk through rows to find visible user message seqs in order.
-        visible_user_seqs: List[int] = []
-        for seq, role, raw_content, _ts in rows:
-            if role != "user":
-                continue
-            try:
-                content = json.loads(raw_content)
-            except Exception:
-                content = raw_content
-            if _is_visible_user_message(content):
-                visible_user_seqs.append(seq)
-
-        # Each pair of display turns (user+assistant) corresponds to a visible user seq.
-        # Mark which turns are before the context boundary.
-        user_turn_idx = 0
-        for turn in visible:
-            if turn["role"] == "user" and user_turn_idx < len(visible_user_seqs):
-                turn["_seq"] = visible_user_seqs[user_turn_idx]
-                user_turn_idx += 1
-
-        total = len(visible)
+        # Display items are numbered oldest first and each turn row stores
+        # how many its predecessors render, so the page [lo, hi) is located
+        # with two index lookups instead of a walk over every turn.
+        items_col = "items_before_thinking" if include_thinking else "items_before"
         offset = (page - 1) * page_size
-        page_items = list(reversed(visible))[offset: offset + page_size]
-        page_items = list(reversed(page_items))
+        last_turn = conn.execute(
+            f"""
+            SELECT turn_flags, {items_col} FROM messages
+            WHERE session_id = ? AND turn_flags > 0
+            ORDER BY seq DESC LIMIT 1
+            """,
+            (session_id,),
+        ).fetchone()
+        total = last_turn[1] + _display_items(last_turn[0], include_thinking) if last_turn else 0
+        hi = total - offset
+        lo = max(0, hi - page_size)
+
+        page_items: List[Dict[str, Any]] = []
+        if hi > 0:
+            # The turn holding item lo, and the first turn past the page
+            first_seq, first_before = conn.execute(
+                f"""
+                SELECT seq, {items_col} FROM messages
+                WHERE session_id = ? AND turn_flags > 0 AND {items_col} <= ?
+                ORDER BY {items_col} DESC, seq DESC LIMIT 1
+                """,
+                (session_id, lo),
+            ).fetchone()
+            upper_row = conn.execute(
+                f"""
+                SELECT seq FROM messages
+                WHERE session_id = ? AND turn_flags > 0 AND {items_col} >= ?
+                ORDER BY {items_col}, seq LIMIT 1
+                """,
+                (session_id, hi),
+            ).fetchone()
+            upper_seq = upper_row[0] if upper_row else 1 << 62
+            rows = conn.execute(
+                """
+                SELECT seq, role, content, created_at
+                FROM messages
+                WHERE session_id = ? AND seq >= ? AND seq < ?
+                ORDER BY seq ASC
+                """,
+                (session_id, first_seq, upper_seq),
+            ).fetchall()
+            plain_rows = [(role, content, created_at) for _seq, role, content, created_at in rows]
+            visible = _group_into_display_turns(plain_rows, include_thinking=include_thinking)
+
+            # Annotate user turns with their seq (for the context boundary marker)
+            user_seqs = iter(seq for seq, flags in conn.execute(
+                """
+                SELECT seq, turn_flags FROM messages
+                WHERE session_id = ? AND turn_flags > 0 AND seq >= ? AND seq < ?
+                ORDER BY seq
+                """,
+                (session_id, first_seq, upper_seq),
+            ) if flags & _TURN_HAS_TEXT)
+            for turn in visible:
+                if turn["role"] == "user":
+                    turn["_seq"] = next(user_seqs, None)
+
+            page_items = visible[lo - first_before:hi - first_before]
 
         return {
             "messages": page_items,
@@ -771,39 +1004,35 @@ class ConversationStore:
             }
         """
         page = max(1, page)
-        with self._lock:
-            conn = self._connect()
-            try:
-                if channel_type:
-                    total = conn.execute(
-                        "SELECT COUNT(*) FROM sessions WHERE channel_type = ?",
-                        (channel_type,),
-                    ).fetchone()[0]
-                    rows = conn.execute(
-                        """
-                        SELECT session_id, title, created_at, last_active, msg_count
-                        FROM sessions
-                        WHERE channel_type = ?
-                        ORDER BY last_active DESC
-                        LIMIT ? OFFSET ?
-                        """,
-                        (channel_type, page_size, (page - 1) * page_size),
-                    ).fetchall()
-                else:
-                    total = conn.execute(
-                        "SELECT COUNT(*) FROM sessions",
-                    ).fetchone()[0]
-                    rows = conn.execute(
-                        """
-                        SELECT session_id, title, created_at, last_active, msg_count
-                        FROM sessions
-                        ORDER BY last_active DESC
-                        LIMIT ? OFFSET ?
-                        """,
-                        (page_size, (page - 1) * page_size),
-                    ).fetchall()
-            finally:
-                conn.close()
+        conn = self._reader()
+        if channel_type:
+            total = conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE channel_type = ?",
+                (channel_type,),
+            ).fetchone()[0]
+            rows = conn.execute(
+                """
+                SELECT session_id, title, created_at, last_active, msg_count
+                FROM sessions
+                WHERE channel_type = ?
+                ORDER BY last_active DESC
+                LIMIT ? OFFSET ?
+                """,
+                (channel_type, page_size, (page - 1) * page_size),
+            ).fetchall()
+        else:
+            total = conn.execute(
+                "SELECT COUNT(*) FROM sessions",
+            ).fetchone()[0]
+            rows = conn.execute(
+                """
+                SELECT session_id, title, created_at, last_active, msg_count
+                FROM sessions
+                ORDER BY last_active DESC
+                LIMIT ? OFFSET ?
+                """,
+                (page_size, (page - 1) * page_size),
+            ).fetchall()
 
         sessions = [
             {
@@ -825,44 +1054,51 @@ class ConversationStore:
 
     def rename_session(self, session_id: str, title: str) -> bool:
         """Update the title of a session. Returns True if the session existed."""
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn:
-                    cur = conn.execute(
-                        "UPDATE sessions SET title = ? WHERE session_id = ?",
-                        (title, session_id),
-                    )
-                    return cur.rowcount > 0
-            finally:
-                conn.close()
+        def _rename(conn: sqlite3.Connection) -> bool:
+            cur = conn.execute(
+                "UPDATE sessions SET title = ? WHERE session_id = ?",
+                (title, session_id),
+            )
+            return cur.rowcount > 0
+
+        return self._write(_rename)
 
     def get_stats(self) -> Dict[str, Any]:
         """Return basic stats keyed by channel_type, for monitoring."""
-        with self._lock:
-            conn = self._connect()
-            try:
-                total_sessions = conn.execute(
-                    "SELECT COUNT(*) FROM sessions"
-                ).fetchone()[0]
-                total_messages = conn.execute(
-                    "SELECT COUNT(*) FROM messages"
-                ).fetchone()[0]
-                by_channel = conn.execute(
-                    """
-                    SELECT channel_type, COUNT(*) as cnt
-                    FROM sessions
-                    GROUP BY channel_type
-                    ORDER BY cnt DESC
-                    """
-                ).fetchall()
-                return {
-                    "total_sessions": total_sessions,
-                    "total_messages": total_messages,
-                    "by_channel": {row[0] or "unknown": row[1] for row in by_channel},
-                }
-            finally:
-                conn.close()
+        conn = self._reader()
+        total_sessions = conn.execute(
+            "SELECT COUNT(*) FROM sessions"
+        ).fetchone()[0]
+        total_messages = conn.execute(
+            "SELECT COUNT(*) FROM messages"
+        ).fetchone()[0]
+        by_channel = conn.execute(
+            """
+            SELECT channel_type, COUNT(*) as cnt
+            FROM sessions
+            GROUP BY channel_type
+            ORDER BY cnt DESC
+            """
+        ).fetchall()
+        return {
+            "total_sessions": total_sessions,
+            "total_messages": total_messages,
+            "by_channel": {row[0] or "unknown": row[1] for row in by_channel},
+            "group_commits": self._commits,
+            "writes_committed": self._ops_committed,
+        }
+
+    def close(self) -> None:
+        """Flush queued writes, stop the writer thread and close connections."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=30)
+        with self._readers_lock:
+            readers = list(self._readers)
+        for slot in readers:
+            slot.close()
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -905,13 +1141,194 @@ class ConversationStore:
                 logger.info("[ConversationStore] Migrated: added context_start_seq column")
             except Exception as e:
                 logger.warning(f"[ConversationStore] Migration (context_start_seq) failed: {e}")
+        if "next_seq" not in cols:
+            try:
+                conn.execute("BEGIN")
+                conn.execute(_MIGRATION_ADD_NEXT_SEQ)
+                conn.execute(_BACKFILL_SESSION_COUNTERS)
+                conn.commit()
+                logger.info("[ConversationStore] Migrated: added next_seq column")
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"[ConversationStore] Migration (next_seq) failed: {e}")
+
+        msg_cols = {
+            row[1]
+            for row in conn.execute("PRAGMA table_info(messages)").fetchall()
+        }
+        if "turn_flags" not in msg_cols or "items_before" not in msg_cols:
+            # History paging relies on these columns, so a failure here is
+            # raised rather than leaving a store whose page queries break
+            try:
+                # Columns + backfill in one transaction: a crash leaves no half-built index
+                conn.execute("BEGIN")
+                if "turn_flags" not in msg_cols:
+                    conn.execute(_MIGRATION_ADD_TURN_FLAGS)
+                    self._backfill_turn_flags(conn)
+                for stmt in _MIGRATION_ADD_TURN_ITEMS.strip().splitlines():
+                    conn.execute(stmt)
+                turns = self._backfill_turn_items(conn)
+                conn.commit()
+                logger.info(f"[ConversationStore] Migrated: indexed {turns} turns (turn index columns)")
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"[ConversationStore] Migration (turn index) failed: {e}")
+                raise
+        conn.executescript(_TURN_INDEX_DDL)
+
+    @staticmethod
+    def _write_turn_flags(conn: sqlite3.Connection, session_id: str, rows) -> None:
+        """Recompute turn_flags and item counts for a session from its (seq, role, content) rows."""
+        flags = _compute_turn_flags(rows)
+        conn.execute(
+            "UPDATE messages SET turn_flags = 0, items_before = 0, items_before_thinking = 0 "
+            "WHERE session_id = ? AND turn_flags > 0",
+            (session_id,),
+        )
+        conn.executemany(
+            "UPDATE messages SET turn_flags = ?, items_before = ?, items_before_thinking = ? "
+            "WHERE session_id = ? AND seq = ?",
+            [(f, b, bt, session_id, seq) for seq, f, b, bt in _cumulative_items(sorted(flags.items()))],
+        )
+
+    def _backfill_turn_flags(self, conn: sqlite3.Connection) -> int:
+        """Build the turn index for rows written before turn_flags existed."""
+        updates = []
+        session_rows: List[tuple] = []
+        current = None
+
+        def _flush():
+            for seq, f in _compute_turn_flags(session_rows).items():
+                updates.append((f, current, seq))
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(str(self._db_path), timeout=10)
+        cursor = conn.execute(
+            "SELECT session_id, seq, role, content FROM messages ORDER BY session_id, seq"
+        )
+        for session_id, seq, role, content in cursor:
+            if session_id != current:
+                _flush()
+                session_rows = []
+                current = session_id
+            session_rows.append((seq, role, content))
+        _flush()
+        conn.executemany(
+            "UPDATE messages SET turn_flags = ? WHERE session_id = ? AND seq = ?",
+            updates,
+        )
+        return len(updates)
+
+    @staticmethod
+    def _backfill_turn_items(conn: sqlite3.Connection) -> int:
+        """Fill items_before / items_before_thinking from the stored turn_flags."""
+        updates = []
+        session_turns: List[tuple] = []
+        current = None
+
+        def _flush():
+            for seq, _flags, b, bt in _cumulative_items(session_turns):
+                updates.append((b, bt, current, seq))
+
+        cursor = conn.execute(
+            "SELECT session_id, seq, turn_flags FROM messages WHERE turn_flags > 0 ORDER BY session_id, seq"
+        )
+        for session_id, seq, flags in cursor:
+            if session_id != current:
+                _flush()
+                session_turns = []
+                current = session_id
+            session_turns.append((seq, flags))
+        _flush()
+        conn.executemany(
+            "UPDATE messages SET items_before = ?, items_before_thinking = ? WHERE session_id = ? AND seq = ?",
+            updates,
+        )
+        return len(updates)
+
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self._db_path), timeout=10, **kwargs)
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("PRAGMA synchronous=NORMAL")
         return conn
 
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read connection, opened on first use and kept open."""
+        slot = getattr(self._local, "slot", None)
+        if slot is None or slot.conn is None:
+            # check_same_thread=False only so close() may close it from another thread
+            slot = _ReaderSlot(self._connect(check_same_thread=False))
+            self._local.slot = slot
+            with self._readers_lock:
+                self._readers.add(slot)
+        return slot.conn
+
+    def _submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        if self._closed:
+            raise RuntimeError("ConversationStore is closed")
+        op = _WriteOp(fn)
+        self._queue.put(op)
+        return op.future
+
+    def _write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) on the writer thread and wait for its commit."""
+        return self._submit(fn).result()
+
+    def _writer_loop(self) -> None:
+        # Autocommit mode: transactions are managed explicitly per group
+        conn = self._connect(isolation_level=None)
+        try:
+            stopping = False
+            while not stopping:
+                op = self._queue.get()
+                if op is None:
+                    break
+                batch = [op]
+                while len(batch) < self._MAX_BATCH:
+                    try:
+                        nxt = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if nxt is None:
+                        stopping = True
+                        break
+                    batch.append(nxt)
+                self._commit_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[_WriteOp]) -> None:
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    result = op.fn(conn)
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    outcomes.append((op, None, e))
+                else:
+                    conn.execute("RELEASE op")
+                    outcomes.append((op, result, None))
+            conn.execute("COMMIT")
+        except BaseException as e:
+            logger.warning(f"[ConversationStore] Group commit of {len(batch)} write(s) failed: {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            for op in batch:
+                op.future.set_exception(e)
+            return
+
+        self._commits += 1
+        self._ops_committed += len(batch)
+        for op, result, error in outcomes:
+            if error is not None:
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(result)
+
 
 # ---------------------------------------------------------------------------
 # Singleton
@@ -946,5 +1363,7 @@ def get_conversation_store() -> ConversationStore:
             db_path = Path(expand_path("~/cow")) / "memory" / "long-term" / "index.db"
 
         _store_instance = ConversationStore(db_path)
+        # Drain queued async appends on interpreter shutdown
+        atexit.register(_store_instance.close)
         logger.debug(f"[ConversationStore] Using shared DB at: {db_path}")
         return _store_instance
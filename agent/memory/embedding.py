@@ -5,8 +5,11 @@ Supports OpenAI and local embedding models
 """
 
 import hashlib
+import sqlite3
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class EmbeddingProvider(ABC):
@@ -33,7 +36,8 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
     """OpenAI embedding provider using REST API"""
     
     def __init__(self, model: str = "text-embedding-3-small", api_key: Optional[str] = None,
-                 api_base: Optional[str] = None, extra_headers: Optional[dict] = None):
+                 api_base: Optional[str] = None, extra_headers: Optional[dict] = None,
+                 provider_name: str = "openai"):
         """
         Initialize OpenAI embedding provider
 
@@ -42,8 +46,10 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
             api_key: OpenAI API key
             api_base: Optional API base URL
             extra_headers: Optional extra headers to include in API requests
+            provider_name: Provider label, used to key the embedding cache
         """
         self.model = model
+        self.provider_name = provider_name
         self.api_key = api_key
         self.api_base = api_base or "https://api.openai.com/v1"
         self.extra_headers = extra_headers or {}
@@ -56,8 +62,9 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
         self._dimensions = 1536 if "small" in model else 3072
 
     def _call_api(self, input_data):
-        """Call OpenAI embedding API using requests"""
+        """Call OpenAI embedding API over the shared HTTP transport"""
         import requests
+        from common import http_client
 
         url = f"{self.api_base}/embeddings"
         headers = {
@@ -71,7 +78,7 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
         }
 
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=5)
+            response = http_client.post(url, headers=headers, json=data, timeout=5)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.ConnectionError as e:
@@ -108,30 +115,178 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
 
 
 class EmbeddingCache:
-    """Cache for embeddings to avoid recomputation"""
+    """
+    Persistent embedding cache keyed by (provider, model, content hash)
+
+    Lives in its own table of the memory index database so vectors survive
+    restarts. When the table grows beyond ``max_entries`` the least
+    recently used rows are evicted. Hit/miss counters show how many texts
+    (and whole API calls) were served without calling the provider.
+    """
+
+    def __init__(self, db_path, max_entries: int = 50000):
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+        self.api_calls_saved = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (provider, model, hash)
+            )
+        """)
+        self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_embedding_cache_lru
+            ON embedding_cache(last_used)
+        """)
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        self._last_tick = 0
+
+    def _tick(self) -> int:
+        """Strictly increasing microsecond timestamp for LRU ordering"""
+        self._last_tick = max(int(time.time() * 1_000_000), self._last_tick + 1)
+        return self._last_tick
+
+    def get_many(self, hashes: List[str], provider: str, model: str) -> Dict[str, List[float]]:
+        """Return {hash: embedding} for the hashes present in the cache"""
+        from agent.memory.embedding_codec import decode_embedding
 
-    def __init__(self):
-        self.cache = {}
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(f"""
+                    SELECT hash, embedding FROM embedding_cache
+                    WHERE provider = ? AND model = ? AND hash IN ({placeholders})
+                """, [provider, model, *batch]).fetchall()
+                for h, blob in rows:
+                    found[h] = decode_embedding(blob)
+            if found:
+                now = self._tick()
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET last_used = ? WHERE provider = ? AND model = ? AND hash = ?",
+                    [(now, provider, model, h) for h in found]
+                )
+                self._conn.commit()
+            self.hits += sum(1 for h in hashes if h in found)
+            self.misses += sum(1 for h in hashes if h not in found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]], provider: str, model: str):
+        """Store {hash: embedding} and evict the oldest rows beyond max_entries"""
+        from agent.memory.embedding_codec import encode_embedding
+
+        if not items:
+            return
+        with self._lock:
+            now = self._tick()
+            before = self._conn.total_changes
+            self._conn.executemany("""
+                INSERT OR IGNORE INTO embedding_cache (provider, model, hash, embedding, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (provider, model, h, encode_embedding(emb), now)
+                for h, emb in items.items() if emb
+            ])
+            self._count += self._conn.total_changes - before
+            if self.max_entries and self._count > self.max_entries:
+                excess = self._count - self.max_entries
+                self._conn.execute("""
+                    DELETE FROM embedding_cache WHERE rowid IN (
+                        SELECT rowid FROM embedding_cache ORDER BY last_used ASC LIMIT ?
+                    )
+                """, (excess,))
+                self._count -= excess
+            self._conn.commit()
+
+    def embed_batch(self, provider: "EmbeddingProvider", texts: List[str],
+                    hashes: Optional[List[str]] = None) -> List[List[float]]:
+        """Embed texts through the cache, calling the provider only for misses"""
+        if not texts:
+            return []
+        if hashes is None:
+            hashes = [self._compute_key(t) for t in texts]
+        provider_name, model = self._provider_key(provider)
+        cached = self.get_many(hashes, provider_name, model)
+        missing = [i for i, h in enumerate(hashes) if h not in cached]
+        if missing:
+            vectors = provider.embed_batch([texts[i] for i in missing])
+            fresh = {hashes[i]: vec for i, vec in zip(missing, vectors)}
+            self.put_many(fresh, provider_name, model)
+            cached.update(fresh)
+            self.api_calls += 1
+        else:
+            self.api_calls_saved += 1
+        return [cached.get(h) for h in hashes]
 
     def get(self, text: str, provider: str, model: str) -> Optional[List[float]]:
         """Get cached embedding"""
-        key = self._compute_key(text, provider, model)
-        return self.cache.get(key)
+        key = self._compute_key(text)
+        return self.get_many([key], provider, model).get(key)
     
     def put(self, text: str, provider: str, model: str, embedding: List[float]):
         """Cache embedding"""
-        key = self._compute_key(text, provider, model)
-        self.cache[key] = embedding
+        self.put_many({self._compute_key(text): embedding}, provider, model)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache counters since process start"""
+        return {
+            'entries': self._count,
+            'hits': self.hits,
+            'misses': self.misses,
+            'api_calls': self.api_calls,
+            'api_calls_saved': self.api_calls_saved,
+        }
     
     @staticmethod
-    def _compute_key(text: str, provider: str, model: str) -> str:
-        """Compute cache key"""
-        content = f"{provider}:{model}:{text}"
-        return hashlib.md5(content.encode('utf-8')).hexdigest()
+    def _provider_key(provider: "EmbeddingProvider"):
+        name = getattr(provider, "provider_name", None) or type(provider).__name__
+        return name, getattr(provider, "model", "") or ""
+
+    @staticmethod
+    def _compute_key(text: str) -> str:
+        """Content hash, same as MemoryStorage.compute_hash for chunks"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
     
     def clear(self):
         """Clear cache"""
-        self.cache.clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM embedding_cache")
+            self._conn.commit()
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(db_path, max_entries: int = 50000) -> EmbeddingCache:
+    """Return the process-wide embedding cache for a memory database file"""
+    from pathlib import Path
+
+    key = str(Path(db_path).resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = EmbeddingCache(db_path, max_entries=max_entries)
+        return cache
 
 
 def create_embedding_provider(
@@ -164,4 +319,5 @@ def create_embedding_provider(
         raise ValueError(f"Unsupported embedding provider: {provider}. Use 'openai' or 'linkai'.")
 
     model = model or "text-embedding-3-small"
-    return OpenAIEmbeddingProvider(model=model, api_key=api_key, api_base=api_base, extra_headers=extra_headers)
+    return OpenAIEmbeddingProvider(model=model, api_key=api_key, api_base=api_base,
+                                   extra_headers=extra_headers, provider_name=provider)
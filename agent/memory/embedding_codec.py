@@ -0,0 +1,84 @@
+"""
+Binary encoding of embedding vectors for the chunks table
+
+Layout (little-endian):
+    float32: b"\x01" + float32[dim]
+    int8:    b"\x02" + float32 scale + int8[dim]   (value = q * scale)
+
+The leading tag byte versions each row, so rows written in different
+formats (and legacy JSON text rows) can coexist during a migration.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from typing import Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+FORMAT_FLOAT32 = "float32"
+FORMAT_INT8 = "int8"
+
+TAG_FLOAT32 = 1
+TAG_INT8 = 2
+
+# Bumped when the on-disk layout changes; stored in the memory_meta table
+EMBEDDING_FORMAT_VERSION = 1
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def encode_embedding(vec: Optional[Sequence[float]], fmt: str = FORMAT_FLOAT32) -> Optional[bytes]:
+    """Pack an embedding into a tagged BLOB"""
+    if vec is None or len(vec) == 0:
+        return None
+    if fmt == FORMAT_INT8:
+        peak = max(abs(float(v)) for v in vec)
+        scale = peak / 127.0 if peak else 1.0
+        quantized = array("b", (max(-127, min(127, round(float(v) / scale))) for v in vec))
+        return bytes((TAG_INT8,)) + struct.pack("<f", scale) + quantized.tobytes()
+    values = array("f", (float(v) for v in vec))
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return bytes((TAG_FLOAT32,)) + values.tobytes()
+
+
+def decode_embedding(value: Union[bytes, str, None], as_array: bool = False):
+    """
+    Unpack an embedding column value.
+
+    Accepts tagged BLOBs and legacy JSON text. With ``as_array`` and NumPy
+    available, float32 rows are returned as a read-only view over the BLOB
+    (no copy); otherwise a list of floats is returned.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return json.loads(value)
+    buf = memoryview(value)
+    if len(buf) == 0:
+        return None
+    tag = buf[0]
+    if tag == TAG_FLOAT32:
+        if np is not None and as_array:
+            return np.frombuffer(buf, dtype="<f4", offset=1)
+        values = array("f")
+        values.frombytes(buf[1:])
+        if _BIG_ENDIAN:
+            values.byteswap()
+        return values.tolist()
+    if tag == TAG_INT8:
+        scale = struct.unpack_from("<f", buf, 1)[0]
+        if np is not None and as_array:
+            return np.frombuffer(buf, dtype=np.int8, offset=5).astype(np.float32) * np.float32(scale)
+        quantized = array("b")
+        quantized.frombytes(buf[5:])
+        return [q * scale for q in quantized]
+    raise ValueError(f"unknown embedding format tag: {tag}")
+
@@ -5,15 +5,17 @@ Provides high-level interface for memory operations
 """
 
 import os
+import threading
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from agent.memory.config import MemoryConfig, get_default_memory_config
-from agent.memory.storage import MemoryStorage, MemoryChunk, SearchResult
+from agent.memory.storage import MemoryStorage, MemoryChunk, SearchResult, FileIndexUpdate
 from agent.memory.chunker import TextChunker
-from agent.memory.embedding import create_embedding_provider, EmbeddingProvider
+from agent.memory.embedding import create_embedding_provider, get_embedding_cache, EmbeddingProvider
 from agent.memory.summarizer import MemoryFlushManager, create_memory_files_if_needed
 
 
@@ -24,6 +26,11 @@ class MemoryManager:
     Provides long-term memory for agents with vector and keyword search
     """
     
+    # Files prepared and committed per sync transaction
+    _SYNC_BATCH_FILES = 200
+    # Chunks per embedding request during sync
+    _SYNC_EMBED_BATCH = 64
+    
     def __init__(
         self,
         config: Optional[MemoryConfig] = None,
@@ -42,7 +49,12 @@ class MemoryManager:
         
         # Initialize storage
         db_path = self.config.get_db_path()
-        self.storage = MemoryStorage(db_path)
+        self.storage = MemoryStorage(
+            db_path,
+            vector_index_mode=self.config.vector_index_mode,
+            vector_ivf_min_size=self.config.vector_ivf_min_size,
+            embedding_format=self.config.embedding_storage_format,
+        )
         
         # Initialize chunker
         self.chunker = TextChunker(
@@ -94,6 +106,13 @@ class MemoryManager:
                 from common.log import logger
                 logger.info(f"[MemoryManager] Memory will work with keyword search only (no vector search)")
         
+        # Persistent cache so unchanged chunks are never re-embedded
+        self.embedding_cache = None
+        if self.embedding_provider and self.config.embedding_cache_max_entries > 0:
+            self.embedding_cache = get_embedding_cache(
+                db_path, max_entries=self.config.embedding_cache_max_entries
+            )
+        
         # Initialize memory flush manager
         workspace_dir = self.config.get_workspace()
         self.flush_manager = MemoryFlushManager(
@@ -105,6 +124,9 @@ class MemoryManager:
         self._init_workspace()
         
         self._dirty = False
+        # memory_search runs in parallel within a step: one sync at a time
+        # on the shared storage connection
+        self._sync_lock = threading.Lock()
     
     def _init_workspace(self):
         """Initialize workspace directories"""
@@ -151,7 +173,10 @@ class MemoryManager:
         
         # Sync if needed
         if self.config.sync_on_search and self._dirty:
-            await self.sync()
+            with self._sync_lock:
+                # another search may have synced while this one waited
+                if self._dirty:
+                    self._sync(False)
         
         # Perform vector search (if embedding provider available)
         vector_results = []
@@ -228,17 +253,13 @@ class MemoryManager:
         
         # Generate embeddings (if provider available)
         texts = [chunk.text for chunk in chunks]
-        if self.embedding_provider:
-            embeddings = self.embedding_provider.embed_batch(texts)
-        else:
-            # No embeddings, just use None
-            embeddings = [None] * len(texts)
+        hashes = [MemoryStorage.compute_hash(text) for text in texts]
+        embeddings = self._embed_texts(texts, hashes)
         
         # Create memory chunks
         memory_chunks = []
-        for chunk, embedding in zip(chunks, embeddings):
+        for chunk, embedding, chunk_hash in zip(chunks, embeddings, hashes):
             chunk_id = self._generate_chunk_id(path, chunk.start_line, chunk.end_line)
-            chunk_hash = MemoryStorage.compute_hash(chunk.text)
             
             memory_chunks.append(MemoryChunk(
                 id=chunk_id,
@@ -271,28 +292,71 @@ class MemoryManager:
         """
         Synchronize memory from files
         
+        Files whose size and mtime match the files table are skipped without
+        being read. Changed files are re-chunked and diffed against the stored
+        chunk hashes, so only added or modified chunks are embedded and written.
+        
         Args:
-            force: Force full reindex
+            force: Re-read every file, ignoring stored size/mtime
         """
+        with self._sync_lock:
+            self._sync(force)
+
+    def _sync(self, force: bool):
+        """sync() body; the caller holds _sync_lock"""
+        known = self.storage.get_all_file_meta()
+        changed = []
+        for target in self._collect_sync_targets():
+            try:
+                stat = target[0].stat()
+            except OSError:
+                continue
+            meta = known.get(target[1])
+            if (not force and meta and meta['size'] == stat.st_size
+                    and meta['mtime'] == stat.st_mtime_ns):
+                continue
+            changed.append((target, stat, meta['hash'] if meta else None))
+        
+        if changed:
+            workers = max(1, self.config.sync_workers)
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="memory-sync") \
+                if workers > 1 and len(changed) > 1 else None
+            try:
+                for i in range(0, len(changed), self._SYNC_BATCH_FILES):
+                    batch = changed[i:i + self._SYNC_BATCH_FILES]
+                    if pool:
+                        plans = list(pool.map(lambda item: self._prepare_sync_file(*item), batch))
+                    else:
+                        plans = [self._prepare_sync_file(*item) for item in batch]
+                    self._apply_sync_plans([p for p in plans if p], pool)
+            finally:
+                if pool:
+                    pool.shutdown(wait=True)
+        
+        self._dirty = False
+    
+    def _collect_sync_targets(self) -> List[tuple]:
+        """List (file_path, rel_path, source, scope, user_id) for every indexable file"""
         memory_dir = self.config.get_memory_dir()
         workspace_dir = self.config.get_workspace()
+        targets = []
         
         # Scan MEMORY.md (workspace root)
         memory_file = Path(workspace_dir) / "MEMORY.md"
         if memory_file.exists():
-            await self._sync_file(memory_file, "memory", "shared", None)
+            targets.append((memory_file, "MEMORY.md", "memory", "shared", None))
         
         # Scan memory directory (including daily summaries)
         if memory_dir.exists():
             for file_path in memory_dir.rglob("*.md"):
-                # Skip hidden directories (e.g. .dreams/)
-                if any(part.startswith('.') for part in file_path.relative_to(workspace_dir).parts):
-                    continue
-
-                # Determine scope and user_id from path
                 rel_path = file_path.relative_to(workspace_dir)
                 parts = rel_path.parts
                 
+                # Skip hidden directories (e.g. .dreams/)
+                if any(part.startswith('.') for part in parts):
+                    continue
+                
+                # Determine scope and user_id from path
                 # Check if it's in daily summary directory
                 if "daily" in parts:
                     # Daily summary files
@@ -315,65 +379,82 @@ class MemoryManager:
                     user_id = None
                     scope = "shared"
                 
-                await self._sync_file(file_path, "memory", scope, user_id)
-
+                targets.append((file_path, str(rel_path), "memory", scope, user_id))
+        
         # Scan knowledge directory (structured knowledge wiki)
         from config import conf
         if conf().get("knowledge", True):
             knowledge_dir = Path(workspace_dir) / "knowledge"
             if knowledge_dir.exists():
                 for file_path in knowledge_dir.rglob("*.md"):
-                    await self._sync_file(file_path, "knowledge", "shared", None)
+                    rel_path = str(file_path.relative_to(workspace_dir))
+                    targets.append((file_path, rel_path, "knowledge", "shared", None))
         
-        self._dirty = False
+        return targets
     
-    async def _sync_file(
-        self,
-        file_path: Path,
-        source: str,
-        scope: str,
-        user_id: Optional[str]
-    ):
-        """Sync a single file"""
-        # Compute file hash
-        content = file_path.read_text(encoding='utf-8')
-        file_hash = MemoryStorage.compute_hash(content)
-        
-        # Get relative path
-        workspace_dir = self.config.get_workspace()
-        rel_path = str(file_path.relative_to(workspace_dir))
-        
-        # Check if file changed
-        stored_hash = self.storage.get_file_hash(rel_path)
-        if stored_hash == file_hash:
-            return  # No changes
-        
-        # Delete old chunks
-        self.storage.delete_by_path(rel_path)
-        
-        # Chunk and embed
-        chunks = self.chunker.chunk_text(content)
-        if not chunks:
-            return
-        
-        texts = [chunk.text for chunk in chunks]
-        if self.embedding_provider:
-            embeddings = self.embedding_provider.embed_batch(texts)
-        else:
-            embeddings = [None] * len(texts)
+    def _prepare_sync_file(self, target: tuple, stat: os.stat_result, stored_hash: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Read, hash and chunk a changed file (runs on the sync pool, no DB access)"""
+        file_path, rel_path, source, scope, user_id = target
+        try:
+            content = file_path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError) as e:
+            from common.log import logger
+            logger.warning(f"[MemoryManager] Failed to read {file_path}: {e}")
+            return None
+        
+        plan = {
+            'target': target,
+            'hash': MemoryStorage.compute_hash(content),
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'chunks': None,
+        }
+        if plan['hash'] == stored_hash:
+            return plan  # Touched but unchanged: only size/mtime are refreshed
         
-        # Create memory chunks
-        memory_chunks = []
-        for chunk, embedding in zip(chunks, embeddings):
+        # Later chunks win on id collisions, matching INSERT OR REPLACE
+        chunks = {}
+        for chunk in self.chunker.chunk_text(content):
             chunk_id = self._generate_chunk_id(rel_path, chunk.start_line, chunk.end_line)
-            chunk_hash = MemoryStorage.compute_hash(chunk.text)
+            chunks[chunk_id] = (chunk, MemoryStorage.compute_hash(chunk.text))
+        plan['chunks'] = chunks
+        return plan
+    
+    def _apply_sync_plans(self, plans: List[Dict[str, Any]], pool: Optional[ThreadPoolExecutor] = None):
+        """Diff prepared files against stored chunks, embed what changed and write it"""
+        updates = []
+        pending = []  # (chunk_id, TextChunk, hash, update, scope, user_id)
+        for plan in plans:
+            file_path, rel_path, source, scope, user_id = plan['target']
+            update = FileIndexUpdate(
+                path=rel_path, source=source, hash=plan['hash'],
+                mtime=plan['mtime'], size=plan['size'], delete_ids=[], chunks=[]
+            )
+            updates.append(update)
+            if plan['chunks'] is None:
+                continue
             
-            memory_chunks.append(MemoryChunk(
+            stored = self.storage.get_chunk_hashes(rel_path)
+            for chunk_id, (chunk, chunk_hash) in plan['chunks'].items():
+                if stored.get(chunk_id) == chunk_hash:
+                    del stored[chunk_id]  # Unchanged: keep row and vector
+                else:
+                    pending.append((chunk_id, chunk, chunk_hash, update, scope, user_id))
+            # Removed and modified chunks are deleted explicitly: REPLACE does
+            # not fire the FTS delete trigger for the row it overwrites
+            update.delete_ids = list(stored)
+        
+        texts = [item[1].text for item in pending]
+        hashes = [item[2] for item in pending]
+        embeddings = self._embed_sync_texts(texts, hashes, pool)
+        
+        for (chunk_id, chunk, chunk_hash, update, scope, user_id), embedding in zip(pending, embeddings):
+            update.chunks.append(MemoryChunk(
                 id=chunk_id,
                 user_id=user_id,
                 scope=scope,
-                source=source,
-                path=rel_path,
+                source=update.source,
+                path=update.path,
                 start_line=chunk.start_line,
                 end_line=chunk.end_line,
                 text=chunk.text,
@@ -382,18 +463,38 @@ class MemoryManager:
                 metadata=None
             ))
         
-        # Save
-        self.storage.save_chunks_batch(memory_chunks)
-        
-        # Update file metadata
-        stat = file_path.stat()
-        self.storage.update_file_metadata(
-            path=rel_path,
-            source=source,
-            file_hash=file_hash,
-            mtime=int(stat.st_mtime),
-            size=stat.st_size
+        self.storage.apply_file_updates(updates)
+    
+    def _embed_sync_texts(self, texts: List[str], hashes: List[str],
+                          pool: Optional[ThreadPoolExecutor] = None) -> List[Optional[List[float]]]:
+        """Embed sync chunks in provider-sized batches, in parallel when a pool is given"""
+        if not texts:
+            return []
+        size = self._SYNC_EMBED_BATCH
+        batches = [(texts[i:i + size], hashes[i:i + size]) for i in range(0, len(texts), size)]
+        if pool and len(batches) > 1:
+            results = pool.map(lambda batch: self._embed_texts(*batch), batches)
+        else:
+            results = (self._embed_texts(*batch) for batch in batches)
+        return [embedding for result in results for embedding in result]
+    
+    async def _sync_file(
+        self,
+        file_path: Path,
+        source: str,
+        scope: str,
+        user_id: Optional[str]
+    ):
+        """Sync a single file"""
+        workspace_dir = self.config.get_workspace()
+        rel_path = str(file_path.relative_to(workspace_dir))
+        plan = self._prepare_sync_file(
+            (file_path, rel_path, source, scope, user_id),
+            file_path.stat(),
+            self.storage.get_file_hash(rel_path)
         )
+        if plan:
+            self._apply_sync_plans([plan])
     
     def flush_memory(
         self,
@@ -439,7 +540,8 @@ class MemoryManager:
             'embedding_enabled': self.embedding_provider is not None,
             'embedding_provider': self.config.embedding_provider if self.embedding_provider else 'disabled',
             'embedding_model': self.config.embedding_model if self.embedding_provider else 'N/A',
-            'search_mode': 'hybrid (vector + keyword)' if self.embedding_provider else 'keyword only (FTS5)'
+            'search_mode': 'hybrid (vector + keyword)' if self.embedding_provider else 'keyword only (FTS5)',
+            'embedding_cache': self.embedding_cache.get_stats() if self.embedding_cache else None
         }
     
     def mark_dirty(self):
@@ -452,6 +554,14 @@ class MemoryManager:
     
     # Helper methods
     
+    def _embed_texts(self, texts: List[str], hashes: List[str]) -> List[Optional[List[float]]]:
+        """Embed chunk texts, reusing cached vectors for hashes seen before"""
+        if not self.embedding_provider:
+            return [None] * len(texts)
+        if self.embedding_cache:
+            return self.embedding_cache.embed_batch(self.embedding_provider, texts, hashes)
+        return self.embedding_provider.embed_batch(texts)
+    
     def _generate_chunk_id(self, path: str, start_line: int, end_line: int) -> str:
         """Generate unique chunk ID"""
         content = f"{path}:{start_line}:{end_line}"
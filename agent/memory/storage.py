@@ -8,10 +8,27 @@ from __future__ import annotations
 import sqlite3
 import json
 import hashlib
+import threading
 from typing import List, Dict, Optional, Any
 from pathlib import Path
 from dataclasses import dataclass
 
+from agent.memory.embedding_codec import (
+    EMBEDDING_FORMAT_VERSION, FORMAT_FLOAT32, decode_embedding, encode_embedding,
+)
+from agent.memory.vector_index import VectorIndex, get_vector_index
+
+_migrating_dbs = set()
+_migrating_lock = threading.Lock()
+
+# Per-process results of one-off database checks. Every session's
+# MemoryManager opens its own connection to the same workspace database;
+# FTS5 support is a property of the SQLite build and the integrity check
+# only needs to run once per file.
+_fts5_supported: Optional[bool] = None
+_verified_dbs = set()
+_db_checks_lock = threading.Lock()
+
 
 @dataclass
 class MemoryChunk:
@@ -41,25 +58,60 @@ class SearchResult:
     user_id: Optional[str] = None
 
 
+@dataclass
+class FileIndexUpdate:
+    """Chunk-level changes for one file, applied by MemoryStorage.apply_file_updates"""
+    path: str
+    source: str
+    hash: str
+    mtime: int
+    size: int
+    delete_ids: List[str]
+    chunks: List[MemoryChunk]
+
+
 class MemoryStorage:
     """SQLite-based storage with FTS5 for keyword search"""
     
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        vector_index_mode: str = "auto",
+        vector_ivf_min_size: int = 50000,
+        embedding_format: str = FORMAT_FLOAT32
+    ):
         self.db_path = db_path
         self.conn: Optional[sqlite3.Connection] = None
         self.fts5_available = False  # Track FTS5 availability
+        self.embedding_format = embedding_format  # "float32" | "int8"
+        self._recreated = False
         self._init_db()
+        self._migrate_embeddings()
+        # Shared by every storage on this db file so writes from one
+        # MemoryManager are visible to searches from another
+        self.vector_index: VectorIndex = get_vector_index(
+            str(Path(db_path).resolve()),
+            mode=vector_index_mode,
+            ivf_min_size=vector_ivf_min_size,
+        )
+        if self._recreated:
+            self.vector_index.reset()
     
     def _check_fts5_support(self) -> bool:
         """Check if SQLite has FTS5 support"""
+        global _fts5_supported
+        if _fts5_supported is not None:
+            return _fts5_supported
         try:
             self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS fts5_test USING fts5(test)")
             self.conn.execute("DROP TABLE IF EXISTS fts5_test")
-            return True
+            _fts5_supported = True
         except sqlite3.OperationalError as e:
             if "no such module: fts5" in str(e):
-                return False
-            raise
+                _fts5_supported = False
+            else:
+                raise
+        return _fts5_supported
     
     def _init_db(self):
         """Initialize database with schema"""
@@ -73,9 +125,12 @@ class MemoryStorage:
                 from common.log import logger
                 logger.debug("[MemoryStorage] FTS5 not available, using LIKE-based keyword search")
             
-            # Check database integrity
+            # Check database integrity (once per file per process)
+            db_key = str(Path(self.db_path).resolve())
+            with _db_checks_lock:
+                verified = db_key in _verified_dbs
             try:
-                result = self.conn.execute("PRAGMA integrity_check").fetchone()
+                result = ('ok',) if verified else self.conn.execute("PRAGMA integrity_check").fetchone()
                 if result[0] != 'ok':
                     print(f"⚠️  Database integrity check failed: {result[0]}")
                     print(f"   Recreating database...")
@@ -89,6 +144,7 @@ class MemoryStorage:
                     # Reconnect to create new database
                     self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
                     self.conn.row_factory = sqlite3.Row
+                    self._recreated = True
             except sqlite3.DatabaseError:
                 # Database is corrupted, recreate it
                 print(f"⚠️  Database is corrupted, recreating...")
@@ -100,6 +156,10 @@ class MemoryStorage:
                 Path(str(self.db_path) + '-shm').unlink(missing_ok=True)
                 self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
                 self.conn.row_factory = sqlite3.Row
+                self._recreated = True
+            
+            with _db_checks_lock:
+                _verified_dbs.add(db_key)
             
             # Enable WAL mode for better concurrency
             self.conn.execute("PRAGMA journal_mode=WAL")
@@ -120,7 +180,7 @@ class MemoryStorage:
                 start_line INTEGER NOT NULL,
                 end_line INTEGER NOT NULL,
                 text TEXT NOT NULL,
-                embedding TEXT,
+                embedding BLOB,
                 hash TEXT NOT NULL,
                 metadata TEXT,
                 created_at INTEGER DEFAULT (strftime('%s', 'now')),
@@ -175,11 +235,21 @@ class MemoryStorage:
                 END
             """)
             
+            # Only fire for indexed columns, so embedding-only updates (e.g. the
+            # binary format migration) don't touch FTS. External-content FTS5
+            # tables must be updated via the 'delete' command, not UPDATE.
+            row = self.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'chunks_au'"
+            ).fetchone()
+            if row and "UPDATE OF" not in row['sql']:
+                self.conn.execute("DROP TRIGGER chunks_au")
             self.conn.execute("""
-                CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
-                    UPDATE chunks_fts SET text = new.text, id = new.id,
-                                         user_id = new.user_id, path = new.path, source = new.source, scope = new.scope
-                    WHERE rowid = new.rowid;
+                CREATE TRIGGER IF NOT EXISTS chunks_au
+                AFTER UPDATE OF text, id, user_id, path, source, scope ON chunks BEGIN
+                    INSERT INTO chunks_fts(chunks_fts, rowid, text, id, user_id, path, source, scope)
+                    VALUES ('delete', old.rowid, old.text, old.id, old.user_id, old.path, old.source, old.scope);
+                    INSERT INTO chunks_fts(rowid, text, id, user_id, path, source, scope)
+                    VALUES (new.rowid, new.text, new.id, new.user_id, new.path, new.source, new.scope);
                 END
             """)
         
@@ -195,8 +265,73 @@ class MemoryStorage:
             )
         """)
         
+        # Key/value table for on-disk format versions
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        
         self.conn.commit()
     
+    def _migrate_embeddings(self):
+        """
+        Convert legacy JSON-text embeddings to binary BLOBs.
+
+        Runs in a background thread on its own connection, in small
+        committed batches, so the store stays usable meanwhile: readers
+        decode both formats until the last row is converted.
+        """
+        row = self.conn.execute(
+            "SELECT value FROM memory_meta WHERE key = 'embedding_format_version'"
+        ).fetchone()
+        if row and int(row['value']) >= EMBEDDING_FORMAT_VERSION:
+            return
+        
+        db_key = str(Path(self.db_path).resolve())
+        with _migrating_lock:
+            if db_key in _migrating_dbs:
+                return
+            _migrating_dbs.add(db_key)
+        
+        def run():
+            from common.log import logger
+            conn = None
+            try:
+                conn = sqlite3.connect(str(self.db_path))
+                conn.execute("PRAGMA busy_timeout=5000")
+                migrated = 0
+                while True:
+                    rows = conn.execute("""
+                        SELECT rowid, embedding FROM chunks
+                        WHERE typeof(embedding) = 'text' LIMIT 500
+                    """).fetchall()
+                    if not rows:
+                        break
+                    conn.executemany(
+                        "UPDATE chunks SET embedding = ? WHERE rowid = ?",
+                        [(encode_embedding(json.loads(emb), self.embedding_format), rowid) for rowid, emb in rows]
+                    )
+                    conn.commit()
+                    migrated += len(rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO memory_meta (key, value) VALUES ('embedding_format_version', ?)",
+                    (str(EMBEDDING_FORMAT_VERSION),)
+                )
+                conn.commit()
+                if migrated:
+                    logger.info(f"[MemoryStorage] Migrated {migrated} embeddings to binary format")
+            except Exception as e:
+                logger.warning(f"[MemoryStorage] Embedding migration failed, will retry next start: {e}")
+            finally:
+                if conn:
+                    conn.close()
+                with _migrating_lock:
+                    _migrating_dbs.discard(db_key)
+        
+        threading.Thread(target=run, daemon=True, name="memory-embedding-migration").start()
+    
     def save_chunk(self, chunk: MemoryChunk):
         """Save a memory chunk"""
         self.conn.execute("""
@@ -212,11 +347,12 @@ class MemoryStorage:
             chunk.start_line,
             chunk.end_line,
             chunk.text,
-            json.dumps(chunk.embedding) if chunk.embedding else None,
+            encode_embedding(chunk.embedding, self.embedding_format),
             chunk.hash,
             json.dumps(chunk.metadata) if chunk.metadata else None
         ))
         self.conn.commit()
+        self.vector_index.add([self._index_row(chunk)])
     
     def save_chunks_batch(self, chunks: List[MemoryChunk]):
         """Save multiple chunks in a batch"""
@@ -228,13 +364,14 @@ class MemoryStorage:
             (
                 c.id, c.user_id, c.scope, c.source, c.path,
                 c.start_line, c.end_line, c.text,
-                json.dumps(c.embedding) if c.embedding else None,
+                encode_embedding(c.embedding, self.embedding_format),
                 c.hash,
                 json.dumps(c.metadata) if c.metadata else None
             )
             for c in chunks
         ])
         self.conn.commit()
+        self.vector_index.add(self._index_row(c) for c in chunks)
     
     def get_chunk(self, chunk_id: str) -> Optional[MemoryChunk]:
         """Get a chunk by ID"""
@@ -255,47 +392,27 @@ class MemoryStorage:
         limit: int = 10
     ) -> List[SearchResult]:
         """
-        Vector similarity search using in-memory cosine similarity
-        (sqlite-vec can be added later for better performance)
+        Vector similarity search over the in-memory vector index
+
+        The index is loaded from the chunks table on first use and kept up
+        to date by save/delete, so a query never rescans the table.
         """
         if scopes is None:
             scopes = ["shared"]
             if user_id:
                 scopes.append("user")
         
-        # Build query
-        scope_placeholders = ','.join('?' * len(scopes))
-        params = scopes
-        
-        if user_id:
-            query = f"""
-                SELECT * FROM chunks 
-                WHERE scope IN ({scope_placeholders})
-                AND (scope = 'shared' OR user_id = ?)
-                AND embedding IS NOT NULL
-            """
-            params.append(user_id)
-        else:
-            query = f"""
-                SELECT * FROM chunks 
-                WHERE scope IN ({scope_placeholders})
-                AND embedding IS NOT NULL
-            """
-        
-        rows = self.conn.execute(query, params).fetchall()
-        
-        # Calculate cosine similarity
-        results = []
-        for row in rows:
-            embedding = json.loads(row['embedding'])
-            similarity = self._cosine_similarity(query_embedding, embedding)
-            
-            if similarity > 0:
-                results.append((similarity, row))
+        self.vector_index.ensure_loaded(self._load_index_rows)
+        hits = self.vector_index.search(query_embedding, scopes, user_id=user_id, limit=limit)
+        if not hits:
+            return []
         
-        # Sort by similarity and limit
-        results.sort(key=lambda x: x[0], reverse=True)
-        results = results[:limit]
+        placeholders = ','.join('?' * len(hits))
+        rows = self.conn.execute(f"""
+            SELECT id, path, start_line, end_line, text, source, user_id
+            FROM chunks WHERE id IN ({placeholders})
+        """, [chunk_id for _, chunk_id in hits]).fetchall()
+        rows_by_id = {row['id']: row for row in rows}
         
         return [
             SearchResult(
@@ -307,9 +424,26 @@ class MemoryStorage:
                 source=row['source'],
                 user_id=row['user_id']
             )
-            for score, row in results
+            for score, row in ((score, rows_by_id.get(chunk_id)) for score, chunk_id in hits)
+            if row is not None
         ]
     
+    def _load_index_rows(self):
+        """Yield (id, scope, user_id, path, embedding) for every embedded chunk"""
+        cursor = self.conn.execute("""
+            SELECT id, scope, user_id, path, embedding FROM chunks
+            WHERE embedding IS NOT NULL
+        """)
+        for row in cursor:
+            yield (
+                row['id'], row['scope'], row['user_id'], row['path'],
+                decode_embedding(row['embedding'], as_array=True),
+            )
+    
+    @staticmethod
+    def _index_row(chunk: MemoryChunk):
+        return chunk.id, chunk.scope, chunk.user_id, chunk.path, chunk.embedding
+    
     def search_keyword(
         self,
         query: str,
@@ -464,6 +598,76 @@ class MemoryStorage:
             DELETE FROM chunks WHERE path = ?
         """, (path,))
         self.conn.commit()
+        self.vector_index.remove_path(path)
+    
+    def delete_chunks(self, chunk_ids: List[str]):
+        """Delete chunks by id"""
+        if not chunk_ids:
+            return
+        self.conn.executemany("""
+            DELETE FROM chunks WHERE id = ?
+        """, [(chunk_id,) for chunk_id in chunk_ids])
+        self.conn.commit()
+        self.vector_index.remove_ids(chunk_ids)
+    
+    def get_chunk_hashes(self, path: str) -> Dict[str, str]:
+        """Get {chunk_id: hash} for all chunks of a file"""
+        rows = self.conn.execute("""
+            SELECT id, hash FROM chunks WHERE path = ?
+        """, (path,)).fetchall()
+        return {row['id']: row['hash'] for row in rows}
+    
+    def get_all_file_meta(self) -> Dict[str, Dict[str, Any]]:
+        """Get {path: {hash, mtime, size}} for every indexed file"""
+        rows = self.conn.execute("""
+            SELECT path, hash, mtime, size FROM files
+        """).fetchall()
+        return {
+            row['path']: {'hash': row['hash'], 'mtime': row['mtime'], 'size': row['size']}
+            for row in rows
+        }
+    
+    def apply_file_updates(self, updates: List[FileIndexUpdate]):
+        """
+        Apply chunk-level changes for several files in one transaction
+        
+        Stale chunks are deleted, new chunks inserted and the files table
+        updated; chunks not listed in either are left untouched.
+        """
+        if not updates:
+            return
+        delete_ids = [chunk_id for u in updates for chunk_id in u.delete_ids]
+        chunks = [c for u in updates for c in u.chunks]
+        try:
+            if delete_ids:
+                self.conn.executemany("""
+                    DELETE FROM chunks WHERE id = ?
+                """, [(chunk_id,) for chunk_id in delete_ids])
+            if chunks:
+                self.conn.executemany("""
+                    INSERT OR REPLACE INTO chunks 
+                    (id, user_id, scope, source, path, start_line, end_line, text, embedding, hash, metadata, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, strftime('%s', 'now'))
+                """, [
+                    (
+                        c.id, c.user_id, c.scope, c.source, c.path,
+                        c.start_line, c.end_line, c.text,
+                        encode_embedding(c.embedding, self.embedding_format),
+                        c.hash,
+                        json.dumps(c.metadata) if c.metadata else None
+                    )
+                    for c in chunks
+                ])
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO files (path, source, hash, mtime, size, updated_at)
+                VALUES (?, ?, ?, ?, ?, strftime('%s', 'now'))
+            """, [(u.path, u.source, u.hash, u.mtime, u.size) for u in updates])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.vector_index.remove_ids(delete_ids)
+        self.vector_index.add(self._index_row(c) for c in chunks)
     
     def get_file_hash(self, path: str) -> Optional[str]:
         """Get stored file hash"""
@@ -525,7 +729,7 @@ class MemoryStorage:
             start_line=row['start_line'],
             end_line=row['end_line'],
             text=row['text'],
-            embedding=json.loads(row['embedding']) if row['embedding'] else None,
+            embedding=decode_embedding(row['embedding']),
             hash=row['hash'],
             metadata=json.loads(row['metadata']) if row['metadata'] else None
         )
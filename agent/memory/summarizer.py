@@ -117,6 +117,8 @@ class MemoryFlushManager:
         self._last_flushed_content_hash: str = ""  # Content hash at last flush, for daily dedup
         self._last_dream_input_hash: str = ""  # "{date}:{daily_hash}" of last dream, for dedup
         self._last_flush_thread: Optional[threading.Thread] = None
+        self._flush_threads: set = set()  # flush workers still running
+        self._flush_threads_lock = threading.Lock()
     
     def get_today_memory_file(self, user_id: Optional[str] = None, ensure_exists: bool = False) -> Path:
         """Get today's memory file path: memory/YYYY-MM-DD.md"""
@@ -200,10 +202,12 @@ class MemoryFlushManager:
             import copy
             snapshot = copy.deepcopy(deduped)
             thread = threading.Thread(
-                target=self._flush_worker,
+                target=self._run_flush_worker,
                 args=(snapshot, user_id, reason, max_messages, context_summary_callback),
                 daemon=True,
             )
+            with self._flush_threads_lock:
+                self._flush_threads.add(thread)
             thread.start()
             logger.info(f"[MemoryFlush] Async flush dispatched (reason={reason}, msgs={len(snapshot)})")
             self._last_flush_thread = thread
@@ -213,6 +217,18 @@ class MemoryFlushManager:
             logger.warning(f"[MemoryFlush] Failed to dispatch flush (reason={reason}): {e}")
             return False
 
+    def pending_flushes(self) -> List[threading.Thread]:
+        """Flush workers dispatched by this manager that have not finished yet."""
+        with self._flush_threads_lock:
+            return list(self._flush_threads)
+
+    def _run_flush_worker(self, *args):
+        try:
+            self._flush_worker(*args)
+        finally:
+            with self._flush_threads_lock:
+                self._flush_threads.discard(threading.current_thread())
+
     def _flush_worker(
         self,
         messages: List[Dict],
@@ -0,0 +1,386 @@
+"""
+In-memory vector index for memory chunks
+
+Keeps L2-normalized float32 embedding matrices per (scope, user_id, dim)
+partition, so a query is a single matrix-vector product plus argpartition
+instead of JSON-decoding and scoring every row in Python.
+
+The index is loaded from the chunks table once per process and then kept
+in sync by MemoryStorage (save_chunk / save_chunks_batch / delete_by_path).
+All MemoryStorage instances on the same db file share one index.
+
+NumPy is optional: without it the index falls back to pre-normalized Python
+lists, which still avoids the per-query JSON decode and norm computation.
+For very large partitions an IVF (inverted file) mode probes only the
+nearest clusters instead of scanning every row.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+# (chunk_id, scope, user_id, path, embedding)
+IndexRow = Tuple[str, str, Optional[str], str, Sequence[float]]
+
+MODE_FLAT = "flat"
+MODE_IVF = "ivf"
+MODE_AUTO = "auto"
+
+
+def _normalize_list(vec: Sequence[float]) -> Optional[List[float]]:
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0:
+        return None
+    return [v / norm for v in vec]
+
+
+class _Partition:
+    """Vectors of one (scope, user_id, dim) group"""
+
+    _COMPACT_RATIO = 0.25
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.ids: List[Optional[str]] = []  # row -> chunk id, None when deleted
+        self.rows: Dict[str, int] = {}      # chunk id -> row
+        self.dead = 0
+        if np is not None:
+            self.matrix = np.empty((0, dim), dtype=np.float32)
+            self.alive = np.empty((0,), dtype=bool)
+        else:
+            self.vectors: List[Optional[List[float]]] = []
+        # IVF state (numpy only)
+        self.centroids = None
+        self.lists = None              # list of row-index arrays per centroid
+        self.ivf_rows = 0              # rows covered by the IVF lists
+
+    @property
+    def live_count(self) -> int:
+        return len(self.ids) - self.dead
+
+    def add_many(self, ids: List[str], vectors: List[Sequence[float]]):
+        if np is not None:
+            block = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), self.dim)
+            norms = np.linalg.norm(block, axis=1)
+            keep = norms > 0
+            if not keep.all():
+                block = block[keep]
+                norms = norms[keep]
+                ids = [i for i, k in zip(ids, keep) if k]
+            if not ids:
+                return
+            block /= norms[:, None]
+            start = len(self.ids)
+            self._ensure_capacity(start + len(ids))
+            self.matrix[start:start + len(ids)] = block
+            self.alive[start:start + len(ids)] = True
+        else:
+            start = len(self.ids)
+            kept_ids = []
+            for chunk_id, vec in zip(ids, vectors):
+                normalized = _normalize_list(vec)
+                if normalized is None:
+                    continue
+                self.vectors.append(normalized)
+                kept_ids.append(chunk_id)
+            ids = kept_ids
+        for offset, chunk_id in enumerate(ids):
+            self.rows[chunk_id] = start + offset
+        self.ids.extend(ids)
+
+    def _ensure_capacity(self, needed: int):
+        capacity = self.matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 64)
+        matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        matrix[:len(self.ids)] = self.matrix[:len(self.ids)]
+        alive = np.zeros((new_capacity,), dtype=bool)
+        alive[:len(self.ids)] = self.alive[:len(self.ids)]
+        self.matrix, self.alive = matrix, alive
+
+    def remove(self, chunk_id: str):
+        row = self.rows.pop(chunk_id, None)
+        if row is None:
+            return
+        self.ids[row] = None
+        self.dead += 1
+        if np is not None:
+            self.alive[row] = False
+        else:
+            self.vectors[row] = None
+        if self.dead > 64 and self.dead > len(self.ids) * self._COMPACT_RATIO:
+            self._compact()
+
+    def _compact(self):
+        keep = [row for row, chunk_id in enumerate(self.ids) if chunk_id is not None]
+        if np is not None:
+            matrix = np.ascontiguousarray(self.matrix[keep])
+            self.matrix = matrix
+            self.alive = np.ones((len(keep),), dtype=bool)
+        else:
+            self.vectors = [self.vectors[row] for row in keep]
+        self.ids = [self.ids[row] for row in keep]
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self.dead = 0
+        self.centroids = None  # row numbers changed, IVF must be rebuilt
+        self.lists = None
+        self.ivf_rows = 0
+
+    # ---- search ----
+
+    def search(self, query, limit: int, nprobe: int, use_ivf: bool) -> List[Tuple[float, str]]:
+        if not self.ids:
+            return []
+        if np is None:
+            return self._search_python(query, limit)
+        if use_ivf:
+            self._ensure_ivf()
+            candidates = self._ivf_candidates(query, nprobe)
+            scores = self.matrix[candidates] @ query
+        else:
+            n = len(self.ids)
+            candidates = None
+            scores = self.matrix[:n] @ query
+            if self.dead:
+                scores = np.where(self.alive[:n], scores, -np.inf)
+        k = min(limit, scores.shape[0])
+        if k <= 0:
+            return []
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for idx in top:
+            score = float(scores[idx])
+            if score <= 0:
+                break
+            row = int(candidates[idx]) if candidates is not None else int(idx)
+            chunk_id = self.ids[row]
+            if chunk_id is not None:
+                results.append((score, chunk_id))
+        return results
+
+    def _search_python(self, query: List[float], limit: int) -> List[Tuple[float, str]]:
+        scored = (
+            (sum(a * b for a, b in zip(query, vec)), chunk_id)
+            for chunk_id, vec in zip(self.ids, self.vectors)
+            if chunk_id is not None
+        )
+        return [item for item in heapq.nlargest(limit, scored) if item[0] > 0]
+
+    # ---- IVF (numpy only) ----
+
+    def _ensure_ivf(self):
+        n = len(self.ids)
+        if self.lists is not None and n - self.ivf_rows <= max(1000, self.ivf_rows // 10):
+            return
+        self._build_ivf()
+
+    def _build_ivf(self, iterations: int = 8):
+        n = len(self.ids)
+        live_rows = np.flatnonzero(self.alive[:n])
+        nlist = int(min(4096, max(16, math.sqrt(len(live_rows)))))
+        nlist = min(nlist, len(live_rows))
+        rng = np.random.default_rng(0)
+        sample_size = min(len(live_rows), nlist * 64)
+        sample = self.matrix[rng.choice(live_rows, size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            filled = np.bincount(assign, minlength=nlist) > 0
+            centroids[filled] = sums[filled]  # empty clusters keep their old centroid
+            norms = np.linalg.norm(centroids, axis=1)
+            norms[norms == 0] = 1.0
+            centroids /= norms[:, None]
+
+        assign = np.empty((n,), dtype=np.int32)
+        batch = 65536
+        for start in range(0, n, batch):
+            end = min(n, start + batch)
+            assign[start:end] = np.argmax(self.matrix[start:end] @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        self.centroids = centroids
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(nlist)]
+        self.ivf_rows = n
+
+    def _ivf_candidates(self, query, nprobe: int):
+        probe = min(nprobe, len(self.lists))
+        centroid_scores = self.centroids @ query
+        nearest = np.argpartition(-centroid_scores, probe - 1)[:probe]
+        parts = [self.lists[c] for c in nearest]
+        if len(self.ids) > self.ivf_rows:  # rows added since the last build
+            parts.append(np.arange(self.ivf_rows, len(self.ids)))
+        candidates = np.concatenate(parts) if parts else np.empty((0,), dtype=np.int64)
+        return candidates[self.alive[candidates]]
+
+
+class VectorIndex:
+    """
+    Vector index over memory chunks, partitioned by (scope, user_id, dim)
+
+    Args:
+        mode: "flat" (exact scan), "ivf" (approximate) or "auto"
+              (ivf once a partition reaches ivf_min_size rows, numpy only)
+        ivf_min_size: Partition size at which "auto" switches to IVF
+        nprobe: Number of IVF clusters probed per query
+    """
+
+    def __init__(self, mode: str = MODE_AUTO, ivf_min_size: int = 50000, nprobe: int = 16):
+        self.mode = mode
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._partitions: Dict[Tuple[str, Optional[str], int], _Partition] = {}
+        self._id_partition: Dict[str, Tuple[str, Optional[str], int]] = {}
+        self._id_path: Dict[str, str] = {}
+        self._path_ids: Dict[str, set] = {}
+
+    def ensure_loaded(self, load_rows: Callable[[], Iterable[IndexRow]]):
+        """Populate the index from storage on first use"""
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            self._add_rows(load_rows())
+            self.loaded = True
+
+    def reset(self):
+        with self._lock:
+            self._partitions.clear()
+            self._id_partition.clear()
+            self._id_path.clear()
+            self._path_ids.clear()
+            self.loaded = False
+
+    def add(self, rows: Iterable[IndexRow]):
+        """Insert or replace chunks (no-op until the index is loaded)"""
+        if not self.loaded:
+            return
+        with self._lock:
+            self._add_rows(rows)
+
+    def remove_path(self, path: str):
+        if not self.loaded:
+            return
+        with self._lock:
+            for chunk_id in list(self._path_ids.get(path, ())):
+                self._remove_id(chunk_id)
+
+    def remove_ids(self, chunk_ids: Iterable[str]):
+        if not self.loaded:
+            return
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove_id(chunk_id)
+
+    def _add_rows(self, rows: Iterable[IndexRow]):
+        grouped: Dict[Tuple[str, Optional[str], int], Tuple[List[str], List[Sequence[float]]]] = {}
+        # a chunk id repeated within one batch keeps only its last row, as the upsert in storage does
+        latest = {row[0]: row for row in rows}
+        for chunk_id, scope, user_id, path, embedding in latest.values():
+            if chunk_id in self._id_path:
+                self._remove_id(chunk_id)
+            if embedding is None or len(embedding) == 0:
+                continue
+            key = (scope, user_id, len(embedding))
+            ids, vectors = grouped.setdefault(key, ([], []))
+            ids.append(chunk_id)
+            vectors.append(embedding)
+            self._id_path[chunk_id] = path
+            self._path_ids.setdefault(path, set()).add(chunk_id)
+        for key, (ids, vectors) in grouped.items():
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = self._partitions[key] = _Partition(key[2])
+            partition.add_many(ids, vectors)
+            for chunk_id in ids:
+                if chunk_id in partition.rows:
+                    self._id_partition[chunk_id] = key
+
+    def _remove_id(self, chunk_id: str):
+        path = self._id_path.pop(chunk_id, None)
+        if path is not None:
+            ids = self._path_ids.get(path)
+            if ids is not None:
+                ids.discard(chunk_id)
+                if not ids:
+                    del self._path_ids[path]
+        key = self._id_partition.pop(chunk_id, None)
+        if key is not None:
+            self._partitions[key].remove(chunk_id)
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        scopes: List[str],
+        user_id: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Tuple[float, str]]:
+        """
+        Return up to ``limit`` (score, chunk_id) pairs with positive cosine
+        similarity, best first. Scope filtering matches the SQL it replaces:
+        scope IN scopes, and when user_id is given, shared chunks or that
+        user's chunks only.
+        """
+        dim = len(query_embedding)
+        if np is not None:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(query))
+            if norm == 0:
+                return []
+            query = query / norm
+        else:
+            query = _normalize_list(query_embedding)
+            if query is None:
+                return []
+
+        results: List[Tuple[float, str]] = []
+        with self._lock:
+            for (scope, part_user, part_dim), partition in self._partitions.items():
+                if part_dim != dim or scope not in scopes:
+                    continue
+                if user_id and scope != "shared" and part_user != user_id:
+                    continue
+                use_ivf = np is not None and (
+                    self.mode == MODE_IVF
+                    or (self.mode == MODE_AUTO and partition.live_count >= self.ivf_min_size)
+                ) and partition.live_count > 0
+                results.extend(partition.search(query, limit, self.nprobe, use_ivf))
+        results.sort(key=lambda item: item[0], reverse=True)
+        return results[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "partitions": len(self._partitions),
+                "vectors": sum(p.live_count for p in self._partitions.values()),
+            }
+
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(db_path: str, **kwargs) -> VectorIndex:
+    """Return the process-wide index for a memory database file"""
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = _indexes[db_path] = VectorIndex(**kwargs)
+        return index
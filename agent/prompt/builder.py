@@ -329,15 +329,15 @@ def _build_memory_section(memory_manager: Any, tools: Optional[List[Any]], langu
 
 def _build_knowledge_section(workspace_dir: str, language: str) -> List[str]:
     """Build knowledge wiki section. Injects knowledge/index.md when present."""
-    index_path = os.path.join(workspace_dir, "knowledge", "index.md")
-    if not os.path.exists(index_path):
-        return []
+    from .workspace import read_cached_text
 
+    index_path = os.path.join(workspace_dir, "knowledge", "index.md")
     try:
-        with open(index_path, 'r', encoding='utf-8') as f:
-            index_content = f.read().strip()
+        index_content = read_cached_text(index_path)
     except Exception:
         return []
+    if index_content is None:
+        return []
 
     lines = [
         "## 📚 知识系统",
@@ -456,10 +456,21 @@ def _build_workspace_section(workspace_dir: str, language: str) -> List[str]:
     return lines
 
 
+_cloud_client_missing = False
+
+
 def _build_cloud_website_section(workspace_dir: str) -> List[str]:
     """Build cloud website access prompt when cloud deployment is configured."""
+    global _cloud_client_missing
+    if _cloud_client_missing:
+        return []
     try:
         from common.cloud_client import build_website_prompt
+    except ImportError:
+        # Optional dependency (linkai) not installed; don't retry the import per prompt
+        _cloud_client_missing = True
+        return []
+    try:
         return build_website_prompt(workspace_dir)
     except Exception:
         return []
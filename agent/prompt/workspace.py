@@ -6,7 +6,8 @@ Workspace Management - 工作空间管理模块
 
 from __future__ import annotations
 import os
-from typing import List, Optional, Dict
+import threading
+from typing import List, Optional, Dict, Tuple
 from dataclasses import dataclass
 
 from common.log import logger
@@ -148,8 +149,7 @@ def load_context_files(workspace_dir: str, files_to_load: Optional[List[str]] =
                 continue
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+            content = read_cached_text(filepath)
             
             # 跳过空文件或只包含模板占位符的文件
             if not content or _is_template_placeholder(content):
@@ -172,6 +172,37 @@ def load_context_files(workspace_dir: str, files_to_load: Optional[List[str]] =
     return context_files
 
 
+# Workspace files read into every system prompt (context files, knowledge
+# index), shared across sessions and re-read only when mtime/size change.
+_text_cache: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_text_cache_lock = threading.Lock()
+
+
+def read_cached_text(filepath: str) -> Optional[str]:
+    """
+    读取文件内容（去除首尾空白），按 mtime/size 缓存
+
+    Returns:
+        文件内容；文件不存在时返回 None
+    """
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        with _text_cache_lock:
+            _text_cache.pop(filepath, None)
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _text_cache_lock:
+        cached = _text_cache.get(filepath)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    with _text_cache_lock:
+        _text_cache[filepath] = (stamp, content)
+    return content
+
+
 def _create_template_if_missing(filepath: str, template_content: str):
     """如果文件不存在，创建模板文件"""
     if not os.path.exists(filepath):
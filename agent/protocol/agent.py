@@ -6,6 +6,7 @@ import threading
 from common.log import logger
 from agent.protocol.models import LLMRequest, LLMModel
 from agent.protocol.agent_stream import AgentStreamExecutor
+from agent.protocol.tokenizer import approximate_tokens, get_token_counter
 from agent.protocol.result import AgentAction, AgentActionType, ToolResult, AgentResult
 from agent.tools.base_tool import BaseTool, ToolStage
 
@@ -40,6 +41,7 @@ class Agent:
         self.model: LLMModel = model  # Instance of LLMModel
         self.description = description
         self.tools: list = []
+        self._tool_catalog = None  # Compiled schemas of self.tools, rebuilt by the executor when tools change
         self.max_steps = max_steps  # max tool-call steps, default 100
         self.max_context_tokens = max_context_tokens  # max tokens in context
         self.context_reserve_tokens = context_reserve_tokens  # reserve tokens for new requests
@@ -211,66 +213,27 @@ class Agent:
 
     def _estimate_message_tokens(self, message: dict) -> int:
         """
-        Estimate token count for a message.
+        Count tokens for a message with the tokenizer of the agent's model.
 
-        Uses chars/3 for Chinese-heavy content and chars/4 for ASCII-heavy content,
-        plus per-block overhead for tool_use / tool_result structures.
+        Exact for OpenAI / Qwen models, a calibrated estimate otherwise, plus
+        per-block overhead for tool_use / tool_result structures. Counts are
+        memoized per text, so history is only tokenized once.
 
         :param message: Message dict with 'role' and 'content'
-        :return: Estimated token count
+        :return: Token count
         """
-        content = message.get('content', '')
-        if isinstance(content, str):
-            return max(1, self._estimate_text_tokens(content))
-        elif isinstance(content, list):
-            total_tokens = 0
-            for part in content:
-                if not isinstance(part, dict):
-                    continue
-                block_type = part.get('type', '')
-                if block_type == 'text':
-                    total_tokens += self._estimate_text_tokens(part.get('text', ''))
-                elif block_type == 'image':
-                    total_tokens += 1200
-                elif block_type == 'tool_use':
-                    # tool_use has id + name + input (JSON-encoded)
-                    total_tokens += 50  # overhead for structure
-                    input_data = part.get('input', {})
-                    if isinstance(input_data, dict):
-                        import json
-                        input_str = json.dumps(input_data, ensure_ascii=False)
-                        total_tokens += self._estimate_text_tokens(input_str)
-                elif block_type == 'tool_result':
-                    # tool_result has tool_use_id + content
-                    total_tokens += 30  # overhead for structure
-                    result_content = part.get('content', '')
-                    if isinstance(result_content, str):
-                        total_tokens += self._estimate_text_tokens(result_content)
-                else:
-                    # Unknown block type, estimate conservatively
-                    total_tokens += 10
-            return max(1, total_tokens)
-        return 1
+        model_name = getattr(self.model, 'model', None) if self.model else None
+        return get_token_counter(model_name).count_message(message)
 
     @staticmethod
     def _estimate_text_tokens(text: str) -> int:
         """
-        Estimate token count for a text string.
-
-        Chinese / CJK characters typically use ~1.5 tokens each,
-        while ASCII uses ~0.25 tokens per char (4 chars/token).
-        We use a weighted average based on the character mix.
+        Estimate token count for a text string from its ASCII / non-ASCII mix.
 
         :param text: Input text
         :return: Estimated token count
         """
-        if not text:
-            return 0
-        # Count non-ASCII characters (CJK, emoji, etc.)
-        non_ascii = sum(1 for c in text if ord(c) > 127)
-        ascii_count = len(text) - non_ascii
-        # CJK chars: ~1.5 tokens each; ASCII: ~0.25 tokens per char
-        return int(non_ascii * 1.5 + ascii_count * 0.25) + 1
+        return approximate_tokens(text)
 
     def _find_tool(self, tool_name: str):
         """Find and return a tool with the specified name"""
@@ -414,6 +377,7 @@ class Agent:
         # Get max_context_turns from config
         from config import conf
         max_context_turns = conf().get("agent_max_context_turns", 20)
+        tool_parallelism = conf().get("agent_tool_parallelism", 4)
         
         # Create stream executor with copied message history
         executor = AgentStreamExecutor(
@@ -424,7 +388,8 @@ class Agent:
             max_turns=self.max_steps,
             on_event=on_event,
             messages=messages_copy,  # Pass copied message history
-            max_context_turns=max_context_turns
+            max_context_turns=max_context_turns,
+            tool_parallelism=tool_parallelism
         )
 
         # Execute
@@ -4,13 +4,20 @@ Agent Stream Execution Module - Multi-turn reasoning based on tool-call
 Provides streaming output, event system, and complete tool-call loop
 """
 import json
+import threading
 import time
-from typing import List, Dict, Any, Optional, Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
 
 from agent.protocol.models import LLMRequest, LLMModel
-from agent.protocol.message_utils import sanitize_claude_messages, compress_turn_to_text_only
+from agent.protocol.message_utils import (
+    sanitize_claude_messages, compress_turn_to_text_only, is_closed_tool_segment,
+)
+from agent.protocol.turn_index import TurnIndex
 from agent.tools.base_tool import BaseTool, ToolResult
 from common.log import logger
+from common.tool_catalog import ToolCatalog
 
 
 # Maximum number of characters of model "reasoning / thinking" content to persist
@@ -44,6 +51,25 @@ def _truncate_reasoning_for_storage(text: str) -> str:
     return head + _REASONING_TRUNCATE_MARKER.format(omitted=omitted) + tail
 
 
+# Pool shared by all executors for running parallel-safe tool calls. Its size
+# only bounds the process-wide thread count: each step also caps its own
+# concurrency (tool_parallelism), and the step's thread takes back any call
+# the pool has not started yet, so a busy pool never makes a step slower
+# than running its calls one by one.
+_TOOL_POOL_WORKERS = 16
+_tool_pool: Optional[ThreadPoolExecutor] = None
+_tool_pool_lock = threading.Lock()
+
+
+def _get_tool_pool() -> ThreadPoolExecutor:
+    global _tool_pool
+    if _tool_pool is None:
+        with _tool_pool_lock:
+            if _tool_pool is None:
+                _tool_pool = ThreadPoolExecutor(max_workers=_TOOL_POOL_WORKERS, thread_name_prefix="agent-tool")
+    return _tool_pool
+
+
 class AgentStreamExecutor:
     """
     Agent Stream Executor
@@ -64,7 +90,8 @@ class AgentStreamExecutor:
             max_turns: int = 50,
             on_event: Optional[Callable] = None,
             messages: Optional[List[Dict]] = None,
-            max_context_turns: int = 30
+            max_context_turns: int = 30,
+            tool_parallelism: int = 4
     ):
         """
         Initialize stream executor
@@ -78,6 +105,8 @@ class AgentStreamExecutor:
             on_event: Event callback function
             messages: Optional existing message history (for persistent conversations)
             max_context_turns: Maximum number of conversation turns to keep in context
+            tool_parallelism: Maximum number of parallel-safe tool calls of one step
+                run concurrently (1 runs every call in order)
         """
         self.agent = agent
         self.model = model
@@ -87,9 +116,15 @@ class AgentStreamExecutor:
         self.max_turns = max_turns
         self.on_event = on_event
         self.max_context_turns = max_context_turns
+        self.tool_parallelism = max(1, int(tool_parallelism or 1))
 
         # Message history - use provided messages or create new list
         self.messages = messages if messages is not None else []
+        # Turn boundaries / token prefix sums over self.messages, kept up to
+        # date incrementally (see _turn_index_synced)
+        self._turn_index = TurnIndex(self._count_message_tokens)
+        # (list, length, tail message) as of the last full sanitize pass
+        self._validated = (None, 0, None)
         
         # Tool failure tracking for retry protection
         self.tool_failure_history = []  # List of (tool_name, args_hash, success) tuples
@@ -374,8 +409,7 @@ class AgentStreamExecutor:
                 tool_result_blocks = []
 
                 try:
-                    for tool_call in tool_calls:
-                        result = self._execute_tool(tool_call)
+                    for tool_call, result in self._execute_tool_calls(tool_calls):
                         tool_results.append(result)
                         
                         # Debug: Check if tool is being called repeatedly with same args
@@ -569,6 +603,22 @@ class AgentStreamExecutor:
 
         return final_response
 
+    def _tool_catalog(self) -> ToolCatalog:
+        """
+        The compiled catalog of self.tools.
+
+        Kept on the agent, so it (and the provider conversions memoized on it)
+        outlives a single run; rebuilt only when the agent's tool set changes.
+        """
+        catalog = getattr(self.agent, "_tool_catalog", None)
+        if catalog is None or not catalog.matches(self.tools.values()):
+            catalog = ToolCatalog(self.tools.values())
+            try:
+                self.agent._tool_catalog = catalog
+            except AttributeError:
+                pass
+        return catalog
+
     def _call_llm_stream(self, retry_on_empty=True, retry_count=0, max_retries=3,
                          _overflow_retry: bool = False) -> Tuple[str, List[Dict]]:
         """
@@ -591,19 +641,11 @@ class AgentStreamExecutor:
 
         # Prepare messages
         messages = self._prepare_messages()
-        turns = self._identify_complete_turns()
-        logger.info(f"Sending {len(messages)} messages ({len(turns)} turns) to LLM")
-
-        # Prepare tool definitions (OpenAI/Claude format)
-        tools_schema = None
-        if self.tools:
-            tools_schema = []
-            for tool in self.tools.values():
-                tools_schema.append({
-                    "name": tool.name,
-                    "description": tool.description,
-                    "input_schema": tool.params  # Claude uses input_schema
-                })
+        turn_count = self._turn_index_synced().turn_count
+        logger.info(f"Sending {len(messages)} messages ({turn_count} turns) to LLM")
+
+        # Prepare tool definitions (Claude format, compiled once per tool set)
+        tools_schema = self._tool_catalog() if self.tools else None
 
         # Create request
         request = LLMRequest(
@@ -926,6 +968,101 @@ class AgentStreamExecutor:
 
         return full_content, tool_calls
 
+    def _execute_tool_calls(self, tool_calls: List[Dict]) -> Iterator[Tuple[Dict, Dict[str, Any]]]:
+        """
+        Execute one step's tool calls, yielding (tool_call, result) in call order.
+
+        Runs of consecutive calls to parallel-safe tools are executed together
+        (up to tool_parallelism at a time); any other call is a barrier that
+        starts only after everything before it finished and runs alone, so
+        side-effecting tools keep their order. Results are produced lazily:
+        when the caller stops (e.g. on a critical error), later calls are not
+        started.
+        """
+        # Tool instances are shared with the pool threads: hand them this
+        # step's model and agent here, before any of them runs
+        for name in {call["name"] for call in tool_calls}:
+            tool = self.tools.get(name)
+            if tool:
+                tool.model = self.model
+                tool.context = self.agent
+        i = 0
+        while i < len(tool_calls):
+            j = i
+            while j < len(tool_calls) and j - i < self.tool_parallelism and self._is_parallel_safe(tool_calls[j]):
+                j += 1
+            if j - i > 1:
+                yield from self._execute_tool_batch(tool_calls[i:j])
+                i = j
+            else:
+                yield tool_calls[i], self._execute_tool(tool_calls[i])
+                i += 1
+
+    def _is_parallel_safe(self, tool_call: Dict) -> bool:
+        if "_parse_error" in tool_call:
+            return False
+        tool = self.tools.get(tool_call["name"])
+        return tool is not None and getattr(tool, "parallel_safe", False)
+
+    def _execute_tool_batch(self, tool_calls: List[Dict]) -> Iterator[Tuple[Dict, Dict[str, Any]]]:
+        """
+        Execute parallel-safe tool calls concurrently, yielding results in call order.
+
+        Start events are emitted for the whole batch up front and end events in
+        call order, both from the calling thread. When the caller stops early
+        (critical error), every call still without an end event gets a
+        "cancelled" one, so each start keeps its end. The first call runs on
+        this thread, the rest on the shared pool; a call the pool has not
+        picked up by the time its result is needed is cancelled there and run
+        here.
+
+        Retry protection sees the same history as when the calls run one by
+        one: each call is checked in call order, after the results before it
+        are recorded. By then the later calls may already have run; they are
+        read-only, so a blocked call's outcome is simply dropped in favour of
+        the stop message.
+        """
+        for call in tool_calls:
+            self._emit_tool_start(call)
+
+        pool = _get_tool_pool()
+        futures = {i: pool.submit(self._invoke_tool, call) for i, call in enumerate(tool_calls) if i}
+        ended = 0
+        try:
+            for i, call in enumerate(tool_calls):
+                blocked = self._check_retry_protection(call)
+                if blocked is not None:
+                    if i:
+                        futures[i].cancel()
+                    self._emit_event("tool_execution_end", {
+                        "tool_call_id": call["id"],
+                        "tool_name": call["name"],
+                        **blocked
+                    })
+                    ended = i + 1
+                    # On a critical error the caller stops here and the
+                    # finally below cancels whatever has not started
+                    yield call, blocked
+                    continue
+                if i == 0 or futures[i].cancel():
+                    outcome = self._invoke_tool(call)
+                else:
+                    outcome = futures[i].result()
+                result = self._finish_tool(call, *outcome)
+                ended = i + 1
+                yield call, result
+        finally:
+            for future in futures.values():
+                future.cancel()
+            for call in tool_calls[ended:]:
+                self._emit_event("tool_execution_end", {
+                    "tool_call_id": call["id"],
+                    "tool_name": call["name"],
+                    "status": "cancelled",
+                    "result": "Cancelled: the run stopped before this call finished",
+                    "execution_time": 0
+                })
+
     def _execute_tool(self, tool_call: Dict) -> Dict[str, Any]:
         """
         Execute tool
@@ -936,8 +1073,29 @@ class AgentStreamExecutor:
         Returns:
             Tool execution result
         """
+        result = self._begin_tool(tool_call)
+        if result is not None:
+            return result
+        # Only a tool running alone reports progress; the callback holds this
+        # call's id and the executor, so it is dropped once the call returns
+        tool = self.tools.get(tool_call["name"])
+        if tool and not tool.parallel_safe:
+            tool.on_update = partial(self._emit_tool_update, tool_call)
+        try:
+            outcome = self._invoke_tool(tool_call)
+        finally:
+            if tool:
+                tool.on_update = None
+        return self._finish_tool(tool_call, *outcome)
+
+    def _begin_tool(self, tool_call: Dict) -> Optional[Dict[str, Any]]:
+        """
+        Pre-execution checks and the start event.
+
+        Returns the result to use instead of running the tool (argument parse
+        error, retry protection), or None when the tool should run.
+        """
         tool_name = tool_call["name"]
-        tool_id = tool_call["id"]
         arguments = tool_call["arguments"]
 
         # Check if there was a JSON parse error
@@ -952,7 +1110,20 @@ class AgentStreamExecutor:
             self._record_tool_result(tool_name, arguments, False)
             return result
 
-        # Check for consecutive failures (retry protection)
+        result = self._check_retry_protection(tool_call)
+        if result is not None:
+            return result
+
+        self._emit_tool_start(tool_call)
+        return None
+
+    def _check_retry_protection(self, tool_call: Dict) -> Optional[Dict[str, Any]]:
+        """
+        The stop result (recorded as a failure) when the call repeats too
+        often or its tool keeps failing, or None when it may run.
+        """
+        tool_name = tool_call["name"]
+        arguments = tool_call["arguments"]
         should_stop, stop_reason, is_critical = self._check_consecutive_failures(tool_name, arguments)
         if should_stop:
             logger.error(f"🛑 {stop_reason}")
@@ -973,26 +1144,53 @@ class AgentStreamExecutor:
                     "execution_time": 0
                 }
             return result
+        return None
 
+    def _emit_tool_start(self, tool_call: Dict):
         self._emit_event("tool_execution_start", {
-            "tool_call_id": tool_id,
-            "tool_name": tool_name,
-            "arguments": arguments
+            "tool_call_id": tool_call["id"],
+            "tool_name": tool_call["name"],
+            "arguments": tool_call["arguments"]
         })
 
+    def _invoke_tool(self, tool_call: Dict) -> Tuple[Optional[ToolResult], Optional[Exception], float]:
+        """
+        Run the tool itself: (result, error, execution_time).
+
+        Touches no executor state, so parallel-safe tools can run it on a pool
+        thread; recording and events are left to _finish_tool.
+        """
+        tool_name = tool_call["name"]
         try:
             tool = self.tools.get(tool_name)
             if not tool:
                 raise ValueError(self._build_tool_not_found_message(tool_name))
 
-            # Set tool context
-            tool.model = self.model
-            tool.context = self.agent
-
             # Execute tool
             start_time = time.time()
-            result: ToolResult = tool.execute_tool(arguments)
-            execution_time = time.time() - start_time
+            result: ToolResult = tool.execute_tool(tool_call["arguments"])
+            return result, None, time.time() - start_time
+        except Exception as e:
+            return None, e, 0
+
+    def _emit_tool_update(self, tool_call: Dict, data: dict):
+        """Progress reported by a running tool through its on_update callback."""
+        self._emit_event("tool_execution_update", {
+            "tool_call_id": tool_call["id"],
+            "tool_name": tool_call["name"],
+            **data
+        })
+
+    def _finish_tool(self, tool_call: Dict, result: Optional[ToolResult],
+                     error: Optional[Exception], execution_time: float) -> Dict[str, Any]:
+        """Record the outcome of _invoke_tool, emit the end event and build the result dict."""
+        tool_name = tool_call["name"]
+        tool_id = tool_call["id"]
+        arguments = tool_call["arguments"]
+
+        try:
+            if error is not None:
+                raise error
 
             result_dict = {
                 "status": result.status,
@@ -1079,8 +1277,32 @@ class AgentStreamExecutor:
         )
 
     def _validate_and_fix_messages(self):
-        """Delegate to the shared sanitizer (see message_sanitizer.py)."""
-        sanitize_claude_messages(self.messages)
+        """
+        Delegate to the shared sanitizer (see message_sanitizer.py).
+
+        When the only change since the last pass is appended messages that
+        close their own tool_use / tool_result pairs (the normal agent step),
+        the history is still valid and the full pass is skipped.
+        """
+        validated_list, validated_len, validated_tail = self._validated
+        messages = self.messages
+        appended_only = (
+            validated_list is messages and validated_len
+            and len(messages) >= validated_len
+            and messages[validated_len - 1] is validated_tail
+        )
+        if not (appended_only and is_closed_tool_segment(messages[validated_len:])):
+            if sanitize_claude_messages(messages):
+                # Repairs insert / drop / rewrite messages anywhere in the list
+                self._turn_index.invalidate()
+        self._validated = (messages, len(messages), messages[-1] if messages else None)
+
+    def _count_message_tokens(self, msg: Dict) -> int:
+        return self.agent._estimate_message_tokens(msg) if self.agent else 0
+
+    def _turn_index_synced(self) -> TurnIndex:
+        """The turn index, caught up with messages appended since the last call."""
+        return self._turn_index.sync(self.messages)
 
     def _identify_complete_turns(self) -> List[Dict]:
         """
@@ -1095,48 +1317,7 @@ class AgentStreamExecutor:
         Returns:
             List of turns, each turn is a dict with 'messages' list
         """
-        turns = []
-        current_turn = {'messages': []}
-        
-        for msg in self.messages:
-            role = msg.get('role')
-            content = msg.get('content', [])
-            
-            if role == 'user':
-                # Determine if this is a real user query (not a tool_result injection
-                # or an internal hint message injected by the agent loop).
-                is_user_query = False
-                has_tool_result = False
-                if isinstance(content, list):
-                    has_text = any(
-                        isinstance(block, dict) and block.get('type') == 'text'
-                        for block in content
-                    )
-                    has_tool_result = any(
-                        isinstance(block, dict) and block.get('type') == 'tool_result'
-                        for block in content
-                    )
-                    # A message with tool_result is always internal, even if it
-                    # also contains text blocks (shouldn't happen, but be safe).
-                    is_user_query = has_text and not has_tool_result
-                elif isinstance(content, str):
-                    is_user_query = True
-                
-                if is_user_query:
-                    if current_turn['messages']:
-                        turns.append(current_turn)
-                    current_turn = {'messages': [msg]}
-                else:
-                    current_turn['messages'].append(msg)
-            else:
-                # AI 回复，属于当前轮次
-                current_turn['messages'].append(msg)
-        
-        # 添加最后一个轮次
-        if current_turn['messages']:
-            turns.append(current_turn)
-        
-        return turns
+        return self._turn_index_synced().turns()
     
     def _estimate_turn_tokens(self, turn: Dict) -> int:
         """估算一个轮次的 tokens"""
@@ -1159,24 +1340,13 @@ class AgentStreamExecutor:
         if len(self.messages) < 2:
             return
 
-        # Find where the last user text message starts (= current turn boundary)
-        # We skip the current turn's messages to preserve their full content
-        current_turn_start = len(self.messages)
-        for i in range(len(self.messages) - 1, -1, -1):
-            msg = self.messages[i]
-            if msg.get("role") == "user":
-                content = msg.get("content", [])
-                if isinstance(content, list) and any(
-                    isinstance(b, dict) and b.get("type") == "text" for b in content
-                ):
-                    current_turn_start = i
-                    break
-                elif isinstance(content, str):
-                    current_turn_start = i
-                    break
+        # The last user query starts the current turn; its messages keep their
+        # full content. Only messages the index flagged as large are visited.
+        index = self._turn_index_synced()
+        current_turn_start = index.last_query if index.last_query is not None else len(self.messages)
 
         truncated_count = 0
-        for i in range(current_turn_start):
+        for i in index.large_messages(before=current_turn_start):
             msg = self.messages[i]
             if msg.get("role") != "user":
                 continue
@@ -1184,6 +1354,7 @@ class AgentStreamExecutor:
             if not isinstance(content, list):
                 continue
 
+            changed = False
             for block in content:
                 if not isinstance(block, dict) or block.get("type") != "tool_result":
                     continue
@@ -1193,6 +1364,9 @@ class AgentStreamExecutor:
                     block["content"] = result_str[:MAX_HISTORY_RESULT_CHARS] + \
                         f"\n\n[Historical output truncated: {original_len} -> {MAX_HISTORY_RESULT_CHARS} chars]"
                     truncated_count += 1
+                    changed = True
+            if changed:
+                index.refresh(i)
 
         if truncated_count > 0:
             logger.info(f"📎 Truncated {truncated_count} historical tool result(s) to {MAX_HISTORY_RESULT_CHARS} chars")
@@ -1215,47 +1389,44 @@ class AgentStreamExecutor:
         original_count = len(self.messages)
 
         # Step 1: Aggressively truncate ALL tool results to 5K chars
-        AGGRESSIVE_LIMIT = 10000
-        truncated = 0
-        for msg in self.messages:
-            content = msg.get("content", [])
-            if not isinstance(content, list):
-                continue
-            for block in content:
-                if not isinstance(block, dict):
-                    continue
-                # Truncate tool_result blocks
-                if block.get("type") == "tool_result":
-                    result_str = block.get("content", "")
-                    if isinstance(result_str, str) and len(result_str) > AGGRESSIVE_LIMIT:
-                        block["content"] = (
-                            result_str[:AGGRESSIVE_LIMIT]
-                            + f"\n\n[Truncated for context recovery: "
-                            f"{len(result_str)} -> {AGGRESSIVE_LIMIT} chars]"
-                        )
-                        truncated += 1
-                # Truncate tool_use input blocks (e.g. large write content)
-                if block.get("type") == "tool_use" and isinstance(block.get("input"), dict):
-                    input_str = json.dumps(block["input"], ensure_ascii=False)
-                    if len(input_str) > AGGRESSIVE_LIMIT:
-                        # Keep only a summary of the input
-                        for key, val in block["input"].items():
-                            if isinstance(val, str) and len(val) > 1000:
-                                block["input"][key] = (
-                                    val[:1000]
-                                    + f"... [truncated {len(val)} chars]"
-                                )
-                        truncated += 1
-
         # Step 2: Truncate overly long user text messages (e.g. pasted content)
+        # Both limits are covered by the index's large-message list.
+        AGGRESSIVE_LIMIT = 10000
         USER_MSG_LIMIT = 10000
-        for msg in self.messages:
-            if msg.get("role") != "user":
-                continue
+        index = self._turn_index_synced()
+        truncated = 0
+        for i in index.large_messages():
+            msg = self.messages[i]
+            truncated_before = truncated
             content = msg.get("content", [])
             if isinstance(content, list):
                 for block in content:
-                    if isinstance(block, dict) and block.get("type") == "text":
+                    if not isinstance(block, dict):
+                        continue
+                    # Truncate tool_result blocks
+                    if block.get("type") == "tool_result":
+                        result_str = block.get("content", "")
+                        if isinstance(result_str, str) and len(result_str) > AGGRESSIVE_LIMIT:
+                            block["content"] = (
+                                result_str[:AGGRESSIVE_LIMIT]
+                                + f"\n\n[Truncated for context recovery: "
+                                f"{len(result_str)} -> {AGGRESSIVE_LIMIT} chars]"
+                            )
+                            truncated += 1
+                    # Truncate tool_use input blocks (e.g. large write content)
+                    if block.get("type") == "tool_use" and isinstance(block.get("input"), dict):
+                        input_str = json.dumps(block["input"], ensure_ascii=False)
+                        if len(input_str) > AGGRESSIVE_LIMIT:
+                            # Keep only a summary of the input
+                            for key, val in block["input"].items():
+                                if isinstance(val, str) and len(val) > 1000:
+                                    block["input"][key] = (
+                                        val[:1000]
+                                        + f"... [truncated {len(val)} chars]"
+                                    )
+                            truncated += 1
+                    # Truncate long user text blocks
+                    if msg.get("role") == "user" and block.get("type") == "text":
                         text = block.get("text", "")
                         if len(text) > USER_MSG_LIMIT:
                             block["text"] = (
@@ -1264,23 +1435,22 @@ class AgentStreamExecutor:
                                 f"{len(text)} -> {USER_MSG_LIMIT} chars]"
                             )
                             truncated += 1
-            elif isinstance(content, str) and len(content) > USER_MSG_LIMIT:
+            elif msg.get("role") == "user" and isinstance(content, str) and len(content) > USER_MSG_LIMIT:
                 msg["content"] = (
                     content[:USER_MSG_LIMIT]
                     + f"\n\n[Message truncated for context recovery: "
                     f"{len(content)} -> {USER_MSG_LIMIT} chars]"
                 )
                 truncated += 1
+            if truncated != truncated_before:
+                index.refresh(i)
 
         # Step 3: Keep only the last 5 complete turns
-        turns = self._identify_complete_turns()
-        if len(turns) > 5:
-            kept_turns = turns[-5:]
-            new_messages = []
-            for turn in kept_turns:
-                new_messages.extend(turn["messages"])
-            removed = len(turns) - 5
-            self.messages[:] = new_messages
+        turn_count = index.turn_count
+        if turn_count > 5:
+            removed = turn_count - 5
+            self.messages[:] = self.messages[index.turn_start(removed):]
+            index.drop_turns(removed, self.messages)
             logger.info(
                 f"🔧 Aggressive trim: removed {removed} old turns, "
                 f"truncated {truncated} large blocks, "
@@ -1291,7 +1461,7 @@ class AgentStreamExecutor:
         if truncated > 0:
             logger.info(
                 f"🔧 Aggressive trim: truncated {truncated} large blocks "
-                f"(no turns removed, only {len(turns)} turn(s) left)"
+                f"(no turns removed, only {turn_count} turn(s) left)"
             )
             return True
 
@@ -1365,18 +1535,20 @@ class AgentStreamExecutor:
         self._truncate_historical_tool_results()
 
         # Step 1: 识别完整轮次
-        turns = self._identify_complete_turns()
-        
-        if not turns:
+        index = self._turn_index_synced()
+        if not index.turn_count:
             return
-        
+
+        old_count = len(self.messages)
+
         # Step 2: 轮次限制 - 超出时移除前一半，保留后一半
-        if len(turns) > self.max_context_turns:
-            removed_count = len(turns) // 2
-            keep_count = len(turns) - removed_count
-            
-            discarded_turns = turns[:removed_count]
-            turns = turns[-keep_count:]
+        if index.turn_count > self.max_context_turns:
+            removed_count = index.turn_count // 2
+            keep_count = index.turn_count - removed_count
+
+            discarded_turns = index.turns(0, removed_count)
+            self.messages = self.messages[index.turn_start(removed_count):]
+            index.drop_turns(removed_count, self.messages)
 
             logger.info(
                 f"💾 上下文轮次超限: {keep_count + removed_count} > {self.max_context_turns}，"
@@ -1390,7 +1562,7 @@ class AgentStreamExecutor:
                     discarded_messages.extend(turn["messages"])
                 if discarded_messages:
                     user_id = getattr(self.agent, '_current_user_id', None)
-                    cb = self._build_context_summary_callback(discarded_turns, turns)
+                    cb = self._build_context_summary_callback(discarded_turns, index.turns())
                     self.agent.memory_manager.flush_memory(
                         messages=discarded_messages, user_id=user_id,
                         reason="trim", max_messages=0,
@@ -1411,21 +1583,12 @@ class AgentStreamExecutor:
 
         # Estimate system prompt tokens
         system_tokens = self.agent._estimate_message_tokens({"role": "system", "content": self.system_prompt})
-        available_tokens = max_tokens - system_tokens
 
-        # Calculate current tokens
-        current_tokens = sum(self._estimate_turn_tokens(turn) for turn in turns)
+        # Current tokens: the index keeps per-turn prefix sums
+        current_tokens = index.tokens()
         
-        # If under limit, reconstruct messages and return
+        # If under limit, keep the (possibly turn-trimmed) messages
         if current_tokens + system_tokens <= max_tokens:
-            # Reconstruct message list from turns
-            new_messages = []
-            for turn in turns:
-                new_messages.extend(turn['messages'])
-            
-            old_count = len(self.messages)
-            self.messages = new_messages
-            
             # Log if we removed messages due to turn limit
             if old_count > len(self.messages):
                 logger.info(f"   重建消息列表: {old_count} -> {len(self.messages)} 条消息")
@@ -1443,11 +1606,12 @@ class AgentStreamExecutor:
         #                     (with full tool chains) is more useful.
 
         COMPRESS_THRESHOLD = 5
+        turn_count = index.turn_count
 
-        if len(turns) < COMPRESS_THRESHOLD:
+        if turn_count < COMPRESS_THRESHOLD:
             # --- Few turns: compress ALL turns to text-only, never discard ---
             compressed_turns = []
-            for t in turns:
+            for t in index.turns():
                 compressed = compress_turn_to_text_only(t)
                 if compressed["messages"]:
                     compressed_turns.append(compressed)
@@ -1457,24 +1621,21 @@ class AgentStreamExecutor:
                 new_messages.extend(turn["messages"])
 
             new_tokens = sum(self._estimate_turn_tokens(t) for t in compressed_turns)
-            old_count = len(self.messages)
             self.messages = new_messages
 
             logger.info(
                 f"📦 上下文tokens超限(轮次<{COMPRESS_THRESHOLD}): "
                 f"~{current_tokens + system_tokens} > {max_tokens}，"
-                f"压缩全部 {len(turns)} 轮为纯文本 "
+                f"压缩全部 {turn_count} 轮为纯文本 "
                 f"({old_count} -> {len(self.messages)} 条消息，"
                 f"~{current_tokens + system_tokens} -> ~{new_tokens + system_tokens} tokens)"
             )
             return
 
         # --- Many turns (>=5): discard the older half, keep the newer half ---
-        removed_count = len(turns) // 2
-        keep_count = len(turns) - removed_count
-        discarded_turns = turns[:removed_count]
-        kept_turns = turns[-keep_count:]
-        kept_tokens = sum(self._estimate_turn_tokens(t) for t in kept_turns)
+        removed_count = turn_count // 2
+        keep_count = turn_count - removed_count
+        kept_tokens = index.tokens(removed_count)
 
         logger.info(
             f"🔄 上下文tokens超限: ~{current_tokens + system_tokens} > {max_tokens}，"
@@ -1482,24 +1643,21 @@ class AgentStreamExecutor:
         )
 
         if self.agent.memory_manager:
+            discarded_turns = index.turns(0, removed_count)
             discarded_messages = []
             for turn in discarded_turns:
                 discarded_messages.extend(turn["messages"])
             if discarded_messages:
                 user_id = getattr(self.agent, '_current_user_id', None)
-                cb = self._build_context_summary_callback(discarded_turns, kept_turns)
+                cb = self._build_context_summary_callback(discarded_turns, index.turns(removed_count))
                 self.agent.memory_manager.flush_memory(
                     messages=discarded_messages, user_id=user_id,
                     reason="trim", max_messages=0,
                     context_summary_callback=cb,
                 )
 
-        new_messages = []
-        for turn in kept_turns:
-            new_messages.extend(turn['messages'])
-
-        old_count = len(self.messages)
-        self.messages = new_messages
+        self.messages = self.messages[index.turn_start(removed_count):]
+        index.drop_turns(removed_count, self.messages)
 
         logger.info(
             f"   移除了 {removed_count} 轮对话 "
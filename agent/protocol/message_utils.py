@@ -1,13 +1,17 @@
 """
 Message sanitizer — fix broken tool_use / tool_result pairs.
 
-Provides two public helpers that can be reused across agent_stream.py
+Provides public helpers that can be reused across agent_stream.py
 and any bot that converts messages to OpenAI format:
 
 1. sanitize_claude_messages(messages)
    Operates on the internal Claude-format message list (in-place).
 
-2. drop_orphaned_tool_results_openai(messages)
+2. is_closed_tool_segment(messages)
+   Checks whether messages appended to a sanitized list keep it valid,
+   so the full pass can be skipped.
+
+3. drop_orphaned_tool_results_openai(messages)
    Operates on an already-converted OpenAI-format message list,
    returning a cleaned copy.
 """
@@ -236,6 +240,54 @@ def sanitize_claude_messages(messages: List[Dict]) -> int:
     return removed + adj_repairs
 
 
+def is_closed_tool_segment(messages: List[Dict]) -> bool:
+    """
+    Return True when *messages*, appended to an already-sanitized history,
+    cannot need any of the repairs sanitize_claude_messages makes: the
+    segment does not open with a tool_result message, every tool_use is
+    answered by the next (user) message, and every tool_result answers a
+    tool_use inside the segment. Pure check; nothing is modified.
+    """
+    if not messages:
+        return True
+    first_content = messages[0].get("content")
+    if messages[0].get("role") == "user" and isinstance(first_content, list) \
+            and _has_block_type(first_content, "tool_result"):
+        return False
+
+    use_ids: Set[str] = set()
+    for i, msg in enumerate(messages):
+        content = msg.get("content")
+        if not isinstance(content, list):
+            continue
+        if msg.get("role") == "assistant":
+            required = {
+                b.get("id") for b in content
+                if isinstance(b, dict) and b.get("type") == "tool_use"
+            }
+            if not required:
+                continue
+            if not all(required) or i + 1 >= len(messages):
+                return False
+            nxt = messages[i + 1]
+            nc = nxt.get("content")
+            if nxt.get("role") != "user" or not isinstance(nc, list):
+                return False
+            present = {
+                b.get("tool_use_id") for b in nc
+                if isinstance(b, dict) and b.get("type") == "tool_result"
+            }
+            if not required <= present:
+                return False
+            use_ids |= required
+        elif msg.get("role") == "user":
+            for b in content:
+                if isinstance(b, dict) and b.get("type") == "tool_result" \
+                        and b.get("tool_use_id") not in use_ids:
+                    return False
+    return True
+
+
 # ------------------------------------------------------------------ #
 # OpenAI-format sanitizer (used by minimax_bot, openai_compatible_bot)
 # ------------------------------------------------------------------ #
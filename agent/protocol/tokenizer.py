@@ -0,0 +1,261 @@
+"""
+Token counting for context-window management.
+
+One TokenCounter per tokenizer family, shared process-wide:
+
+- OpenAI models (gpt-*, o1/o3/o4, chatgpt-*): exact counts via tiktoken
+- Qwen models (qwen*, qwq*, qvq*): exact counts via the Qwen BPE shipped
+  with dashscope
+- everything else, or when a tokenizer cannot be loaded: a character-class
+  estimate (see approximate_tokens), calibrated per family where a reference
+  tokenizer was available
+
+Counts are memoized by the (hash, length) of the text, so a history message
+is tokenized once per process instead of once per turn, and the cache holds
+no reference to the text itself. Strings cache their own hash, which makes
+repeat lookups for the same history content O(1).
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Dict, List, Optional
+
+from common.log import logger
+
+# Calibrated against a BPE reference (Qwen's vocabulary) on this repository's
+# code and Chinese/English docs: the least-squares fit is ~0.21 tokens per
+# ASCII char, rounded up since under-counting risks overflowing the context
+# window. Non-ASCII (mostly CJK) density differs a lot between vocabularies,
+# so it is set per family: Qwen fits ~0.93 per char (rounded up to 1.0);
+# families without a calibration keep the conservative 1.5.
+_ASCII_TOKENS_PER_CHAR = 0.22
+_NON_ASCII_TOKENS_PER_CHAR = 1.5
+_FAMILY_NON_ASCII_TOKENS_PER_CHAR = {"qwen": 1.0}
+
+# Structural overhead per content block, in tokens
+_IMAGE_TOKENS = 1200
+_TOOL_USE_OVERHEAD = 50
+_TOOL_RESULT_OVERHEAD = 30
+_UNKNOWN_BLOCK_TOKENS = 10
+
+# Memoized counts per counter, and the length below which the approximate
+# counter is cheaper than a cache lookup (real tokenizers always go through
+# the cache: their per-call overhead dominates on short strings)
+_TEXT_CACHE_SIZE = 8192
+_MIN_CACHED_LEN = 64
+
+_OPENAI_PREFIXES = ("gpt-", "o1", "o3", "o4", "chatgpt-")
+_QWEN_PREFIXES = ("qwen", "qwq", "qvq")
+
+
+_CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def approximate_tokens(text: str, non_ascii_rate: float = _NON_ASCII_TOKENS_PER_CHAR) -> int:
+    """
+    Estimate the token count of text from its ASCII / non-ASCII character mix.
+
+    Both classes are counted in C (encode with errors='ignore'), so the cost
+    is a single pass over the string rather than a Python loop per character.
+
+    :param text: Text to estimate
+    :param non_ascii_rate: Tokens per non-ASCII char of the target vocabulary
+    """
+    if not text:
+        return 0
+    ascii_count = len(text.encode("ascii", "ignore"))
+    non_ascii = len(text) - ascii_count
+    return int(ascii_count * _ASCII_TOKENS_PER_CHAR + non_ascii * non_ascii_rate) + 1
+
+
+class TokenCounter:
+    """
+    Counts tokens of texts and agent messages with one tokenizer backend.
+
+    :param name: Backend label, e.g. "tiktoken:o200k_base", "qwen", "approx"
+    :param encode_len: Callable returning the token count of a string
+    :param exact: True when encode_len is the model's real tokenizer
+    """
+
+    def __init__(self, name: str, encode_len: Callable[[str], int], exact: bool = False):
+        self.name = name
+        self.exact = exact
+        self._encode_len = encode_len
+        # hash -> (length, count), least recently used first. Hits are
+        # lock-free (single OrderedDict calls are atomic); the lock only
+        # keeps inserts and evictions in step
+        self._cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def count_text(self, text: str) -> int:
+        """
+        Token count of a string (memoized).
+
+        The cache is keyed on the text's hash and checked against its length
+        rather than holding the text, so long-gone tool outputs are not kept
+        alive by it.
+        """
+        if not text:
+            return 0
+        size = len(text)
+        if not self.exact and size < _MIN_CACHED_LEN:
+            return self._encode_len(text)
+        key = hash(text)
+        cache = self._cache
+        entry = cache.get(key)
+        if entry is not None and entry[0] == size:
+            self._hits += 1
+            try:
+                cache.move_to_end(key)
+            except KeyError:  # evicted by another thread meanwhile
+                pass
+            return entry[1]
+        count = self._encode_len(text)
+        with self._cache_lock:
+            self._misses += 1
+            cache[key] = (size, count)
+            if len(cache) > _TEXT_CACHE_SIZE:
+                cache.popitem(last=False)
+        return count
+
+    def count_message(self, message: dict) -> int:
+        """
+        Token count of a message dict (role + str or block-list content).
+
+        Text is counted exactly (or by estimate, per backend); images and the
+        id/name framing of tool_use / tool_result blocks use fixed overheads.
+        """
+        content = message.get("content", "")
+        if isinstance(content, str):
+            return max(1, self.count_text(content))
+        if not isinstance(content, list):
+            return 1
+        total = 0
+        for part in content:
+            if not isinstance(part, dict):
+                continue
+            block_type = part.get("type", "")
+            if block_type == "text":
+                total += self.count_text(part.get("text", ""))
+            elif block_type == "image":
+                total += _IMAGE_TOKENS
+            elif block_type == "tool_use":
+                total += _TOOL_USE_OVERHEAD
+                input_data = part.get("input", {})
+                if isinstance(input_data, dict):
+                    total += self._count_json(input_data)
+            elif block_type == "tool_result":
+                total += _TOOL_RESULT_OVERHEAD
+                result_content = part.get("content", "")
+                if isinstance(result_content, str):
+                    total += self.count_text(result_content)
+            else:
+                total += _UNKNOWN_BLOCK_TOKENS
+        return max(1, total)
+
+    def count_messages(self, messages: List[dict]) -> int:
+        """Token count of a message list."""
+        return sum(self.count_message(m) for m in messages)
+
+    def _count_json(self, value: Any) -> int:
+        """
+        Token count of a JSON value without serializing it.
+
+        Leaf strings go through the text cache (tool inputs are reused turn
+        after turn); punctuation is charged one token per delimiter.
+        """
+        if isinstance(value, str):
+            return self.count_text(value) + 1
+        if isinstance(value, dict):
+            return 1 + sum(
+                self.count_text(str(k)) + 2 + self._count_json(v)
+                for k, v in value.items()
+            )
+        if isinstance(value, (list, tuple)):
+            return 1 + sum(self._count_json(v) + 1 for v in value)
+        if isinstance(value, bool) or value is None:
+            return 1
+        return self.count_text(str(value))
+
+    def cache_info(self):
+        """Hit / miss statistics of the text cache, shaped like lru_cache's."""
+        with self._cache_lock:
+            return _CacheInfo(self._hits, self._misses, _TEXT_CACHE_SIZE, len(self._cache))
+
+
+_APPROX = TokenCounter("approx", approximate_tokens)
+
+_counters: Dict[str, TokenCounter] = {"approx": _APPROX}
+_model_counters: Dict[str, TokenCounter] = {}
+_lock = threading.Lock()
+
+
+def _backend_for_model(model: str) -> str:
+    """Backend key for a model name: "tiktoken:<encoding>", "qwen" or "approx"."""
+    name = (model or "").lower()
+    if name.startswith(_QWEN_PREFIXES):
+        return "qwen"
+    if name.startswith(_OPENAI_PREFIXES):
+        try:
+            from tiktoken.model import encoding_name_for_model
+            return f"tiktoken:{encoding_name_for_model(name)}"
+        except ImportError:
+            return "approx"
+        except KeyError:
+            return "tiktoken:o200k_base"
+    return "approx"
+
+
+def _load_backend(key: str) -> Optional[TokenCounter]:
+    """Build the counter for a backend key; None when the tokenizer is unavailable."""
+    try:
+        if key.startswith("tiktoken:"):
+            import tiktoken
+            encoding = tiktoken.get_encoding(key.split(":", 1)[1])
+            return TokenCounter(key, lambda text: len(encoding.encode_ordinary(text)), exact=True)
+        if key == "qwen":
+            from dashscope import get_tokenizer
+            tokenizer = get_tokenizer("qwen-turbo")
+            return TokenCounter(key, lambda text: len(tokenizer.encode(text)), exact=True)
+    except ImportError:
+        logger.debug(f"[Tokenizer] {key} backend not installed, using approximate counts")
+    except Exception as e:
+        logger.warning(f"[Tokenizer] Failed to load {key} tokenizer, using approximate counts: {e}")
+    return None
+
+
+def _approx_backend(key: str) -> TokenCounter:
+    """Approximate counter for a backend key, with its family's calibration if any."""
+    rate = _FAMILY_NON_ASCII_TOKENS_PER_CHAR.get(key)
+    if rate is None:
+        return _APPROX
+    return TokenCounter(f"approx:{key}", functools.partial(approximate_tokens, non_ascii_rate=rate))
+
+
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """
+    Return the shared TokenCounter for a model name.
+
+    The tokenizer is loaded on first use of its family; a family whose
+    tokenizer fails to load falls back to the approximate counter (calibrated
+    for that family when possible) for the rest of the process instead of
+    retrying.
+    """
+    counter = _model_counters.get(model or "")
+    if counter is not None:
+        return counter
+    key = _backend_for_model(model)
+    with _lock:
+        counter = _counters.get(key)
+        if counter is None:
+            counter = _load_backend(key) or _approx_backend(key)
+            _counters[key] = counter
+            if counter.exact:
+                logger.debug(f"[Tokenizer] Loaded {key} for model {model}")
+        _model_counters[model or ""] = counter
+    return counter
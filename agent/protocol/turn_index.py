@@ -0,0 +1,228 @@
+"""
+Running turn index over an agent executor's message list.
+
+A turn opens at each real user query and holds everything up to the next
+one (assistant replies, tool_use, tool_result, injected hints). TurnIndex
+classifies every message once, when it is first seen, and keeps:
+
+- turn start offsets, so a message's turn is a bisect
+- per-turn token counts as prefix sums, so the tokens of any turn range
+  are one subtraction
+- the messages carrying large payloads, so truncation passes visit only those
+
+The index follows the list by identity. sync() picks up appended messages
+incrementally; a different list object, a shorter list or a replaced tail
+message makes it rebuild. In-place edits of one message's content are
+reported with refresh(i), anything else with invalidate().
+"""
+
+from __future__ import annotations
+
+import bisect
+from typing import Callable, Dict, List, Optional
+
+
+def is_user_query(msg: Dict) -> bool:
+    """
+    True for a real user query (opens a turn), False for tool_result
+    injections. A message with tool_result is always internal, even if it
+    also contains text blocks.
+    """
+    if msg.get("role") != "user":
+        return False
+    content = msg.get("content", [])
+    if isinstance(content, str):
+        return True
+    if not isinstance(content, list):
+        return False
+    has_text = False
+    for block in content:
+        if not isinstance(block, dict):
+            continue
+        btype = block.get("type")
+        if btype == "tool_result":
+            return False
+        if btype == "text":
+            has_text = True
+    return has_text
+
+
+def _json_chars(value) -> int:
+    """Upper bound on the serialized size of a JSON value, before escaping."""
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return 2 + sum(len(str(k)) + 4 + _json_chars(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(_json_chars(v) + 2 for v in value)
+    return len(str(value))
+
+
+def payload_chars(msg: Dict) -> int:
+    """
+    Size in chars of the largest text-bearing field of a message.
+
+    tool_use inputs are charged twice their unescaped JSON size (escaping
+    at most doubles common characters), so they are not under-reported
+    against a serialized-size limit.
+    """
+    content = msg.get("content", "")
+    if isinstance(content, str):
+        return len(content)
+    if not isinstance(content, list):
+        return 0
+    largest = 0
+    for block in content:
+        if not isinstance(block, dict):
+            continue
+        btype = block.get("type")
+        if btype == "text":
+            size = len(block.get("text", "") or "")
+        elif btype == "tool_result":
+            result = block.get("content", "")
+            size = len(result) if isinstance(result, str) else 0
+        elif btype == "tool_use" and isinstance(block.get("input"), dict):
+            size = 2 * _json_chars(block["input"])
+        else:
+            continue
+        largest = max(largest, size)
+    return largest
+
+
+class TurnIndex:
+    """
+    Turn boundaries and cumulative token counts for a message list.
+
+    :param count_tokens: Token count of one message
+    :param large_chars: Messages whose payload_chars exceeds this are tracked
+                        in large_messages()
+    """
+
+    def __init__(self, count_tokens: Callable[[Dict], int], large_chars: int = 10000):
+        self._count_tokens = count_tokens
+        self._large_chars = large_chars
+        self.invalidate()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def invalidate(self) -> None:
+        """Forget everything; the next sync() re-indexes the whole list."""
+        self._messages: Optional[List[Dict]] = None
+        self._tail: Optional[Dict] = None
+        self._length = 0
+        self._starts: List[int] = []
+        self._prefix: List[int] = [0]
+        self._msg_tokens: List[int] = []
+        self._large: List[int] = []
+        self._last_query: Optional[int] = None
+
+    def sync(self, messages: List[Dict]) -> "TurnIndex":
+        """Bring the index up to date with messages (incremental for appends)."""
+        n = self._length
+        if (messages is not self._messages or len(messages) < n
+                or (n and messages[n - 1] is not self._tail)):
+            self.invalidate()
+            self._messages = messages
+            n = 0
+        for i in range(n, len(messages)):
+            self._add(i, messages[i])
+        self._length = len(messages)
+        self._tail = messages[-1] if messages else None
+        return self
+
+    def refresh(self, i: int) -> None:
+        """Re-count message i after its content was edited in place (same role / turn role)."""
+        msg = self._messages[i]
+        delta = self._count_tokens(msg) - self._msg_tokens[i]
+        if delta:
+            self._msg_tokens[i] += delta
+            for k in range(self.turn_of(i) + 1, len(self._prefix)):
+                self._prefix[k] += delta
+        is_large = payload_chars(msg) > self._large_chars
+        pos = bisect.bisect_left(self._large, i)
+        tracked = pos < len(self._large) and self._large[pos] == i
+        if is_large and not tracked:
+            self._large.insert(pos, i)
+        elif tracked and not is_large:
+            del self._large[pos]
+
+    def drop_turns(self, count: int, messages: List[Dict]) -> None:
+        """
+        Rebase after the first count turns were removed from the front.
+
+        messages is the list now holding the remaining turns (the same list
+        trimmed in place, or a new one).
+        """
+        if count <= 0:
+            self.sync(messages)
+            return
+        if count >= len(self._starts):
+            self.invalidate()
+            self.sync(messages)
+            return
+        offset = self._starts[count]
+        base = self._prefix[count]
+        self._starts = [s - offset for s in self._starts[count:]]
+        self._prefix = [p - base for p in self._prefix[count:]]
+        self._msg_tokens = self._msg_tokens[offset:]
+        self._large = [i - offset for i in self._large if i >= offset]
+        if self._last_query is not None:
+            self._last_query = self._last_query - offset if self._last_query >= offset else None
+        self._length -= offset
+        self._messages = messages
+        self.sync(messages)
+
+    def _add(self, i: int, msg: Dict) -> None:
+        tokens = self._count_tokens(msg)
+        query = is_user_query(msg)
+        if i == 0 or query:
+            self._starts.append(i)
+            self._prefix.append(self._prefix[-1])
+        if query:
+            self._last_query = i
+        self._prefix[-1] += tokens
+        self._msg_tokens.append(tokens)
+        if payload_chars(msg) > self._large_chars:
+            self._large.append(i)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def turn_count(self) -> int:
+        return len(self._starts)
+
+    @property
+    def last_query(self) -> Optional[int]:
+        """Message offset of the latest user query (the current turn), or None."""
+        return self._last_query
+
+    def turn_start(self, t: int) -> int:
+        """Message offset where turn t starts (turn_count maps to the list end)."""
+        return self._starts[t] if t < len(self._starts) else self._length
+
+    def turn_of(self, i: int) -> int:
+        """Turn holding message offset i."""
+        return bisect.bisect_right(self._starts, i) - 1
+
+    def tokens(self, first: int = 0, last: Optional[int] = None) -> int:
+        """Total tokens of turns [first, last)."""
+        last = len(self._starts) if last is None else last
+        return self._prefix[last] - self._prefix[first]
+
+    def turns(self, first: int = 0, last: Optional[int] = None) -> List[Dict]:
+        """Turns [first, last) as {'messages': [...]} dicts."""
+        last = len(self._starts) if last is None else last
+        return [
+            {"messages": self._messages[self.turn_start(t):self.turn_start(t + 1)]}
+            for t in range(first, last)
+        ]
+
+    def large_messages(self, before: Optional[int] = None) -> List[int]:
+        """Offsets of messages with a payload over large_chars, optionally only before an offset."""
+        if before is None:
+            return list(self._large)
+        return self._large[:bisect.bisect_left(self._large, before)]
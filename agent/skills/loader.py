@@ -3,12 +3,29 @@ Skill loader for discovering and loading skills from directories.
 """
 
 import os
+import threading
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from common.log import logger
 from agent.skills.types import Skill, SkillEntry, LoadSkillsResult, SkillMetadata
 from agent.skills.frontmatter import parse_frontmatter, parse_metadata, parse_boolean_value, get_frontmatter_value
 
+# Parsed skill files shared by every SkillLoader in the process, keyed by path.
+# Each session's SkillManager rescans the skill directories on every refresh;
+# unchanged files (same mtime/size, same sibling config.json) reuse the parsed
+# result instead of re-reading and re-parsing their YAML frontmatter. Skill
+# objects are treated as read-only once loaded.
+_parsed_skills: Dict[str, Tuple[tuple, LoadSkillsResult]] = {}
+_parsed_skills_lock = threading.Lock()
+
+
+def _file_stamp(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
 
 class SkillLoader:
     """Loads skills from various directories."""
@@ -122,6 +139,22 @@ class SkillLoader:
         :param source: Source identifier
         :return: LoadSkillsResult
         """
+        # config.json next to the skill feeds linkai-agent's description
+        stamp = (source, _file_stamp(file_path),
+                 _file_stamp(os.path.join(os.path.dirname(file_path), "config.json")))
+        with _parsed_skills_lock:
+            cached = _parsed_skills.get(file_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        result = self._parse_skill_file(file_path, source)
+        if stamp[1] is not None:
+            with _parsed_skills_lock:
+                _parsed_skills[file_path] = (stamp, result)
+        return result
+
+    def _parse_skill_file(self, file_path: str, source: str) -> LoadSkillsResult:
+        """Read and parse a skill markdown file (uncached)."""
         diagnostics = []
         
         try:
@@ -115,7 +115,10 @@ class SkillManager:
             merged[name] = entry_dict
 
         self.skills_config = merged
-        self._save_skills_config()
+        # Refresh runs for every new session and every agent run; only touch
+        # the file when the merged view actually changed
+        if merged != saved or not os.path.exists(self._skills_config_path):
+            self._save_skills_config()
 
     def is_skill_enabled(self, name: str) -> bool:
         """
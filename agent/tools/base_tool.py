@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from common.log import logger
 import copy
 
@@ -38,6 +38,12 @@ class BaseTool:
     description: str = "Base tool"
     params: dict = {}  # Store JSON Schema
     model: Optional[Any] = None  # LLM model instance, type depends on bot implementation
+    # True for read-only tools that keep no per-call state on the instance;
+    # the agent may run several calls of them concurrently within one step
+    parallel_safe: bool = False
+    # Set by the agent before each call of a tool that runs alone; long-running
+    # tools may call it with progress data, emitted as tool_execution_update
+    on_update: Optional[Callable[[dict], None]] = None
 
     @classmethod
     def get_json_schema(cls) -> dict:
@@ -5,15 +5,55 @@ Bash tool - Execute bash commands
 import os
 import re
 import sys
-import subprocess
-import tempfile
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 
 from agent.tools.base_tool import BaseTool, ToolResult
-from agent.tools.utils.truncate import truncate_tail, format_size, DEFAULT_MAX_LINES, DEFAULT_MAX_BYTES
+from agent.tools.bash.runner import run_command, OutputBuffer, MAX_OUTPUT_BYTES
+from agent.tools.utils.truncate import format_size, DEFAULT_MAX_LINES, DEFAULT_MAX_BYTES
 from common.log import logger
 from common.utils import expand_path
 
+_env_lock = threading.Lock()
+_env_cache = {}  # path -> (mtime_ns, size, variables)
+
+
+def _load_env_file(path: str) -> Dict[str, str]:
+    """Variables of a .env file, parsed again only when the file changes."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    with _env_lock:
+        cached = _env_cache.get(path)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+    try:
+        from dotenv import dotenv_values
+        variables = {k: v for k, v in dotenv_values(path).items() if v is not None}
+        logger.debug(f"[Bash] Loaded {len(variables)} variables from {path}")
+    except ImportError:
+        logger.debug("[Bash] python-dotenv not installed, skipping .env loading")
+        variables = {}
+    except Exception as e:
+        logger.debug(f"[Bash] Failed to load .env: {e}")
+        return {}
+    with _env_lock:
+        _env_cache[path] = (st.st_mtime_ns, st.st_size, variables)
+    return variables
+
+
+def _command_env(dotenv_vars: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """
+    Environment for the command: None (inherit ours) when it already has the
+    .env variables, which the agent loads into os.environ at startup.
+    """
+    if all(os.environ.get(k) == v for k, v in dotenv_vars.items()):
+        return None
+    env = os.environ.copy()
+    env.update(dotenv_vars)
+    return env
+
 
 class Bash(BaseTool):
     """Tool for executing bash commands"""
@@ -21,7 +61,7 @@ class Bash(BaseTool):
     _IS_WIN = sys.platform == "win32"
 
     name: str = "bash"
-    description: str = f"""Execute a bash command in the current working directory. Returns stdout and stderr. Output is truncated to last {DEFAULT_MAX_LINES} lines or {DEFAULT_MAX_BYTES // 1024}KB (whichever is hit first). If truncated, full output is saved to a temp file.
+    description: str = f"""Execute a bash command in the current working directory. Returns stdout and stderr. Output is truncated to {DEFAULT_MAX_LINES} lines or {DEFAULT_MAX_BYTES // 1024}KB (whichever is hit first), keeping the last lines and, for very long output, the first ones too. If truncated, full output is saved to a temp file.
 {'''
 PLATFORM: Windows (cmd.exe). Do NOT use Unix-only commands like grep, head, tail, sed, awk.
 ''' if _IS_WIN else ''}
@@ -55,6 +95,8 @@ SAFETY:
         self.default_timeout = self.config.get("timeout", 30)
         # Enable safety mode by default (can be disabled in config)
         self.safety_mode = self.config.get("safety_mode", True)
+        # The command is killed once it writes more output than this
+        self.max_output_bytes = self.config.get("max_output_bytes", MAX_OUTPUT_BYTES)
 
     def execute(self, args: Dict[str, Any]) -> ToolResult:
         """
@@ -83,22 +125,8 @@ SAFETY:
                     f"Safety Warning: {warning}\n\nIf you believe this command is safe and necessary, please ask the user for confirmation first, explaining what the command does and why it's needed.")
 
         try:
-            # Prepare environment with .env file variables
-            env = os.environ.copy()
-            
-            # Load environment variables from ~/.cow/.env if it exists
-            env_file = expand_path("~/.cow/.env")
-            dotenv_vars = {}
-            if os.path.exists(env_file):
-                try:
-                    from dotenv import dotenv_values
-                    dotenv_vars = dotenv_values(env_file)
-                    env.update(dotenv_vars)
-                    logger.debug(f"[Bash] Loaded {len(dotenv_vars)} variables from {env_file}")
-                except ImportError:
-                    logger.debug("[Bash] python-dotenv not installed, skipping .env loading")
-                except Exception as e:
-                    logger.debug(f"[Bash] Failed to load .env: {e}")
+            dotenv_vars = _load_env_file(expand_path("~/.cow/.env"))
+            env = _command_env(dotenv_vars)
 
             # getuid() only exists on Unix-like systems
             if hasattr(os, 'getuid'):
@@ -108,30 +136,21 @@ SAFETY:
             
             # On Windows, convert $VAR references to %VAR% for cmd.exe
             if self._IS_WIN:
+                env = dict(env if env is not None else os.environ)
                 env["PYTHONIOENCODING"] = "utf-8"
                 command = self._convert_env_vars_for_windows(command, dotenv_vars)
                 if command and not command.strip().lower().startswith("chcp"):
                     command = f"chcp 65001 >nul 2>&1 && {command}"
 
-            result = subprocess.run(
-                command,
-                shell=True,
-                cwd=self.cwd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-                timeout=timeout,
-                env=env,
-            )
+            result = run_command(command, cwd=self.cwd, env=env, timeout=timeout,
+                                 max_bytes=self.max_output_bytes, on_progress=self.on_update)
             
             logger.debug(f"[Bash] Exit code: {result.returncode}")
-            logger.debug(f"[Bash] Stdout length: {len(result.stdout)}")
-            logger.debug(f"[Bash] Stderr length: {len(result.stderr)}")
+            logger.debug(f"[Bash] Stdout length: {result.stdout.total}")
+            logger.debug(f"[Bash] Stderr length: {result.stderr.total}")
             
             # Workaround for exit code 126 with no output
-            if result.returncode == 126 and not result.stdout and not result.stderr:
+            if result.returncode == 126 and not result.stdout.total and not result.stderr.total:
                 logger.warning(f"[Bash] Exit 126 with no output - trying alternative execution method")
                 # Try using argument list instead of shell=True
                 import shlex
@@ -139,82 +158,70 @@ SAFETY:
                     parts = shlex.split(command)
                     if len(parts) > 0:
                         logger.info(f"[Bash] Retrying with argument list: {parts[:3]}...")
-                        retry_result = subprocess.run(
-                            parts,
-                            cwd=self.cwd,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            text=True,
-                            encoding="utf-8",
-                            errors="replace",
-                            timeout=timeout,
-                            env=env
-                        )
-                        logger.debug(f"[Bash] Retry exit code: {retry_result.returncode}, stdout: {len(retry_result.stdout)}, stderr: {len(retry_result.stderr)}")
+                        retry_result = run_command(parts, cwd=self.cwd, env=env, timeout=timeout, shell=False,
+                                                   max_bytes=self.max_output_bytes, on_progress=self.on_update)
+                        logger.debug(f"[Bash] Retry exit code: {retry_result.returncode}, stdout: {retry_result.stdout.total}, stderr: {retry_result.stderr.total}")
                         
                         # If retry succeeded, use retry result
-                        if retry_result.returncode == 0 or retry_result.stdout or retry_result.stderr:
+                        if retry_result.returncode == 0 or retry_result.stdout.total or retry_result.stderr.total:
                             result = retry_result
                         else:
                             # Both attempts failed - check if this is openai-image-vision skill
                             if 'openai-image-vision' in command or 'vision.sh' in command:
-                                # Create a mock result with helpful error message
-                                from types import SimpleNamespace
-                                result = SimpleNamespace(
-                                    returncode=1,
-                                    stdout='{"error": "图片无法解析", "reason": "该图片格式可能不受支持，或图片文件存在问题", "suggestion": "请尝试其他图片"}',
-                                    stderr=''
-                                )
+                                # Replace the result with a helpful error message
+                                result.returncode = 1
+                                result.stdout = OutputBuffer()
+                                result.stdout.write('{"error": "图片无法解析", "reason": "该图片格式可能不受支持，或图片文件存在问题", "suggestion": "请尝试其他图片"}'.encode("utf-8"))
                                 logger.info(f"[Bash] Converted exit 126 to user-friendly image error message for vision skill")
                 except Exception as retry_err:
                     logger.warning(f"[Bash] Retry failed: {retry_err}")
 
             # When command succeeds with stdout, keep output clean (stderr goes to server log only).
             # When command fails or stdout is empty, include stderr so the agent can diagnose.
-            if result.returncode == 0 and result.stdout.strip():
-                output = result.stdout
-                if result.stderr:
-                    logger.info(f"[Bash] stderr (not forwarded): {result.stderr[:500]}")
+            stdout_text, notice = result.stdout.render()
+            if result.returncode == 0 and stdout_text.strip():
+                output_text = stdout_text
+                if result.stderr.total:
+                    logger.info(f"[Bash] stderr (not forwarded): {result.stderr.text()[:500]}")
+            elif result.stderr.total:
+                # stderr usually holds the error, keep it whole and give stdout the rest of the window
+                stderr_text, stderr_notice = result.stderr.render()
+                stdout_text, notice = result.stdout.render(
+                    max_lines=max(1, DEFAULT_MAX_LINES - stderr_text.count("\n") - 1),
+                    max_bytes=max(1024, DEFAULT_MAX_BYTES - len(stderr_text.encode("utf-8")) - 1))
+                output_text = stdout_text + "\n" + stderr_text
+                if stderr_notice:
+                    notice = f"{notice + '; ' if notice else ''}stderr: {stderr_notice}"
             else:
-                output = result.stdout
-                if result.stderr:
-                    output += "\n" + result.stderr
-
-            # Check if we need to save full output to temp file
-            temp_file_path = None
-            total_bytes = len(output.encode('utf-8'))
-
-            if total_bytes > DEFAULT_MAX_BYTES:
-                # Save full output to temp file
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.log', prefix='bash-') as f:
-                    f.write(output)
-                    temp_file_path = f.name
-
-            # Apply tail truncation
-            truncation = truncate_tail(output)
-            output_text = truncation.content or "(no output)"
+                output_text = stdout_text
+            output_text = output_text or "(no output)"
 
             # Build result
             details = {}
 
-            if truncation.truncated:
-                details["truncation"] = truncation.to_dict()
-                if temp_file_path:
-                    details["full_output_path"] = temp_file_path
-
-                # Build notice
-                start_line = truncation.total_lines - truncation.output_lines + 1
-                end_line = truncation.total_lines
-
-                if truncation.last_line_partial:
-                    # Edge case: last line alone > 30KB
-                    last_line = output.split('\n')[-1] if output else ""
-                    last_line_size = format_size(len(last_line.encode('utf-8')))
-                    output_text += f"\n\n[Showing last {format_size(truncation.output_bytes)} of line {end_line} (line is {last_line_size}). Full output: {temp_file_path}]"
-                elif truncation.truncated_by == "lines":
-                    output_text += f"\n\n[Showing lines {start_line}-{end_line} of {truncation.total_lines}. Full output: {temp_file_path}]"
-                else:
-                    output_text += f"\n\n[Showing lines {start_line}-{end_line} of {truncation.total_lines} ({format_size(DEFAULT_MAX_BYTES)} limit). Full output: {temp_file_path}]"
+            if notice:
+                details["truncation"] = {
+                    "total_bytes": result.stdout.total + result.stderr.total,
+                    "total_lines": result.stdout.lines,
+                }
+                if result.full_output_path:
+                    details["full_output_path"] = result.full_output_path
+                    notice += f". Full output: {result.full_output_path}"
+                output_text += f"\n\n[{notice}]"
+
+            if result.output_capped:
+                output_text += (f"\n\nCommand killed after writing {format_size(self.max_output_bytes)} of output. "
+                                f"Redirect large output to a file and inspect it with head, tail or grep.")
+                return ToolResult.fail({
+                    "output": output_text,
+                    "exit_code": result.returncode,
+                    "details": details if details else None
+                })
+
+            if result.timed_out:
+                if output_text == "(no output)":
+                    return ToolResult.fail(f"Error: Command timed out after {timeout} seconds")
+                return ToolResult.fail(f"Error: Command timed out after {timeout} seconds. Output so far:\n{output_text}")
 
             # Check exit code
             if result.returncode != 0:
@@ -231,8 +238,6 @@ SAFETY:
                 "details": details if details else None
             })
 
-        except subprocess.TimeoutExpired:
-            return ToolResult.fail(f"Error: Command timed out after {timeout} seconds")
         except Exception as e:
             return ToolResult.fail(f"Error executing command: {str(e)}")
 
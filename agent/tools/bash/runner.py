@@ -0,0 +1,299 @@
+"""
+Run a command while streaming its output.
+
+stdout and stderr are read by one thread each, as the command produces
+them, into OutputBuffers that keep only the first and last bytes of each
+stream. Once the output outgrows what the tool result can show, all of it
+is also written to a temp file. The calling thread waits for the process,
+reports progress to a callback, and kills the whole process tree on
+timeout or when the output passes max_bytes.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Tuple, Union
+
+from agent.tools.utils.truncate import truncate_tail, format_size, DEFAULT_MAX_LINES, DEFAULT_MAX_BYTES
+from common.log import logger
+
+_IS_WIN = sys.platform == "win32"
+
+READ_SIZE = 64 * 1024
+HEAD_BYTES = 8 * 1024  # kept from the start of a stream, the rest of the window is its tail
+HEAD_LINES = 200
+MAX_OUTPUT_BYTES = 32 * 1024 * 1024  # the command is killed past this much output
+POLL_INTERVAL = 0.05
+UPDATE_INTERVAL = 1.0  # seconds between progress callbacks
+UPDATE_TAIL_BYTES = 2 * 1024  # recent output sent with each progress callback
+READ_GRACE = 0.5  # wait for output after exit, background jobs may hold the pipes open
+
+
+class OutputBuffer:
+    """The first head_bytes and the last tail_bytes written to a stream."""
+
+    def __init__(self, head_bytes: int = HEAD_BYTES, tail_bytes: int = DEFAULT_MAX_BYTES - HEAD_BYTES):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self._tail = deque()
+        self._tail_size = 0
+        self.total = 0
+        self.newlines = 0
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        self.newlines += data.count(b"\n")
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+            if not data:
+                return
+        self._tail.append(data)
+        self._tail_size += len(data)
+        # drop whole chunks while the rest still covers tail_bytes
+        while self._tail_size - len(self._tail[0]) >= self.tail_bytes:
+            self._tail_size -= len(self._tail.popleft())
+
+    @property
+    def tail(self) -> bytes:
+        data = b"".join(self._tail)
+        return data[-self.tail_bytes:] if len(data) > self.tail_bytes else data
+
+    @property
+    def complete(self) -> bool:
+        """Whether nothing was dropped between head and tail."""
+        return self.total <= self.head_bytes + self.tail_bytes
+
+    @property
+    def lines(self) -> int:
+        return self.newlines + 1 if self.total else 0
+
+    def text(self) -> str:
+        """Everything kept, only the whole output when complete."""
+        return (bytes(self.head) + self.tail).decode("utf-8", errors="replace")
+
+    def render(self, max_lines: int = DEFAULT_MAX_LINES, max_bytes: int = DEFAULT_MAX_BYTES) -> Tuple[str, str]:
+        """
+        Output for the tool result: (text, notice).
+
+        The whole output if it fits max_lines / max_bytes and notice is "".
+        Otherwise the last lines, or when the middle was dropped the first
+        HEAD_LINES lines and the last ones with a marker between them, and
+        notice describes what is shown.
+        """
+        if self.complete:
+            output = self.text()
+            truncation = truncate_tail(output, max_lines, max_bytes)
+            if not truncation.truncated:
+                return output, ""
+            start_line = truncation.total_lines - truncation.output_lines + 1
+            end_line = truncation.total_lines
+            if truncation.last_line_partial:
+                last_line_size = format_size(len(output.split("\n")[-1].encode("utf-8")))
+                notice = (f"Showing last {format_size(truncation.output_bytes)} of line {end_line} "
+                          f"(line is {last_line_size})")
+            elif truncation.truncated_by == "lines":
+                notice = f"Showing lines {start_line}-{end_line} of {truncation.total_lines}"
+            else:
+                notice = (f"Showing lines {start_line}-{end_line} of {truncation.total_lines} "
+                          f"({format_size(max_bytes)} limit)")
+            return truncation.content, notice
+
+        # keep whole lines at the cut: the head up to its last newline, the tail after its first
+        head = bytes(self.head)
+        if b"\n" in head:
+            head = head[:head.rindex(b"\n")]
+        head_lines = head.decode("utf-8", errors="replace").split("\n")[:HEAD_LINES]
+        head_text = "\n".join(head_lines)
+        tail = self.tail
+        if b"\n" in tail:
+            tail = tail[tail.index(b"\n") + 1:]
+        head_size = len(head_text.encode("utf-8"))
+        truncation = truncate_tail(tail.decode("utf-8", errors="replace"),
+                                   max(1, max_lines - len(head_lines)), max(1024, max_bytes - head_size))
+        omitted = self.total - head_size - truncation.output_bytes
+        text = f"{head_text}\n\n... [{format_size(omitted)} omitted] ...\n\n{truncation.content}"
+        end_line = self.lines
+        notice = (f"Showing lines 1-{len(head_lines)} and {end_line - truncation.output_lines + 1}-{end_line} "
+                  f"of {end_line} ({format_size(self.total)} total)")
+        return text, notice
+
+
+class CommandResult:
+    """Outcome of run_command."""
+
+    def __init__(self, returncode: Optional[int], stdout: OutputBuffer, stderr: OutputBuffer,
+                 timed_out: bool = False, output_capped: bool = False, full_output_path: Optional[str] = None):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.output_capped = output_capped
+        self.full_output_path = full_output_path
+
+
+class _Capture:
+    """Output of both streams, written from the reader threads."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.stdout = OutputBuffer()
+        self.stderr = OutputBuffer(HEAD_BYTES // 4, DEFAULT_MAX_BYTES // 4)
+        self.recent = OutputBuffer(0, UPDATE_TAIL_BYTES)
+        self.total = 0
+        self.capped = threading.Event()
+        self.spill_path = None
+        self._spill = None
+        self._pending = []  # both streams in arrival order, until they overflow the window
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def write(self, buffer: OutputBuffer, data: bytes):
+        with self._lock:
+            if self._closed or self.capped.is_set():
+                return
+            if self.total + len(data) > self.max_bytes:
+                data = data[:self.max_bytes - self.total]
+                self.capped.set()
+            self.total += len(data)
+            buffer.write(data)
+            self.recent.write(data)
+            if self._spill is None:
+                self._pending.append(data)
+                if self.total > DEFAULT_MAX_BYTES:
+                    self._open_spill()
+            elif self._spill:
+                self._spill.write(data)
+
+    def _open_spill(self):
+        try:
+            fd, self.spill_path = tempfile.mkstemp(suffix=".log", prefix="bash-")
+            self._spill = os.fdopen(fd, "wb")
+            self._spill.writelines(self._pending)
+        except OSError as e:
+            logger.warning(f"[Bash] Failed to save full output: {e}")
+            self.spill_path = None
+            self._spill = False  # keep going without a copy
+        self._pending = None
+
+    def close(self):
+        """
+        Stop taking output. Readers still running after the grace period
+        write nothing more, so the buffers can be rendered without the lock.
+        """
+        with self._lock:
+            self._closed = True
+            if self._spill:
+                self._spill.close()
+
+    def progress(self, elapsed: float) -> dict:
+        with self._lock:
+            recent = self.recent.tail
+            lines = self.stdout.newlines + self.stderr.newlines
+            total = self.total
+        if b"\n" in recent[:-1] and total > len(recent):
+            recent = recent[recent.index(b"\n") + 1:]  # drop the partial first line
+        return {
+            "output": recent.decode("utf-8", errors="replace"),
+            "bytes": total,
+            "lines": lines,
+            "elapsed": round(elapsed, 1),
+        }
+
+
+def _read_stream(stream, capture: _Capture, buffer: OutputBuffer):
+    try:
+        while True:
+            data = stream.read1(READ_SIZE)
+            if not data:
+                break
+            capture.write(buffer, data)
+    except (OSError, ValueError):
+        pass  # pipe closed under us
+
+
+def _kill_tree(proc: subprocess.Popen):
+    """Kill the command and everything it started."""
+    try:
+        if _IS_WIN:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+
+def run_command(command: Union[str, List[str]], cwd: str, env: Optional[dict], timeout: float,
+                shell: bool = True, max_bytes: int = MAX_OUTPUT_BYTES,
+                on_progress: Optional[Callable[[dict], None]] = None) -> CommandResult:
+    """
+    Run a command in its own process group, reading its output as it comes.
+
+    :param on_progress: called every UPDATE_INTERVAL seconds while new output
+        arrives, with the recent output, bytes / lines so far and elapsed time
+    """
+    kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if _IS_WIN else {"start_new_session": True}
+    proc = subprocess.Popen(
+        command,
+        shell=shell,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        **kwargs,
+    )
+    capture = _Capture(max_bytes)
+    readers = [
+        threading.Thread(target=_read_stream, args=(proc.stdout, capture, capture.stdout), daemon=True),
+        threading.Thread(target=_read_stream, args=(proc.stderr, capture, capture.stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    start = time.monotonic()
+    deadline = start + timeout
+    last_update, last_total = start, 0
+    timed_out = False
+    try:
+        while True:
+            try:
+                proc.wait(timeout=POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            now = time.monotonic()
+            if capture.capped.is_set() or now >= deadline:
+                timed_out = not capture.capped.is_set()
+                _kill_tree(proc)
+                proc.wait()
+                break
+            if on_progress and now - last_update >= UPDATE_INTERVAL and capture.total != last_total:
+                last_update, last_total = now, capture.total
+                try:
+                    on_progress(capture.progress(now - start))
+                except Exception as e:
+                    logger.debug(f"[Bash] Progress callback failed: {e}")
+    except BaseException:
+        _kill_tree(proc)
+        raise
+    finally:
+        grace = time.monotonic() + READ_GRACE
+        for reader in readers:
+            reader.join(max(0.0, grace - time.monotonic()))
+        capture.close()
+
+    return CommandResult(proc.returncode, capture.stdout, capture.stderr, timed_out=timed_out,
+                         output_capped=capture.capped.is_set(), full_output_path=capture.spill_path)
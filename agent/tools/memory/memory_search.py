@@ -12,6 +12,7 @@ class MemorySearchTool(BaseTool):
     """Tool for searching agent memory"""
     
     name: str = "memory_search"
+    parallel_safe: bool = True
     description: str = (
         "Search agent's long-term memory using semantic and keyword search. "
         "Use this to recall past conversations, preferences, and knowledge."
@@ -0,0 +1,107 @@
+"""
+Sparse line-offset index for serving line windows of large text files.
+
+The index stores, for every BLOCK_SIZE bytes of a file, how many newlines
+come before that block. Locating line N is a bisect plus one block read,
+and the lines are then read forward from there, so an offset/limit window
+(including a window counted from the end) costs I/O and memory in
+proportion to the window, not to the file. Building the index is one
+sequential pass that only counts newlines.
+
+Indexes are cached per (path, size, mtime), so a file that changes gets a
+new index and repeated reads of the same file skip the pass.
+"""
+
+import bisect
+import os
+from array import array
+from typing import List, Tuple
+
+from common.expired_dict import ExpiredDict
+
+BLOCK_SIZE = 64 * 1024
+_BOM = b"\xef\xbb\xbf"
+
+_cache = ExpiredDict(600, max_size=64)
+
+
+class LineIndex:
+    """
+    Newline counts at fixed byte blocks of one version of a file.
+
+    Lines follow str.split('\\n') of the decoded text: a file with N newlines
+    has N + 1 lines (the last one empty when the file ends with a newline).
+    A UTF-8 BOM is skipped and '\\r\\n' endings are read as '\\n'.
+    """
+
+    def __init__(self, path: str, block_size: int = BLOCK_SIZE):
+        self.path = path
+        self.block_size = block_size
+        self.starts = array("q")  # newlines before each block
+        newlines = 0
+        with open(path, "rb") as f:
+            head = f.read(block_size)
+            self.bom = len(_BOM) if head.startswith(_BOM) else 0
+            block = head
+            while block:
+                self.starts.append(newlines)
+                newlines += block.count(b"\n")
+                block = f.read(block_size)
+        self.newlines = newlines
+
+    @property
+    def total_lines(self) -> int:
+        return self.newlines + 1
+
+    def line_offset(self, f, line: int) -> int:
+        """Byte offset where 0-indexed line starts (line < total_lines)."""
+        if line == 0:
+            return self.bom
+        # Line N starts right after the N-th newline; find the block holding it
+        block = bisect.bisect_left(self.starts, line) - 1
+        f.seek(block * self.block_size)
+        data = f.read(self.block_size)
+        k = line - self.starts[block]
+        pieces = data.split(b"\n", k)
+        return block * self.block_size + sum(map(len, pieces[:k])) + k
+
+    def read_lines(self, f, start: int, count: int, max_chars: int) -> Tuple[List[str], bool, bool]:
+        """
+        Read up to count lines from 0-indexed start, stopping before max_chars is exceeded.
+
+        :return: (lines, capped, partial) - capped when max_chars ended the
+                 window early; partial when the first line alone was longer
+                 and only its first max_chars characters are returned
+        """
+        f.seek(self.line_offset(f, start))
+        lines = []
+        chars = 0
+        for _ in range(count):
+            # Bound every read by the characters left, so one huge line cannot be loaded whole
+            raw = f.readline(4 * (max_chars - chars) + 4)
+            if raw and not raw.endswith(b"\n") and f.read(1):
+                if lines:
+                    return lines, True, False
+                text = raw.decode("utf-8", errors="ignore")[:max_chars]
+                return [text], True, True
+            text = raw.decode("utf-8")
+            if text.endswith("\n"):
+                text = text[:-2] if text.endswith("\r\n") else text[:-1]
+            chars += len(text) + 1
+            if chars > max_chars + 1:
+                if not lines:
+                    return [text[:max_chars]], True, True
+                return lines, True, False
+            lines.append(text)
+        return lines, False, False
+
+
+def get_line_index(path: str) -> LineIndex:
+    """Cached LineIndex of path, rebuilt when the file's size or mtime changes."""
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    index = _cache.get(key)
+    if index is None:
+        index = LineIndex(path)
+        _cache[key] = index
+    return index
@@ -8,7 +8,9 @@ from typing import Dict, Any
 from pathlib import Path
 
 from agent.tools.base_tool import BaseTool, ToolResult
+from agent.tools.read.line_index import get_line_index
 from agent.tools.utils.truncate import truncate_head, format_size, DEFAULT_MAX_LINES, DEFAULT_MAX_BYTES
+from common.document_cache import get_document_cache
 from common.utils import expand_path
 
 
@@ -16,6 +18,7 @@ class Read(BaseTool):
     """Tool for reading file contents"""
     
     name: str = "read"
+    parallel_safe: bool = True
     description: str = f"Read or inspect file contents. For text/PDF files, returns content (truncated to {DEFAULT_MAX_LINES} lines or {DEFAULT_MAX_BYTES // 1024}KB). For images/videos/audio, returns metadata only (file info, size, type). Use offset/limit for large text files."
     
     params: dict = {
@@ -229,34 +232,8 @@ class Read(BaseTool):
         :return: File content or error message
         """
         try:
-            # Check file size first
-            file_size = os.path.getsize(absolute_path)
-            MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-            
-            if file_size > MAX_FILE_SIZE:
-                # File too large, return metadata only
-                return ToolResult.success({
-                    "type": "file_to_send",
-                    "file_type": "document",
-                    "path": absolute_path,
-                    "size": file_size,
-                    "size_formatted": format_size(file_size),
-                    "message": f"文件过大 ({format_size(file_size)} > 50MB)，无法读取内容。文件路径: {absolute_path}"
-                })
-            
-            # Read file (utf-8-sig strips BOM automatically on Windows)
-            with open(absolute_path, 'r', encoding='utf-8-sig') as f:
-                content = f.read()
-            
-            # Truncate content if too long (20K characters max for model context)
-            MAX_CONTENT_CHARS = 20 * 1024  # 20K characters
-            content_truncated = False
-            if len(content) > MAX_CONTENT_CHARS:
-                content = content[:MAX_CONTENT_CHARS]
-                content_truncated = True
-            
-            all_lines = content.split('\n')
-            total_file_lines = len(all_lines)
+            index = get_line_index(absolute_path)
+            total_file_lines = index.total_lines
             
             # Apply offset (if specified)
             start_line = 0
@@ -276,43 +253,53 @@ class Read(BaseTool):
             start_line_display = start_line + 1  # For display (1-indexed)
             
             # If user specified limit, use it
-            selected_content = content
             user_limited_lines = None
+            end_line = total_file_lines
             if limit is not None:
-                end_line = min(start_line + limit, total_file_lines)
-                selected_content = '\n'.join(all_lines[start_line:end_line])
+                end_line = min(start_line + max(limit, 0), total_file_lines)
                 user_limited_lines = end_line - start_line
-            elif offset is not None:
-                selected_content = '\n'.join(all_lines[start_line:])
+            
+            # Read only the window (one line past the line limit, so truncation
+            # still notices there is more), capped at 20K characters for model context
+            MAX_CONTENT_CHARS = 20 * 1024  # 20K characters
+            with open(absolute_path, 'rb') as f:
+                lines, capped, partial = index.read_lines(
+                    f, start_line, min(end_line - start_line, DEFAULT_MAX_LINES + 1), MAX_CONTENT_CHARS
+                )
+            selected_content = '\n'.join(lines)
             
             # Apply truncation (considering line count and byte limits)
             truncation = truncate_head(selected_content)
             
             output_text = ""
             details = {}
-            
-            # Add truncation warning if content was truncated
-            if content_truncated:
-                output_text = f"[文件内容已截断到前 {format_size(MAX_CONTENT_CHARS)}，完整文件大小: {format_size(file_size)}]\n\n"
-            
-            if truncation.first_line_exceeds_limit:
+            output_lines = truncation.output_lines
+            
+            if partial:
+                # First line alone is longer than the character cap
+                output_text = lines[0].encode('utf-8')[:DEFAULT_MAX_BYTES].decode('utf-8', errors='ignore')
+                output_lines = 1
+                output_text += f"\n\n[Line {start_line_display} is longer than {format_size(MAX_CONTENT_CHARS)}, showing its beginning. Use bash tool to read the rest.]"
+            elif truncation.first_line_exceeds_limit:
                 # First line exceeds 30KB limit
-                first_line_size = format_size(len(all_lines[start_line].encode('utf-8')))
+                first_line_size = format_size(len(lines[0].encode('utf-8')))
                 output_text = f"[Line {start_line_display} is {first_line_size}, exceeds {format_size(DEFAULT_MAX_BYTES)} limit. Use bash tool to read: head -c {DEFAULT_MAX_BYTES} {display_path} | tail -n +{start_line_display}]"
                 details["truncation"] = truncation.to_dict()
-            elif truncation.truncated:
+            elif truncation.truncated or capped:
                 # Truncation occurred
                 end_line_display = start_line_display + truncation.output_lines - 1
                 next_offset = end_line_display + 1
                 
                 output_text = truncation.content
                 
-                if truncation.truncated_by == "lines":
+                if truncation.truncated and truncation.truncated_by == "lines":
                     output_text += f"\n\n[Showing lines {start_line_display}-{end_line_display} of {total_file_lines}. Use offset={next_offset} to continue.]"
                 else:
-                    output_text += f"\n\n[Showing lines {start_line_display}-{end_line_display} of {total_file_lines} ({format_size(DEFAULT_MAX_BYTES)} limit). Use offset={next_offset} to continue.]"
+                    max_size = DEFAULT_MAX_BYTES if truncation.truncated else MAX_CONTENT_CHARS
+                    output_text += f"\n\n[Showing lines {start_line_display}-{end_line_display} of {total_file_lines} ({format_size(max_size)} limit). Use offset={next_offset} to continue.]"
                 
-                details["truncation"] = truncation.to_dict()
+                if truncation.truncated:
+                    details["truncation"] = truncation.to_dict()
             elif user_limited_lines is not None and start_line + user_limited_lines < total_file_lines:
                 # User specified limit, more content available, but no truncation
                 remaining = total_file_lines - (start_line + user_limited_lines)
@@ -328,7 +315,7 @@ class Read(BaseTool):
                 "content": output_text,
                 "total_lines": total_file_lines,
                 "start_line": start_line_display,
-                "output_lines": truncation.output_lines
+                "output_lines": output_lines
             }
             
             if details:
@@ -347,7 +334,7 @@ class Read(BaseTool):
         try:
             text = self._extract_office_text(absolute_path, file_ext)
         except ImportError as e:
-            return ToolResult.fail(str(e))
+            return ToolResult.fail(f"Error: {e}")
         except Exception as e:
             return ToolResult.fail(f"Error reading Office document: {e}")
 
@@ -405,148 +392,158 @@ class Read(BaseTool):
 
     @staticmethod
     def _extract_office_text(absolute_path: str, file_ext: str) -> str:
-        """Extract plain text from an Office document."""
-        if file_ext in ('.docx', '.doc'):
-            try:
-                from docx import Document
-            except ImportError:
-                raise ImportError("Error: python-docx library not installed. Install with: pip install python-docx")
-            doc = Document(absolute_path)
-            paragraphs = [p.text for p in doc.paragraphs]
-            for table in doc.tables:
-                for row in table.rows:
-                    paragraphs.append('\t'.join(cell.text for cell in row.cells))
+        """Extract plain text from an Office document (parsed once per file version, see DocumentCache)."""
+        doc = get_document_cache().open(absolute_path)
+        units = list(doc.units())
+
+        if doc.kind == "docx":
+            unit = units[0]
+            paragraphs = unit["paragraphs"] + ['\t'.join(row) for row in unit["table_rows"]]
             return '\n'.join(paragraphs)
 
-        if file_ext in ('.xlsx', '.xls'):
-            try:
-                from openpyxl import load_workbook
-            except ImportError:
-                raise ImportError("Error: openpyxl library not installed. Install with: pip install openpyxl")
-            wb = load_workbook(absolute_path, read_only=True, data_only=True)
+        if doc.kind == "xlsx":
             parts = []
-            for ws in wb.worksheets:
-                parts.append(f"--- Sheet: {ws.title} ---")
-                for row in ws.iter_rows(values_only=True):
-                    parts.append('\t'.join(str(c) if c is not None else '' for c in row))
-            wb.close()
+            for sheet in units:
+                parts.append(f"--- Sheet: {sheet['title']} ---")
+                parts.extend('\t'.join(row) for row in sheet["rows"])
             return '\n'.join(parts)
 
-        if file_ext in ('.pptx', '.ppt'):
-            try:
-                from pptx import Presentation
-            except ImportError:
-                raise ImportError("Error: python-pptx library not installed. Install with: pip install python-pptx")
-            prs = Presentation(absolute_path)
+        if doc.kind == "pptx":
             parts = []
-            for i, slide in enumerate(prs.slides, 1):
+            for i, slide in enumerate(units, 1):
                 parts.append(f"--- Slide {i} ---")
-                for shape in slide.shapes:
-                    if shape.has_text_frame:
-                        for para in shape.text_frame.paragraphs:
-                            text = para.text.strip()
-                            if text:
-                                parts.append(text)
+                parts.extend(slide["paragraphs"])
             return '\n'.join(parts)
 
         return ""
 
+    @staticmethod
+    def _iter_pdf_lines(doc):
+        """
+        (page number, line) of the PDF text as '--- Page n ---' blocks separated by
+        a blank line, skipping blank pages; pages are extracted as they are reached.
+        """
+        first = True
+        for page_num, page in enumerate(doc.units(), 1):
+            page_text = page["text"]
+            if not page_text.strip():
+                continue
+            if not first:
+                yield page_num, ""
+            first = False
+            yield page_num, f"--- Page {page_num} ---"
+            for line in page_text.split('\n'):
+                yield page_num, line
+
     def _read_pdf(self, absolute_path: str, display_path: str, offset: int = None, limit: int = None) -> ToolResult:
         """
         Read PDF file content
         
+        Pages are extracted (and cached) only as far as the requested window
+        reaches, so total_lines is reported once the whole document has been
+        extracted; until then the continue hint names the last page shown.
+        
         :param absolute_path: Absolute path to the file
         :param display_path: Path to display
-        :param offset: Starting line number (1-indexed)
+        :param offset: Starting line number (1-indexed, negative counts from the end)
         :param limit: Maximum number of lines to read
         :return: PDF text content or error message
         """
         try:
-            # Try to import pypdf
             try:
-                from pypdf import PdfReader
-            except ImportError:
-                return ToolResult.fail(
-                    "Error: pypdf library not installed. Install with: pip install pypdf"
-                )
+                doc = get_document_cache().open(absolute_path)
+            except ImportError as e:
+                return ToolResult.fail(f"Error: {e}")
+            total_pages = doc.count
             
-            # Read PDF
-            reader = PdfReader(absolute_path)
-            total_pages = len(reader.pages)
+            lines = self._iter_pdf_lines(doc)
+            total_lines = None
+            start_line = 0
+            if offset is not None and offset < 0:
+                # Counting from the end needs every page
+                lines = list(lines)
+                total_lines = len(lines)
+                start_line = max(0, total_lines + offset)
+                lines = iter(lines)
+            elif offset is not None:
+                start_line = max(0, offset - 1)
             
-            # Extract text from all pages
-            text_parts = []
-            for page_num, page in enumerate(reader.pages, 1):
-                page_text = page.extract_text()
-                if page_text.strip():
-                    text_parts.append(f"--- Page {page_num} ---\n{page_text}")
+            # Collect the window: up to limit lines, stopping once the truncation
+            # limits are exceeded, plus one line to tell whether more follows
+            want = DEFAULT_MAX_LINES + 1 if limit is None else min(max(limit, 0), DEFAULT_MAX_LINES + 1)
+            window, pages = [], []
+            window_bytes = 0
+            seen = 0
+            has_more = False
+            for page_num, line in lines:
+                seen += 1
+                if seen <= start_line:
+                    continue
+                if len(window) >= want or window_bytes > DEFAULT_MAX_BYTES:
+                    has_more = True
+                    break
+                window.append(line)
+                pages.append(page_num)
+                window_bytes += len(line.encode('utf-8')) + 1
+            else:
+                total_lines = seen
+            if total_lines is None and doc.complete:
+                # Every page is already extracted: counting the rest is cheap
+                total_lines = seen + sum(1 for _ in lines)
             
-            if not text_parts:
+            if total_lines == 0:
                 return ToolResult.success({
                     "content": f"[PDF file with {total_pages} pages, but no text content could be extracted]",
                     "total_pages": total_pages,
                     "message": "PDF may contain only images or be encrypted"
                 })
-            
-            # Merge all text
-            full_content = "\n\n".join(text_parts)
-            all_lines = full_content.split('\n')
-            total_lines = len(all_lines)
-            
-            # Apply offset and limit (same logic as text files)
-            start_line = 0
-            if offset is not None:
-                start_line = max(0, offset - 1)
-                if start_line >= total_lines:
-                    return ToolResult.fail(
-                        f"Error: Offset {offset} is beyond end of content ({total_lines} lines total)"
-                    )
+            if not window and total_lines is not None and start_line >= total_lines:
+                return ToolResult.fail(
+                    f"Error: Offset {offset} is beyond end of content ({total_lines} lines total)"
+                )
             
             start_line_display = start_line + 1
             
-            selected_content = full_content
-            user_limited_lines = None
-            if limit is not None:
-                end_line = min(start_line + limit, total_lines)
-                selected_content = '\n'.join(all_lines[start_line:end_line])
-                user_limited_lines = end_line - start_line
-            elif offset is not None:
-                selected_content = '\n'.join(all_lines[start_line:])
-            
             # Apply truncation
-            truncation = truncate_head(selected_content)
+            truncation = truncate_head('\n'.join(window))
             
             output_text = ""
             details = {}
+            end_line_display = start_line_display + truncation.output_lines - 1
+            next_offset = end_line_display + 1
+            if total_lines is not None:
+                position = f"of {total_lines}"
+            else:
+                last_page = pages[truncation.output_lines - 1] if truncation.output_lines else total_pages
+                position = f"(through page {last_page} of {total_pages})"
             
             if truncation.truncated:
-                end_line_display = start_line_display + truncation.output_lines - 1
-                next_offset = end_line_display + 1
-                
                 output_text = truncation.content
                 
                 if truncation.truncated_by == "lines":
-                    output_text += f"\n\n[Showing lines {start_line_display}-{end_line_display} of {total_lines}. Use offset={next_offset} to continue.]"
+                    output_text += f"\n\n[Showing lines {start_line_display}-{end_line_display} {position}. Use offset={next_offset} to continue.]"
                 else:
-                    output_text += f"\n\n[Showing lines {start_line_display}-{end_line_display} of {total_lines} ({format_size(DEFAULT_MAX_BYTES)} limit). Use offset={next_offset} to continue.]"
+                    output_text += f"\n\n[Showing lines {start_line_display}-{end_line_display} {position} ({format_size(DEFAULT_MAX_BYTES)} limit). Use offset={next_offset} to continue.]"
                 
                 details["truncation"] = truncation.to_dict()
-            elif user_limited_lines is not None and start_line + user_limited_lines < total_lines:
-                remaining = total_lines - (start_line + user_limited_lines)
-                next_offset = start_line + user_limited_lines + 1
-                
+            elif has_more:
                 output_text = truncation.content
-                output_text += f"\n\n[{remaining} more lines in file. Use offset={next_offset} to continue.]"
+                if total_lines is not None:
+                    remaining = total_lines - (start_line + len(window))
+                    output_text += f"\n\n[{remaining} more lines in file. Use offset={next_offset} to continue.]"
+                else:
+                    output_text += f"\n\n[Showing lines {start_line_display}-{end_line_display} {position}. Use offset={next_offset} to continue.]"
             else:
                 output_text = truncation.content
             
             result = {
                 "content": output_text,
                 "total_pages": total_pages,
-                "total_lines": total_lines,
                 "start_line": start_line_display,
                 "output_lines": truncation.output_lines
             }
+            if total_lines is not None:
+                result["total_lines"] = total_lines
             
             if details:
                 result["details"] = details
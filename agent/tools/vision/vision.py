@@ -28,6 +28,7 @@ import requests
 from agent.tools.base_tool import BaseTool, ToolResult
 from common import const
 from common.log import logger
+from common import http_client
 from config import conf
 
 DEFAULT_MODEL = const.GPT_41_MINI
@@ -100,6 +101,7 @@ class Vision(BaseTool):
     """Analyze images using Vision API"""
 
     name: str = "vision"
+    parallel_safe: bool = True
     description: str = (
         "Analyze a local image or image URL (jpg/jpeg/png) using Vision API. "
         "Can describe content, extract text, identify objects, colors, etc. "
@@ -597,7 +599,7 @@ class Vision(BaseTool):
     @staticmethod
     def _download_to_data_url(url: str) -> dict:
         """Download a remote image and return it as a base64 data URL."""
-        resp = requests.get(url, timeout=30)
+        resp = http_client.get(url, timeout=30)
         if resp.status_code != 200:
             raise VisionAPIError(f"Failed to download image: HTTP {resp.status_code}")
         content_type = resp.headers.get("Content-Type", "image/jpeg").split(";")[0].strip()
@@ -688,7 +690,7 @@ class Vision(BaseTool):
             **provider.extra_headers,
         }
 
-        resp = requests.post(
+        resp = http_client.post(
             f"{provider.api_base}/chat/completions",
             headers=headers,
             json=payload,
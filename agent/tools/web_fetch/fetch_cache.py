@@ -0,0 +1,268 @@
+"""
+Disk-backed HTTP response cache for the web_fetch tool.
+
+Each URL keeps one row in a SQLite table with its validators (ETag /
+Last-Modified), an expiry time, the raw body (zlib-compressed; pages only,
+downloaded documents stay on disk where web_fetch saved them) and the text
+web_fetch returned for it, tagged with the version of the extractor that
+produced it. So:
+
+- a fresh entry is answered without any request
+- a stale entry is revalidated with a conditional GET; a 304 answer reuses
+  the stored text and only moves the expiry
+- when the extractor changes, the text is rebuilt from the stored body
+
+Freshness: a per-domain TTL rule wins (the longest matching domain suffix),
+otherwise the default TTL, shortened by the response's Cache-Control
+max-age. no-cache means always revalidate, no-store is not cached.
+
+The table is bounded by the total size of the stored bodies and texts;
+the least recently used entries are evicted first.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from common.log import logger
+
+DEFAULT_DB_PATH = os.path.join("~", ".cow", "cache", "web_fetch.db")
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class FetchEntry:
+    """A cached response for one URL."""
+
+    __slots__ = ("url", "etag", "last_modified", "expires_at", "body", "text", "text_version", "path")
+
+    def __init__(self, url, etag, last_modified, expires_at, body, text, text_version, path):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.body = body
+        self.text = text
+        self.text_version = text_version
+        self.path = path
+
+
+class FetchCache:
+    """
+    :param db_path: SQLite file (default ~/.cow/cache/web_fetch.db)
+    :param max_bytes: Total stored size before LRU eviction
+    :param default_ttl: Seconds a response is used without revalidation
+    :param domain_ttls: Domain -> TTL seconds; "example.com" also covers its subdomains
+    :param clock: Wall-clock time source (seconds); expiries survive restarts
+    """
+
+    def __init__(self, db_path: str = None, max_bytes: int = 100 * 1024 * 1024, default_ttl: float = 600,
+                 domain_ttls: Dict[str, float] = None, clock=time.time):
+        from common.utils import expand_path
+        self.db_path = expand_path(db_path or DEFAULT_DB_PATH)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.domain_ttls = {d.lower().lstrip("*").lstrip("."): ttl for d, ttl in (domain_ttls or {}).items()}
+        self._clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS fetch_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                body BLOB,
+                text TEXT,
+                text_version INTEGER,
+                path TEXT,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_fetch_cache_accessed ON fetch_cache(accessed_at)")
+        self.conn.commit()
+        self._size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM fetch_cache").fetchone()[0]
+        self.lookups = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def lookup(self, url: str):
+        """
+        Cached entry for url and whether it is still fresh.
+
+        :return: (entry or None, fresh)
+        """
+        with self._lock:
+            self.lookups += 1
+            row = self.conn.execute(
+                "SELECT url, etag, last_modified, expires_at, body, text, text_version, path "
+                "FROM fetch_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, False
+            now = self._clock()
+            self.conn.execute("UPDATE fetch_cache SET accessed_at = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+            entry = FetchEntry(*row)
+            if entry.body is not None:
+                entry.body = zlib.decompress(entry.body)
+            fresh = now < entry.expires_at
+            if fresh:
+                self.hits += 1
+            return entry, fresh
+
+    @staticmethod
+    def conditional_headers(entry: FetchEntry) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers revalidating entry."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def mark_revalidated(self, url: str, headers) -> None:
+        """Record a 304 answer: the stored entry is current again."""
+        with self._lock:
+            self.revalidated += 1
+            self.conn.execute("UPDATE fetch_cache SET expires_at = ? WHERE url = ?",
+                              (self._clock() + self.ttl_for(url, headers), url))
+            self.conn.commit()
+
+    def mark_changed(self) -> None:
+        """Record that a stale entry turned out to be outdated."""
+        with self._lock:
+            self.misses += 1
+
+    def store(self, url: str, headers, text: str, text_version: int = 0,
+              body: Optional[bytes] = None, path: Optional[str] = None) -> bool:
+        """Cache a 200 response; returns False when its Cache-Control forbids storing."""
+        cache_control = (headers.get("Cache-Control") or "").lower()
+        if "no-store" in cache_control:
+            self.delete(url)
+            return False
+        packed = zlib.compress(body) if body is not None else None
+        size = (len(packed) if packed is not None else 0) + len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            now = self._clock()
+            old = self.conn.execute("SELECT size FROM fetch_cache WHERE url = ?", (url,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fetch_cache "
+                "(url, etag, last_modified, expires_at, accessed_at, body, text, text_version, path, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get("ETag"), headers.get("Last-Modified"), now + self.ttl_for(url, headers),
+                 now, packed, text, text_version, path, size),
+            )
+            self._size += size - (old[0] if old else 0)
+            self.stores += 1
+            self._evict()
+            self.conn.commit()
+        return True
+
+    def update_text(self, url: str, text: str, text_version: int) -> None:
+        """Replace the stored text (re-extracted from the stored body)."""
+        with self._lock:
+            row = self.conn.execute("SELECT size, text FROM fetch_cache WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            size = row[0] - len((row[1] or "").encode("utf-8")) + len(text.encode("utf-8"))
+            self.conn.execute("UPDATE fetch_cache SET text = ?, text_version = ?, size = ? WHERE url = ?",
+                              (text, text_version, size, url))
+            self._size += size - row[0]
+            self.conn.commit()
+
+    def delete(self, url: str) -> None:
+        with self._lock:
+            row = self.conn.execute("SELECT size FROM fetch_cache WHERE url = ?", (url,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM fetch_cache WHERE url = ?", (url,))
+                self.conn.commit()
+                self._size -= row[0]
+
+    def ttl_for(self, url: str, headers) -> float:
+        """Seconds a response for url stays fresh."""
+        host = (urlparse(url).hostname or "").lower()
+        best = None
+        for domain, ttl in self.domain_ttls.items():
+            if (host == domain or host.endswith("." + domain)) and (best is None or len(domain) > len(best[0])):
+                best = (domain, ttl)
+        if best is not None:
+            return best[1]
+        cache_control = (headers.get("Cache-Control") or "").lower()
+        if "no-cache" in cache_control:
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        if match:
+            return min(self.default_ttl, int(match.group(1)))
+        return self.default_ttl
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters since start plus the current size."""
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM fetch_cache").fetchone()[0]
+            served = self.hits + self.revalidated
+            return {
+                "entries": entries,
+                "bytes": self._size,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": served / self.lookups if self.lookups else 0.0,
+            }
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT url, size FROM fetch_cache ORDER BY accessed_at LIMIT 16").fetchall()
+            if not rows:
+                self._size = 0
+                break
+            for url, size in rows:
+                if self._size <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM fetch_cache WHERE url = ?", (url,))
+                self._size -= size
+                self.evictions += 1
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_fetch_cache() -> Optional[FetchCache]:
+    """Process-wide FetchCache built from config, or None when web_fetch_cache is off."""
+    global _default_cache
+    from config import conf
+    if not conf().get("web_fetch_cache", True):
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                try:
+                    _default_cache = FetchCache(
+                        max_bytes=int(conf().get("web_fetch_cache_max_mb", 100)) * 1024 * 1024,
+                        default_ttl=conf().get("web_fetch_cache_ttl", 600),
+                        domain_ttls=conf().get("web_fetch_cache_domain_ttl") or {},
+                    )
+                except Exception as e:
+                    logger.warning(f"[WebFetch] fetch cache unavailable: {e}")
+                    _default_cache = False
+    return _default_cache or None
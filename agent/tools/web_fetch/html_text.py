@@ -0,0 +1,676 @@
+"""
+Single-pass HTML to text conversion for the web_fetch tool.
+
+HtmlTextExtractor is fed the page chunk by chunk as it is downloaded. One
+compiled pattern finds the next tag that matters (block, heading, list,
+link, table, pre, comment, script...) and the text before it - inline tags
+such as span or b stripped in one substitution - is written straight into
+the output. A link holding only text, or a run of div / section tags with
+nothing but whitespace between them, is one match rather than several.
+Markup cut by the end of a chunk waits for the next one.
+
+- script and style bodies are skipped without being tokenized; noscript,
+  template, svg and similar elements are dropped with their content
+- character references are decoded with html.unescape (all of HTML5)
+- headings become "#" lines, list items "-" / "1." lines (indented when
+  nested), links [text](url), table rows "| a | b |", <pre> a fenced block
+- a table with block elements in its cells is page layout: its cells are
+  written as plain blocks instead
+- other whitespace is collapsed, block elements start new lines
+
+Once max_chars of text have been written the extractor marks itself done,
+so callers can stop downloading.
+
+html.parser.HTMLParser would do the tokenizing too, but it handles every
+tag (and parses its attributes) in Python, which made it several times
+slower than this on pages with heavy markup such as highlighted code.
+"""
+
+import re
+from html import unescape
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+DEFAULT_MAX_CHARS = 50000
+MAX_PENDING = 64 * 1024  # an unclosed "<" this far back is text, not a tag
+
+_SKIP_TAGS = {"noscript", "template", "svg", "math", "iframe", "object", "canvas", "select", "textarea"}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source",
+              "track", "wbr"}
+_PARAGRAPH_TAGS = {"p", "blockquote", "figure"}  # separated by a blank line
+_BLOCK_TAGS = _PARAGRAPH_TAGS | {
+    "address", "article", "aside", "body", "caption", "center", "dd", "details", "dialog", "div", "dl", "dt",
+    "fieldset", "figcaption", "footer", "form", "header", "hgroup", "html", "main", "nav", "section", "summary",
+}
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_RAW_TAGS = {"script", "style"}
+# tags with any effect; the rest (span, b, code, ...) are stripped from the text
+# any of these inside a cell makes its table a layout table
+_LAYOUT_TAGS = _BLOCK_TAGS | set(_HEADINGS) | {"li", "ul", "ol", "pre", "table", "hr"}
+_HANDLED_TAGS = _SKIP_TAGS | _BLOCK_TAGS | _RAW_TAGS | set(_HEADINGS) | {
+    "title", "li", "ul", "ol", "a", "br", "hr", "pre", "table", "tr", "td", "th",
+}
+
+
+def _prefix_tree(words: List[str]) -> str:
+    """Alternation of words factored by common prefixes; re tries the branches of a flat one one by one."""
+    tree: dict = {}
+    for word in words:
+        node = tree
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def branch(node: dict) -> str:
+        alternatives = [re.escape(ch) + branch(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1 and "" not in node:
+            return alternatives[0]
+        group = "(?:" + "|".join(alternatives) + ")"
+        return group + "?" if "" in node else group
+
+    return branch(tree)
+
+
+def _cased(names) -> str:
+    return _prefix_tree(sorted(set(names) | {name.upper() for name in names}))
+
+
+# lower- and upper-case names instead of IGNORECASE, and no quoting rules in
+# attributes: both made the search several times slower. Every branch starts
+# after the "<", so the search still skips ahead to the next one.
+_LINE_TAG = r"/?(?:" + _cased(_BLOCK_TAGS - _PARAGRAPH_TAGS) + r")(?=[\s/>])[^>]*>"
+_INLINE_TAG = r"/?(?!(?:" + _cased(_HANDLED_TAGS) + r")(?=[\s/>]))[a-zA-Z][^>]*>"
+_MARKUP_RE = re.compile(
+    r"<(?:"
+    r"[aA](?=[\s>])([^>]*)(?<!/)>"  # 1: attributes of a link holding only text and inline tags,
+    r"([^<]*(?:<" + _INLINE_TAG + r"[^<]*)*)</[aA](?=[\s/>])[^>]*>"  # 2: its text, up to the end tag
+    r"|(" + _LINE_TAG + r"(?:\s*<" + _LINE_TAG + r")+)"  # 3: div, section... with only whitespace between
+    r"|(/?)(" + _cased(_HANDLED_TAGS) + r")(?=[\s/>])"  # 4-5: tag
+    r"([^>]*)>"  # 6: attributes
+    r"|!--.*?-->"  # comment
+    r"|[!?](?!--)[^>]*>"  # doctype, CDATA, processing instruction
+    r"|(!--)"  # 7: a comment not closed yet
+    r")",
+    re.DOTALL,
+)
+_LINE_TAGS_RE = re.compile(r"(\s*)<(/?)([a-zA-Z]+)([^>]*)>")
+_INLINE_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+_RAW_END = {tag: re.compile(rf"</{tag}\s*>", re.IGNORECASE) for tag in ("script", "style")}
+_HREF_RE = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+_UNLINKED = ("#", "javascript:", "mailto:", "data:")
+
+
+def _unfinished(text: str) -> int:
+    """Where markup or an entity cut by the end of a chunk starts in text, or -1."""
+    cut = -1
+    lt = text.rfind("<")
+    if lt >= 0 and ">" not in text[lt:]:
+        cut = lt
+    amp = text.rfind("&")
+    if amp >= 0 and ";" not in text[amp:] and len(text) - amp < 32 and (cut < 0 or amp < cut):
+        cut = amp
+    if cut >= 0 and len(text) - cut > MAX_PENDING:
+        return -1
+    return cut
+
+
+class _Table:
+    __slots__ = ("rows", "row", "cell", "header_done", "layout")
+
+    def __init__(self):
+        self.rows = 0
+        self.row: Optional[List[str]] = None
+        self.cell: Optional[List[str]] = None
+        self.header_done = False
+        self.layout = False  # cells are written as plain blocks
+
+
+class HtmlTextExtractor:
+    """
+    :param base_url: Page URL, for resolving relative links
+    :param max_chars: Text length after which the extractor is done
+    """
+
+    def __init__(self, base_url: str = "", max_chars: int = DEFAULT_MAX_CHARS):
+        self.base_url = base_url
+        self.max_chars = max_chars
+        self.title_parts: List[str] = []
+        self.done = False  # max_chars reached; the text is cut there
+        self._out: List[str] = []
+        self._sink = self._out  # where text goes: the open table cell, else the output
+        self._size = 0  # length of the output
+        self._held = 0  # length of the text in table cells and rows not written out yet
+        self._pos = 0  # length of everything written to any sink, for link starts
+        self._breaks = 0  # newlines owed before the next text
+        self._space = False  # a space is owed before the next text
+        self._prefix = ""  # list bullet / heading marker for the next text
+        self._pending = False  # any of the above, or a link waiting for its text
+        self._skip = 0  # depth inside dropped elements
+        self._raw = None  # script / style whose end tag has not been seen yet
+        self._buf = ""  # input cut by the chunk end: a tag, an entity, the tail of a raw block
+        self._in_title = False
+        self._pre = 0
+        self._pre_start = False  # a newline right after <pre> is not content
+        self._lists: List[list] = []  # [tag, next number]
+        self._links: List[list] = []  # [attributes, output length at the link's first text, sink]
+        self._tables: List[_Table] = []
+        self._urls: Dict[str, str] = {}  # link attributes -> absolute URL, or "" (pages repeat links)
+        self._hrefs: Dict[str, str] = {}  # href -> absolute URL
+        self._base: Optional[List[str]] = None  # "scheme://host/", then each directory of base_url down from it
+
+    @property
+    def title(self) -> str:
+        return _WS_RE.sub(" ", "".join(self.title_parts)).strip()
+
+    def text(self) -> str:
+        """Text written so far."""
+        return "".join(self._out).strip()
+
+    def feed(self, data: str) -> None:
+        if not self.done:
+            self._parse(self._buf + data, final=False)
+
+    def close(self) -> None:
+        """Process whatever input is left, and write out table rows still open."""
+        if not self.done and self._buf:
+            self._parse(self._buf, final=True)
+        self._buf = ""
+        while self._tables:
+            table = self._tables.pop()
+            if not table.layout:
+                self._end_row(table)
+        self._update_sink()
+
+    # ---- tokenizer ----
+
+    def _parse(self, buf: str, final: bool):
+        self._buf = ""
+        pos, end = 0, len(buf)
+        search = _MARKUP_RE.search
+        while pos < end and not self.done:
+            if self._raw is not None:
+                pos = self._skip_raw(buf, pos, final)
+                continue
+            token = search(buf, pos)
+            if token is None:
+                text = buf[pos:]
+                if not final:
+                    cut = _unfinished(text)
+                    if cut >= 0:
+                        self._buf = text[cut:]
+                        text = text[:cut]
+                if text:
+                    self._text(text)
+                return
+            start = token.start()
+            if start > pos:
+                text = buf[pos:start]
+                if not text.isspace() or self._pre or self._in_title:
+                    self._text(text)
+                elif not self._skip:
+                    self._space = self._pending = True  # what handle_data makes of whitespace
+            link, link_text, lines, close, name, attrs, open_comment = token.groups()
+            pos = token.end()
+            if name is None:
+                if link is not None:
+                    self._link(link, link_text)
+                elif lines is not None:
+                    self._lines(lines)
+                elif open_comment:
+                    if final:
+                        return  # it runs to the end of the page
+                    if end - start < MAX_PENDING:
+                        self._buf = buf[start:]
+                        return
+                    pos = start + 4
+                continue  # comment, doctype
+            tag = name.lower()
+            if close:
+                self.handle_endtag(tag)
+            elif tag in _RAW_TAGS:
+                self._raw = tag
+            else:
+                self.handle_starttag(tag, attrs)
+                if attrs.endswith("/") and tag not in _VOID_TAGS:
+                    self.handle_endtag(tag)
+
+    def _text(self, text: str):
+        if "<" in text:
+            text = _INLINE_TAG_RE.sub("", text)
+        if "&" in text:
+            text = unescape(text)
+        if text:
+            self.handle_data(text)
+
+    def _skip_raw(self, buf: str, pos: int, final: bool) -> int:
+        """Skip script / style content up to its end tag; returns where parsing resumes."""
+        end_tag = _RAW_END[self._raw].search(buf, pos)
+        if end_tag is None:
+            if not final:
+                self._buf = buf[max(pos, len(buf) - 16):]  # the end tag may be cut in two
+            return len(buf)
+        self._raw = None
+        return end_tag.end()
+
+    # ---- tag and text handlers ----
+
+    def handle_starttag(self, tag: str, attrs: str):
+        if self._skip:
+            if tag in _SKIP_TAGS:
+                self._skip += 1
+            return
+        if tag in _LAYOUT_TAGS and self._sink is not self._out:
+            self._to_layout(self._tables[-1])
+        if tag in _BLOCK_TAGS:
+            self._block(2 if tag in _PARAGRAPH_TAGS else 1)
+        elif tag == "a":
+            self._links.append([attrs, None, None])
+            self._pending = True
+        elif tag == "li":
+            self._block(1)
+            indent = "  " * max(0, len(self._lists) - 1)
+            if self._lists and self._lists[-1][0] == "ol":
+                self._prefix = f"{indent}{self._lists[-1][1]}. "
+                self._lists[-1][1] += 1
+            else:
+                self._prefix = f"{indent}- "
+        elif tag in _HEADINGS:
+            self._block(2)
+            self._prefix = "#" * _HEADINGS[tag] + " "
+        elif tag in ("ul", "ol"):
+            self._block(1 if self._lists else 2)
+            self._lists.append([tag, 1])
+        elif tag == "br":
+            self._break_line()
+        elif tag in ("td", "th"):
+            if self._tables:
+                table = self._tables[-1]
+                if table.layout:
+                    self._block(1)
+                    return
+                if table.row is None:
+                    table.row = []
+                table.cell = self._sink = []
+                if tag == "td":
+                    table.header_done = True
+        elif tag == "tr":
+            if self._tables:
+                if self._tables[-1].layout:
+                    self._block(1)
+                else:
+                    self._end_row(self._tables[-1])  # a row left open by its missing </tr>
+                    self._tables[-1].row = []
+        elif tag == "table":
+            self._block(2)
+            self._flush()
+            self._tables.append(_Table())
+        elif tag == "pre":
+            self._block(2)
+            self._flush()
+            self._write("```\n")
+            self._pre += 1
+            self._pre_start = True
+        elif tag == "hr":
+            self._block(2)
+        elif tag == "title":
+            self._in_title = True
+        elif tag in _SKIP_TAGS:
+            self._skip = 1
+
+    def handle_endtag(self, tag: str):
+        if self._skip:
+            if tag in _SKIP_TAGS:
+                self._skip -= 1
+            return
+        if tag in _BLOCK_TAGS:
+            self._block(2 if tag in _PARAGRAPH_TAGS else 1)
+        elif tag == "a":
+            self._end_link()
+        elif tag == "li":
+            self._prefix = ""
+            self._block(1)
+        elif tag in _HEADINGS:
+            self._prefix = ""
+            self._block(2)
+        elif tag in ("ul", "ol"):
+            if self._lists:
+                self._lists.pop()
+            self._prefix = ""
+            self._block(1 if self._lists else 2)
+        elif tag in ("td", "th", "tr"):
+            if self._tables:
+                table = self._tables[-1]
+                if table.layout:
+                    self._block(1)
+                elif tag == "tr":
+                    self._end_row(table)
+                else:
+                    self._end_cell(table)
+        elif tag == "table":
+            if self._tables:
+                table = self._tables.pop()
+                if not table.layout:
+                    self._end_row(table)
+                self._update_sink()
+                self._block(2)
+        elif tag == "pre":
+            if self._pre:
+                self._pre -= 1
+                self._write("\n```")
+                self._block(2)
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data: str):
+        if self._skip:
+            return
+        if self._in_title:
+            self.title_parts.append(data)
+            return
+        if self._pre:
+            if self._pre_start and data.startswith("\n"):
+                data = data[1:]
+            self._pre_start = False
+            if data:
+                self._start_text()
+                self._write(data)
+            return
+        if data[0].isspace():
+            self._space = self._pending = True
+        words = " ".join(data.split())
+        if words:
+            if self._links:
+                self._start_text()
+            elif self._pending:
+                self._pending = False
+                words = self._owed() + words
+            self._write(words)
+            if data[-1].isspace():
+                self._space = self._pending = True
+
+    def _link(self, attrs: str, text: str):
+        """
+        A link holding only text and inline tags, with its end tag.
+
+        Writes what handle_starttag, handle_data and _end_link would, without
+        the round trip through the link stack; anything unusual (an open
+        outer link, title / pre / skipped content, nearing max_chars) takes
+        that regular path.
+        """
+        if (self._links or self._skip or self._in_title or self._pre
+                or self._size + self._held + len(text) + len(self._prefix) + 3 >= self.max_chars):
+            self.handle_starttag("a", attrs)
+            if text:
+                self._text(text)
+            self.handle_endtag("a")
+            return
+        if "<" in text:
+            text = _INLINE_TAG_RE.sub("", text)
+        if "&" in text:
+            text = unescape(text)
+        words = " ".join(text.split())
+        if not words:
+            if text:
+                self._space = self._pending = True
+            return
+        url = self._urls.get(attrs)
+        if url is None:
+            url = self._url(attrs)
+        if url:
+            words = f"[{words}]({url})"
+        if text[0].isspace():
+            self._space = self._pending = True
+        if self._pending:
+            self._pending = False
+            words = self._owed() + words
+        self._sink.append(words)
+        self._count(len(words))
+        if self._size + self._held >= self.max_chars:
+            self.done = True
+        if text[-1].isspace():
+            self._space = self._pending = True
+
+    def _lines(self, tags: str):
+        """Block tags with nothing but whitespace between them: one new line, unless pre / title / a cell need each."""
+        if self._skip:
+            return
+        if not (self._pre or self._in_title or self._sink is not self._out):
+            self._block(1)
+            return
+        for space, close, name, attrs in _LINE_TAGS_RE.findall("<" + tags):
+            if space:
+                self.handle_data(space)
+            tag = name.lower()
+            if close:
+                self.handle_endtag(tag)
+            else:
+                self.handle_starttag(tag, attrs)
+                if attrs.endswith("/"):
+                    self.handle_endtag(tag)
+            if self.done:
+                return
+
+    def _url(self, attrs: str) -> str:
+        """Absolute URL of a link's href, "" when there is nothing to link to; memoized per page."""
+        url = self._urls.get(attrs)
+        if url is None:
+            href = _href(attrs)
+            if not href or href.startswith(_UNLINKED):
+                url = ""
+            else:
+                url = self._hrefs.get(href)
+                if url is None:
+                    try:
+                        url = self._join(href) if self.base_url else href
+                    except ValueError:  # e.g. a broken IPv6 host
+                        url = href
+                    self._hrefs[href] = url
+            self._urls[attrs] = url
+        return url
+
+    def _join(self, href: str) -> str:
+        """
+        urljoin(base_url, href), with the common cases done here: plain
+        relative paths ("x.html", "../../y/z.html#f", the bulk of the links
+        on docs sites) and absolute http(s) URLs, which urljoin gives back as
+        they are. urljoin's general parsing made up a fifth of extraction time.
+        """
+        if (href[0] <= " " or "\t" in href or "\n" in href or "\r" in href or ";" in href or "?#" in href
+                or href.endswith(("?", "#"))):
+            return urljoin(self.base_url, href)  # parts urljoin strips, or drops when empty
+        if href.startswith(("http://", "https://")):
+            if href.partition("//")[2][:1] not in ("", "/", "?", "#"):
+                return href
+            return urljoin(self.base_url, href)
+        base = self._base
+        if base is None:
+            parts = urlsplit(self.base_url)
+            dirs = parts.path.split("/")[1:-1]
+            ok = parts.scheme in ("http", "https") and parts.netloc and not any(d in ("", ".", "..") for d in dirs)
+            root = f"{parts.scheme}://{parts.netloc}/"
+            base = self._base = [root + "".join(d + "/" for d in dirs[:n]) for n in range(len(dirs) + 1)] if ok else []
+        if not base or href.startswith(("/", "?", "#")) or "//" in href or ":" in href.split("/", 1)[0]:
+            return urljoin(self.base_url, href)
+        up = 0
+        while href.startswith("../", up):
+            up += 3
+        rest = href[up:]
+        if rest.startswith(".") or "/." in rest:
+            return urljoin(self.base_url, href)  # dot segments
+        return base[max(0, len(base) - 1 - up // 3)] + rest
+
+    # ---- output ----
+
+    def _write(self, s: str):
+        sink = self._sink
+        sink.append(s)
+        n = len(s)
+        self._pos += n
+        if sink is self._out:
+            self._size += n
+        else:
+            self._held += n
+        over = self._size + self._held - self.max_chars
+        if over >= 0:
+            over = min(over, n)
+            if over:
+                sink[-1] = s[:n - over]
+                self._count(-over)
+            self.done = True
+
+    def _count(self, n: int):
+        self._pos += n
+        if self._sink is self._out:
+            self._size += n
+        else:
+            self._held += n
+
+    def _update_sink(self):
+        table = self._tables[-1] if self._tables else None
+        self._sink = table.cell if table is not None and table.cell is not None else self._out
+
+    def _at_line_start(self) -> bool:
+        sink = self._sink
+        return not sink or (sink is self._out and sink[-1].endswith("\n"))
+
+    def _flush(self):
+        """Emit the breaks, prefix or space owed before the next text."""
+        owed = self._owed()
+        if owed:
+            self._write(owed)
+
+    def _owed(self) -> str:
+        """Take the breaks, prefix or space owed before the next text, as the string to write first."""
+        sink = self._sink
+        owed = ""
+        if sink is not self._out:
+            if self._breaks:
+                self._space = bool(sink)  # a cell is one line: a break is a space
+                self._breaks = 0
+            if self._space and sink:
+                owed = " "
+        else:
+            if self._breaks:
+                if sink:
+                    trailing = len(sink[-1]) - len(sink[-1].rstrip("\n"))
+                    if trailing < self._breaks:
+                        owed = "\n" * (self._breaks - trailing)
+                self._space = False
+                self._breaks = 0
+            if self._prefix:
+                owed += self._prefix
+                self._prefix = ""
+                self._space = False
+            if self._space and sink and not (owed or sink[-1]).endswith("\n"):
+                owed += " "
+        self._space = False
+        return owed
+
+    def _start_text(self):
+        if self._breaks or self._prefix or self._space:
+            self._flush()
+        for link in self._links:
+            if link[1] is None:
+                link[1] = self._pos
+                link[2] = self._sink
+        self._pending = False
+
+    def _block(self, newlines: int):
+        if self._pre:
+            return
+        if newlines > self._breaks:
+            self._breaks = newlines
+        self._space = False
+        self._pending = True
+
+    def _break_line(self):
+        if self._pre:
+            self._write("\n")
+        elif self._sink is not self._out:
+            self._space = self._pending = True
+        else:
+            self._flush()
+            self._write("\n")
+
+    def _end_link(self):
+        if not self._links:
+            return
+        attrs, start, sink = self._links.pop()
+        if start is None or self._pos == start or sink is not self._sink:
+            return
+        url = self._url(attrs)
+        if not url:
+            return
+        # wrap the link text written since its start in [...]
+        label, length = [], 0
+        while sink and length < self._pos - start:
+            piece = sink.pop()
+            length += len(piece)
+            label.append(piece)
+        text = "".join(reversed(label))
+        keep = length - (self._pos - start)
+        text = f"{text[:keep]}[{text[keep:].strip()}]({url})"
+        sink.append(text)
+        self._count(len(text) - length)
+        if self._size + self._held >= self.max_chars:
+            self.done = True
+
+    def _end_cell(self, table: _Table):
+        if table.cell is None:
+            return
+        text = "".join(table.cell)
+        cell = _WS_RE.sub(" ", text).strip().replace("|", "\\|")
+        self._held += len(cell) - len(text)
+        table.cell = None
+        self._update_sink()
+        if table.row is None:
+            table.row = []
+        table.row.append(cell)
+
+    def _end_row(self, table: _Table):
+        self._end_cell(table)
+        row, table.row = table.row, None
+        if row:
+            self._held -= sum(len(cell) for cell in row)
+        if not row or not any(row):
+            return
+        self._flush()
+        if not self._at_line_start():
+            self._write("\n")
+        self._write("| " + " | ".join(row) + " |\n")
+        if table.rows == 0 and not table.header_done:
+            self._write("|" + " --- |" * len(row) + "\n")
+        table.header_done = True
+        table.rows += 1
+
+    def _to_layout(self, table: _Table):
+        """A block element in a cell: write the row so far as plain blocks, and the rest of the table too."""
+        self._end_cell(table)
+        row, table.row = table.row or [], None
+        self._held -= sum(len(cell) for cell in row)
+        table.layout = True
+        for link in self._links:
+            if link[2] is not None and link[2] is not self._out:
+                link[1] = link[2] = None  # its text so far was in the cell
+        for cell in row:
+            if cell:
+                self._block(1)
+                self._flush()
+                self._write(cell.replace("\\|", "|"))
+        self._block(1)
+
+
+def _href(attrs: str) -> str:
+    match = _HREF_RE.search(attrs)
+    return unescape(match.group(match.lastindex)).strip() if match else ""
+
+
+def html_to_text(html: str, base_url: str = "", max_chars: int = DEFAULT_MAX_CHARS) -> HtmlTextExtractor:
+    """Run an extractor over a complete document."""
+    extractor = HtmlTextExtractor(base_url, max_chars)
+    extractor.feed(html)
+    extractor.close()
+    return extractor
@@ -6,22 +6,38 @@ Supports:
 - Document files (PDF, Word, TXT, Markdown, etc.): downloads to workspace/tmp and parses content
 """
 
+import codecs
+import hashlib
 import os
 import re
 import uuid
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, Optional, Set, Tuple
 from urllib.parse import urlparse, unquote
 
 import requests
 
 from agent.tools.base_tool import BaseTool, ToolResult
-from agent.tools.utils.truncate import truncate_head, format_size
+from agent.tools.web_fetch.fetch_cache import get_fetch_cache
+from agent.tools.web_fetch.html_text import HtmlTextExtractor, html_to_text
+from agent.tools.utils.truncate import truncate_head, format_size, DEFAULT_MAX_LINES, DEFAULT_MAX_BYTES
+from common.document_cache import get_document_cache
 from common.log import logger
+from common import http_client
 
+try:
+    from requests.compat import chardet
+except ImportError:
+    chardet = None
 
 DEFAULT_TIMEOUT = 30
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
+# Bump when the text built from a page or document changes, so cached
+# entries are re-extracted (pages from their stored body) instead of reused
+TEXT_VERSION = 3
+PAGE_CHUNK_SIZE = 16 * 1024
+SNIFF_BYTES = 16 * 1024  # bytes buffered to detect the charset when the headers have none
+
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
     "Accept": "*/*",
@@ -77,6 +93,7 @@ class WebFetch(BaseTool):
     """Tool for fetching web pages and remote document files"""
 
     name: str = "web_fetch"
+    parallel_safe: bool = True
     description: str = (
         "Fetch content from a http/https URL. For web pages, extracts readable text. "
         "For document files (PDF, Word, TXT, Markdown, Excel, PPT), downloads and parses the file content. "
@@ -115,13 +132,24 @@ class WebFetch(BaseTool):
     # ---- Web page fetching ----
 
     def _fetch_webpage(self, url: str) -> ToolResult:
-        """Fetch and extract readable text from an HTML web page."""
+        """Fetch and extract readable text from an HTML web page (through the fetch cache)."""
         parsed = urlparse(url)
+        cache = get_fetch_cache()
+        entry, fresh = cache.lookup(url) if cache else (None, False)
+        if entry is not None and entry.body is None:
+            entry = None  # a document entry; pages need the stored body
+        if entry is not None and fresh:
+            return ToolResult.success(self._cached_page_text(cache, entry))
+
+        headers = DEFAULT_HEADERS
+        if entry is not None:
+            headers = {**DEFAULT_HEADERS, **cache.conditional_headers(entry)}
         try:
-            response = requests.get(
+            response = http_client.get(
                 url,
-                headers=DEFAULT_HEADERS,
+                headers=headers,
                 timeout=DEFAULT_TIMEOUT,
+                stream=True,
                 allow_redirects=True,
             )
             response.raise_for_status()
@@ -134,56 +162,175 @@ class WebFetch(BaseTool):
         except Exception as e:
             return ToolResult.fail(f"Error: Failed to fetch URL: {e}")
 
+        if entry is not None:
+            if response.status_code == 304:
+                response.close()
+                cache.mark_revalidated(url, response.headers)
+                return ToolResult.success(self._cached_page_text(cache, entry))
+            cache.mark_changed()
+
         content_type = response.headers.get("Content-Type", "")
         if self._is_binary_content_type(content_type) and not _is_document_url(url):
+            response.close()
             return self._handle_download_by_content_type(url, response, content_type)
 
-        response.encoding = self._detect_encoding(response)
-        html = response.text
-        title = self._extract_title(html)
-        text = self._extract_text(html)
+        try:
+            extractor, html = self._read_page(response, url, keep_html=bool(cache))
+        except requests.Timeout:
+            return ToolResult.fail(f"Error: Request timed out after {DEFAULT_TIMEOUT}s")
+        except Exception as e:
+            return ToolResult.fail(f"Error: Failed to fetch URL: {e}")
+        finally:
+            response.close()
+
+        result = self._format_page(extractor)
+        if cache:
+            cache.store(url, response.headers, result, TEXT_VERSION, body=html.encode("utf-8"))
+
+        return ToolResult.success(result)
+
+    def _read_page(self, response: requests.Response, url: str, keep_html: bool = False) -> Tuple[HtmlTextExtractor, str]:
+        """
+        Stream the page through the text extractor, stopping once it has enough text.
+
+        :return: (extractor, the HTML consumed when keep_html, else "")
+        """
+        extractor = HtmlTextExtractor(base_url=getattr(response, "url", None) or url)
+        declared = _extract_charset_from_content_type(response.headers.get("Content-Type", ""))
+        consumed = []
+        decoder = None
+        head = b""
+        received = 0
+        for chunk in response.iter_content(chunk_size=PAGE_CHUNK_SIZE):
+            received += len(chunk)
+            if decoder is None:
+                head += chunk
+                if len(head) < SNIFF_BYTES and not declared and not _extract_charset_from_html_meta(head[:4096]):
+                    continue
+                decoder = self._page_decoder(response, head)
+                chunk, head = head, b""
+            text = decoder.decode(chunk)
+            extractor.feed(text)
+            if keep_html:
+                consumed.append(text)
+            if extractor.done or received > MAX_FILE_SIZE:
+                break
+        else:
+            if decoder is None:
+                decoder = self._page_decoder(response, head)
+            text = decoder.decode(head, final=True)
+            extractor.feed(text)
+            if keep_html:
+                consumed.append(text)
+        extractor.close()
+        return extractor, "".join(consumed)
+
+    def _page_decoder(self, response: requests.Response, head: bytes):
+        try:
+            return codecs.getincrementaldecoder(self._detect_encoding(response, head))(errors="replace")
+        except LookupError:
+            return codecs.getincrementaldecoder("utf-8")(errors="replace")
 
-        return ToolResult.success(f"Title: {title}\n\nContent:\n{text}")
+    @staticmethod
+    def _format_page(extractor: HtmlTextExtractor) -> str:
+        """Tool output for an HTML page."""
+        text = f"Title: {extractor.title or 'Untitled'}\n\nContent:\n{extractor.text()}"
+        if extractor.done:
+            text += f"\n\n[Content truncated at {extractor.max_chars} characters]"
+        return text
+
+    def _cached_page_text(self, cache, entry) -> str:
+        """Stored output of a cached page, re-extracted from its body if the extractor changed."""
+        if entry.text is not None and entry.text_version == TEXT_VERSION:
+            return entry.text
+        text = self._format_page(html_to_text(entry.body.decode("utf-8"), base_url=entry.url))
+        cache.update_text(entry.url, text, TEXT_VERSION)
+        return text
 
     # ---- Document fetching ----
 
     def _fetch_document(self, url: str) -> ToolResult:
-        """Download a document file and extract its text content."""
+        """
+        Download a document file and extract its text content.
+
+        Extracted text is cached per URL and version (ETag / Last-Modified, or
+        the content hash when the server sends neither). When the server's
+        validators match a cached copy whose download is still on disk, the
+        body is not downloaded again.
+        The tool output itself goes through the fetch cache like web pages do,
+        as long as the saved download still exists.
+        """
         suffix = _get_url_suffix(url)
         parsed = urlparse(url)
         filename = self._extract_filename(url)
         tmp_dir = self._ensure_tmp_dir()
 
         local_path = os.path.join(tmp_dir, filename)
-        logger.info(f"[WebFetch] Downloading document: {url} -> {local_path}")
 
+        fetch_cache = get_fetch_cache()
+        entry, fresh = fetch_cache.lookup(url) if fetch_cache else (None, False)
+        if entry is not None and (entry.text_version != TEXT_VERSION or not entry.path
+                                  or not os.path.exists(entry.path)):
+            fetch_cache.mark_changed()
+            entry = None
+        if entry is not None and fresh:
+            return ToolResult.success(entry.text)
+
+        logger.info(f"[WebFetch] Downloading document: {url} -> {local_path}")
+        headers = DEFAULT_HEADERS
+        if entry is not None:
+            headers = {**DEFAULT_HEADERS, **fetch_cache.conditional_headers(entry)}
+        cached = None
         try:
-            response = requests.get(
+            response = http_client.get(
                 url,
-                headers=DEFAULT_HEADERS,
+                headers=headers,
                 timeout=DEFAULT_TIMEOUT,
                 stream=True,
                 allow_redirects=True,
             )
             response.raise_for_status()
 
-            content_length = int(response.headers.get("Content-Length", 0))
-            if content_length > MAX_FILE_SIZE:
-                return ToolResult.fail(
-                    f"Error: File too large ({format_size(content_length)} > {format_size(MAX_FILE_SIZE)})"
-                )
-
-            downloaded = 0
-            with open(local_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    downloaded += len(chunk)
-                    if downloaded > MAX_FILE_SIZE:
-                        f.close()
-                        os.remove(local_path)
-                        return ToolResult.fail(
-                            f"Error: File too large (>{format_size(MAX_FILE_SIZE)}), download aborted"
-                        )
-                    f.write(chunk)
+            if entry is not None:
+                if response.status_code == 304:
+                    response.close()
+                    fetch_cache.mark_revalidated(url, response.headers)
+                    return ToolResult.success(entry.text)
+                fetch_cache.mark_changed()
+
+            version = self._remote_version(response)
+            if version and suffix not in TEXT_SUFFIXES:
+                cached = get_document_cache().lookup(url, version)
+                if cached is not None and not os.path.exists(cached.path):
+                    cached = None
+
+            if cached is not None:
+                response.close()
+                local_path = cached.path
+                filename = os.path.basename(local_path)
+                logger.info(f"[WebFetch] Document unchanged, using cached copy: {local_path}")
+            else:
+                content_length = int(response.headers.get("Content-Length", 0))
+                if content_length > MAX_FILE_SIZE:
+                    return ToolResult.fail(
+                        f"Error: File too large ({format_size(content_length)} > {format_size(MAX_FILE_SIZE)})"
+                    )
+
+                downloaded = 0
+                digest = hashlib.sha256()
+                with open(local_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        downloaded += len(chunk)
+                        if downloaded > MAX_FILE_SIZE:
+                            f.close()
+                            os.remove(local_path)
+                            return ToolResult.fail(
+                                f"Error: File too large (>{format_size(MAX_FILE_SIZE)}), download aborted"
+                            )
+                        digest.update(chunk)
+                        f.write(chunk)
+                if not version:
+                    version = {"sha256": digest.hexdigest(), "size": downloaded}
 
         except requests.Timeout:
             return ToolResult.fail(f"Error: Download timed out after {DEFAULT_TIMEOUT}s")
@@ -195,10 +342,18 @@ class WebFetch(BaseTool):
             self._cleanup_file(local_path)
             return ToolResult.fail(f"Error: Failed to download file: {e}")
 
+        pages = None
         try:
-            text = self._parse_document(local_path, suffix)
+            doc = None
+            if suffix not in TEXT_SUFFIXES:
+                doc = cached or get_document_cache().open(local_path, source=url, version=version)
+            if suffix in PDF_SUFFIXES:
+                text, pages = self._parse_pdf(doc)
+            else:
+                text = self._parse_document(local_path, suffix, doc)
         except Exception as e:
-            self._cleanup_file(local_path)
+            if cached is None:
+                self._cleanup_file(local_path)
             return ToolResult.fail(f"Error: Failed to parse document: {e}")
 
         if not text or not text.strip():
@@ -215,51 +370,59 @@ class WebFetch(BaseTool):
         header = f"[Document: {filename} | Size: {format_size(file_size)} | Saved to: {local_path}]\n\n"
 
         if truncation.truncated:
-            header += f"[Content truncated: showing {truncation.output_lines} of {truncation.total_lines} lines]\n\n"
+            if pages and pages[0] < pages[1]:
+                header += (f"[Content truncated: showing {truncation.output_lines} lines "
+                           f"from the first {pages[0]} of {pages[1]} pages]\n\n")
+            else:
+                header += f"[Content truncated: showing {truncation.output_lines} of {truncation.total_lines} lines]\n\n"
+
+        if fetch_cache:
+            fetch_cache.store(url, response.headers, header + result_text, TEXT_VERSION, path=local_path)
 
         return ToolResult.success(header + result_text)
 
-    def _parse_document(self, file_path: str, suffix: str) -> str:
-        """Parse document file and return extracted text."""
+    def _parse_document(self, file_path: str, suffix: str, doc=None) -> str:
+        """Parse document file and return extracted text (doc: its CachedDocument, for non-text files)."""
         if suffix in PDF_SUFFIXES:
-            return self._parse_pdf(file_path)
+            return self._parse_pdf(doc or get_document_cache().open(file_path))[0]
         elif suffix in WORD_SUFFIXES:
-            return self._parse_word(file_path)
+            return self._parse_word(doc or get_document_cache().open(file_path))
         elif suffix in TEXT_SUFFIXES:
             return self._parse_text(file_path)
         elif suffix in SPREADSHEET_SUFFIXES:
-            return self._parse_spreadsheet(file_path)
+            return self._parse_spreadsheet(doc or get_document_cache().open(file_path))
         elif suffix in PPT_SUFFIXES:
-            return self._parse_ppt(file_path)
+            return self._parse_ppt(doc or get_document_cache().open(file_path))
         else:
             return self._parse_text(file_path)
 
-    def _parse_pdf(self, file_path: str) -> str:
-        """Extract text from PDF using pypdf."""
-        try:
-            from pypdf import PdfReader
-        except ImportError:
-            raise ImportError("pypdf library is required for PDF parsing. Install with: pip install pypdf")
+    def _parse_pdf(self, doc) -> Tuple[str, Tuple[int, int]]:
+        """
+        Text of the PDF's pages, extracting only as many as the output can show.
 
-        reader = PdfReader(file_path)
+        :return: (text, (pages read, total pages))
+        """
+        total = doc.count
         text_parts = []
-        for page_num, page in enumerate(reader.pages, 1):
-            page_text = page.extract_text()
+        lines = 0
+        size = 0
+        pages_read = 0
+        for page_num, page in enumerate(doc.units(), 1):
+            pages_read = page_num
+            page_text = page["text"]
             if page_text and page_text.strip():
-                text_parts.append(f"--- Page {page_num}/{len(reader.pages)} ---\n{page_text}")
-
-        return "\n\n".join(text_parts)
-
-    def _parse_word(self, file_path: str) -> str:
-        """Extract text from Word documents (.docx)."""
-        try:
-            from docx import Document
-        except ImportError:
-            raise ImportError(
-                "python-docx library is required for .docx parsing. Install with: pip install python-docx"
-            )
-        doc = Document(file_path)
-        paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
+                part = f"--- Page {page_num}/{total} ---\n{page_text}"
+                text_parts.append(part)
+                lines += part.count("\n") + 2
+                size += len(part.encode("utf-8")) + 2
+                if lines > DEFAULT_MAX_LINES or size > DEFAULT_MAX_BYTES:
+                    break
+
+        return "\n\n".join(text_parts), (pages_read, total)
+
+    def _parse_word(self, doc) -> str:
+        """Text of a Word document (.docx): its non-empty paragraphs."""
+        paragraphs = [p for p in doc.unit(0)["paragraphs"] if p.strip()]
         return "\n\n".join(paragraphs)
 
     def _parse_text(self, file_path: str) -> str:
@@ -273,61 +436,34 @@ class WebFetch(BaseTool):
                 continue
         raise ValueError(f"Unable to decode file with any supported encoding: {encodings}")
 
-    def _parse_spreadsheet(self, file_path: str) -> str:
-        """Extract text from Excel files (.xls/.xlsx)."""
-        try:
-            import openpyxl
-        except ImportError:
-            raise ImportError(
-                "openpyxl library is required for .xlsx parsing. Install with: pip install openpyxl"
-            )
-
-        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    def _parse_spreadsheet(self, doc) -> str:
+        """Text of an Excel file (.xls/.xlsx): non-empty rows per sheet."""
         result_parts = []
-
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            rows = []
-            for row in ws.iter_rows(values_only=True):
-                cells = [str(c) if c is not None else "" for c in row]
-                if any(cells):
-                    rows.append(" | ".join(cells))
+        for sheet in doc.units():
+            rows = [" | ".join(cells) for cells in sheet["rows"] if any(cells)]
             if rows:
-                result_parts.append(f"--- Sheet: {sheet_name} ---\n" + "\n".join(rows))
+                result_parts.append(f"--- Sheet: {sheet['title']} ---\n" + "\n".join(rows))
 
-        wb.close()
         return "\n\n".join(result_parts)
 
-    def _parse_ppt(self, file_path: str) -> str:
-        """Extract text from PowerPoint files (.ppt/.pptx)."""
-        try:
-            from pptx import Presentation
-        except ImportError:
-            raise ImportError(
-                "python-pptx library is required for .pptx parsing. Install with: pip install python-pptx"
-            )
-
-        prs = Presentation(file_path)
+    def _parse_ppt(self, doc) -> str:
+        """Text of a PowerPoint file (.ppt/.pptx): slides that have text."""
         text_parts = []
-
-        for slide_num, slide in enumerate(prs.slides, 1):
-            slide_texts = []
-            for shape in slide.shapes:
-                if shape.has_text_frame:
-                    for paragraph in shape.text_frame.paragraphs:
-                        text = paragraph.text.strip()
-                        if text:
-                            slide_texts.append(text)
-            if slide_texts:
-                text_parts.append(f"--- Slide {slide_num}/{len(prs.slides)} ---\n" + "\n".join(slide_texts))
+        for slide_num, slide in enumerate(doc.units(), 1):
+            if slide["paragraphs"]:
+                text_parts.append(f"--- Slide {slide_num}/{doc.count} ---\n" + "\n".join(slide["paragraphs"]))
 
         return "\n\n".join(text_parts)
 
     # ---- Encoding detection ----
 
     @staticmethod
-    def _detect_encoding(response: requests.Response) -> str:
-        """Detect response encoding with priority: Content-Type header > HTML meta > chardet > utf-8."""
+    def _detect_encoding(response: requests.Response, head: bytes) -> str:
+        """
+        Detect response encoding with priority: Content-Type header > HTML meta > chardet > utf-8.
+
+        :param head: The first bytes of the body (the response is streamed)
+        """
         # 1. Check Content-Type header for explicit charset
         content_type = response.headers.get("Content-Type", "")
         charset = _extract_charset_from_content_type(content_type)
@@ -335,13 +471,13 @@ class WebFetch(BaseTool):
             return charset
 
         # 2. Scan raw bytes for HTML meta charset declaration
-        raw = response.content[:4096]
+        raw = head[:4096]
         charset = _extract_charset_from_html_meta(raw)
         if charset:
             return charset
 
         # 3. Use apparent_encoding (chardet-based detection) if confident enough
-        apparent = response.apparent_encoding
+        apparent = chardet.detect(head)["encoding"] if chardet is not None and head else None
         if apparent:
             apparent_lower = apparent.lower()
             # Trust CJK / Windows encodings detected by chardet
@@ -352,6 +488,15 @@ class WebFetch(BaseTool):
         # 4. Fallback
         return "utf-8"
 
+    @staticmethod
+    def _remote_version(response: requests.Response) -> Optional[Dict[str, Any]]:
+        """Cache version of a download from its validators, or None if the server sends none."""
+        etag = response.headers.get("ETag")
+        modified = response.headers.get("Last-Modified")
+        if not etag and not modified:
+            return None
+        return {"etag": etag, "last_modified": modified, "size": int(response.headers.get("Content-Length", 0) or 0)}
+
     # ---- Helper methods ----
 
     def _ensure_tmp_dir(self) -> str:
@@ -422,23 +567,3 @@ class WebFetch(BaseTool):
         parsed = urlparse(url)
         new_path = parsed.path.rstrip("/") + suffix
         return parsed._replace(path=new_path).geturl()
-
-    # ---- HTML extraction (unchanged) ----
-
-    @staticmethod
-    def _extract_title(html: str) -> str:
-        match = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
-        return match.group(1).strip() if match else "Untitled"
-
-    @staticmethod
-    def _extract_text(html: str) -> str:
-        text = re.sub(r"<script[^>]*>.*?</script>", "", html, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r"<style[^>]*>.*?</style>", "", text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r"<[^>]+>", "", text)
-        text = text.replace("&amp;", "&").replace("&lt;", "<").replace("&gt;", ">")
-        text = text.replace("&quot;", '"').replace("&#39;", "'").replace("&nbsp;", " ")
-        text = re.sub(r"[^\S\n]+", " ", text)
-        text = re.sub(r"\n{3,}", "\n\n", text)
-        lines = [line.strip() for line in text.splitlines()]
-        text = "\n".join(lines)
-        return text.strip()
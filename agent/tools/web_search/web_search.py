@@ -13,6 +13,7 @@ import requests
 
 from agent.tools.base_tool import BaseTool, ToolResult
 from common.log import logger
+from common import http_client
 from config import conf
 
 
@@ -24,6 +25,7 @@ class WebSearch(BaseTool):
     """Tool for searching the web using Bocha or LinkAI search API"""
 
     name: str = "web_search"
+    parallel_safe: bool = True
     description: str = "Search the web for real-time information. Returns titles, URLs, and snippets."
 
     params: dict = {
@@ -145,7 +147,7 @@ class WebSearch(BaseTool):
 
         logger.debug(f"[WebSearch] Bocha search: query='{query}', count={count}")
 
-        response = requests.post(url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
+        response = http_client.post(url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
 
         if response.status_code == 401:
             return ToolResult.fail("Error: Invalid BOCHA_API_KEY. Please check your API key.")
@@ -239,7 +241,7 @@ class WebSearch(BaseTool):
 
         logger.debug(f"[WebSearch] LinkAI search: query='{query}', count={count}")
 
-        response = requests.post(url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
+        response = http_client.post(url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
 
         if response.status_code == 401:
             return ToolResult.fail("Error: Invalid LINKAI_API_KEY. Please check your API key.")
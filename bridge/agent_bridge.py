@@ -3,9 +3,11 @@ Agent Bridge - Integrates Agent system with existing COW bridge
 """
 
 import os
+import threading
 from typing import Optional, List
 
 from agent.protocol import Agent, LLMModel, LLMRequest
+from bridge.agent_cache import AgentCache
 from bridge.agent_event_handler import AgentEventHandler
 from bridge.agent_initializer import AgentInitializer
 from bridge.bridge import Bridge
@@ -264,7 +266,13 @@ class AgentBridge:
     
     def __init__(self, bridge: Bridge):
         self.bridge = bridge
-        self.agents = {}  # session_id -> Agent instance mapping
+        # session_id -> Agent, bounded; evicted agents are hibernated to the
+        # ConversationStore and rebuilt on the session's next message
+        self.agents = AgentCache(
+            max_size=conf().get("agent_cache_max_sessions", 500),
+            idle_ttl=conf().get("agent_cache_idle_ttl", 3600),
+            on_evict=self._hibernate_agent,
+        )
         self.default_agent = None  # For backward compatibility (no session_id)
         self.agent: Optional[Agent] = None
         self.scheduler_initialized = False
@@ -328,12 +336,13 @@ class AgentBridge:
 
         return agent
     
-    def get_agent(self, session_id: str = None) -> Optional[Agent]:
+    def get_agent(self, session_id: str = None, pin: bool = False) -> Optional[Agent]:
         """
         Get agent instance for the given session
         
         Args:
             session_id: Session identifier (e.g., user_id). If None, returns default agent.
+            pin: Keep the agent from being evicted until agents.unpin(session_id)
         
         Returns:
             Agent instance for this session
@@ -344,21 +353,46 @@ class AgentBridge:
                 self._init_default_agent()
             return self.default_agent
         
-        # Check if agent exists for this session
-        if session_id not in self.agents:
-            self._init_agent_for_session(session_id)
-        
-        return self.agents[session_id]
+        # Reuse the live agent, or build one (restoring hibernated history)
+        agent = self.agents.lookup(session_id, pin=pin)
+        if agent is None:
+            agent = self._init_agent_for_session(session_id, pin=pin)
+        return agent
     
     def _init_default_agent(self):
         """Initialize default super agent"""
         agent = self.initializer.initialize_agent(session_id=None)
         self.default_agent = agent
     
-    def _init_agent_for_session(self, session_id: str):
+    def _init_agent_for_session(self, session_id: str, pin: bool = False) -> Agent:
         """Initialize agent for a specific session"""
         agent = self.initializer.initialize_agent(session_id=session_id)
-        self.agents[session_id] = agent
+        return self.agents.put(session_id, agent, pin=pin)
+    
+    def _hibernate_agent(self, session_id: str, agent: Agent):
+        """Release an evicted agent; its history stays in the ConversationStore"""
+        memory_manager = getattr(agent, "memory_manager", None)
+        default_memory = getattr(self.default_agent, "memory_manager", None)
+        if memory_manager is not None and memory_manager is not default_memory:
+            pending = memory_manager.flush_manager.pending_flushes()
+            if pending:
+                # A trim / daily flush of this session is still summarizing:
+                # close once it is done rather than under it, without holding
+                # up the message that caused the eviction
+                threading.Thread(
+                    target=self._close_memory_after, args=(session_id, memory_manager, pending),
+                    daemon=True, name=f"hibernate-{session_id}",
+                ).start()
+            else:
+                memory_manager.close()
+        logger.debug(f"[AgentBridge] Hibernated agent for session={session_id}")
+
+    @staticmethod
+    def _close_memory_after(session_id: str, memory_manager, flushes):
+        for thread in flushes:
+            thread.join()
+        memory_manager.close()
+        logger.debug(f"[AgentBridge] Closed memory of hibernated session={session_id} after its flush")
     
     def agent_reply(self, query: str, context: Context = None, 
                    on_event=None, clear_history: bool = False) -> Reply:
@@ -376,13 +410,16 @@ class AgentBridge:
         """
         session_id = None
         agent = None
+        pinned = False
         try:
             # Extract session_id from context for user isolation
             if context:
                 session_id = context.kwargs.get("session_id") or context.get("session_id")
             
-            # Get agent for this session (will auto-initialize if needed)
-            agent = self.get_agent(session_id=session_id)
+            # Get agent for this session (will auto-initialize if needed);
+            # pinned so it cannot be hibernated while this run is in progress
+            agent = self.get_agent(session_id=session_id, pin=True)
+            pinned = agent is not None and session_id is not None
             if not agent:
                 return Reply(ReplyType.ERROR, "Failed to initialize super agent")
             
@@ -493,6 +530,9 @@ class AgentBridge:
                 except Exception as db_err:
                     logger.warning(f"[AgentBridge] Failed to clear DB after error: {db_err}")
             return Reply(ReplyType.ERROR, f"Agent error: {str(e)}")
+        finally:
+            if pinned:
+                self.agents.unpin(session_id)
     
     def _create_file_reply(self, file_info: dict, text_response: str, context: Context = None) -> Reply:
         """
@@ -0,0 +1,303 @@
+"""
+Bounded cache of per-session Agent instances.
+
+AgentBridge used to keep one fully initialized Agent per session id forever:
+message list, tools, a MemoryManager with its own SQLite connection, a skill
+manager and a rendered system prompt. On a busy group bot that grows without
+limit. AgentCache caps it with LRU and idle-TTL eviction.
+
+Every run's messages are already persisted to the ConversationStore, so an
+evicted agent is simply hibernated: its resources are released and, when the
+session comes back, AgentInitializer builds a fresh agent and
+_restore_conversation_history reloads the recent turns. Agents that are in the
+middle of a run are pinned and never evicted.
+
+The cache keeps the small dict surface existing callers rely on
+(``in``, ``[]``, ``del``, ``get``, ``items``, ``values``, ``clear``);
+iteration helpers return snapshots so they are safe while other threads
+insert or evict.
+
+Config:
+    agent_cache_max_sessions   live agents kept in memory, 0 = unbounded
+    agent_cache_idle_ttl       seconds without use before an agent is hibernated, 0 = never
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from common.log import logger
+
+
+def _deep_sizeof(obj: Any) -> int:
+    """Approximate retained size of plain containers (dict/list/tuple/str/bytes/numbers)."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+def estimate_agent_bytes(agent) -> int:
+    """
+    Estimate the per-session memory of an agent: its message history and
+    system prompt. Tool, skill and model objects are mostly shared
+    infrastructure and are not counted.
+    """
+    lock = getattr(agent, "messages_lock", None)
+    if lock is not None:
+        with lock:
+            messages = list(agent.messages)
+    else:
+        messages = list(getattr(agent, "messages", []) or [])
+    return _deep_sizeof(messages) + sys.getsizeof(getattr(agent, "system_prompt", "") or "")
+
+
+class AgentCache:
+    """LRU + idle-TTL cache of session agents with pinning and hibernation bookkeeping."""
+
+    def __init__(
+        self,
+        max_size: int = 0,
+        idle_ttl: float = 0,
+        on_evict: Optional[Callable[[str, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max(0, int(max_size or 0))
+        self.idle_ttl = max(0.0, float(idle_ttl or 0))
+        self._on_evict = on_evict
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._agents: "OrderedDict[str, Any]" = OrderedDict()  # LRU order, oldest first
+        self._last_used: Dict[str, float] = {}
+        self._pins: Dict[str, int] = {}
+        self._hibernated: Dict[str, float] = {}  # session_id -> wall time of last use
+        self._drained: Set[str] = set()  # hibernated sessions already handed to drain_hibernated
+        self._hits = 0
+        self._misses = 0
+        self._restores = 0
+        self._evicted_lru = 0
+        self._evicted_idle = 0
+
+    # ------------------------------------------------------------------
+    # Cache operations
+    # ------------------------------------------------------------------
+
+    def lookup(self, session_id: str, pin: bool = False):
+        """
+        Return the live agent for ``session_id`` (marking it recently used), or None.
+
+        Also hibernates agents whose idle TTL ran out; with entries kept in LRU
+        order that check stops at the first recent one, so it is O(evicted)
+        plus the pinned entries it steps over.
+        """
+        with self._lock:
+            agent = self._agents.get(session_id)
+            if agent is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._agents.move_to_end(session_id)
+                self._last_used[session_id] = self._clock()
+                if pin:
+                    self._pins[session_id] = self._pins.get(session_id, 0) + 1
+            evicted = self._collect_evictions() if self.idle_ttl else []
+        self._release_all(evicted)
+        return agent
+
+    def put(self, session_id: str, agent, pin: bool = False):
+        """
+        Insert a freshly built agent and evict over-limit / idle ones.
+
+        If another thread stored an agent for the same session first, that
+        one wins and is returned; the caller's agent is released.
+        """
+        with self._lock:
+            existing = self._agents.get(session_id)
+            if existing is not None:
+                stored, duplicate = existing, agent
+                self._agents.move_to_end(session_id)
+            else:
+                stored, duplicate = agent, None
+                self._agents[session_id] = agent
+                if self._hibernated.pop(session_id, None) is not None:
+                    self._restores += 1
+                    self._drained.discard(session_id)
+            self._last_used[session_id] = self._clock()
+            if pin:
+                self._pins[session_id] = self._pins.get(session_id, 0) + 1
+            evicted = self._collect_evictions()
+        if duplicate is not None:
+            self._release(session_id, duplicate)
+        self._release_all(evicted)
+        return stored
+
+    def pin(self, session_id: str):
+        with self._lock:
+            if session_id in self._agents:
+                self._pins[session_id] = self._pins.get(session_id, 0) + 1
+
+    def unpin(self, session_id: str):
+        """Release a pin taken by lookup/put/pin; evicts if the cache ran over while pinned."""
+        with self._lock:
+            count = self._pins.get(session_id, 0) - 1
+            if count > 0:
+                self._pins[session_id] = count
+            else:
+                self._pins.pop(session_id, None)
+            if session_id in self._agents:
+                self._agents.move_to_end(session_id)
+                self._last_used[session_id] = self._clock()
+            evicted = self._collect_evictions()
+        self._release_all(evicted)
+
+    def evict_idle(self) -> int:
+        """Hibernate agents idle longer than idle_ttl. Returns how many were evicted."""
+        with self._lock:
+            evicted = self._collect_evictions()
+        self._release_all(evicted)
+        return len(evicted)
+
+    def drain_hibernated(self) -> List[Tuple[str, float]]:
+        """
+        Return sessions hibernated since the last drain, as (session_id, last_used_wall_time).
+
+        They stay hibernated (a later rebuild still counts as a restore); they
+        are only marked so the next drain skips them until they hibernate again.
+        """
+        with self._lock:
+            drained = [(sid, t) for sid, t in self._hibernated.items() if sid not in self._drained]
+            self._drained.update(sid for sid, _ in drained)
+        return drained
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            agents = list(self._agents.values())
+            stats = {
+                "live": len(agents),
+                "max_size": self.max_size,
+                "idle_ttl": self.idle_ttl,
+                "pinned": len(self._pins),
+                "hibernated": len(self._hibernated),
+                "hits": self._hits,
+                "misses": self._misses,
+                "restores": self._restores,
+                "evicted_lru": self._evicted_lru,
+                "evicted_idle": self._evicted_idle,
+            }
+        sizes = [estimate_agent_bytes(a) for a in agents]
+        stats["estimated_bytes"] = sum(sizes)
+        stats["avg_bytes_per_agent"] = int(sum(sizes) / len(sizes)) if sizes else 0
+        stats["max_bytes_per_agent"] = max(sizes) if sizes else 0
+        return stats
+
+    def _collect_evictions(self) -> List[Tuple[str, Any]]:
+        """Pop idle and over-limit agents (oldest first, skipping pinned ones). Caller holds the lock."""
+        evicted = []
+        now = self._clock()
+        if self.idle_ttl:
+            idle = []
+            for session_id in self._agents:
+                if now - self._last_used.get(session_id, now) < self.idle_ttl:
+                    break  # LRU order: everything after is more recent
+                if session_id not in self._pins:
+                    idle.append(session_id)
+            evicted.extend(self._pop(session_id) for session_id in idle)
+            self._evicted_idle += len(idle)
+        excess = len(self._agents) - self.max_size if self.max_size else 0
+        if excess > 0:
+            oldest = []
+            for session_id in self._agents:
+                if len(oldest) >= excess:
+                    break
+                if session_id not in self._pins:
+                    oldest.append(session_id)
+            evicted.extend(self._pop(session_id) for session_id in oldest)
+            self._evicted_lru += len(oldest)
+        return evicted
+
+    def _pop(self, session_id: str) -> Tuple[str, Any]:
+        agent = self._agents.pop(session_id)
+        idle = self._clock() - self._last_used.pop(session_id, self._clock())
+        self._hibernated[session_id] = time.time() - max(0.0, idle)
+        self._drained.discard(session_id)
+        return session_id, agent
+
+    def _release_all(self, evicted: List[Tuple[str, Any]]):
+        for session_id, agent in evicted:
+            self._release(session_id, agent)
+
+    def _release(self, session_id: str, agent):
+        if self._on_evict is None:
+            return
+        try:
+            self._on_evict(session_id, agent)
+        except Exception as e:
+            logger.warning(f"[AgentCache] Failed to release agent for session={session_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # dict-style access used by existing callers
+    # ------------------------------------------------------------------
+
+    def __contains__(self, session_id) -> bool:
+        with self._lock:
+            return session_id in self._agents
+
+    def __getitem__(self, session_id):
+        with self._lock:
+            return self._agents[session_id]
+
+    def __setitem__(self, session_id, agent):
+        self.put(session_id, agent)
+
+    def __delitem__(self, session_id):
+        """Drop a session outright (e.g. it was cleared); not recorded as hibernated."""
+        with self._lock:
+            del self._agents[session_id]
+            self._last_used.pop(session_id, None)
+            self._pins.pop(session_id, None)
+            self._hibernated.pop(session_id, None)
+            self._drained.discard(session_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._agents)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, session_id, default=None):
+        with self._lock:
+            return self._agents.get(session_id, default)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._agents.keys())
+
+    def values(self) -> List[Any]:
+        with self._lock:
+            return list(self._agents.values())
+
+    def items(self) -> List[Tuple[str, Any]]:
+        with self._lock:
+            return list(self._agents.items())
+
+    def clear(self):
+        with self._lock:
+            self._agents.clear()
+            self._last_used.clear()
+            self._pins.clear()
+            self._hibernated.clear()
+            self._drained.clear()
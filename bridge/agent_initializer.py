@@ -22,6 +22,15 @@ class AgentInitializer:
     - Tool loading
     - System prompt building
     """
+
+    # config.json keys mirrored into ~/.cow/.env
+    _ENV_KEY_MAPPING = {
+        "open_ai_api_key": "OPENAI_API_KEY",
+        "open_ai_api_base": "OPENAI_API_BASE",
+        "gemini_api_key": "GEMINI_API_KEY",
+        "claude_api_key": "CLAUDE_API_KEY",
+        "linkai_api_key": "LINKAI_API_KEY",
+    }
     
     def __init__(self, bridge, agent_bridge):
         """
@@ -33,6 +42,8 @@ class AgentInitializer:
         """
         self.bridge = bridge
         self.agent_bridge = agent_bridge
+        # workspace_root -> fingerprint of the inputs of the last bootstrap
+        self._workspace_fingerprints = {}
     
     def initialize_agent(self, session_id: Optional[str] = None) -> Agent:
         """
@@ -49,15 +60,10 @@ class AgentInitializer:
         # Get workspace from config
         workspace_root = expand_path(conf().get("agent_workspace", "~/cow"))
         
-        # Migrate API keys
-        self._migrate_config_to_env(workspace_root)
-        
-        # Load environment variables
-        self._load_env_file()
-        
-        # Initialize workspace
-        from agent.prompt import ensure_workspace, load_context_files, PromptBuilder
-        workspace_files = ensure_workspace(workspace_root, create_templates=True)
+        # Migrate API keys, load .env and initialize the workspace
+        # (skipped for new sessions when none of their inputs changed)
+        from agent.prompt import load_context_files, PromptBuilder
+        self._prepare_workspace(workspace_root)
         
         if session_id is None:
             logger.info(f"[AgentInitializer] Workspace initialized at: {workspace_root}")
@@ -122,6 +128,47 @@ class AgentInitializer:
 
         return agent
 
+    def _prepare_workspace(self, workspace_root: str):
+        """
+        Workspace-wide bootstrap: config -> .env migration, .env loading and
+        ensure_workspace. These only depend on the API keys in config, the
+        .env file and the workspace files, so they run again only when one of
+        those changed since the previous agent was built.
+        """
+        fingerprint = self._workspace_fingerprint(workspace_root)
+        if self._workspace_fingerprints.get(workspace_root) == fingerprint:
+            return
+
+        self._migrate_config_to_env(workspace_root)
+        self._load_env_file()
+
+        from agent.prompt import ensure_workspace
+        ensure_workspace(workspace_root, create_templates=True)
+
+        # Migration may have rewritten .env; store the post-bootstrap state
+        self._workspace_fingerprints[workspace_root] = self._workspace_fingerprint(workspace_root)
+
+    @staticmethod
+    def _workspace_fingerprint(workspace_root: str) -> tuple:
+        from config import conf
+
+        def _stamp(path):
+            try:
+                st = os.stat(path)
+                return st.st_mtime_ns, st.st_size
+            except OSError:
+                return None
+
+        api_keys = tuple(conf().get(key, "") for key in AgentInitializer._ENV_KEY_MAPPING)
+        from agent.prompt.workspace import DEFAULT_AGENT_FILENAME
+        return (
+            api_keys,
+            conf().get("knowledge", True),
+            _stamp(expand_path("~/.cow/.env")),
+            os.path.isdir(os.path.join(workspace_root, "memory")),
+            os.path.exists(os.path.join(workspace_root, DEFAULT_AGENT_FILENAME)),
+        )
+
     def _restore_conversation_history(self, agent, session_id: str) -> None:
         """
         Load persisted conversation messages from SQLite and inject them
@@ -488,13 +535,7 @@ class AgentInitializer:
         """Migrate API keys from config.json to .env file"""
         from config import conf
         
-        key_mapping = {
-            "open_ai_api_key": "OPENAI_API_KEY",
-            "open_ai_api_base": "OPENAI_API_BASE",
-            "gemini_api_key": "GEMINI_API_KEY",
-            "claude_api_key": "CLAUDE_API_KEY",
-            "linkai_api_key": "LINKAI_API_KEY",
-        }
+        key_mapping = self._ENV_KEY_MAPPING
         
         env_file = expand_path("~/.cow/.env")
         
@@ -588,7 +629,16 @@ class AgentInitializer:
         for sid, agent in self.agent_bridge.agents.items():
             agents.append((sid, agent))
 
-        if not agents:
+        # Sessions hibernated out of the agent cache since the last flush
+        # (only those used within the past day) are summarized from the
+        # ConversationStore instead of a live message list
+        hibernated = []
+        drain = getattr(self.agent_bridge.agents, "drain_hibernated", None)
+        if drain is not None:
+            cutoff = time.time() - 86400
+            hibernated = [sid for sid, last_used in drain() if last_used >= cutoff]
+
+        if not agents and not hibernated:
             return
 
         # Phase 1: flush daily summaries
@@ -614,8 +664,31 @@ class AgentInitializer:
             except Exception as e:
                 logger.warning(f"[DailyFlush] Failed for session {label}: {e}")
 
+        if hibernated:
+            if dream_candidate is None:
+                logger.debug(f"[DailyFlush] No memory manager available, skipped {len(hibernated)} hibernated session(s)")
+            else:
+                from agent.memory import get_conversation_store
+                from config import conf
+                store = get_conversation_store()
+                max_turns = conf().get("agent_max_context_turns", 20)
+                for sid in hibernated:
+                    try:
+                        messages = self._filter_text_only_messages(
+                            store.load_messages(sid, max_turns=max_turns)
+                        )
+                        if not messages:
+                            continue
+                        if dream_candidate.create_daily_summary(messages):
+                            flushed += 1
+                            t = dream_candidate._last_flush_thread
+                            if t:
+                                flush_threads.append(t)
+                    except Exception as e:
+                        logger.warning(f"[DailyFlush] Failed for hibernated session {sid}: {e}")
+
         if flushed:
-            logger.info(f"[DailyFlush] Flushed {flushed}/{len(agents)} agent session(s)")
+            logger.info(f"[DailyFlush] Flushed {flushed}/{len(agents) + len(hibernated)} agent session(s)")
 
         # Wait for all flush threads to finish before dreaming
         for t in flush_threads:
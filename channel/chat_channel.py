@@ -3,12 +3,15 @@ import re
 import threading
 import time
 from asyncio import CancelledError
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import Future
+from queue import Queue
 
+from bridge.bridge import Bridge
 from bridge.context import *
 from bridge.reply import *
 from channel.channel import Channel
 from common.dequeue import Dequeue
+from common.handler_pool import get_handler_pool
 from common import memory
 from plugins import *
 
@@ -17,8 +20,6 @@ try:
 except Exception as e:
     pass
 
-handler_pool = ThreadPoolExecutor(max_workers=8)  # 处理消息的线程池
-
 
 # 抽象类, 它包含了与消息通道无关的通用处理逻辑
 class ChatChannel(Channel):
@@ -34,11 +35,31 @@ class ChatChannel(Channel):
         # like "No request_id found in context".
         self.futures = {}
         self.sessions = {}
-        self.lock = threading.Lock()
+        # RLock: Future.cancel() runs done-callbacks synchronously, and those
+        # callbacks take the lock again while cancel_session() still holds it.
+        self.lock = threading.RLock()
+        # Session ids with pending work. produce() and worker completion push
+        # here so consume() only wakes up when something actually changed.
+        self._ready_sessions = Queue()
         _thread = threading.Thread(target=self.consume)
         _thread.setDaemon(True)
         _thread.start()
 
+    @property
+    def handler_pool(self):
+        """
+        Worker pool for the current channel and bot type.
+
+        Looked up on every use (get_handler_pool caches the pools) so a bot type
+        switched by a config reload routes new messages to the matching pool.
+        """
+        bot_type = None
+        try:
+            bot_type = Bridge().get_bot_type("chat")
+        except Exception:
+            pass
+        return get_handler_pool(self.channel_type, bot_type)
+
     # 根据消息构造context，消息内容相关的触发项写在这里
     def _compose_context(self, ctype: ContextType, content, **kwargs):
         context = Context(ctype, content)
@@ -418,69 +439,87 @@ class ChatChannel(Channel):
                 logger.exception("Worker raise exception: {}".format(e))
             with self.lock:
                 self.sessions[session_id][1].release()
+            self._ready_sessions.put(session_id)
 
         return func
 
     def produce(self, context: Context):
         session_id = context["session_id"]
+        is_admin_cmd = context.type == ContextType.TEXT and context.content.startswith("#")
+        pool = self.handler_pool
+        if not pool.admit(force=is_admin_cmd):  # 管理命令不受排队上限限制
+            logger.warning("[chat_channel] handler pool '{}' is saturated, drop message of session {}".format(
+                pool.name, session_id))
+            return
         with self.lock:
             if session_id not in self.sessions:
                 self.sessions[session_id] = [
                     Dequeue(),
                     threading.BoundedSemaphore(conf().get("concurrency_in_session", 1)),
                 ]
-            if context.type == ContextType.TEXT and context.content.startswith("#"):
-                self.sessions[session_id][0].putleft(context)  # 优先处理管理命令
+            # 消息和接纳它的线程池一起排队，配置重载后也提交到同一个池
+            if is_admin_cmd:
+                self.sessions[session_id][0].putleft((context, pool))  # 优先处理管理命令
             else:
-                self.sessions[session_id][0].put(context)
+                self.sessions[session_id][0].put((context, pool))
+        self._ready_sessions.put(session_id)
 
-    # 消费者函数，单独线程，用于从消息队列中取出消息并处理
+    # 消费者函数，单独线程，阻塞等待有新消息或任务完成的session，再分发到线程池处理
     def consume(self):
         while True:
-            with self.lock:
-                session_ids = list(self.sessions.keys())
-            for session_id in session_ids:
-                with self.lock:
-                    context_queue, semaphore = self.sessions[session_id]
-                if semaphore.acquire(blocking=False):  # 等线程处理完毕才能删除
-                    if not context_queue.empty():
-                        context = context_queue.get()
-                        logger.debug("[chat_channel] consume context: {}".format(context))
-                        future: Future = handler_pool.submit(self._handle, context)
-                        future.add_done_callback(self._thread_pool_callback(session_id, context=context))
-                        with self.lock:
-                            if session_id not in self.futures:
-                                self.futures[session_id] = []
-                            self.futures[session_id].append(future)
-                    elif semaphore._initial_value == semaphore._value + 1:  # 除了当前，没有任务再申请到信号量，说明所有任务都处理完毕
-                        with self.lock:
-                            self.futures[session_id] = [t for t in self.futures[session_id] if not t.done()]
-                            assert len(self.futures[session_id]) == 0, "thread pool error"
-                            del self.sessions[session_id]
-                    else:
-                        semaphore.release()
-            time.sleep(0.2)
+            session_id = self._ready_sessions.get()
+            try:
+                self._dispatch(session_id)
+            except Exception as e:
+                logger.exception("[chat_channel] dispatch error, session_id={}: {}".format(session_id, e))
+
+    def _dispatch(self, session_id):
+        """
+        Submit as many queued contexts of one session as its semaphore allows,
+        and drop the session entry once it has no queued or running work.
+        """
+        with self.lock:
+            if session_id not in self.sessions:
+                return
+            context_queue, semaphore = self.sessions[session_id]
+            while not context_queue.empty() and semaphore.acquire(blocking=False):
+                context, pool = context_queue.get()
+                logger.debug("[chat_channel] consume context: {}".format(context))
+                future: Future = pool.submit(self._handle, context)
+                if session_id not in self.futures:
+                    self.futures[session_id] = []
+                self.futures[session_id].append(future)
+                future.add_done_callback(self._thread_pool_callback(session_id, context=context))
+            if context_queue.empty() and semaphore._initial_value == semaphore._value:  # 没有排队和执行中的任务，清理session
+                self.futures[session_id] = [t for t in self.futures.get(session_id, []) if not t.done()]
+                assert len(self.futures[session_id]) == 0, "thread pool error"
+                del self.futures[session_id]
+                del self.sessions[session_id]
 
     # 取消session_id对应的所有任务，只能取消排队的消息和已提交线程池但未执行的任务
     def cancel_session(self, session_id):
         with self.lock:
             if session_id in self.sessions:
-                for future in self.futures[session_id]:
+                for future in list(self.futures.get(session_id, [])):
                     future.cancel()
-                cnt = self.sessions[session_id][0].qsize()
-                if cnt > 0:
-                    logger.info("Cancel {} messages in session {}".format(cnt, session_id))
-                self.sessions[session_id][0] = Dequeue()
+                self._discard_queued(session_id)
+
+    def _discard_queued(self, session_id):
+        """Drop the queued messages of a session and give their slots back to the pools that admitted them."""
+        context_queue = self.sessions[session_id][0]
+        cnt = context_queue.qsize()
+        if cnt > 0:
+            logger.info("Cancel {} messages in session {}".format(cnt, session_id))
+            for _, pool in list(context_queue.queue):
+                pool.discard(1)
+        self.sessions[session_id][0] = Dequeue()
 
     def cancel_all_session(self):
         with self.lock:
             for session_id in self.sessions:
-                for future in self.futures[session_id]:
+                for future in list(self.futures.get(session_id, [])):
                     future.cancel()
-                cnt = self.sessions[session_id][0].qsize()
-                if cnt > 0:
-                    logger.info("Cancel {} messages in session {}".format(cnt, session_id))
-                self.sessions[session_id][0] = Dequeue()
+                self._discard_queued(session_id)
 
 
 def check_prefix(content, prefix_list):
@@ -10,7 +10,6 @@ import json
 import logging
 import os
 import time
-import requests
 
 import dingtalk_stream
 from dingtalk_stream import AckMessage
@@ -27,6 +26,7 @@ from common.expired_dict import ExpiredDict
 from common.log import logger
 from common.singleton import singleton
 from common.time_check import time_checker
+from common import http_client
 from config import conf
 
 
@@ -99,7 +99,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
         super(dingtalk_stream.ChatbotHandler, self).__init__()
         self.logger = self.setup_logger()
         # 历史消息id暂存，用于幂等控制
-        self.receivedMsgs = ExpiredDict(conf().get("expires_in_seconds", 3600))
+        self.receivedMsgs = ExpiredDict(conf().get("expires_in_seconds", 3600), background_sweep=True)
         self._stream_client = None
         self._running = False
         self._event_loop = None
@@ -122,7 +122,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
         connection_dict is None and error_str contains a human-readable message.
         """
         try:
-            resp = requests.post(
+            resp = http_client.post(
                 "https://api.dingtalk.com/v1.0/gateway/connections/open",
                 headers={"Content-Type": "application/json", "Accept": "application/json"},
                 json={
@@ -260,7 +260,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = http_client.post(url, headers=headers, json=data, timeout=10)
             result = response.json()
             
             if response.status_code == 200 and "accessToken" in result:
@@ -304,7 +304,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
 
         logger.info(f"[DingTalk] Sending single message to user {user_id} with robot_code {robot_code}")
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = http_client.post(url, headers=headers, json=data, timeout=10)
             result = response.json()
             
             if response.status_code == 200 and result.get("processQueryKey"):
@@ -350,7 +350,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = http_client.post(url, headers=headers, json=data, timeout=10)
             result = response.json()
             
             if response.status_code == 200:
@@ -387,7 +387,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
         if file_path.startswith("http://") or file_path.startswith("https://"):
             try:
                 import uuid
-                response = requests.get(file_path, timeout=(5, 60))
+                response = http_client.get(file_path, timeout=(5, 60))
                 if response.status_code != 200:
                     logger.error(f"[DingTalk] Failed to download file from URL: {file_path}")
                     return None
@@ -423,7 +423,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
         try:
             with open(file_path, "rb") as f:
                 files = {"media": (os.path.basename(file_path), f)}
-                response = requests.post(url, params=params, files=files, timeout=(5, 60))
+                response = http_client.post(url, params=params, files=files, timeout=(5, 60))
                 result = response.json()
                 
                 if result.get("errcode") == 0:
@@ -475,7 +475,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
             body["userIds"] = [incoming_message.sender_staff_id]
         
         try:
-            response = requests.post(url=url, headers=headers, json=body, timeout=10)
+            response = http_client.post(url=url, headers=headers, json=body, timeout=10)
             result = response.json()
             
             logger.info(f"[DingTalk] Image send result: {response.text}")
@@ -539,7 +539,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
             }
         
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = http_client.post(url, headers=headers, json=data, timeout=10)
             result = response.json()
             
             if response.status_code == 200:
@@ -931,7 +931,7 @@ class DingTalkChanel(ChatChannel, dingtalk_stream.ChatbotHandler):
             body["userIds"] = [incoming_message.sender_staff_id]
         
         try:
-            response = requests.post(url=url, headers=headers, json=body, timeout=10)
+            response = http_client.post(url=url, headers=headers, json=body, timeout=10)
             result = response.json()
             
             logger.info(f"[DingTalk] File send result: {response.text}")
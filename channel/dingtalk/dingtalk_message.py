@@ -1,7 +1,6 @@
 import os
 import re
 
-import requests
 from dingtalk_stream import ChatbotMessage
 
 from bridge.context import ContextType
@@ -10,6 +9,7 @@ from channel.chat_message import ChatMessage
 from common.log import logger
 from common.tmp_dir import TmpDir
 from common.utils import expand_path
+from common import http_client
 from config import conf
 
 
@@ -158,7 +158,7 @@ def download_image_file(image_url, temp_dir):
         }
         
         try:
-            token_response = requests.post(token_url, json=token_body, headers=token_headers, timeout=10)
+            token_response = http_client.post(token_url, json=token_body, headers=token_headers, timeout=10)
             
             if token_response.status_code == 200:
                 token_data = token_response.json()
@@ -179,7 +179,7 @@ def download_image_file(image_url, temp_dir):
                     "robotCode": robot_code
                 }
                 
-                download_response = requests.post(download_api_url, json=download_body, headers=download_headers, timeout=10)
+                download_response = http_client.post(download_api_url, json=download_body, headers=download_headers, timeout=10)
                 
                 if download_response.status_code == 200:
                     download_data = download_response.json()
@@ -190,7 +190,7 @@ def download_image_file(image_url, temp_dir):
                         return None
                     
                     # 从 downloadUrl 下载实际图片
-                    image_response = requests.get(download_url, stream=True, timeout=60)
+                    image_response = http_client.get(download_url, stream=True, timeout=60)
                     
                     if image_response.status_code == 200:
                         # 生成文件名（使用 download_code 的 hash，避免特殊字符）
@@ -226,7 +226,7 @@ def download_image_file(image_url, temp_dir):
         }
         
         try:
-            response = requests.get(image_url, headers=headers, stream=True, timeout=60 * 5)
+            response = http_client.get(image_url, headers=headers, stream=True, timeout=60 * 5)
             if response.status_code == 200:
                 # 生成文件名
                 file_name = image_url.split("/")[-1].split("?")[0]
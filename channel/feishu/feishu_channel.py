@@ -20,7 +20,6 @@ import threading
 # -*- coding=utf-8 -*-
 import uuid
 
-import requests
 import web
 
 from bridge.context import Context
@@ -32,6 +31,7 @@ from common import utils
 from common.expired_dict import ExpiredDict
 from common.log import logger
 from common.singleton import singleton
+from common import http_client
 from config import conf
 
 # Suppress verbose logs from Lark SDK
@@ -239,7 +239,7 @@ class FeiShuChanel(ChatChannel):
     def __init__(self):
         super().__init__()
         # 历史消息id暂存，用于幂等控制
-        self.receivedMsgs = ExpiredDict(60 * 60 * 7.1)
+        self.receivedMsgs = ExpiredDict(60 * 60 * 7.1, background_sweep=True)
         self._http_server = None
         self._ws_client = None
         self._ws_thread = None
@@ -288,7 +288,7 @@ class FeiShuChanel(ChatChannel):
                 logger.warning("[FeiShu] Cannot fetch bot info: no access_token")
                 return
             headers = {"Authorization": "Bearer " + access_token}
-            resp = requests.get("https://open.feishu.cn/open-apis/bot/v3/info/", headers=headers, timeout=5)
+            resp = http_client.get("https://open.feishu.cn/open-apis/bot/v3/info/", headers=headers, timeout=5)
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get("code") == 0:
@@ -674,7 +674,7 @@ class FeiShuChanel(ChatChannel):
                 "msg_type": msg_type,
                 "content": content_json
             }
-            res = requests.post(url=url, headers=headers, json=data, timeout=(5, 10))
+            res = http_client.post(url=url, headers=headers, json=data, timeout=(5, 10))
         else:
             # 发送新消息（私聊或群聊中无msg_id的情况，如定时任务）
             url = "https://open.feishu.cn/open-apis/im/v1/messages"
@@ -684,7 +684,7 @@ class FeiShuChanel(ChatChannel):
                 "msg_type": msg_type,
                 "content": content_json
             }
-            res = requests.post(url=url, headers=headers, params=params, json=data, timeout=(5, 10))
+            res = http_client.post(url=url, headers=headers, params=params, json=data, timeout=(5, 10))
         res = res.json()
         if res.get("code") == 0:
             logger.info(f"[FeiShu] send message success")
@@ -831,7 +831,7 @@ class FeiShuChanel(ChatChannel):
                 # 步骤 1: 创建卡片实体
                 create_url = "https://open.feishu.cn/open-apis/cardkit/v1/cards"
                 create_body = {"type": "card_json", "data": _build_card_json()}
-                res = requests.post(
+                res = http_client.post(
                     create_url, headers=headers, json=create_body, timeout=(5, 10)
                 )
                 res_json = res.json()
@@ -862,7 +862,7 @@ class FeiShuChanel(ChatChannel):
                         f"{msg.msg_id}/reply"
                     )
                     send_body = {"msg_type": "interactive", "content": content_payload}
-                    send_res = requests.post(
+                    send_res = http_client.post(
                         send_url, headers=headers, json=send_body, timeout=(5, 10)
                     )
                 else:
@@ -873,7 +873,7 @@ class FeiShuChanel(ChatChannel):
                         "msg_type": "interactive",
                         "content": content_payload,
                     }
-                    send_res = requests.post(
+                    send_res = http_client.post(
                         send_url, headers=headers, params=params, json=send_body,
                         timeout=(5, 10),
                     )
@@ -917,7 +917,7 @@ class FeiShuChanel(ChatChannel):
                 "sequence": _next_sequence(),
             }
             try:
-                res = requests.put(url, headers=headers, json=body, timeout=(5, 10))
+                res = http_client.put(url, headers=headers, json=body, timeout=(5, 10))
                 res_json = res.json()
                 if res_json.get("code") != 0:
                     logger.warning(
@@ -963,7 +963,7 @@ class FeiShuChanel(ChatChannel):
                 "sequence": _next_sequence(),
             }
             try:
-                res = requests.put(put_url, headers=headers, json=put_body, timeout=(5, 10))
+                res = http_client.put(put_url, headers=headers, json=put_body, timeout=(5, 10))
                 res_json = res.json()
                 if res_json.get("code") != 0:
                     logger.warning(
@@ -1091,7 +1091,7 @@ class FeiShuChanel(ChatChannel):
             "app_secret": self.feishu_app_secret
         }
         data = bytes(json.dumps(req_body), encoding='utf8')
-        response = requests.post(url=url, data=data, headers=headers)
+        response = http_client.post(url=url, data=data, headers=headers)
         if response.status_code == 200:
             res = response.json()
             if res.get("code") != 0:
@@ -1120,7 +1120,7 @@ class FeiShuChanel(ChatChannel):
             headers = {'Authorization': f'Bearer {access_token}'}
 
             with open(local_path, "rb") as file:
-                upload_response = requests.post(upload_url, files={"image": file}, data=data, headers=headers)
+                upload_response = http_client.post(upload_url, files={"image": file}, data=data, headers=headers)
                 logger.info(f"[FeiShu] upload file, res={upload_response.content}")
 
                 response_data = upload_response.json()
@@ -1131,7 +1131,7 @@ class FeiShuChanel(ChatChannel):
                     return None
 
         # Original logic for HTTP URLs
-        response = requests.get(img_url)
+        response = http_client.get(img_url)
         suffix = utils.get_path_suffix(img_url)
         temp_name = str(uuid.uuid4()) + "." + suffix
         if response.status_code == 200:
@@ -1148,7 +1148,7 @@ class FeiShuChanel(ChatChannel):
             'Authorization': f'Bearer {access_token}',
         }
         with open(temp_name, "rb") as file:
-            upload_response = requests.post(upload_url, files={"image": file}, data=data, headers=headers)
+            upload_response = http_client.post(upload_url, files={"image": file}, data=data, headers=headers)
             logger.info(f"[FeiShu] upload file, res={upload_response.content}")
             os.remove(temp_name)
             return upload_response.json().get("data").get("image_key")
@@ -1214,7 +1214,7 @@ class FeiShuChanel(ChatChannel):
             else:
                 # For HTTP URLs, download first
                 logger.info(f"[FeiShu] Downloading video from URL: {video_url}")
-                response = requests.get(video_url, timeout=(5, 60))
+                response = http_client.get(video_url, timeout=(5, 60))
                 if response.status_code != 200:
                     logger.error(f"[FeiShu] download video failed, status={response.status_code}")
                     return None
@@ -1253,7 +1253,7 @@ class FeiShuChanel(ChatChannel):
             logger.info(f"[FeiShu] Uploading video: file_name={file_name}, duration={duration}ms")
 
             with open(local_path, "rb") as file:
-                upload_response = requests.post(
+                upload_response = http_client.post(
                     upload_url,
                     files={"file": file},
                     data=data,
@@ -1321,7 +1321,7 @@ class FeiShuChanel(ChatChannel):
 
         try:
             with open(upload_path, "rb") as f:
-                upload_response = requests.post(
+                upload_response = http_client.post(
                     upload_url,
                     files={"file": f},
                     data=data,
@@ -1386,7 +1386,7 @@ class FeiShuChanel(ChatChannel):
 
             try:
                 with open(local_path, "rb") as file:
-                    upload_response = requests.post(
+                    upload_response = http_client.post(
                         upload_url,
                         files={"file": file},
                         data=data,
@@ -1408,7 +1408,7 @@ class FeiShuChanel(ChatChannel):
 
         # For HTTP URLs, download first then upload
         try:
-            response = requests.get(file_url, timeout=(5, 30))
+            response = http_client.get(file_url, timeout=(5, 30))
             if response.status_code != 200:
                 logger.error(f"[FeiShu] download file failed, status={response.status_code}")
                 return None
@@ -1436,7 +1436,7 @@ class FeiShuChanel(ChatChannel):
             headers = {'Authorization': f'Bearer {access_token}'}
 
             with open(temp_name, "rb") as file:
-                upload_response = requests.post(upload_url, files={"file": file}, data=data, headers=headers)
+                upload_response = http_client.post(upload_url, files={"file": file}, data=data, headers=headers)
                 logger.info(f"[FeiShu] upload file, res={upload_response.content}")
 
                 response_data = upload_response.json()
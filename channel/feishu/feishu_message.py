@@ -2,11 +2,11 @@ from bridge.context import ContextType
 from channel.chat_message import ChatMessage
 import json
 import os
-import requests
 from common.log import logger
 from common.tmp_dir import TmpDir
 from common import utils
 from common.utils import expand_path
+from common import http_client
 from config import conf
 
 
@@ -41,7 +41,7 @@ class FeishuMessage(ChatMessage):
             url = f"https://open.feishu.cn/open-apis/im/v1/messages/{msg.get('message_id')}/resources/{image_key}"
             headers = {"Authorization": "Bearer " + access_token}
             params = {"type": "image"}
-            response = requests.get(url=url, headers=headers, params=params)
+            response = http_client.get(url=url, headers=headers, params=params)
             
             if response.status_code == 200:
                 with open(image_path, "wb") as f:
@@ -113,7 +113,7 @@ class FeishuMessage(ChatMessage):
                         url = f"https://open.feishu.cn/open-apis/im/v1/messages/{self.msg_id}/resources/{image_key}"
                         headers = {"Authorization": "Bearer " + access_token}
                         params = {"type": "image"}
-                        response = requests.get(url=url, headers=headers, params=params)
+                        response = http_client.get(url=url, headers=headers, params=params)
                         if response.status_code == 200:
                             with open(image_path, "wb") as f:
                                 f.write(response.content)
@@ -155,7 +155,7 @@ class FeishuMessage(ChatMessage):
                 params = {
                     "type": "file"
                 }
-                response = requests.get(url=url, headers=headers, params=params)
+                response = http_client.get(url=url, headers=headers, params=params)
                 if response.status_code == 200:
                     with open(self.content, "wb") as f:
                         f.write(response.content)
@@ -183,7 +183,7 @@ class FeishuMessage(ChatMessage):
                     "type": "file"
                 }
                 try:
-                    response = requests.get(url=url, headers=headers, params=params)
+                    response = http_client.get(url=url, headers=headers, params=params)
                     logger.info(f"[FeiShu] download audio response: status={response.status_code}, size={len(response.content)} bytes")
                     if response.status_code == 200:
                         with open(self.content, "wb") as f:
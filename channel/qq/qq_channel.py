@@ -13,7 +13,6 @@ import os
 import threading
 import time
 
-import requests
 import websocket
 
 from bridge.context import Context, ContextType
@@ -24,6 +23,7 @@ from common.expired_dict import ExpiredDict
 from common.log import logger
 from common.singleton import singleton
 from common.ws_client_compat import websocket_app_run_forever
+from common import http_client
 from config import conf
 
 # Rich media file_type constants
@@ -74,7 +74,7 @@ class QQChannel(ChatChannel):
         self._heartbeat_interval = 45000
         self._can_resume = False
 
-        self.received_msgs = ExpiredDict(60 * 60 * 7.1)
+        self.received_msgs = ExpiredDict(60 * 60 * 7.1, background_sweep=True)
         self._msg_seq_counter = {}
 
         conf()["group_name_white_list"] = ["ALL_GROUP"]
@@ -121,7 +121,7 @@ class QQChannel(ChatChannel):
 
     def _refresh_access_token(self):
         try:
-            resp = requests.post(
+            resp = http_client.post(
                 "https://bots.qq.com/app/getAppAccessToken",
                 json={"appId": self.app_id, "clientSecret": self.app_secret},
                 timeout=10,
@@ -153,7 +153,7 @@ class QQChannel(ChatChannel):
 
     def _get_ws_url(self) -> str:
         try:
-            resp = requests.get(
+            resp = http_client.get(
                 f"{QQ_API_BASE}/gateway",
                 headers=self._get_auth_headers(),
                 timeout=10,
@@ -518,7 +518,7 @@ class QQChannel(ChatChannel):
 
     def _post_message(self, url: str, body: dict, event_type: str):
         try:
-            resp = requests.post(url, json=body, headers=self._get_auth_headers(), timeout=10)
+            resp = http_client.post(url, json=body, headers=self._get_auth_headers(), timeout=10)
             if resp.status_code in (200, 201, 202, 204):
                 logger.info(f"[QQ] Message sent successfully: event_type={event_type}")
             else:
@@ -589,7 +589,7 @@ class QQChannel(ChatChannel):
         }
 
         try:
-            resp = requests.post(
+            resp = http_client.post(
                 upload_url, json=upload_body,
                 headers=self._get_auth_headers(), timeout=30,
             )
@@ -635,7 +635,7 @@ class QQChannel(ChatChannel):
         }
 
         try:
-            resp = requests.post(
+            resp = http_client.post(
                 upload_url, json=upload_body,
                 headers=self._get_auth_headers(), timeout=30,
             )
@@ -1,10 +1,10 @@
 import os
-import requests
 
 from bridge.context import ContextType
 from channel.chat_message import ChatMessage
 from common.log import logger
 from common.utils import expand_path
+from common import http_client
 from config import conf
 
 
@@ -48,7 +48,7 @@ class QQMessage(ChatMessage):
             tmp_dir = _get_tmp_dir()
             image_path = os.path.join(tmp_dir, f"qq_{self.msg_id}.png")
             try:
-                resp = requests.get(img_url, timeout=30)
+                resp = http_client.get(img_url, timeout=30)
                 resp.raise_for_status()
                 with open(image_path, "wb") as f:
                     f.write(resp.content)
@@ -71,7 +71,7 @@ class QQMessage(ChatMessage):
                     img_url = "https://" + img_url
                 img_path = os.path.join(tmp_dir, f"qq_{self.msg_id}_{idx}.png")
                 try:
-                    resp = requests.get(img_url, timeout=30)
+                    resp = http_client.get(img_url, timeout=30)
                     resp.raise_for_status()
                     with open(img_path, "wb") as f:
                         f.write(resp.content)
@@ -69,6 +69,8 @@ const I18N = {
         channels_empty: '暂未接入任何通道', channels_empty_desc: '点击右上角「接入通道」按钮开始配置',
         channels_disconnect_confirm: '确认断开该通道？配置将保留但通道会停止运行。',
         channels_connected: '已接入', channels_connecting: '接入中...',
+        channels_pool_active: '处理中', channels_pool_queued: '排队', channels_pool_rejected: '拒绝',
+        channels_pool_wait: '平均等待',
         weixin_scan_title: '微信扫码登录', weixin_scan_desc: '请使用微信扫描下方二维码',
         weixin_scan_loading: '正在获取二维码...', weixin_scan_waiting: '等待扫码...',
         weixin_scan_scanned: '已扫码，请在手机上确认', weixin_scan_expired: '二维码已过期，正在刷新...',
@@ -168,6 +170,8 @@ const I18N = {
         channels_empty: 'No channels connected', channels_empty_desc: 'Click the "Connect" button above to get started',
         channels_disconnect_confirm: 'Disconnect this channel? Config will be preserved but the channel will stop.',
         channels_connected: 'Connected', channels_connecting: 'Connecting...',
+        channels_pool_active: 'Running', channels_pool_queued: 'Queued', channels_pool_rejected: 'Rejected',
+        channels_pool_wait: 'Avg wait',
         weixin_scan_title: 'WeChat QR Login', weixin_scan_desc: 'Scan the QR code below with WeChat',
         weixin_scan_loading: 'Loading QR code...', weixin_scan_waiting: 'Waiting for scan...',
         weixin_scan_scanned: 'Scanned, please confirm on your phone', weixin_scan_expired: 'QR code expired, refreshing...',
@@ -1252,6 +1256,16 @@ function startSSE(requestId, loadingEl, timestamp, titleInfo) {
 
                 scrollChatToBottom();
 
+            } else if (item.type === 'tool_update') {
+                if (currentToolEl) {
+                    const outputSection = currentToolEl.querySelector('.tool-output-section');
+                    if (outputSection && item.output) {
+                        outputSection.innerHTML = `
+                            <div class="tool-detail-label">Output <span class="tool-time">${item.elapsed}s</span></div>
+                            <pre class="tool-detail-content">${escapeHtml(String(item.output))}</pre>`;
+                    }
+                }
+
             } else if (item.type === 'tool_end') {
                 if (currentToolEl) {
                     const isError = item.status !== 'success';
@@ -3053,6 +3067,7 @@ function renderActiveChannels() {
                         ${statusText}
                     </div>
                     <p class="text-xs text-slate-500 dark:text-slate-400 mt-0.5 font-mono">${escapeHtml(ch.name)}</p>
+                    <p id="channel-pool-${ch.name}" class="text-xs text-slate-400 dark:text-slate-500 mt-0.5 hidden"></p>
                 </div>
                 <button onclick="disconnectChannel('${ch.name}')"
                     class="px-3 py-1.5 rounded-lg text-xs font-medium
@@ -3096,6 +3111,41 @@ function renderActiveChannels() {
             startWeixinActiveStatusPoll();
         }
     });
+    loadHandlerPoolGauges();
+}
+
+// Live gauges of each channel's message handler pool, refreshed while the
+// channels view is open
+let _handlerPoolTimer = null;
+
+function loadHandlerPoolGauges() {
+    if (_handlerPoolTimer) {
+        clearTimeout(_handlerPoolTimer);
+        _handlerPoolTimer = null;
+    }
+    if (currentView !== 'channels') return;
+    fetch('/api/stats/handler_pools').then(r => r.json()).then(data => {
+        if (data.status !== 'success') return;
+        const byChannel = {};
+        (data.pools || []).forEach(p => {
+            (byChannel[p.channel_type] = byChannel[p.channel_type] || []).push(p);
+        });
+        Object.keys(byChannel).forEach(channel => {
+            const el = document.getElementById(`channel-pool-${channel}`);
+            if (!el) return;
+            el.textContent = byChannel[channel].map(p =>
+                `${p.bot_type ? p.bot_type + ': ' : ''}${t('channels_pool_active')} ${p.active}/${p.workers}` +
+                ` · ${t('channels_pool_queued')} ${p.queued}${p.max_queue ? '/' + p.max_queue : ''}` +
+                ` · ${t('channels_pool_rejected')} ${p.rejected}` +
+                ` · ${t('channels_pool_wait')} ${p.avg_wait_ms}ms`
+            ).join('  |  ');
+            el.classList.remove('hidden');
+        });
+    }).catch(() => {}).finally(() => {
+        if (currentView === 'channels' && !_handlerPoolTimer) {
+            _handlerPoolTimer = setTimeout(loadHandlerPoolGauges, 5000);
+        }
+    });
 }
 
 function buildChannelFieldsHtml(chName, fields) {
@@ -286,6 +286,15 @@ class WebChannel(ChatChannel):
                 arguments = data.get("arguments", {})
                 q.put({"type": "tool_start", "tool": tool_name, "arguments": arguments})
 
+            elif event_type == "tool_execution_update":
+                # Live progress of a long-running tool (e.g. bash output so far)
+                q.put({
+                    "type": "tool_update",
+                    "tool": data.get("tool_name", "tool"),
+                    "output": str(data.get("output", ""))[-2000:],
+                    "elapsed": data.get("elapsed", 0),
+                })
+
             elif event_type == "tool_execution_end":
                 tool_name = data.get("tool_name", "tool")
                 status = data.get("status", "success")
@@ -584,6 +593,9 @@ class WebChannel(ChatChannel):
             '/api/knowledge/read', 'KnowledgeReadHandler',
             '/api/knowledge/graph', 'KnowledgeGraphHandler',
             '/api/scheduler', 'SchedulerHandler',
+            '/api/stats/handler_pools', 'HandlerPoolStatsHandler',
+            '/api/stats/http', 'HttpStatsHandler',
+            '/api/stats/agents', 'AgentCacheStatsHandler',
             '/api/sessions', 'SessionsHandler',
             '/api/sessions/(.*)/generate_title', 'SessionTitleHandler',
             '/api/sessions/(.*)/clear_context', 'SessionClearContextHandler',
@@ -1837,6 +1849,44 @@ class SchedulerHandler:
             return json.dumps({"status": "error", "message": str(e)})
 
 
+class HandlerPoolStatsHandler:
+    def GET(self):
+        _require_auth()
+        web.header('Content-Type', 'application/json; charset=utf-8')
+        try:
+            from common.handler_pool import get_all_pool_stats
+            return json.dumps({"status": "success", "pools": get_all_pool_stats()}, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"[WebChannel] Handler pool stats API error: {e}")
+            return json.dumps({"status": "error", "message": str(e)})
+
+
+class HttpStatsHandler:
+    def GET(self):
+        _require_auth()
+        web.header('Content-Type', 'application/json; charset=utf-8')
+        try:
+            from common.http_client import get_http_stats
+            return json.dumps({"status": "success", "http": get_http_stats()}, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"[WebChannel] HTTP stats API error: {e}")
+            return json.dumps({"status": "error", "message": str(e)})
+
+
+class AgentCacheStatsHandler:
+    def GET(self):
+        _require_auth()
+        web.header('Content-Type', 'application/json; charset=utf-8')
+        try:
+            from bridge.bridge import Bridge
+            agent_bridge = Bridge()._agent_bridge
+            stats = agent_bridge.agents.stats() if agent_bridge else {}
+            return json.dumps({"status": "success", "agents": stats}, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"[WebChannel] Agent cache stats API error: {e}")
+            return json.dumps({"status": "error", "message": str(e)})
+
+
 class SessionsHandler:
     def GET(self):
         _require_auth()
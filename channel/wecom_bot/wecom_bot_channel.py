@@ -16,7 +16,6 @@ import threading
 import time
 import uuid
 
-import requests
 import websocket
 
 from bridge.context import Context, ContextType
@@ -27,6 +26,7 @@ from common.expired_dict import ExpiredDict
 from common.log import logger
 from common.singleton import singleton
 from common.ws_client_compat import websocket_app_run_forever
+from common import http_client
 from config import conf
 
 WECOM_WS_URL = "wss://openws.work.weixin.qq.com"
@@ -41,7 +41,7 @@ class WecomBotChannel(ChatChannel):
         super().__init__()
         self.bot_id = ""
         self.bot_secret = ""
-        self.received_msgs = ExpiredDict(60 * 60 * 7.1)
+        self.received_msgs = ExpiredDict(60 * 60 * 7.1, background_sweep=True)
         self._ws = None
         self._ws_thread = None
         self._heartbeat_thread = None
@@ -500,7 +500,7 @@ class WecomBotChannel(ChatChannel):
 
         if local_path.startswith(("http://", "https://")):
             try:
-                resp = requests.get(local_path, timeout=30)
+                resp = http_client.get(local_path, timeout=30)
                 resp.raise_for_status()
                 ct = resp.headers.get("Content-Type", "")
                 if "jpeg" in ct or "jpg" in ct:
@@ -645,7 +645,7 @@ class WecomBotChannel(ChatChannel):
 
         if local_path.startswith(("http://", "https://")):
             try:
-                resp = requests.get(local_path, timeout=60)
+                resp = http_client.get(local_path, timeout=60)
                 resp.raise_for_status()
                 ext = os.path.splitext(local_path)[1] or ".bin"
                 tmp_path = f"/tmp/wecom_file_{uuid.uuid4().hex[:8]}{ext}"
@@ -1,12 +1,12 @@
 import os
 import re
 import base64
-import requests
 
 from bridge.context import ContextType
 from channel.chat_message import ChatMessage
 from common.log import logger
 from common.utils import expand_path
+from common import http_client
 from config import conf
 from Crypto.Cipher import AES
 
@@ -58,7 +58,7 @@ def _decrypt_media(url: str, aeskey: str) -> bytes:
     Download and decrypt AES-256-CBC encrypted media from wecom bot.
     Returns decrypted bytes.
     """
-    resp = requests.get(url, timeout=30)
+    resp = http_client.get(url, timeout=30)
     resp.raise_for_status()
     encrypted = resp.content
 
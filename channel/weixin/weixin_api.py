@@ -23,6 +23,7 @@ import uuid
 import requests
 
 from common.log import logger
+from common import http_client
 
 DEFAULT_BASE_URL = "https://ilinkai.weixin.qq.com"
 CDN_BASE_URL = "https://novac2c.cdn.weixin.qq.com/c2c"
@@ -74,7 +75,7 @@ class WeixinApi:
         headers = _build_headers(self.token)
         body.setdefault("base_info", {}).setdefault("channel_version", CHANNEL_VERSION)
         try:
-            resp = requests.post(url, json=body, headers=headers, timeout=timeout)
+            resp = http_client.post(url, json=body, headers=headers, timeout=timeout)
             resp.raise_for_status()
             return resp.json()
         except requests.exceptions.Timeout:
@@ -212,7 +213,7 @@ class WeixinApi:
 
     def fetch_qr_code(self) -> dict:
         url = _ensure_trailing_slash(self.base_url) + f"ilink/bot/get_bot_qrcode?bot_type={BOT_TYPE}"
-        resp = requests.get(url, timeout=15)
+        resp = http_client.get(url, timeout=15)
         resp.raise_for_status()
         return resp.json()
 
@@ -224,7 +225,7 @@ class WeixinApi:
             "iLink-App-ClientVersion": CLIENT_VERSION,
         }
         try:
-            resp = requests.get(url, headers=headers, timeout=timeout)
+            resp = http_client.get(url, headers=headers, timeout=timeout)
             resp.raise_for_status()
             return resp.json()
         except requests.exceptions.Timeout:
@@ -328,7 +329,7 @@ def upload_media_to_cdn(api: WeixinApi, file_path: str, to_user_id: str,
             else:
                 raise RuntimeError(f"[Weixin] getUploadUrl returned neither upload_full_url nor upload_param: {resp}")
 
-            cdn_resp = requests.post(cdn_url, data=encrypted, headers={
+            cdn_resp = http_client.post(cdn_url, data=encrypted, headers={
                 "Content-Type": "application/octet-stream",
                 "Content-Length": str(len(encrypted)),
             }, timeout=120)
@@ -381,7 +382,7 @@ def download_media_from_cdn(cdn_base_url: str, encrypt_query_param: str,
     """
     from urllib.parse import quote
     url = f"{cdn_base_url}/download?encrypted_query_param={quote(encrypt_query_param)}"
-    resp = requests.get(url, timeout=60)
+    resp = http_client.get(url, timeout=60)
     resp.raise_for_status()
 
     # Determine key format:
@@ -11,7 +11,6 @@ import threading
 import time
 import uuid
 
-import requests
 
 from bridge.context import Context, ContextType
 from bridge.reply import Reply, ReplyType
@@ -24,6 +23,7 @@ from channel.weixin.weixin_message import WeixinMessage
 from common.expired_dict import ExpiredDict
 from common.log import logger
 from common.singleton import singleton
+from common import http_client
 from config import conf
 
 MAX_CONSECUTIVE_FAILURES = 3
@@ -71,7 +71,7 @@ class WeixinChannel(ChatChannel):
         self._stop_event = threading.Event()
         self._poll_thread = None
         self._context_tokens = {}  # user_id -> context_token
-        self._received_msgs = ExpiredDict(60 * 60 * 7.1)
+        self._received_msgs = ExpiredDict(60 * 60 * 7.1, background_sweep=True)
         self._get_updates_buf = ""
         self._credentials_path = ""
         self.login_status = self.LOGIN_STATUS_IDLE
@@ -605,7 +605,7 @@ class WeixinChannel(ChatChannel):
 
         if local_path.startswith(("http://", "https://")):
             try:
-                resp = requests.get(local_path, timeout=60)
+                resp = http_client.get(local_path, timeout=60)
                 resp.raise_for_status()
                 ct = resp.headers.get("Content-Type", "")
                 ext = ".bin"
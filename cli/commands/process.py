@@ -272,6 +272,27 @@ def status():
         mode = "Agent" if cfg.get("agent") else "Chat"
         click.echo(f"  模式: {mode}")
 
+    if pid:
+        _print_handler_pool_stats(cfg.get("web_port", 9899) if cfg else 9899)
+
+
+def _print_handler_pool_stats(web_port: int):
+    """Show live handler pool gauges from the running web console, if reachable."""
+    try:
+        import requests
+        resp = requests.get(f"http://127.0.0.1:{web_port}/api/stats/handler_pools", timeout=2)
+        data = resp.json()
+    except Exception:
+        return
+    if data.get("status") != "success" or not data.get("pools"):
+        return
+    click.echo("  消息处理线程池:")
+    for p in data["pools"]:
+        click.echo(
+            f"    {p['name']}: 运行 {p['active']}/{p['workers']}, 排队 {p['queued']}, "
+            f"拒绝 {p['rejected']}, 平均等待 {p['avg_wait_ms']}ms"
+        )
+
 
 @click.command()
 @click.option("--follow", "-f", is_flag=True, help="Follow log output")
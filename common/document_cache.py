@@ -0,0 +1,347 @@
+"""
+On-disk cache of the text extracted from PDF and Office documents.
+
+Documents are split into units - PDF pages, Excel sheets, PowerPoint
+slides, or one unit for a Word document - and every unit is stored as its
+own JSON file under a directory per source (a local path or a URL):
+
+    <root>/<sha1 of source>/meta.json     source, version, kind, unit count
+    <root>/<sha1 of source>/<n>.json      extracted unit n
+
+The version identifies the file content ({"mtime", "size"} for local files,
+ETag / Last-Modified / size or a content hash for downloads); opening a
+source with a different version discards what was stored for it.
+
+PDF pages are extracted lazily, a batch at a time, as callers walk through
+CachedDocument.units(), so a window at the start of a long PDF only pays
+for the pages it shows. Cold batches run on a process pool when there is
+more than one CPU (pypdf is pure Python, so threads would not help). Office
+files are parsed in one go by their libraries and stored per sheet/slide.
+
+Units are raw structured data (page text, paragraphs, rows of cells);
+formatting them is left to the callers.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from common.log import logger
+
+DEFAULT_CACHE_DIR = os.path.join("~", ".cow", "cache", "documents")
+PDF_BATCH_PAGES = 8  # pages extracted per lazy step
+MIN_PARALLEL_PAGES = 4  # smaller cold batches are extracted in-process
+
+_KINDS = {
+    ".pdf": "pdf",
+    ".docx": "docx", ".doc": "docx",
+    ".xlsx": "xlsx", ".xls": "xlsx",
+    ".pptx": "pptx", ".ppt": "pptx",
+}
+
+
+def _open_pdf(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("pypdf library not installed. Install with: pip install pypdf")
+    return PdfReader(path)
+
+
+# (path, mtime_ns, size, PdfReader) last used by this thread: a pool worker's
+# only thread, or each thread extracting in-process
+_worker_state = threading.local()
+
+
+def _extract_pdf_pages(path: str, pages: List[int]) -> List[str]:
+    """Text of the given 0-indexed pages; runs in pool workers and in-process."""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    cached = getattr(_worker_state, "reader", None)
+    if cached is None or cached[:3] != key:
+        cached = _worker_state.reader = key + (_open_pdf(path),)
+    reader = cached[3]
+    return [reader.pages[i].extract_text() or "" for i in pages]
+
+
+def _extract_office(path: str, kind: str) -> List[dict]:
+    """All units of an Office document."""
+    if kind == "docx":
+        try:
+            from docx import Document
+        except ImportError:
+            raise ImportError("python-docx library not installed. Install with: pip install python-docx")
+        doc = Document(path)
+        return [{
+            "paragraphs": [p.text for p in doc.paragraphs],
+            "table_rows": [[cell.text for cell in row.cells] for table in doc.tables for row in table.rows],
+        }]
+
+    if kind == "xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportError("openpyxl library not installed. Install with: pip install openpyxl")
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            return [{
+                "title": ws.title,
+                "rows": [[str(c) if c is not None else "" for c in row] for row in ws.iter_rows(values_only=True)],
+            } for ws in wb.worksheets]
+        finally:
+            wb.close()
+
+    if kind == "pptx":
+        try:
+            from pptx import Presentation
+        except ImportError:
+            raise ImportError("python-pptx library not installed. Install with: pip install python-pptx")
+        prs = Presentation(path)
+        slides = []
+        for slide in prs.slides:
+            texts = []
+            for shape in slide.shapes:
+                if shape.has_text_frame:
+                    for para in shape.text_frame.paragraphs:
+                        text = para.text.strip()
+                        if text:
+                            texts.append(text)
+            slides.append({"paragraphs": texts})
+        return slides
+
+    raise ValueError(f"Unsupported document kind: {kind}")
+
+
+def _write_json(path: str, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class CachedDocument:
+    """Extracted units of one version of a document, filled in on demand."""
+
+    def __init__(self, cache: "DocumentCache", directory: str, meta: dict):
+        self._cache = cache
+        self._dir = directory
+        self.source = meta["source"]
+        self.version = meta["version"]
+        self.kind = meta["kind"]
+        self.path = meta["path"]
+        self.count = meta["count"]
+        self._units: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        """Whether every unit has been extracted."""
+        return all(self._stored(i) for i in range(self.count))
+
+    def unit(self, index: int) -> dict:
+        """Unit index, extracting it (and the rest of its batch) when needed."""
+        unit = self._units.get(index)
+        if unit is None:
+            self.ensure(range(index, min(self.count, index + PDF_BATCH_PAGES)))
+            unit = self._units[index]
+        return unit
+
+    def units(self, start: int = 0) -> Iterator[dict]:
+        """Units from start on, extracted a batch at a time as iteration reaches them."""
+        for index in range(start, self.count):
+            yield self.unit(index)
+
+    def ensure(self, indices):
+        """Load or extract the given units."""
+        with self._lock:
+            missing = []
+            for index in indices:
+                if index in self._units:
+                    continue
+                try:
+                    with open(self._unit_path(index), encoding="utf-8") as f:
+                        self._units[index] = json.load(f)
+                except (OSError, ValueError):
+                    missing.append(index)
+            if not missing:
+                return
+            if self.kind != "pdf":
+                # Office units are stored together when the document is opened
+                raise FileNotFoundError(f"Extracted content missing for {self.source}")
+            texts = self._cache._extract_pages(self.path, missing)
+            for index, text in zip(missing, texts):
+                unit = {"text": text}
+                _write_json(self._unit_path(index), unit)
+                self._units[index] = unit
+
+    def _stored(self, index: int) -> bool:
+        return index in self._units or os.path.exists(self._unit_path(index))
+
+    def _unit_path(self, index: int) -> str:
+        return os.path.join(self._dir, f"{index}.json")
+
+
+class DocumentCache:
+    """
+    :param root: Cache directory (default ~/.cow/cache/documents)
+    :param max_documents: Sources kept on disk; the least recently opened are removed
+    :param workers: Processes for cold PDF pages (default min(4, CPUs)); 1 disables the pool
+    """
+
+    def __init__(self, root: str = None, max_documents: int = 200, workers: int = None):
+        from common.utils import expand_path
+        self.root = expand_path(root or DEFAULT_CACHE_DIR)
+        self.max_documents = max_documents
+        self.workers = workers if workers is not None else min(4, os.cpu_count() or 1)
+        self._docs: Dict[str, CachedDocument] = {}
+        self._opening: Dict[str, list] = {}  # source -> [lock, holders] while it is being opened
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def open(self, path: str, source: str = None, version: Optional[dict] = None,
+             kind: str = None) -> CachedDocument:
+        """
+        Cached document for the file at path.
+
+        :param source: Cache identity (default: the absolute path)
+        :param version: Content version (default: the file's mtime and size)
+        :param kind: pdf / docx / xlsx / pptx (default: from the file extension)
+        """
+        path = os.path.abspath(path)
+        source = source or path
+        if version is None:
+            st = os.stat(path)
+            version = {"mtime": st.st_mtime_ns, "size": st.st_size}
+        kind = kind or _KINDS.get(os.path.splitext(path)[1].lower())
+        if kind is None:
+            raise ValueError(f"Unsupported document type: {path}")
+
+        # Parsing holds only this source's lock, other documents open meanwhile
+        with self._source_lock(source):
+            with self._lock:
+                doc = self._lookup(source, version)
+            if doc is not None and os.path.exists(doc.path):
+                return doc
+            directory = self._dir(source)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory, exist_ok=True)
+            if kind == "pdf":
+                units = None
+                count = len(_open_pdf(path).pages)
+            else:
+                units = _extract_office(path, kind)
+                count = len(units)
+            for index, unit in enumerate(units or ()):
+                _write_json(os.path.join(directory, f"{index}.json"), unit)
+            meta = {"source": source, "version": version, "kind": kind, "path": path, "count": count}
+            _write_json(os.path.join(directory, "meta.json"), meta)
+            with self._lock:
+                doc = self._docs[source] = CachedDocument(self, directory, meta)
+                self._evict()
+            return doc
+
+    @contextmanager
+    def _source_lock(self, source: str):
+        """Serialize opens of one source; the lock is dropped with its last holder."""
+        with self._lock:
+            entry = self._opening.setdefault(source, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._opening[source]
+
+    def lookup(self, source: str, version: dict) -> Optional[CachedDocument]:
+        """Cached document for source at exactly this version, if any."""
+        with self._lock:
+            return self._lookup(source, version)
+
+    def _lookup(self, source, version):
+        doc = self._docs.get(source)
+        if doc is None:
+            try:
+                with open(os.path.join(self._dir(source), "meta.json"), encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return None
+            doc = self._docs[source] = CachedDocument(self, self._dir(source), meta)
+        if doc.version != version:
+            return None
+        try:
+            os.utime(os.path.join(self._dir(source), "meta.json"))  # recency for eviction
+        except OSError:
+            pass
+        return doc
+
+    def _dir(self, source: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(source.encode("utf-8")).hexdigest())
+
+    def _evict(self):
+        try:
+            entries = []
+            for name in os.listdir(self.root):
+                meta = os.path.join(self.root, name, "meta.json")
+                try:
+                    entries.append((os.path.getmtime(meta), name))
+                except OSError:
+                    continue
+        except OSError:
+            return
+        if len(entries) <= self.max_documents:
+            return
+        entries.sort()
+        stale = {name for _, name in entries[:len(entries) - self.max_documents]}
+        for name in stale:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        for source, doc in list(self._docs.items()):
+            if os.path.basename(doc._dir) in stale:
+                del self._docs[source]
+
+    def _extract_pages(self, path: str, pages: List[int]) -> List[str]:
+        """Text of the given PDF pages, split across the process pool when worthwhile."""
+        pool = self._get_pool() if len(pages) >= MIN_PARALLEL_PAGES else None
+        if pool is not None:
+            size = -(-len(pages) // self.workers)
+            chunks = [pages[i:i + size] for i in range(0, len(pages), size)]
+            try:
+                futures = [pool.submit(_extract_pdf_pages, path, chunk) for chunk in chunks]
+                return [text for future in futures for text in future.result()]
+            except BrokenExecutor as e:
+                logger.warning(f"[DocumentCache] PDF worker pool broken, extracting in-process: {e}")
+                with self._lock:
+                    self._pool = None
+        return _extract_pdf_pages(path, pages)
+
+    def _get_pool(self):
+        if self.workers <= 1:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process with running threads is not safe
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_document_cache() -> DocumentCache:
+    """Process-wide DocumentCache shared by the read and web_fetch tools."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = DocumentCache()
+    return _default_cache
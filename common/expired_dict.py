@@ -1,42 +1,207 @@
-from datetime import datetime, timedelta
+"""
+Dict-like cache whose entries expire a fixed time after their last use.
 
+Every write and every read moves the key to the end of an OrderedDict and
+pushes its deadline to now + expires_in_seconds. With one TTL for all keys
+that keeps the dict ordered by deadline as well as by recency, so
 
-class ExpiredDict(dict):
-    def __init__(self, expires_in_seconds):
-        super().__init__()
+- expired entries are always at the front and are swept from there on each
+  access (amortized O(1), nothing lingers until it happens to be read)
+- the optional max_size evicts from the same end (least recently used)
+
+Time comes from time.monotonic, so wall-clock jumps neither expire nor
+resurrect entries. Iteration (keys/items/values/len) only looks at entries
+and does not extend their lifetime.
+
+A dict that may go unused for long (a session store on an idle bot) can be
+created with background_sweep=True: one shared daemon thread then sweeps it
+every SWEEP_INTERVAL seconds, so expired values are released without
+waiting for the next access.
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from common.log import logger
+
+_MISSING = object()
+
+SWEEP_INTERVAL = 60  # seconds between background sweeps
+
+_swept = []  # weakrefs to the dicts created with background_sweep=True
+_swept_lock = threading.Lock()
+_sweeper = None
+
+
+def _sweep_registered():
+    """Sweep every live registered dict once and forget the collected ones."""
+    with _swept_lock:
+        refs = list(_swept)
+    collected = False
+    for ref in refs:
+        d = ref()
+        if d is None:
+            collected = True
+            continue
+        try:
+            d.sweep()
+        except Exception as e:
+            logger.debug(f"[ExpiredDict] background sweep failed: {e}")
+    if collected:
+        with _swept_lock:
+            _swept[:] = [ref for ref in _swept if ref() is not None]
+
+
+def _sweep_loop():
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        _sweep_registered()
+
+
+def _register_sweep(d):
+    global _sweeper
+    with _swept_lock:
+        _swept.append(weakref.ref(d))
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_sweep_loop, name="expired-dict-sweeper", daemon=True)
+            _sweeper.start()
+
+
+class ExpiredDict(MutableMapping):
+    """
+    :param expires_in_seconds: Idle time after which an entry expires
+    :param max_size: Optional entry limit; the least recently used entry is
+                     evicted when it is exceeded
+    :param clock: Monotonic time source (seconds)
+    :param background_sweep: Also sweep from the shared background thread
+    """
+
+    def __init__(self, expires_in_seconds, max_size=None, clock=time.monotonic, background_sweep=False):
         self.expires_in_seconds = expires_in_seconds
+        self.max_size = max_size
+        self._clock = clock
+        self._data = OrderedDict()  # key -> [value, deadline], oldest deadline first
+        self._lock = threading.Lock()
+        self._sweep_at = float("-inf")  # no entry expires before this
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if background_sweep:
+            _register_sweep(self)
 
     def __getitem__(self, key):
-        value, expiry_time = super().__getitem__(key)
-        if datetime.now() > expiry_time:
-            del self[key]
-            raise KeyError("expired {}".format(key))
-        self.__setitem__(key, value)
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
         return value
 
     def __setitem__(self, key, value):
-        expiry_time = datetime.now() + timedelta(seconds=self.expires_in_seconds)
-        super().__setitem__(key, (value, expiry_time))
+        with self._lock:
+            now = self._clock()
+            self._sweep(now)
+            entry = self._data.get(key)
+            if entry is None:
+                self._data[key] = [value, now + self.expires_in_seconds]
+                if self.max_size is not None:
+                    while len(self._data) > self.max_size:
+                        self._data.popitem(last=False)
+                        self.evictions += 1
+            else:
+                entry[0] = value
+                entry[1] = now + self.expires_in_seconds
+                self._data.move_to_end(key)
 
-    def get(self, key, default=None):
-        try:
-            return self[key]
-        except KeyError:
-            return default
+    def __delitem__(self, key):
+        with self._lock:
+            self._sweep(self._clock())
+            del self._data[key]
 
     def __contains__(self, key):
-        try:
-            self[key]
-            return True
-        except KeyError:
-            return False
+        return self._lookup(key) is not _MISSING
+
+    def __len__(self):
+        with self._lock:
+            self._sweep(self._clock())
+            return len(self._data)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
 
     def keys(self):
-        keys = list(super().keys())
-        return [key for key in keys if key in self]
+        with self._lock:
+            self._sweep(self._clock())
+            return list(self._data)
 
     def items(self):
-        return [(key, self[key]) for key in self.keys()]
+        with self._lock:
+            self._sweep(self._clock())
+            return [(key, entry[0]) for key, entry in self._data.items()]
 
-    def __iter__(self):
-        return self.keys().__iter__()
+    def values(self):
+        with self._lock:
+            self._sweep(self._clock())
+            return [entry[0] for entry in self._data.values()]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def sweep(self):
+        """Drop expired entries now; returns how many were removed."""
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def stats(self):
+        """Counters since creation plus the current size."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _lookup(self, key):
+        """Value of a live key (refreshing its deadline), or _MISSING."""
+        with self._lock:
+            now = self._clock()
+            self._sweep(now)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            entry[1] = now + self.expires_in_seconds
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _sweep(self, now):
+        # Deadlines are now + TTL at write time, so a new or touched entry never
+        # expires before an older one: nothing is due until the front's deadline
+        if now <= self._sweep_at:
+            return 0
+        removed = 0
+        data = self._data
+        while data:
+            key, entry = next(iter(data.items()))
+            if entry[1] >= now:
+                self._sweep_at = entry[1]
+                break
+            del data[key]
+            removed += 1
+        else:
+            self._sweep_at = now + self.expires_in_seconds
+        self.expirations += removed
+        return removed
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, dict(self.items()))
@@ -0,0 +1,162 @@
+"""
+Per-channel message handler pools.
+
+Each channel gets its own ThreadPoolExecutor so a slow agent run on one
+channel (e.g. a Feishu task with many tool steps) can't starve the others.
+Pools are keyed by channel type and bot type together, so a bot-type
+override applies no matter which caller creates the pool first.
+Pools are sized from config and carry an admission limit plus live gauges
+(queue depth, active workers, wait time) for the web console and /status.
+
+Config:
+    handler_pool_workers     default worker threads per channel
+    handler_pool_max_queue   max messages waiting per channel, 0 = unbounded
+    handler_pool_overrides   per channel type or bot type, e.g.
+                             {"feishu": {"workers": 4, "max_queue": 50},
+                              "claudeAPI": {"workers": 2}}
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from common.log import logger
+from config import conf
+
+DEFAULT_WORKERS = 8
+
+
+class HandlerPool:
+    """ThreadPoolExecutor with an admission limit and usage gauges."""
+
+    def __init__(self, name: str, max_workers: int = DEFAULT_WORKERS, max_queue: int = 0,
+                 channel_type: str = None, bot_type: str = None):
+        self.name = name
+        self.channel_type = channel_type or name
+        self.bot_type = bot_type
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue or 0))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=f"handler-{name}"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0       # admitted, not yet started
+        self._active = 0        # running on a worker
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0  # seconds, over started tasks
+        self._wait_max = 0.0
+        self._started = 0
+
+    def admit(self, force: bool = False) -> bool:
+        """
+        Reserve a queue slot for one message.
+
+        Returns False (and counts a rejection) when the queue is full. Every
+        admitted message must later be submitted or returned via discard().
+        """
+        with self._lock:
+            if not force and self.max_queue and self._pending >= self.max_queue:
+                self._rejected += 1
+                return False
+            self._pending += 1
+            return True
+
+    def discard(self, count: int = 1):
+        """Give back slots of admitted messages that will never be submitted."""
+        if count <= 0:
+            return
+        with self._lock:
+            self._pending = max(0, self._pending - count)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Run an admitted message on the pool."""
+        enqueued_at = time.monotonic()
+
+        def run():
+            waited = time.monotonic() - enqueued_at
+            with self._lock:
+                self._pending = max(0, self._pending - 1)
+                self._active += 1
+                self._started += 1
+                self._wait_total += waited
+                if waited > self._wait_max:
+                    self._wait_max = waited
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        with self._lock:
+            self._submitted += 1
+        future = self._executor.submit(run)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        if future.cancelled():
+            self.discard(1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg_wait = self._wait_total / self._started if self._started else 0.0
+            return {
+                "name": self.name,
+                "channel_type": self.channel_type,
+                "bot_type": self.bot_type,
+                "workers": self.max_workers,
+                "active": self._active,
+                "queued": self._pending,
+                "max_queue": self.max_queue,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(avg_wait * 1000, 2),
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _resolve_pool_config(channel_type: str, bot_type: str = None) -> dict:
+    overrides = conf().get("handler_pool_overrides") or {}
+    settings = {
+        "workers": conf().get("handler_pool_workers", DEFAULT_WORKERS),
+        "max_queue": conf().get("handler_pool_max_queue", 0),
+    }
+    # channel-specific settings win over bot-type settings
+    for key in (bot_type, channel_type):
+        if key and isinstance(overrides.get(key), dict):
+            settings.update(overrides[key])
+    return settings
+
+
+def get_handler_pool(channel_type: str, bot_type: str = None) -> HandlerPool:
+    """Return the handler pool of a channel and bot type, creating it from config on first use."""
+    channel_type = channel_type or "default"
+    key = (channel_type, bot_type or None)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            settings = _resolve_pool_config(channel_type, bot_type)
+            name = f"{channel_type}:{bot_type}" if bot_type else channel_type
+            pool = HandlerPool(name, settings.get("workers", DEFAULT_WORKERS), settings.get("max_queue", 0),
+                               channel_type=channel_type, bot_type=bot_type or None)
+            _pools[key] = pool
+            logger.debug(f"[HandlerPool] created pool '{name}': workers={pool.max_workers}, max_queue={pool.max_queue}")
+        return pool
+
+
+def get_all_pool_stats() -> list:
+    """Snapshot of every pool's gauges."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [p.stats() for p in pools]
@@ -0,0 +1,261 @@
+"""
+Shared pooled HTTP transport.
+
+Bots, channels and tools used to call ``requests.post`` / ``requests.get``
+directly, which builds a throw-away Session per call: every LLM round-trip and
+every tool step paid for a new TCP connection and TLS handshake. This module
+hands out one process-wide ``requests.Session`` whose adapter keeps per-host
+keep-alive pools, so consecutive calls to the same API reuse connections.
+
+The module mirrors the ``requests`` call API, so call sites only swap the
+module name:
+
+    from common import http_client
+    resp = http_client.post(url, json=payload, timeout=30)
+
+Cookies are never persisted on the shared session (it is used by unrelated
+bots and tenants at once); each call behaves like a fresh ``requests.post``
+in that respect.
+
+Top-level ``json=`` values that are EncodedJSON lists (e.g. a compiled tool
+catalog, see common/tool_catalog.py) are spliced into the body from their
+cached bytes instead of being serialized again on every request.
+
+Config:
+    http_pool_connections   hosts whose connection pools are kept alive (LRU)
+    http_pool_maxsize       keep-alive connections kept per host
+    http_max_retries        retries for failed connects, and for 502/503/504
+                            on idempotent methods (POST bodies are never resent)
+"""
+
+import json as _json
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import ProxyManager
+from urllib3.util.retry import Retry
+
+from config import conf
+
+DEFAULT_POOL_CONNECTIONS = 32
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_MAX_RETRIES = 2
+
+
+class _TransportStats:
+    """Per-host request / new-connection counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, List[int]] = {}  # host -> [requests, connections]
+
+    def _bump(self, host: str, idx: int):
+        with self._lock:
+            counters = self._hosts.get(host)
+            if counters is None:
+                counters = self._hosts[host] = [0, 0]
+            counters[idx] += 1
+
+    def request(self, host: str):
+        self._bump(host or "", 0)
+
+    def connection(self, host: str):
+        self._bump(host or "", 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = {h: tuple(c) for h, c in self._hosts.items()}
+        total_requests = sum(r for r, _ in hosts.values())
+        total_connections = sum(c for _, c in hosts.values())
+        reused = max(0, total_requests - total_connections)
+        return {
+            "requests": total_requests,
+            "connections_opened": total_connections,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / total_requests, 3) if total_requests else 0.0,
+            "hosts": {
+                h: {"requests": r, "connections_opened": c, "connections_reused": max(0, r - c)}
+                for h, (r, c) in sorted(hosts.items())
+            },
+        }
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+_stats = _TransportStats()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _stats.connection(self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _stats.connection(self.host)
+        return super()._new_conn()
+
+
+_COUNTING_POOLS = {"http": _CountingHTTPConnectionPool, "https": _CountingHTTPSConnectionPool}
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that records requests and newly opened connections per host."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _COUNTING_POOLS
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        # SOCKS managers bring their own pool classes; leave those alone
+        if type(manager) is ProxyManager:
+            manager.pool_classes_by_scheme = _COUNTING_POOLS
+        return manager
+
+    def send(self, request, **kwargs):
+        _stats.request(urlsplit(request.url).hostname)
+        return super().send(request, **kwargs)
+
+
+def _build_retry(max_retries: int) -> Retry:
+    return Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        backoff_factor=0.3,
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+
+
+class EncodedJSON(list):
+    """
+    A JSON array that memoizes its own serialization.
+
+    Meant for large payload parts that are sent unchanged many times; it must
+    not be mutated after the first ``encoded`` access.
+    """
+
+    _encoded = None
+
+    @property
+    def encoded(self) -> bytes:
+        if self._encoded is None:
+            self._encoded = _json.dumps(self, ensure_ascii=False).encode("utf-8")
+        return self._encoded
+
+
+def _encode_json_body(payload: Dict[str, Any]) -> bytes:
+    """Serialize a dict payload, reusing the cached bytes of its EncodedJSON values."""
+    plain = {k: v for k, v in payload.items() if not isinstance(v, EncodedJSON)}
+    body = [_json.dumps(plain, ensure_ascii=False, allow_nan=False).encode("utf-8")[:-1]]
+    first = not plain
+    for key, value in payload.items():
+        if isinstance(value, EncodedJSON):
+            body.append(b"" if first else b", ")
+            body.append(_json.dumps(key).encode("utf-8") + b": " + value.encoded)
+            first = False
+    body.append(b"}")
+    return b"".join(body)
+
+
+def create_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> requests.Session:
+    """Build a keep-alive Session with the pooled adapter mounted for http and https."""
+    session = requests.Session()
+    # Never keep cookies across unrelated callers
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = PooledHTTPAdapter(
+        pool_connections=max(1, int(pool_connections)),
+        pool_maxsize=max(1, int(pool_maxsize)),
+        max_retries=_build_retry(max(0, int(max_retries))),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled Session, created from config on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session(
+                    pool_connections=conf().get("http_pool_connections", DEFAULT_POOL_CONNECTIONS),
+                    pool_maxsize=conf().get("http_pool_maxsize", DEFAULT_POOL_MAXSIZE),
+                    max_retries=conf().get("http_max_retries", DEFAULT_MAX_RETRIES),
+                )
+    return _session
+
+
+def reset_session():
+    """Close the shared Session so the next call rebuilds it (e.g. after a config reload)."""
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("allow_redirects", True)
+    return get_session().get(url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("allow_redirects", False)
+    return get_session().head(url, **kwargs)
+
+
+def post(url: str, data=None, json=None, **kwargs) -> requests.Response:
+    if data is None and isinstance(json, dict) and any(isinstance(v, EncodedJSON) for v in json.values()):
+        headers = dict(kwargs.pop("headers", None) or {})
+        if not any(k.lower() == "content-type" for k in headers):
+            headers["Content-Type"] = "application/json"
+        return get_session().post(url, data=_encode_json_body(json), headers=headers, **kwargs)
+    return get_session().post(url, data=data, json=json, **kwargs)
+
+
+def put(url: str, data=None, **kwargs) -> requests.Response:
+    return get_session().put(url, data=data, **kwargs)
+
+
+def patch(url: str, data=None, **kwargs) -> requests.Response:
+    return get_session().patch(url, data=data, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return get_session().delete(url, **kwargs)
+
+
+def get_http_stats() -> Dict[str, Any]:
+    """Connection reuse counters for the shared transport (since start or last reset)."""
+    return _stats.snapshot()
+
+
+def reset_http_stats():
+    _stats.reset()
@@ -0,0 +1,156 @@
+"""
+Incremental Server-Sent Events decoder.
+
+Streaming LLM endpoints (OpenAI-compatible, Claude, Gemini ``alt=sse``,
+LinkAI) all speak SSE. The decoder keeps one ``bytearray`` per stream and a
+scan offset, so every byte is examined once no matter how the upstream splits
+its TCP chunks: no ``buf += raw`` copies, no rescans from the start of the
+buffer per event. Lines may end in ``\\r\\n``, ``\\n`` or ``\\r`` (including a
+``\\r\\n`` split across two chunks), and each field value is decoded as UTF-8
+only once its line is complete, so multibyte characters straddling chunk
+boundaries come out intact.
+
+Usage:
+    from common.sse import iter_sse_response
+    for event in iter_sse_response(resp):
+        if event.data == "[DONE]":
+            break
+        chunk = json.loads(event.data)
+"""
+
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+_LINE_END = re.compile(rb"\r\n|\r|\n")
+_CR = 0x0D
+_LF = 0x0A
+_COLON = 0x3A
+_SPACE = 0x20
+
+
+class SSEEvent(NamedTuple):
+    data: str
+    event: str = "message"
+    id: Optional[str] = None
+
+
+class SSEDecoder:
+    """Feed raw bytes, get complete events back."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._scan = 0            # buffer offset already known to hold no line break
+        self._lone_cr = False     # a bare "\r" line ending was seen; needs the regex path
+        self._skip_lf = False     # (regex path) chunk ended in "\r"; drop a leading "\n"
+        self._data: List[bytes] = []
+        self._event = b""
+        self._last_id: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Consume a chunk and return the events it completed."""
+        events: List[SSEEvent] = []
+        if not chunk:
+            return events
+        buf = self._buf
+        if not self._lone_cr and b"\r" in chunk and self._has_lone_cr(chunk):
+            self._lone_cr = True
+            self._scan = 0
+        buf += chunk
+        lone_cr = self._lone_cr
+        if not self._skip_lf and b"\n" not in chunk and (not lone_cr or b"\r" not in chunk):
+            self._scan = len(buf)  # mid-line chunk: nothing can complete yet
+            return events
+
+        pos = 0
+        if self._skip_lf:
+            self._skip_lf = False
+            if buf[0] == _LF:
+                pos = 1
+        search = _LINE_END.search
+        find = buf.find
+        startswith = buf.startswith
+        end_of_buf = len(buf)
+        scan = max(pos, self._scan)
+        while True:
+            # Locate the next line: [pos, start) followed by a terminator ending at nxt
+            if lone_cr:
+                match = search(buf, scan)
+                if match is None:
+                    break
+                start, nxt = match.span()
+                if nxt == end_of_buf and buf[start] == _CR:
+                    self._skip_lf = True
+            else:
+                nl = find(b"\n", scan)
+                if nl == -1:
+                    break
+                start = nl - 1 if nl > pos and buf[nl - 1] == _CR else nl
+                nxt = nl + 1
+
+            if start == pos:
+                self._dispatch(events)
+            elif buf[pos] != _COLON:  # ":" lines are comments / keep-alives
+                colon = find(b":", pos, start)
+                if colon == -1:
+                    name_len, value_start = start - pos, start
+                else:
+                    name_len, value_start = colon - pos, colon + 1
+                    if value_start < start and buf[value_start] == _SPACE:
+                        value_start += 1
+                if name_len == 4 and startswith(b"data", pos):
+                    self._data.append(bytes(buf[value_start:start]))
+                elif name_len == 5 and startswith(b"event", pos):
+                    self._event = bytes(buf[value_start:start])
+                elif name_len == 2 and startswith(b"id", pos):
+                    value = bytes(buf[value_start:start])
+                    if b"\0" not in value:
+                        self._last_id = value.decode("utf-8", "replace")
+                # "retry" and unknown fields are ignored
+            pos = scan = nxt
+        if pos:
+            del buf[:pos]  # O(1) amortised: bytearray trims its head in place
+        self._scan = len(buf)
+        return events
+
+    def _has_lone_cr(self, chunk: bytes) -> bool:
+        """True if ``chunk`` uses "\r" on its own as a line ending."""
+        if self._buf and self._buf[-1] == _CR and chunk[0] != _LF:
+            return True
+        trailing = 1 if chunk[-1] == _CR else 0
+        return chunk.count(b"\r") != chunk.count(b"\r\n") + trailing
+
+    def flush(self) -> List[SSEEvent]:
+        """End of stream: treat a trailing partial line / unterminated event as complete."""
+        events = self.feed(b"\n") if self._buf else []
+        self._dispatch(events)
+        self._buf.clear()
+        self._scan = 0
+        self._skip_lf = False
+        return events
+
+    def _dispatch(self, events: List[SSEEvent]):
+        data, event = self._data, self._event
+        self._data = []
+        self._event = b""
+        if not data:
+            return
+        payload = data[0] if len(data) == 1 else b"\n".join(data)
+        events.append(SSEEvent(
+            data=payload.decode("utf-8", "replace"),
+            event=event.decode("utf-8", "replace") if event else "message",
+            id=self._last_id,
+        ))
+
+
+def iter_sse(chunks: Iterable[bytes]) -> Iterator[SSEEvent]:
+    """Decode an iterable of byte chunks into events."""
+    decoder = SSEDecoder()
+    for chunk in chunks:
+        if chunk:
+            yield from decoder.feed(chunk)
+    yield from decoder.flush()
+
+
+def iter_sse_response(resp) -> Iterator[SSEEvent]:
+    """Decode a streamed ``requests.Response`` (raw bytes, never ``decode_unicode``)."""
+    return iter_sse(resp.iter_content(chunk_size=None, decode_unicode=False))
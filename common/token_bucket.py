@@ -1,39 +1,180 @@
+"""
+Thread-free token buckets and a multi-limit rate limiter.
+
+A TokenBucket refills lazily: the tokens available are computed from the
+monotonic time elapsed since the last call, so a bucket owns no thread and
+is exact at any rate (a 100k TPM bucket is not limited by sleep granularity).
+
+Acquiring reserves tokens up front: the cost is taken immediately (the
+balance may go negative) and the caller sleeps for as long as the deficit
+takes to refill. Waiters are therefore served in arrival order, weighted
+costs larger than the capacity still go through, and nothing is held while
+sleeping. A reservation that would wait longer than the timeout is refused
+without taking anything.
+
+RateLimiter applies several per-minute limits at once (e.g. RPM and TPM) to
+each key, reserving from all of a key's buckets together.
+"""
+
+import asyncio
 import threading
 import time
 
+_DEFAULT = object()
+
 
 class TokenBucket:
-    def __init__(self, tpm, timeout=None):
-        self.capacity = int(tpm)  # 令牌桶容量
-        self.tokens = 0  # 初始令牌数为0
-        self.rate = int(tpm) / 60  # 令牌每秒生成速率
+    """
+    :param tpm: Tokens refilled per minute, also the bucket capacity
+    :param timeout: Default longest wait (seconds) in get_token; None waits as long as needed
+    :param clock: Monotonic time source (seconds)
+    """
+
+    def __init__(self, tpm, timeout=None, clock=time.monotonic):
+        self.capacity = float(tpm)  # 令牌桶容量
+        self.rate = float(tpm) / 60  # 令牌每秒生成速率
         self.timeout = timeout  # 等待令牌超时时间
-        self.cond = threading.Condition()  # 条件变量
-        self.is_running = True
-        # 开启令牌生成线程
-        threading.Thread(target=self._generate_tokens).start()
-
-    def _generate_tokens(self):
-        """生成令牌"""
-        while self.is_running:
-            with self.cond:
-                if self.tokens < self.capacity:
-                    self.tokens += 1
-                self.cond.notify()  # 通知获取令牌的线程
-            time.sleep(1 / self.rate)
-
-    def get_token(self):
-        """获取令牌"""
-        with self.cond:
-            while self.tokens <= 0:
-                flag = self.cond.wait(self.timeout)
-                if not flag:  # 超时
-                    return False
-            self.tokens -= 1
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = self.capacity  # 初始为满桶
+        self._updated = clock()
+
+    @property
+    def tokens(self):
+        """Tokens available now (negative while reservations are outstanding)."""
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+    def get_token(self, cost=1, timeout=_DEFAULT):
+        """获取令牌: block until cost tokens are reserved; False if that takes longer than timeout."""
+        delay = self.reserve(cost, timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    async def get_token_async(self, cost=1, timeout=_DEFAULT):
+        """Like get_token, but waits with asyncio.sleep."""
+        delay = self.reserve(cost, timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
         return True
 
+    def try_get_token(self, cost=1):
+        """Take cost tokens only if they are available now."""
+        return self.reserve(cost, 0) is not None
+
+    def reserve(self, cost=1, timeout=_DEFAULT):
+        """Reserve cost tokens; returns the seconds to wait before using them, or None if refused."""
+        if timeout is _DEFAULT:
+            timeout = self.timeout
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            delay = self._delay(cost)
+            if timeout is not None and delay > timeout:
+                return None
+            self._tokens -= cost
+            return delay
+
     def close(self):
-        self.is_running = False
+        """Kept for compatibility; a lazy bucket has nothing to stop."""
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def _delay(self, cost):
+        deficit = cost - self._tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+
+class RateLimiter:
+    """
+    Several per-minute limits applied together, with separate buckets per key.
+
+    :param limits: Limit name -> quota per minute, e.g. {"rpm": 60, "tpm": 100000};
+                   falsy quotas are ignored
+    :param timeout: Default longest wait (seconds) in acquire; None waits as long as needed
+    :param clock: Monotonic time source (seconds)
+    """
+
+    def __init__(self, limits, timeout=None, clock=time.monotonic):
+        self.limits = {name: quota for name, quota in (limits or {}).items() if quota}
+        self.timeout = timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> {limit name: TokenBucket}
+
+    def acquire(self, key=None, costs=None, timeout=_DEFAULT):
+        """
+        Reserve from every limit of key and wait until all of them allow it.
+
+        :param costs: Limit name -> cost of this call; limits not listed cost 1
+        :return: False if the wait would exceed timeout (nothing is taken)
+        """
+        delay = self.reserve(key, costs, timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    async def acquire_async(self, key=None, costs=None, timeout=_DEFAULT):
+        """Like acquire, but waits with asyncio.sleep."""
+        delay = self.reserve(key, costs, timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
+
+    def reserve(self, key=None, costs=None, timeout=_DEFAULT):
+        """Reserve from every limit of key; returns the seconds to wait, or None if refused."""
+        if not self.limits:
+            return 0.0
+        if timeout is _DEFAULT:
+            timeout = self.timeout
+        costs = costs or {}
+        with self._lock:
+            buckets = self._buckets.get(key)
+            if buckets is None:
+                buckets = self._buckets[key] = {
+                    name: TokenBucket(quota, clock=self._clock) for name, quota in self.limits.items()
+                }
+            now = self._clock()
+            delay = 0.0
+            for name, bucket in buckets.items():
+                bucket._refill(now)
+                delay = max(delay, bucket._delay(costs.get(name, 1)))
+            if timeout is not None and delay > timeout:
+                return None
+            for name, bucket in buckets.items():
+                bucket._tokens -= costs.get(name, 1)
+            return delay
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name, limits, timeout=None):
+    """
+    Process-wide RateLimiter for name (e.g. a provider), shared by every bot
+    instance; rebuilt when its limits or timeout change.
+    """
+    limits = {k: v for k, v in (limits or {}).items() if v}
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None or limiter.limits != limits or limiter.timeout != timeout:
+            limiter = _limiters[name] = RateLimiter(limits, timeout)
+        return limiter
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+"""
+Compiled tool catalog shared by the agent executor and the model bots.
+
+The agent sends the same tool definitions on every LLM call of a run, and
+every bot converts them into its provider format (OpenAI functions, Gemini
+functionDeclarations, ...) on every call. A ToolCatalog is built once per
+tool set instead:
+
+- it is the Claude-format schema list itself ({name, description,
+  input_schema}), so code that expects a plain list keeps working
+- bot converters decorated with compiled_tool_format memoize their output
+  on the catalog, once per converter
+- both the catalog and the memoized conversions are EncodedJSON lists, so
+  http_client splices their cached bytes into request bodies
+
+A catalog is tied to the tool objects it was built from; ToolCatalog.matches
+tells whether a tool list is still the same set (by identity, in order).
+"""
+
+import functools
+import threading
+from typing import Any, Callable, Iterable
+
+from common.http_client import EncodedJSON
+
+
+class ToolCatalog(EncodedJSON):
+    """
+    Claude-format schemas of a tool set plus memoized provider conversions.
+
+    :param tools: Tool objects with name, description and params attributes
+    """
+
+    def __init__(self, tools: Iterable[Any]):
+        self.tools = tuple(tools)
+        super().__init__({
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": tool.params  # Claude uses input_schema
+        } for tool in self.tools)
+        self._formats = {}
+        self._lock = threading.Lock()
+
+    def matches(self, tools: Iterable[Any]) -> bool:
+        """True when tools are the same objects, in the same order, as this catalog's."""
+        tools = tuple(tools)
+        return len(tools) == len(self.tools) and all(a is b for a, b in zip(tools, self.tools))
+
+    def converted(self, key: str, convert: Callable[[list], Any]) -> Any:
+        """Result of convert(self), computed once per key."""
+        result = self._formats.get(key)
+        if result is None:
+            with self._lock:
+                result = self._formats.get(key)
+                if result is None:
+                    result = convert(self)
+                    if isinstance(result, list) and not isinstance(result, EncodedJSON):
+                        result = EncodedJSON(result)
+                    self._formats[key] = result
+        return result
+
+
+def compiled_tool_format(convert: Callable) -> Callable:
+    """
+    Decorator for a bot's tools converter method, convert(self, tools).
+
+    Conversions of a ToolCatalog are memoized on the catalog, keyed by the
+    converter, and shared by every call (and every bot instance) using that
+    catalog; callers must treat the result as read-only. Plain lists are
+    converted as before.
+    """
+    key = f"{convert.__module__}.{convert.__qualname__}"
+
+    @functools.wraps(convert)
+    def wrapper(self, tools):
+        if isinstance(tools, ToolCatalog):
+            return tools.converted(key, lambda catalog: convert(self, catalog))
+        return convert(self, tools)
+
+    return wrapper
@@ -54,6 +54,12 @@ available_setting = {
     "image_proxy": True,  # 是否需要图片代理，国内访问LinkAI时需要
     "image_create_prefix": ["画", "看", "找"],  # 开启图片回复的前缀
     "concurrency_in_session": 1,  # 同一会话最多有多少条消息在处理中，大于1可能乱序
+    "handler_pool_workers": 8,  # 每个通道处理消息的线程数，各通道相互隔离
+    "handler_pool_max_queue": 0,  # 每个通道最多等待处理的消息数，超出后丢弃新消息，0为不限制
+    "handler_pool_overrides": {},  # 按通道或bot类型覆盖线程池配置，如 {"feishu": {"workers": 4, "max_queue": 50}}
+    "http_pool_connections": 32,  # 共享HTTP连接池缓存的域名数量，各模型/通道/工具复用同一个连接池
+    "http_pool_maxsize": 16,  # 每个域名保持的长连接数
+    "http_max_retries": 2,  # 连接失败（及幂等请求遇到502/503/504）时的重试次数，POST请求体不会重发
     "image_create_size": "256x256",  # 图片大小,可选有 256x256, 512x512, 1024x1024 (dall-e-3默认为1024x1024)
     "group_chat_exit_group": False,
     # chatgpt会话参数
@@ -64,6 +70,8 @@ available_setting = {
     # chatgpt限流配置
     "rate_limit_chatgpt": 20,  # chatgpt的调用频率限制
     "rate_limit_dalle": 50,  # openai dalle的调用频率限制
+    "rate_limits": {},  # 按模型厂商限流(每分钟请求数rpm/token数tpm)，如 {"deepseek": {"rpm": 60, "tpm": 100000}}，键为bot_type，支持 openai/openAI/chatGPTOnAzure/linkai/deepseek/qianfan/moonshot/doubao/modelscope/minimax
+    "rate_limit_timeout": 60,  # 触发限流时最长等待秒数，超时则本次请求失败
     # chatgpt api参数 参考https://platform.openai.com/docs/api-reference/chat/create
     "temperature": 0.9,
     "top_p": 1,
@@ -213,6 +221,13 @@ available_setting = {
     "agent_max_context_tokens": 50000,  # Agent模式下最大上下文tokens
     "agent_max_context_turns": 20,  # Agent模式下最大上下文记忆轮次
     "agent_max_steps": 20,  # Agent模式下单次运行最大决策步数
+    "agent_tool_parallelism": 4,  # 单步内只读工具（web_fetch、read、memory_search等）并行执行的最大数量，1表示串行
+    "web_fetch_cache": True,  # web_fetch结果缓存（~/.cow/cache/web_fetch.db），过期后用ETag/Last-Modified条件请求校验
+    "web_fetch_cache_ttl": 600,  # 缓存在此秒数内直接使用，不发请求
+    "web_fetch_cache_domain_ttl": {},  # 按域名设置缓存秒数（含子域名），如 {"github.com": 3600, "news.ycombinator.com": 60}
+    "web_fetch_cache_max_mb": 100,  # 缓存总大小上限，超出按最近最少使用淘汰
+    "agent_cache_max_sessions": 500,  # 内存中保留的会话Agent上限，超出按LRU休眠，0表示不限制
+    "agent_cache_idle_ttl": 3600,  # 会话Agent空闲多少秒后休眠（历史保存在对话库中，下次消息时恢复），0表示不过期
     "enable_thinking": False,  # Enable deep-thinking mode for thinking-capable models
     "knowledge": True,  # 是否开启知识库功能
     # Per-skill runtime config. Nested keys are flattened to env vars at startup
@@ -1,5 +1,4 @@
 from models.session_manager import Session
-from common.log import logger
 
 """
     e.g.  [
@@ -11,36 +10,20 @@ from common.log import logger
 
 
 class BaiduWenxinSession(Session):
+    # 没有system消息，按问答对从最早的开始丢弃
+    keep_head = 0
+    discard_step = 2
+    keep_last = 0
+    drop_last_reply = False
+
     def __init__(self, session_id, system_prompt=None, model="gpt-3.5-turbo"):
         super().__init__(session_id, system_prompt)
         self.model = model
         # 百度文心不支持system prompt
         # self.reset()
 
-    def discard_exceeding(self, max_tokens, cur_tokens=None):
-        precise = True
-        try:
-            cur_tokens = self.calc_tokens()
-        except Exception as e:
-            precise = False
-            if cur_tokens is None:
-                raise e
-            logger.debug("Exception when counting tokens precisely for query: {}".format(e))
-        while cur_tokens > max_tokens:
-            if len(self.messages) >= 2:
-                self.messages.pop(0)
-                self.messages.pop(0)
-            else:
-                logger.debug("max_tokens={}, total_tokens={}, len(messages)={}".format(max_tokens, cur_tokens, len(self.messages)))
-                break
-            if precise:
-                cur_tokens = self.calc_tokens()
-            else:
-                cur_tokens = cur_tokens - max_tokens
-        return cur_tokens
-
-    def calc_tokens(self):
-        return num_tokens_from_messages(self.messages, self.model)
+    def _count_tokens(self, messages):
+        return num_tokens_from_messages(messages, self.model)
 
 
 def num_tokens_from_messages(messages, model):
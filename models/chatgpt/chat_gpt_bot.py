@@ -23,11 +23,14 @@ from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
 from common.log import logger
 from common.token_bucket import TokenBucket
+from common import http_client
 from config import conf, load_config
 from models.baidu.baidu_wenxin_session import BaiduWenxinSession
 
 # OpenAI对话模型API (可用)
 class ChatGPTBot(Bot, OpenAIImage, OpenAICompatibleBot):
+    rate_limit_provider = const.OPENAI
+
     def __init__(self):
         super().__init__()
         # Resolve api key / base from config (no global SDK state anymore).
@@ -248,6 +251,8 @@ class ChatGPTBot(Bot, OpenAIImage, OpenAICompatibleBot):
             # If api_key is None, the per-instance default key will be used.
             if args is None:
                 args = self.args
+            if not self._acquire_rate_limit(session.messages, args.get("max_tokens"), args.get("model")):
+                raise RateLimitError("RateLimitError: rate limit exceeded")
             # Translate old SDK kwargs to HTTP client params:
             # - request_timeout / timeout -> per-call timeout
             call_args = dict(args)
@@ -319,6 +324,8 @@ class AzureChatGPTBot(ChatGPTBot):
     so the OpenAICompatibleBot streaming/tool path uses it transparently.
     """
 
+    rate_limit_provider = const.CHATGPTONAZURE
+
     def __init__(self):
         super().__init__()
         self._azure_api_version = conf().get("azure_api_version", "2023-06-01-preview")
@@ -353,13 +360,13 @@ class AzureChatGPTBot(ChatGPTBot):
             headers = {"api-key": api_key, "Content-Type": "application/json"}
             try:
                 body = {"prompt": query, "size": conf().get("image_create_size", "256x256"),"n": 1}
-                submission = requests.post(url, headers=headers, json=body)
+                submission = http_client.post(url, headers=headers, json=body)
                 operation_location = submission.headers['operation-location']
                 status = ""
                 while (status != "succeeded"):
                     if retry_count > 3:
                         return False, "图片生成失败"
-                    response = requests.get(operation_location, headers=headers)
+                    response = http_client.get(operation_location, headers=headers)
                     status = response.json()['status']
                     retry_count += 1
                 image_url = response.json()['result']['data'][0]['url']
@@ -378,7 +385,7 @@ class AzureChatGPTBot(ChatGPTBot):
             headers = {"api-key": api_key, "Content-Type": "application/json"}
             try:
                 body = {"prompt": query, "size": conf().get("image_create_size", "1024x1024"), "quality": conf().get("dalle3_image_quality", "standard")}
-                response = requests.post(url, headers=headers, json=body)
+                response = http_client.post(url, headers=headers, json=body)
                 response.raise_for_status()  # 检查请求是否成功
                 data = response.json()
 
@@ -15,6 +15,8 @@ from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
 from common import const
 from common.log import logger
+from common import http_client
+from common.sse import iter_sse_response
 from config import conf
 
 # Optional OpenAI image support
@@ -124,7 +126,7 @@ class ClaudeAPIBot(Bot, OpenAIImage):
 
             # Make HTTP request
             proxies = {"http": self.proxy, "https": self.proxy} if self.proxy else None
-            response = requests.post(
+            response = http_client.post(
                 f"{self.api_base}/messages",
                 headers=headers,
                 json=data,
@@ -277,7 +279,7 @@ class ClaudeAPIBot(Bot, OpenAIImage):
                 "content-type": "application/json",
             }
             proxies = {"http": self.proxy, "https": self.proxy} if self.proxy else None
-            resp = requests.post(f"{self.api_base}/messages",
+            resp = http_client.post(f"{self.api_base}/messages",
                                  headers=headers, json=data, proxies=proxies)
 
             if resp.status_code != 200:
@@ -398,7 +400,7 @@ class ClaudeAPIBot(Bot, OpenAIImage):
 
         # Make HTTP request
         proxies = {"http": self.proxy, "https": self.proxy} if self.proxy else None
-        response = requests.post(
+        response = http_client.post(
             f"{self.api_base}/messages",
             headers=headers,
             json=request_params,
@@ -479,7 +481,7 @@ class ClaudeAPIBot(Bot, OpenAIImage):
         try:
             # Make streaming HTTP request
             proxies = {"http": self.proxy, "https": self.proxy} if self.proxy else None
-            response = requests.post(
+            response = http_client.post(
                 f"{self.api_base}/messages",
                 headers=headers,
                 json=request_params,
@@ -503,104 +505,101 @@ class ClaudeAPIBot(Bot, OpenAIImage):
                 return
 
             # Process streaming response
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode('utf-8')
-                    if line.startswith('data: '):
-                        line = line[6:]  # Remove 'data: ' prefix
-                        if line == '[DONE]':
-                            break
-                        try:
-                            event = json.loads(line)
-                            event_type = event.get("type")
-
-                            if event_type == "content_block_start":
-                                # New content block
-                                block = event.get("content_block", {})
-                                if block.get("type") == "tool_use":
-                                    current_tool_use_index = event.get("index", 0)
-                                    tool_uses_map[current_tool_use_index] = {
-                                        "id": block.get("id", ""),
-                                        "name": block.get("name", ""),
-                                        "input": ""
-                                    }
-
-                            elif event_type == "content_block_delta":
-                                delta = event.get("delta", {})
-                                delta_type = delta.get("type")
-
-                                if delta_type == "thinking_delta":
-                                    thinking_text = delta.get("thinking", "")
-                                    if thinking_text:
-                                        yield {
-                                            "choices": [{
-                                                "index": 0,
-                                                "delta": {
-                                                    "role": "assistant",
-                                                    "reasoning_content": thinking_text
-                                                },
-                                                "finish_reason": None
-                                            }]
-                                        }
-
-                                elif delta_type == "text_delta":
-                                    content = delta.get("text", "")
-                                    yield {
-                                        "id": event.get("id", ""),
-                                        "object": "chat.completion.chunk",
-                                        "created": int(time.time()),
-                                        "model": request_params["model"],
-                                        "choices": [{
-                                            "index": 0,
-                                            "delta": {"content": content},
-                                            "finish_reason": None
-                                        }]
-                                    }
-
-                                elif delta_type == "input_json_delta":
-                                    # Tool input accumulation
-                                    if current_tool_use_index >= 0:
-                                        tool_uses_map[current_tool_use_index]["input"] += delta.get("partial_json", "")
-
-                            elif event_type == "message_delta":
-                                # Extract stop_reason from delta
-                                delta = event.get("delta", {})
-                                if "stop_reason" in delta:
-                                    stop_reason = delta.get("stop_reason")
-                                    logger.info(f"[Claude] Stream stop_reason: {stop_reason}")
-                                
-                                # Message complete - yield tool calls if any
-                                if tool_uses_map:
-                                    for idx in sorted(tool_uses_map.keys()):
-                                        tool_data = tool_uses_map[idx]
-                                        yield {
-                                            "id": event.get("id", ""),
-                                            "object": "chat.completion.chunk",
-                                            "created": int(time.time()),
-                                            "model": request_params["model"],
-                                            "choices": [{
-                                                "index": 0,
-                                                "delta": {
-                                                    "tool_calls": [{
-                                                        "index": idx,
-                                                        "id": tool_data["id"],
-                                                        "type": "function",
-                                                        "function": {
-                                                            "name": tool_data["name"],
-                                                            "arguments": tool_data["input"]
-                                                        }
-                                                    }]
-                                                },
-                                                "finish_reason": stop_reason
+            for sse_event in iter_sse_response(response):
+                line = sse_event.data
+                if line == '[DONE]':
+                    break
+                try:
+                    event = json.loads(line)
+                    event_type = event.get("type")
+
+                    if event_type == "content_block_start":
+                        # New content block
+                        block = event.get("content_block", {})
+                        if block.get("type") == "tool_use":
+                            current_tool_use_index = event.get("index", 0)
+                            tool_uses_map[current_tool_use_index] = {
+                                "id": block.get("id", ""),
+                                "name": block.get("name", ""),
+                                "input": ""
+                            }
+
+                    elif event_type == "content_block_delta":
+                        delta = event.get("delta", {})
+                        delta_type = delta.get("type")
+
+                        if delta_type == "thinking_delta":
+                            thinking_text = delta.get("thinking", "")
+                            if thinking_text:
+                                yield {
+                                    "choices": [{
+                                        "index": 0,
+                                        "delta": {
+                                            "role": "assistant",
+                                            "reasoning_content": thinking_text
+                                        },
+                                        "finish_reason": None
+                                    }]
+                                }
+
+                        elif delta_type == "text_delta":
+                            content = delta.get("text", "")
+                            yield {
+                                "id": event.get("id", ""),
+                                "object": "chat.completion.chunk",
+                                "created": int(time.time()),
+                                "model": request_params["model"],
+                                "choices": [{
+                                    "index": 0,
+                                    "delta": {"content": content},
+                                    "finish_reason": None
+                                }]
+                            }
+
+                        elif delta_type == "input_json_delta":
+                            # Tool input accumulation
+                            if current_tool_use_index >= 0:
+                                tool_uses_map[current_tool_use_index]["input"] += delta.get("partial_json", "")
+
+                    elif event_type == "message_delta":
+                        # Extract stop_reason from delta
+                        delta = event.get("delta", {})
+                        if "stop_reason" in delta:
+                            stop_reason = delta.get("stop_reason")
+                            logger.info(f"[Claude] Stream stop_reason: {stop_reason}")
+                        
+                        # Message complete - yield tool calls if any
+                        if tool_uses_map:
+                            for idx in sorted(tool_uses_map.keys()):
+                                tool_data = tool_uses_map[idx]
+                                yield {
+                                    "id": event.get("id", ""),
+                                    "object": "chat.completion.chunk",
+                                    "created": int(time.time()),
+                                    "model": request_params["model"],
+                                    "choices": [{
+                                        "index": 0,
+                                        "delta": {
+                                            "tool_calls": [{
+                                                "index": idx,
+                                                "id": tool_data["id"],
+                                                "type": "function",
+                                                "function": {
+                                                    "name": tool_data["name"],
+                                                    "arguments": tool_data["input"]
+                                                }
                                             }]
-                                        }
-                            
-                            elif event_type == "message_stop":
-                                # Final event - log completion
-                                logger.debug(f"[Claude] Stream completed with stop_reason: {stop_reason}")
-
-                        except json.JSONDecodeError:
-                            continue
+                                        },
+                                        "finish_reason": stop_reason
+                                    }]
+                                }
+                    
+                    elif event_type == "message_stop":
+                        # Final event - log completion
+                        logger.debug(f"[Claude] Stream completed with stop_reason: {stop_reason}")
+
+                except json.JSONDecodeError:
+                    continue
 
         except requests.RequestException as e:
             logger.error(f"Claude streaming request error: {e}")
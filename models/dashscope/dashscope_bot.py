@@ -8,6 +8,7 @@ from models.session_manager import SessionManager
 from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
 from common.log import logger
+from common.tool_catalog import compiled_tool_format
 from config import conf, load_config
 from .dashscope_session import DashscopeSession
 import os
@@ -518,6 +519,7 @@ class DashscopeBot(Bot):
             result[attr] = _to_dict(val)
         return result
 
+    @compiled_tool_format
     def _convert_tools_to_dashscope_format(self, tools):
         """
         Convert tools from Claude format to DashScope format
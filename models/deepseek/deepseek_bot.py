@@ -32,6 +32,8 @@ from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
 from common import const
 from common.log import logger
+from common import http_client
+from common.tool_catalog import compiled_tool_format
 from config import conf, load_config
 from .deepseek_session import DeepSeekSession
 
@@ -39,6 +41,8 @@ DEFAULT_API_BASE = "https://api.deepseek.com/v1"
 
 
 class DeepSeekBot(Bot, OpenAICompatibleBot):
+    rate_limit_provider = const.DEEPSEEK
+
     def __init__(self):
         super().__init__()
         self.sessions = SessionManager(
@@ -159,7 +163,7 @@ class DeepSeekBot(Bot, OpenAICompatibleBot):
                 for k in ("temperature", "top_p", "presence_penalty", "frequency_penalty"):
                     body.pop(k, None)
 
-            res = requests.post(
+            res = http_client.post(
                 f"{self.api_base}/chat/completions",
                 headers=headers,
                 json=body,
@@ -212,6 +216,10 @@ class DeepSeekBot(Bot, OpenAICompatibleBot):
         - Thinking mode toggle and reasoning_effort for V4 models
         """
         try:
+            if not self._acquire_rate_limit(messages, kwargs.get("max_tokens"),
+                                            kwargs.get("model") or self.args["model"]):
+                raise Exception("rate limit exceeded, please try again later")
+
             converted_messages = self._convert_messages_to_openai_format(messages)
 
             system_prompt = kwargs.pop("system", None)
@@ -286,9 +294,10 @@ class DeepSeekBot(Bot, OpenAICompatibleBot):
             logger.error(f"[DEEPSEEK] call_with_tools error: {e}")
             import traceback
             logger.error(traceback.format_exc())
+            error_msg = str(e)
 
             def error_generator():
-                yield {"error": True, "message": str(e), "status_code": 500}
+                yield {"error": True, "message": error_msg, "status_code": 500}
             return error_generator()
 
     # -------------------- streaming --------------------
@@ -298,7 +307,7 @@ class DeepSeekBot(Bot, OpenAICompatibleBot):
         try:
             headers = self._build_headers()
             url = f"{self.api_base}/chat/completions"
-            response = requests.post(url, headers=headers, json=request_body, stream=True, timeout=180)
+            response = http_client.post(url, headers=headers, json=request_body, stream=True, timeout=180)
 
             if response.status_code != 200:
                 error_msg = response.text
@@ -413,7 +422,7 @@ class DeepSeekBot(Bot, OpenAICompatibleBot):
             headers = self._build_headers()
             request_body.pop("stream", None)
             url = f"{self.api_base}/chat/completions"
-            response = requests.post(url, headers=headers, json=request_body, timeout=180)
+            response = http_client.post(url, headers=headers, json=request_body, timeout=180)
 
             if response.status_code != 200:
                 error_msg = response.text
@@ -610,6 +619,7 @@ class DeepSeekBot(Bot, OpenAICompatibleBot):
 
         return converted
 
+    @compiled_tool_format
     def _convert_tools_to_openai_format(self, tools):
         """
         Convert tools from Claude format to OpenAI format.
@@ -655,7 +665,7 @@ class DeepSeekBot(Bot, OpenAICompatibleBot):
                 }],
             }
             headers = self._build_headers()
-            resp = requests.post(
+            resp = http_client.post(
                 f"{self.api_base}/chat/completions",
                 headers=headers, json=payload, timeout=60,
             )
@@ -6,16 +6,22 @@ from typing import Optional
 
 import requests
 from models.bot import Bot
+from models.rate_limit import RateLimitedBot
 from models.session_manager import SessionManager
 from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
+from common import const
 from common.log import logger
+from common import http_client
+from common.tool_catalog import compiled_tool_format
 from config import conf, load_config
 from .doubao_session import DoubaoSession
 
 
 # Doubao (火山方舟 / Volcengine Ark) API Bot
-class DoubaoBot(Bot):
+class DoubaoBot(Bot, RateLimitedBot):
+    rate_limit_provider = const.DOUBAO
+
     def __init__(self):
         super().__init__()
         self.sessions = SessionManager(DoubaoSession, model=conf().get("model") or "doubao-seed-2-0-pro-260215")
@@ -103,7 +109,7 @@ class DoubaoBot(Bot):
             body["messages"] = session.messages
             # Disable thinking by default for better efficiency
             body["thinking"] = {"type": "disabled"}
-            res = requests.post(
+            res = http_client.post(
                 f"{self.base_url}/chat/completions",
                 headers=headers,
                 json=body
@@ -169,7 +175,7 @@ class DoubaoBot(Bot):
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
             }
-            resp = requests.post(f"{self.base_url}/chat/completions",
+            resp = http_client.post(f"{self.base_url}/chat/completions",
                                  headers=headers, json=payload, timeout=60)
             if resp.status_code != 200:
                 return {"error": True, "message": f"HTTP {resp.status_code}: {resp.text[:300]}"}
@@ -213,6 +219,10 @@ class DoubaoBot(Bot):
             Generator yielding OpenAI-format chunks (for streaming)
         """
         try:
+            if not self._acquire_rate_limit(messages, kwargs.get("max_tokens"),
+                                            kwargs.get("model") or self.args["model"]):
+                raise Exception("rate limit exceeded, please try again later")
+
             # Convert messages from Claude format to OpenAI format
             converted_messages = self._convert_messages_to_openai_format(messages)
 
@@ -264,8 +274,10 @@ class DoubaoBot(Bot):
             import traceback
             logger.error(traceback.format_exc())
 
+            error_msg = str(e)
+
             def error_generator():
-                yield {"error": True, "message": str(e), "status_code": 500}
+                yield {"error": True, "message": error_msg, "status_code": 500}
             return error_generator()
 
     # -------------------- streaming --------------------
@@ -279,7 +291,7 @@ class DoubaoBot(Bot):
             }
 
             url = f"{self.base_url}/chat/completions"
-            response = requests.post(url, headers=headers, json=request_body, stream=True, timeout=120)
+            response = http_client.post(url, headers=headers, json=request_body, stream=True, timeout=120)
 
             if response.status_code != 200:
                 error_msg = response.text
@@ -407,7 +419,7 @@ class DoubaoBot(Bot):
 
             request_body.pop("stream", None)
             url = f"{self.base_url}/chat/completions"
-            response = requests.post(url, headers=headers, json=request_body, timeout=120)
+            response = http_client.post(url, headers=headers, json=request_body, timeout=120)
 
             if response.status_code != 200:
                 error_msg = response.text
@@ -553,6 +565,7 @@ class DoubaoBot(Bot):
 
         return converted
 
+    @compiled_tool_format
     def _convert_tools_to_openai_format(self, tools):
         """
         Convert tools from Claude format to OpenAI format.
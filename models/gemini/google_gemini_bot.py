@@ -14,12 +14,14 @@ import re
 import time
 from typing import Optional
 
-import requests
 from models.bot import Bot
 from models.session_manager import SessionManager
 from bridge.context import ContextType, Context
 from bridge.reply import Reply, ReplyType
 from common.log import logger
+from common import http_client
+from common.sse import iter_sse_response
+from common.tool_catalog import compiled_tool_format
 from config import conf
 from models.chatgpt.chat_gpt_session import ChatGPTSession
 from models.baidu.baidu_wenxin_session import BaiduWenxinSession
@@ -212,7 +214,7 @@ class GoogleGeminiBot(Bot):
 
         if image_url.startswith("http://") or image_url.startswith("https://"):
             try:
-                response = requests.get(image_url, timeout=20)
+                response = http_client.get(image_url, timeout=20)
                 if response.status_code != 200:
                     logger.warning(f"[Gemini] Failed to fetch remote image: status={response.status_code}, url={image_url}")
                     return None
@@ -257,7 +259,7 @@ class GoogleGeminiBot(Bot):
             }
             endpoint = f"{self.api_base}/v1beta/models/{model_name}:generateContent"
             headers = {"x-goog-api-key": self.api_key, "Content-Type": "application/json"}
-            resp = requests.post(endpoint, headers=headers, json=payload, timeout=60)
+            resp = http_client.post(endpoint, headers=headers, json=payload, timeout=60)
 
             if resp.status_code != 200:
                 return {"error": True, "message": f"HTTP {resp.status_code}: {resp.text[:300]}"}
@@ -496,7 +498,7 @@ class GoogleGeminiBot(Bot):
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(
+            response = http_client.post(
                 endpoint,
                 headers=headers,
                 json=payload,
@@ -539,6 +541,7 @@ class GoogleGeminiBot(Bot):
                     "status_code": 500
                 }
     
+    @compiled_tool_format
     def _convert_tools_to_gemini_rest_format(self, tools_list):
         """
         Convert tools to Gemini REST API format
@@ -681,16 +684,8 @@ class GoogleGeminiBot(Bot):
             raw_chunks = []  # Buffer raw chunks for diagnostics on empty response
             non_text_part_keys = []  # Track non-text/functionCall part keys (e.g. thoughtSignature)
             
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                
-                line = line.decode('utf-8')
-                
-                # Skip SSE prefixes
-                if line.startswith('data: '):
-                    line = line[6:]
-                
+            for sse_event in iter_sse_response(response):
+                line = sse_event.data
                 if not line or line == '[DONE]':
                     continue
                 
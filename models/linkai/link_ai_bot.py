@@ -3,7 +3,6 @@
 
 import re
 import time
-import requests
 import json
 import config
 from models.bot import Bot
@@ -15,11 +14,15 @@ from bridge.reply import Reply, ReplyType
 from common.log import logger
 from config import conf, pconf
 import threading
-from common import memory, utils
+from common import const, memory, utils
+from common import http_client
+from common.sse import iter_sse_response
 import base64
 import os
 
 class LinkAIBot(Bot, OpenAICompatibleBot):
+    rate_limit_provider = const.LINKAI
+
     # authentication failed
     AUTH_FAILED_CODE = 401
     NO_QUOTA_CODE = 406
@@ -137,7 +140,7 @@ class LinkAIBot(Bot, OpenAICompatibleBot):
 
             # do http request
             base_url = conf().get("linkai_api_base", "https://api.link-ai.tech")
-            res = requests.post(url=base_url + "/v1/chat/completions", json=body, headers=headers,
+            res = http_client.post(url=base_url + "/v1/chat/completions", json=body, headers=headers,
                                 timeout=conf().get("request_timeout", 180))
             if res.status_code == 200:
                 # execute success
@@ -276,7 +279,7 @@ class LinkAIBot(Bot, OpenAICompatibleBot):
 
             # do http request
             base_url = conf().get("linkai_api_base", "https://api.link-ai.tech")
-            res = requests.post(url=base_url + "/v1/chat/completions", json=body, headers=headers,
+            res = http_client.post(url=base_url + "/v1/chat/completions", json=body, headers=headers,
                                 timeout=conf().get("request_timeout", 180))
             if res.status_code == 200:
                 # execute success
@@ -320,7 +323,7 @@ class LinkAIBot(Bot, OpenAICompatibleBot):
         # do http request
         base_url = conf().get("linkai_api_base", "https://api.link-ai.tech")
         params = {"app_code": app_code}
-        res = requests.get(url=base_url + "/v1/app/info", params=params, headers=headers, timeout=(5, 10))
+        res = http_client.get(url=base_url + "/v1/app/info", params=params, headers=headers, timeout=(5, 10))
         if res.status_code == 200:
             return res.json()
         else:
@@ -341,7 +344,7 @@ class LinkAIBot(Bot, OpenAICompatibleBot):
                 "img_proxy": conf().get("image_proxy")
             }
             url = conf().get("linkai_api_base", "https://api.link-ai.tech") + "/v1/images/generations"
-            res = requests.post(url, headers=headers, json=data, timeout=(5, 90))
+            res = http_client.post(url, headers=headers, json=data, timeout=(5, 90))
             t2 = time.time()
             image_url = res.json()["data"][0]["url"]
             logger.info("[OPEN_AI] image_url={}".format(image_url))
@@ -444,7 +447,7 @@ def _download_file(url: str):
             os.makedirs(file_path)
         file_name = url.split("/")[-1]  # 获取文件名
         file_path = os.path.join(file_path, file_name)
-        response = requests.get(url)
+        response = http_client.get(url)
         with open(file_path, "wb") as f:
             f.write(response.content)
         return file_path
@@ -593,7 +596,7 @@ def _linkai_call_with_tools(self, messages, tools=None, stream=False, **kwargs):
 def _handle_linkai_sync_response(self, base_url, headers, body):
     """Handle synchronous LinkAI API response"""
     try:
-        res = requests.post(
+        res = http_client.post(
             url=base_url + "/v1/chat/completions",
             json=body,
             headers=headers,
@@ -619,7 +622,7 @@ def _handle_linkai_sync_response(self, base_url, headers, body):
 def _handle_linkai_stream_response(self, base_url, headers, body):
     """Handle streaming LinkAI API response"""
     try:
-        res = requests.post(
+        res = http_client.post(
             url=base_url + "/v1/chat/completions",
             json=body,
             headers=headers,
@@ -643,41 +646,38 @@ def _handle_linkai_stream_response(self, base_url, headers, body):
             return
         
         # Process streaming response (OpenAI-compatible SSE format)
-        for line in res.iter_lines():
-            if line:
-                line = line.decode('utf-8')
-                if line.startswith('data: '):
-                    line = line[6:]  # Remove 'data: ' prefix
-                    if line == '[DONE]':
-                        break
-                    try:
-                        chunk = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-
-                    # Check for error responses within the stream
-                    # Some providers (e.g., MiniMax via LinkAI) return errors as:
-                    # {'type': 'error', 'error': {'type': '...', 'message': '...', 'http_code': '400'}}
-                    if chunk.get("type") == "error" or (
-                        isinstance(chunk.get("error"), dict) and "message" in chunk.get("error", {})
-                    ):
-                        error_data = chunk.get("error", {})
-                        error_msg = error_data.get("message", "Unknown error") if isinstance(error_data, dict) else str(error_data)
-                        http_code = error_data.get("http_code", "") if isinstance(error_data, dict) else ""
-                        status_code = int(http_code) if http_code and str(http_code).isdigit() else 400
-                        logger.error(f"[LinkAI] stream error: {error_msg} (http_code={http_code})")
-                        yield {
-                            "error": True,
-                            "message": error_msg,
-                            "status_code": status_code
-                        }
-                        return
+        for sse_event in iter_sse_response(res):
+            line = sse_event.data
+            if line == '[DONE]':
+                break
+            try:
+                chunk = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            # Check for error responses within the stream
+            # Some providers (e.g., MiniMax via LinkAI) return errors as:
+            # {'type': 'error', 'error': {'type': '...', 'message': '...', 'http_code': '400'}}
+            if chunk.get("type") == "error" or (
+                isinstance(chunk.get("error"), dict) and "message" in chunk.get("error", {})
+            ):
+                error_data = chunk.get("error", {})
+                error_msg = error_data.get("message", "Unknown error") if isinstance(error_data, dict) else str(error_data)
+                http_code = error_data.get("http_code", "") if isinstance(error_data, dict) else ""
+                status_code = int(http_code) if http_code and str(http_code).isdigit() else 400
+                logger.error(f"[LinkAI] stream error: {error_msg} (http_code={http_code})")
+                yield {
+                    "error": True,
+                    "message": error_msg,
+                    "status_code": status_code
+                }
+                return
 
-                    # Forward SSE JSON as-is so extensions (e.g. delta._gemini_raw_parts
-                    # for Gemini via LinkAI) reach agent_stream and are stored on assistant
-                    # messages for the next request. Standard OpenAI fields are unchanged.
-                    yield chunk
-                        
+            # Forward SSE JSON as-is so extensions (e.g. delta._gemini_raw_parts
+            # for Gemini via LinkAI) reach agent_stream and are stored on assistant
+            # messages for the next request. Standard OpenAI fields are unchanged.
+            yield chunk
+                
     except Exception as e:
         logger.error(f"[LinkAI] stream response error: {e}")
         yield {
@@ -8,17 +8,22 @@ import requests
 
 from models.bot import Bot
 from models.minimax.minimax_session import MinimaxSession
+from models.rate_limit import RateLimitedBot
 from models.session_manager import SessionManager
 from bridge.context import Context, ContextType
 from bridge.reply import Reply, ReplyType
 from common.log import logger
 from config import conf, load_config
 from common import const
+from common import http_client
+from common.tool_catalog import compiled_tool_format
 from agent.protocol.message_utils import drop_orphaned_tool_results_openai
 
 
 # MiniMax对话模型API
-class MinimaxBot(Bot):
+class MinimaxBot(Bot, RateLimitedBot):
+    rate_limit_provider = const.MiniMax
+
     def __init__(self):
         super().__init__()
         self.args = {
@@ -115,7 +120,7 @@ class MinimaxBot(Bot):
             url = f"{self.api_base}/chat/completions"
             logger.debug(f"[MINIMAX] Calling {url} with model={request_body['model']}")
 
-            response = requests.post(url, headers=headers, json=request_body, timeout=60)
+            response = http_client.post(url, headers=headers, json=request_body, timeout=60)
 
             if response.status_code == 200:
                 result = response.json()
@@ -200,7 +205,7 @@ class MinimaxBot(Bot):
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
             }
-            resp = requests.post(f"{self.api_base}/chat/completions",
+            resp = http_client.post(f"{self.api_base}/chat/completions",
                                  headers=headers, json=payload, timeout=60)
             if resp.status_code != 200:
                 return {"error": True, "message": f"HTTP {resp.status_code}: {resp.text[:300]}"}
@@ -242,6 +247,10 @@ class MinimaxBot(Bot):
             Formatted response or generator for streaming
         """
         try:
+            if not self._acquire_rate_limit(messages, kwargs.get("max_tokens"),
+                                            kwargs.get("model") or self.args["model"]):
+                raise Exception("rate limit exceeded, please try again later")
+
             # Convert messages from Claude format to OpenAI format
             converted_messages = self._convert_messages_to_openai_format(messages)
 
@@ -290,8 +299,10 @@ class MinimaxBot(Bot):
             import traceback
             logger.error(traceback.format_exc())
             
+            error_msg = str(e)
+
             def error_generator():
-                yield {"error": True, "message": str(e), "status_code": 500}
+                yield {"error": True, "message": error_msg, "status_code": 500}
             return error_generator()
 
     def _convert_messages_to_openai_format(self, messages):
@@ -404,6 +415,7 @@ class MinimaxBot(Bot):
 
         return drop_orphaned_tool_results_openai(converted)
 
+    @compiled_tool_format
     def _convert_tools_to_openai_format(self, tools):
         """
         Convert tools from Claude format to OpenAI format
@@ -451,7 +463,7 @@ class MinimaxBot(Bot):
             request_body.pop("stream", None)
 
             url = f"{self.api_base}/chat/completions"
-            response = requests.post(url, headers=headers, json=request_body, timeout=60)
+            response = http_client.post(url, headers=headers, json=request_body, timeout=60)
 
             if response.status_code != 200:
                 error_msg = response.text
@@ -527,7 +539,7 @@ class MinimaxBot(Bot):
             }
 
             url = f"{self.api_base}/chat/completions"
-            response = requests.post(url, headers=headers, json=request_body, stream=True, timeout=60)
+            response = http_client.post(url, headers=headers, json=request_body, stream=True, timeout=60)
 
             if response.status_code != 200:
                 error_msg = response.text
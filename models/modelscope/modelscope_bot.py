@@ -2,18 +2,22 @@
 
 import json
 import time
-import requests
 
 from models.bot import Bot
+from models.rate_limit import RateLimitedBot
 from models.session_manager import SessionManager
 from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
+from common import const
 from common.log import logger
+from common import http_client
+from common.tool_catalog import compiled_tool_format
 from config import conf, load_config
 from .modelscope_session import ModelScopeSession
 
 
-class ModelScopeBot(Bot):
+class ModelScopeBot(Bot, RateLimitedBot):
+    rate_limit_provider = const.MODELSCOPE
 
     def __init__(self):
         super().__init__()
@@ -118,7 +122,7 @@ class ModelScopeBot(Bot):
             body["messages"] = self._convert_messages_for_modelscope(session.messages)
             body["stream"] = False
             
-            res = requests.post(
+            res = http_client.post(
                 "{}/chat/completions".format(self.base_url),
                 headers=headers,
                 json=body,
@@ -182,7 +186,7 @@ class ModelScopeBot(Bot):
             body["messages"] = self._convert_messages_for_modelscope(session.messages)
             body["stream"] = True
 
-            res = requests.post(
+            res = http_client.post(
                 "{}/chat/completions".format(self.base_url),
                 headers=headers,
                 json=body,
@@ -257,7 +261,7 @@ class ModelScopeBot(Bot):
             
             logger.debug("[ModelScopeImage] model={}".format(payload["model"]))
             
-            res = requests.post(
+            res = http_client.post(
                 "{}/images/generations".format(self.base_url),
                 headers=create_headers,
                 data=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
@@ -295,7 +299,7 @@ class ModelScopeBot(Bot):
                 logger.debug("[ModelScopeImage] poll {} URL: {}".format(i+1, poll_url))
                 logger.debug("[ModelScopeImage] poll headers: {}".format(poll_headers))
                 
-                task_res = requests.get(
+                task_res = http_client.get(
                     poll_url,
                     headers=poll_headers,
                     timeout=30
@@ -446,6 +450,10 @@ class ModelScopeBot(Bot):
                     else:
                         return self._create_error_response(error_content)
             
+            if not self._acquire_rate_limit(messages, kwargs.get("max_tokens"),
+                                            kwargs.get("model") or self.args["model"]):
+                raise Exception("rate limit exceeded, please try again later")
+
             # No drawing intent, proceed with normal tool call flow
             session_id = kwargs.get('session_id', 'default_session')
             session = self.sessions.session_query("", session_id)
@@ -533,7 +541,7 @@ class ModelScopeBot(Bot):
             body["messages"] = self._convert_messages_for_modelscope(session.messages)
             body["stream"] = True
             
-            response = requests.post(
+            response = http_client.post(
                 "{}/chat/completions".format(self.base_url),
                 headers=headers,
                 json=body,
@@ -778,6 +786,7 @@ class ModelScopeBot(Bot):
                 converted.append(msg)
         return converted
 
+    @compiled_tool_format
     def _convert_tools_to_openai_format(self, tools):
         if not tools:
             return None
@@ -6,16 +6,22 @@ from typing import Optional
 
 import requests
 from models.bot import Bot
+from models.rate_limit import RateLimitedBot
 from models.session_manager import SessionManager
 from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
+from common import const
 from common.log import logger
+from common import http_client
+from common.tool_catalog import compiled_tool_format
 from config import conf, load_config
 from .moonshot_session import MoonshotSession
 
 
 # Moonshot (Kimi) API Bot
-class MoonshotBot(Bot):
+class MoonshotBot(Bot, RateLimitedBot):
+    rate_limit_provider = const.MOONSHOT
+
     def __init__(self):
         super().__init__()
         self.sessions = SessionManager(MoonshotSession, model=conf().get("model") or "moonshot-v1-128k")
@@ -131,7 +137,7 @@ class MoonshotBot(Bot):
             if model_name.startswith("kimi-k2") or model_name == "kimi-for-coding":
                 body.pop("temperature", None)
                 body.pop("top_p", None)
-            res = requests.post(
+            res = http_client.post(
                 f"{self.base_url}/chat/completions",
                 headers=headers,
                 json=body
@@ -194,7 +200,7 @@ class MoonshotBot(Bot):
                 }],
             }
             headers = self._build_headers()
-            resp = requests.post(f"{self.base_url}/chat/completions",
+            resp = http_client.post(f"{self.base_url}/chat/completions",
                                  headers=headers, json=payload, timeout=60)
             if resp.status_code != 200:
                 return {"error": True, "message": f"HTTP {resp.status_code}: {resp.text[:300]}"}
@@ -238,6 +244,10 @@ class MoonshotBot(Bot):
             Generator yielding OpenAI-format chunks (for streaming)
         """
         try:
+            if not self._acquire_rate_limit(messages, kwargs.get("max_tokens"),
+                                            kwargs.get("model") or self.args["model"]):
+                raise Exception("rate limit exceeded, please try again later")
+
             # Convert messages from Claude format to OpenAI format
             converted_messages = self._convert_messages_to_openai_format(messages)
 
@@ -294,8 +304,10 @@ class MoonshotBot(Bot):
             import traceback
             logger.error(traceback.format_exc())
 
+            error_msg = str(e)
+
             def error_generator():
-                yield {"error": True, "message": str(e), "status_code": 500}
+                yield {"error": True, "message": error_msg, "status_code": 500}
             return error_generator()
 
     # -------------------- streaming --------------------
@@ -306,7 +318,7 @@ class MoonshotBot(Bot):
             headers = self._build_headers()
 
             url = f"{self.base_url}/chat/completions"
-            response = requests.post(url, headers=headers, json=request_body, stream=True, timeout=120)
+            response = http_client.post(url, headers=headers, json=request_body, stream=True, timeout=120)
 
             if response.status_code != 200:
                 error_msg = response.text
@@ -437,7 +449,7 @@ class MoonshotBot(Bot):
 
             request_body.pop("stream", None)
             url = f"{self.base_url}/chat/completions"
-            response = requests.post(url, headers=headers, json=request_body, timeout=120)
+            response = http_client.post(url, headers=headers, json=request_body, timeout=120)
 
             if response.status_code != 200:
                 error_msg = response.text
@@ -592,6 +604,7 @@ class MoonshotBot(Bot):
 
         return converted
 
+    @compiled_tool_format
     def _convert_tools_to_openai_format(self, tools):
         """
         Convert tools from Claude format to OpenAI format.
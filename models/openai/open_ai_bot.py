@@ -18,6 +18,7 @@ from models.openai.open_ai_session import OpenAISession
 from models.session_manager import SessionManager
 from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
+from common import const
 from common.log import logger
 from config import conf
 
@@ -26,6 +27,8 @@ user_session = dict()
 
 # OpenAI对话模型API (可用)
 class OpenAIBot(Bot, OpenAIImage, OpenAICompatibleBot):
+    rate_limit_provider = const.OPEN_AI
+
     def __init__(self):
         super().__init__()
         self._api_key = conf().get("open_ai_api_key")
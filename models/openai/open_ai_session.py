@@ -1,8 +1,10 @@
 from models.session_manager import Session
-from common.log import logger
 
 
 class OpenAISession(Session):
+    # 从最早的消息（包括system）开始丢弃
+    keep_head = 0
+
     def __init__(self, session_id, system_prompt=None, model="text-davinci-003"):
         super().__init__(session_id, system_prompt)
         self.model = model
@@ -15,53 +17,31 @@ class OpenAISession(Session):
               A: xxx
               Q: xxx
         """
-        prompt = ""
-        for item in self.messages:
-            if item["role"] == "system":
-                prompt += item["content"] + "<|endoftext|>\n\n\n"
-            elif item["role"] == "user":
-                prompt += "Q: " + item["content"] + "\n"
-            elif item["role"] == "assistant":
-                prompt += "\n\nA: " + item["content"] + "<|endoftext|>\n"
-
+        prompt = "".join(self._prompt_item(item) for item in self.messages)
         if len(self.messages) > 0 and self.messages[-1]["role"] == "user":
             prompt += "A: "
         return prompt
 
-    def discard_exceeding(self, max_tokens, cur_tokens=None):
-        precise = True
-        try:
-            cur_tokens = self.calc_tokens()
-        except Exception as e:
-            precise = False
-            if cur_tokens is None:
-                raise e
-            logger.debug("Exception when counting tokens precisely for query: {}".format(e))
-        while cur_tokens > max_tokens:
-            if len(self.messages) > 1:
-                self.messages.pop(0)
-            elif len(self.messages) == 1 and self.messages[0]["role"] == "assistant":
-                self.messages.pop(0)
-                if precise:
-                    cur_tokens = self.calc_tokens()
-                else:
-                    cur_tokens = len(str(self))
-                break
-            elif len(self.messages) == 1 and self.messages[0]["role"] == "user":
-                logger.warn("user question exceed max_tokens. total_tokens={}".format(cur_tokens))
-                break
-            else:
-                logger.debug("max_tokens={}, total_tokens={}, len(conversation)={}".format(max_tokens, cur_tokens, len(self.messages)))
-                break
-            if precise:
-                cur_tokens = self.calc_tokens()
-            else:
-                cur_tokens = len(str(self))
+    @staticmethod
+    def _prompt_item(item):
+        if item["role"] == "system":
+            return item["content"] + "<|endoftext|>\n\n\n"
+        elif item["role"] == "user":
+            return "Q: " + item["content"] + "\n"
+        elif item["role"] == "assistant":
+            return "\n\nA: " + item["content"] + "<|endoftext|>\n"
+        return ""
+
+    def _count_tokens(self, messages):
+        # 逐条计数（不含结尾的"A: "），以便缓存每条消息的token数
+        return num_tokens_from_string("".join(self._prompt_item(item) for item in messages), self.model)
+
+    def _discard_estimated(self, max_tokens, cur_tokens):
+        # 无法精确计算token时，按prompt的字符数估算
+        freed = (len(self._prompt_item(item)) for item in self.messages)
+        cur_tokens, _ = self._trim(max_tokens, cur_tokens, len(str(self)), freed)
         return cur_tokens
 
-    def calc_tokens(self):
-        return num_tokens_from_string(str(self), self.model)
-
 
 # refer to https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_tokens_with_tiktoken.ipynb
 def num_tokens_from_string(string: str, model: str) -> int:
@@ -28,6 +28,8 @@ from typing import Any, Dict, Generator, Optional
 import requests
 
 from common.log import logger
+from common import http_client
+from common.sse import iter_sse_response
 
 
 DEFAULT_API_BASE = "https://api.openai.com/v1"
@@ -208,7 +210,7 @@ class OpenAIHTTPClient:
             )
 
         try:
-            resp = requests.post(
+            resp = http_client.post(
                 url,
                 headers=headers,
                 json=clean_payload,
@@ -256,7 +258,7 @@ class OpenAIHTTPClient:
               followed by termination of the generator.
         """
         try:
-            resp = requests.post(
+            resp = http_client.post(
                 url,
                 headers=headers,
                 json=payload,
@@ -351,88 +353,15 @@ class OpenAIHTTPClient:
     def _iter_sse_events(resp: requests.Response) -> Generator[str, None, None]:
         """Decode an SSE byte stream into joined `data:` payloads.
 
-        Implements the subset of the SSE spec that OpenAI / OpenAI-compatible
-        endpoints actually use:
-          - Events are separated by blank lines (\\r\\r, \\n\\n, or \\r\\n\\r\\n).
-          - Within an event, multiple ``data:`` lines are concatenated with
-            "\\n" (per spec).
-          - ``event:``, ``id:``, ``retry:`` and comment lines (``:``) are
-            tolerated but not yielded — for chat-completion we only care
-            about the JSON payload in ``data:``.
-          - Bytes are buffered until a complete event boundary is seen so
-            UTF-8 codepoints split across TCP chunks decode correctly.
-
-        Yields each event's joined ``data`` string. The terminal sentinel
-        ``[DONE]`` is yielded as a literal string so the caller can break.
+        Thin wrapper over :class:`common.sse.SSEDecoder`, which buffers raw
+        bytes until a line is complete (so UTF-8 codepoints split across TCP
+        chunks decode correctly) and scans each byte only once. ``event:``,
+        ``id:``, ``retry:`` and comment lines are tolerated; only the joined
+        ``data`` of each event is yielded, including the terminal ``[DONE]``
+        sentinel so the caller can break.
         """
-        buf = b""
-        for raw in resp.iter_content(chunk_size=None, decode_unicode=False):
-            if not raw:
-                continue
-            buf += raw
-            # Find complete events (terminated by a blank line).
-            while True:
-                # Look for the earliest event terminator. SSE allows three
-                # forms; check all and pick the earliest match.
-                idx_nn = buf.find(b"\n\n")
-                idx_rr = buf.find(b"\r\r")
-                idx_rnrn = buf.find(b"\r\n\r\n")
-                candidates = [i for i in (idx_nn, idx_rr, idx_rnrn) if i != -1]
-                if not candidates:
-                    break
-                # We need to know the length of the matched terminator to
-                # advance past it correctly.
-                end_pos = min(candidates)
-                if end_pos == idx_rnrn:
-                    term_len = 4
-                else:
-                    term_len = 2
-                event_bytes = buf[:end_pos]
-                buf = buf[end_pos + term_len:]
-
-                # Decode the full event as UTF-8. ``errors="replace"`` is a
-                # belt-and-suspenders safety net for truly malformed upstream
-                # bytes; it should never trigger for well-formed providers.
-                try:
-                    event_text = event_bytes.decode("utf-8")
-                except UnicodeDecodeError:
-                    event_text = event_bytes.decode("utf-8", errors="replace")
-
-                data_lines = []
-                for line in event_text.splitlines():
-                    if not line or line.startswith(":"):
-                        continue
-                    field, _, value = line.partition(":")
-                    # Per SSE spec, a single optional space after the colon
-                    # is part of the framing, not the value.
-                    if value.startswith(" "):
-                        value = value[1:]
-                    if field == "data":
-                        data_lines.append(value)
-                    # Other fields (event/id/retry) are intentionally ignored
-                    # — chat-completion endpoints don't use them in a way we
-                    # need for parsing.
-                if data_lines:
-                    yield "\n".join(data_lines)
-
-        # Flush any trailing bytes the server forgot to terminate. This is
-        # rare but spec-allowed (some providers omit the final \n\n).
-        if buf.strip():
-            try:
-                event_text = buf.decode("utf-8")
-            except UnicodeDecodeError:
-                event_text = buf.decode("utf-8", errors="replace")
-            data_lines = []
-            for line in event_text.splitlines():
-                if not line or line.startswith(":"):
-                    continue
-                field, _, value = line.partition(":")
-                if value.startswith(" "):
-                    value = value[1:]
-                if field == "data":
-                    data_lines.append(value)
-            if data_lines:
-                yield "\n".join(data_lines)
+        for event in iter_sse_response(resp):
+            yield event.data
 
     @staticmethod
     def _make_error_chunk(status_code: int, message: str) -> Dict[str, Any]:
@@ -8,14 +8,17 @@ This includes: OpenAI, LinkAI, Azure OpenAI, and many third-party providers.
 """
 
 import json
-import requests
 from typing import Optional
 from common.log import logger
+from common import http_client
+from common.tool_catalog import compiled_tool_format
 from agent.protocol.message_utils import drop_orphaned_tool_results_openai
+from config import conf
 from models.openai.openai_http_client import OpenAIHTTPClient, OpenAIHTTPError
+from models.rate_limit import RateLimitedBot
 
 
-class OpenAICompatibleBot:
+class OpenAICompatibleBot(RateLimitedBot):
     """
     Base class for OpenAI-compatible bots.
     
@@ -28,7 +31,7 @@ class OpenAICompatibleBot:
     
     Subclasses only need to override get_api_config() to provide their specific API settings.
     """
-    
+
     def get_api_config(self):
         """
         Get API configuration for this bot.
@@ -70,6 +73,10 @@ class OpenAICompatibleBot:
         try:
             # Get API configuration from subclass
             api_config = self.get_api_config()
+
+            if not self._acquire_rate_limit(messages, kwargs.get("max_tokens"),
+                                            kwargs.get("model", api_config.get('model'))):
+                raise Exception("rate limit exceeded, please try again later")
             
             # Convert messages from Claude format to OpenAI format
             messages = self._convert_messages_to_openai_format(messages)
@@ -141,7 +148,6 @@ class OpenAICompatibleBot:
         Subclasses can override this for custom auth headers (e.g. Azure's
         ``api-key`` header) by returning a pre-configured client.
         """
-        from config import conf
         proxy = conf().get("proxy") or None
         return OpenAIHTTPClient(proxy=proxy)
 
@@ -218,6 +224,7 @@ class OpenAICompatibleBot:
                 "status_code": 500,
             }
     
+    @compiled_tool_format
     def _convert_tools_to_openai_format(self, tools):
         """
         Convert tools from Claude format to OpenAI format
@@ -371,7 +378,7 @@ class OpenAICompatibleBot:
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
             }
-            resp = requests.post(
+            resp = http_client.post(
                 f"{api_base}/chat/completions",
                 headers=headers, json=payload, timeout=60,
             )
@@ -2,11 +2,11 @@
 
 import time
 
-import requests
 from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
 from common import const
 from common.log import logger
+from common import http_client
 from config import conf, load_config
 from models.bot import Bot
 from models.openai_compatible_bot import OpenAICompatibleBot
@@ -28,6 +28,8 @@ _VISION_CAPABLE_MODELS = {
 
 
 class QianfanBot(Bot, OpenAICompatibleBot):
+    rate_limit_provider = const.QIANFAN
+
     @property
     def supports_vision(self) -> bool:
         """Whether the configured main model is multimodal."""
@@ -131,7 +133,7 @@ class QianfanBot(Bot, OpenAICompatibleBot):
         try:
             body = dict(args) if args else dict(self.args)
             body["messages"] = session.messages
-            response = requests.post(
+            response = http_client.post(
                 "{}/chat/completions".format(self.api_base),
                 headers=self._build_headers(),
                 json=body,
@@ -169,7 +171,7 @@ class QianfanBot(Bot, OpenAICompatibleBot):
         }
 
         try:
-            response = requests.post(
+            response = http_client.post(
                 "{}/chat/completions".format(self.api_base),
                 headers=self._build_headers(),
                 json=payload,
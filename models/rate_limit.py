@@ -0,0 +1,51 @@
+# encoding:utf-8
+
+"""
+Per-provider rate limits for the bots' LLM calls.
+
+Limits are read from conf()["rate_limits"][<bot_type>], e.g.
+{"deepseek": {"rpm": 60, "tpm": 100000}}, and shared by every bot of the
+provider through common.token_bucket.get_rate_limiter.
+"""
+
+from agent.protocol.tokenizer import get_token_counter
+from common.log import logger
+from common.token_bucket import get_rate_limiter
+from config import conf
+
+
+class RateLimitedBot:
+    """
+    Mixin for bots whose calls count against a provider's limits.
+
+    Subclasses set rate_limit_provider and call _acquire_rate_limit() before
+    each request.
+    """
+
+    # Key of this bot's limits in conf()["rate_limits"]
+    rate_limit_provider = None
+
+    def _rate_limits(self) -> dict:
+        """Per-minute limits configured for this bot's provider, e.g. {"rpm": 60, "tpm": 100000}."""
+        if not self.rate_limit_provider:
+            return {}
+        return (conf().get("rate_limits") or {}).get(self.rate_limit_provider) or {}
+
+    def _acquire_rate_limit(self, messages, max_tokens=None, model=None) -> bool:
+        """
+        Wait until the provider's limits allow one more request.
+
+        The TPM cost is the estimated prompt size plus max_tokens. Returns False
+        when that would take longer than rate_limit_timeout seconds.
+        """
+        limits = self._rate_limits()
+        if not limits:
+            return True
+        costs = {}
+        if limits.get("tpm"):
+            costs["tpm"] = get_token_counter(model).count_messages(messages) + (max_tokens or 0)
+        limiter = get_rate_limiter(self.rate_limit_provider, limits, conf().get("rate_limit_timeout"))
+        if limiter.acquire(costs=costs):
+            return True
+        logger.warning(f"[{self.__class__.__name__}] rate limited: {self.rate_limit_provider} {limits}")
+        return False
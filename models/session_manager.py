@@ -1,9 +1,32 @@
+import itertools
+import operator
+from collections import deque
+
 from common.expired_dict import ExpiredDict
 from common.log import logger
 from config import conf
 
 
 class Session(object):
+    """
+    A chat history plus token-budget trimming.
+
+    Subclasses provide _count_tokens(messages), the provider's token count of
+    a message list, and may adjust the trimming policy: the first keep_head
+    messages (the system prompt) are never discarded; older messages are
+    dropped discard_step at a time while at least keep_last would remain, and
+    then a lone trailing reply is dropped too (if drop_last_reply).
+
+    Per-message counts are cached alongside self.messages (matched by
+    identity, so appends are counted once and a replaced list or message is
+    re-counted), which makes discard_exceeding a single linear pass.
+    """
+
+    keep_head = 1
+    discard_step = 1
+    keep_last = 1
+    drop_last_reply = True
+
     def __init__(self, session_id, system_prompt=None):
         self.session_id = session_id
         self.messages = []
@@ -11,6 +34,7 @@ class Session(object):
             self.system_prompt = conf().get("character_desc", "")
         else:
             self.system_prompt = system_prompt
+        self._forget_counts()
 
     # 重置会话
     def reset(self):
@@ -30,16 +54,102 @@ class Session(object):
         self.messages.append(assistant_item)
 
     def discard_exceeding(self, max_tokens=None, cur_tokens=None):
-        raise NotImplementedError
+        precise = True
+        try:
+            cur_tokens = self.calc_tokens()
+        except Exception as e:
+            precise = False
+            if cur_tokens is None:
+                raise e
+            logger.debug("Exception when counting tokens precisely for query: {}".format(e))
+        if cur_tokens <= max_tokens:
+            return cur_tokens
+        if not precise:
+            self._forget_counts()
+            return self._discard_estimated(max_tokens, cur_tokens)
+
+        freed = itertools.islice(self._counts, self.keep_head, None)
+        cur_tokens, dropped = self._trim(max_tokens, cur_tokens, cur_tokens, freed)
+        head = [(self._counted.popleft(), self._counts.popleft())
+                for _ in range(min(self.keep_head, len(self._counted)))]
+        for _ in range(dropped):
+            self._counted.popleft()
+            self._count_total -= self._counts.popleft()
+        for msg, tokens in reversed(head):
+            self._counted.appendleft(msg)
+            self._counts.appendleft(tokens)
+        return cur_tokens
 
     def calc_tokens(self):
+        messages = self.messages
+        counted = self._counted
+        if (messages is not self._counted_list or len(messages) < len(counted)
+                or not all(map(operator.is_, counted, messages))):
+            self._forget_counts()
+            self._base_tokens = self._count_tokens([])
+            self._counted_list = messages
+            counted = self._counted
+        for msg in itertools.islice(messages, len(counted), None):
+            tokens = self._count_tokens([msg]) - self._base_tokens
+            counted.append(msg)
+            self._counts.append(tokens)
+            self._count_total += tokens
+        return self._base_tokens + self._count_total
+
+    def _count_tokens(self, messages):
+        """Token count of a message list; must add up per message (plus a fixed overhead)."""
         raise NotImplementedError
 
+    def _is_reply(self, msg):
+        return msg.get("role") == "assistant"
+
+    def _is_query(self, msg):
+        return msg.get("role") == "user"
+
+    def _forget_counts(self):
+        self._counted_list = None
+        self._counted = deque()
+        self._counts = deque()
+        self._count_total = 0
+        self._base_tokens = 0
+
+    def _discard_estimated(self, max_tokens, cur_tokens):
+        """Trim without a token counter: each discarded message is assumed to free max_tokens."""
+        cur_tokens, _ = self._trim(max_tokens, cur_tokens, cur_tokens, itertools.repeat(max_tokens))
+        return cur_tokens
+
+    def _trim(self, max_tokens, cur_tokens, remaining, freed):
+        """
+        Drop the oldest messages after the head until cur_tokens fits.
+
+        :param remaining: Token total the session is re-measured at after a drop
+        :param freed: Tokens released by each message after the head, oldest first
+        :return: (tokens after trimming, number of messages dropped)
+        """
+        head, step, count = self.keep_head, self.discard_step, len(self.messages)
+        end = head
+        while cur_tokens > max_tokens and count - end - step >= self.keep_last:
+            for _ in range(step):
+                remaining -= next(freed)
+            end += step
+            cur_tokens = remaining
+        if cur_tokens > max_tokens:
+            if count - end == 1 and self.drop_last_reply and self._is_reply(self.messages[end]):
+                cur_tokens = remaining - next(freed)
+                end += 1
+            elif count - end == 1 and self._is_query(self.messages[end]):
+                logger.warning("user message exceed max_tokens. total_tokens={}".format(cur_tokens))
+            else:
+                logger.debug("max_tokens={}, total_tokens={}, len(messages)={}".format(
+                    max_tokens, cur_tokens, count - end + head))
+        del self.messages[head:end]
+        return cur_tokens, end - head
+
 
 class SessionManager(object):
     def __init__(self, sessioncls, **session_args):
         if conf().get("expires_in_seconds"):
-            sessions = ExpiredDict(conf().get("expires_in_seconds"))
+            sessions = ExpiredDict(conf().get("expires_in_seconds"), background_sweep=True)
         else:
             sessions = dict()
         self.sessions = sessions
@@ -1,4 +1,5 @@
 from common.log import logger
+from common.token_bucket import TokenBucket
 from config import conf
 
 
@@ -15,10 +16,12 @@ class ZhipuAIImage(object):
             self.client = ZhipuAiClient(api_key=api_key, base_url=api_base)
         else:
             self.client = ZhipuAiClient(api_key=api_key)
+        if conf().get("rate_limit_dalle"):
+            self.tb4dalle = TokenBucket(conf().get("rate_limit_dalle", 50))
 
     def create_img(self, query, retry_count=0, api_key=None, api_base=None):
         try:
-            if conf().get("rate_limit_dalle"):
+            if conf().get("rate_limit_dalle") and not self.tb4dalle.get_token():
                 return False, "请求太快了，请休息一下再问我吧"
             logger.info("[ZHIPU_AI] image_query={}".format(query))
             response = self.client.images.generations(
@@ -11,6 +11,7 @@ from models.session_manager import SessionManager
 from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
 from common.log import logger
+from common.tool_catalog import compiled_tool_format
 from config import conf, load_config
 from zai import ZhipuAiClient
 
@@ -381,6 +382,7 @@ class ZHIPUAIBot(Bot, ZhipuAIImage):
                 "status_code": 500
             }
     
+    @compiled_tool_format
     def _convert_tools_to_zhipu_format(self, tools):
         """
         Convert tools from Claude format to ZhipuAI format
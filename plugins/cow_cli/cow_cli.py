@@ -213,6 +213,36 @@ class CowCliPlugin(Plugin):
             lines.append("")
             lines.append(f"  Agent: 未初始化 (首次对话后自动创建)")
 
+        from common.handler_pool import get_all_pool_stats
+        pool_stats = get_all_pool_stats()
+        if pool_stats:
+            lines.append("")
+            lines.append("  消息处理线程池:")
+            for p in pool_stats:
+                lines.append(
+                    f"    {p['name']}: 运行 {p['active']}/{p['workers']}, 排队 {p['queued']}, "
+                    f"拒绝 {p['rejected']}, 平均等待 {p['avg_wait_ms']}ms"
+                )
+
+        from common.http_client import get_http_stats
+        http_stats = get_http_stats()
+        if http_stats["requests"]:
+            lines.append("")
+            lines.append(
+                f"  HTTP连接复用: 请求 {http_stats['requests']}, 新建连接 {http_stats['connections_opened']}, "
+                f"复用率 {http_stats['reuse_ratio'] * 100:.0f}%"
+            )
+
+        agent_stats = self._get_agent_cache_stats()
+        if agent_stats:
+            lines.append("")
+            lines.append(
+                f"  会话Agent缓存: 活跃 {agent_stats['live']}/{agent_stats['max_size'] or '∞'}, "
+                f"休眠 {agent_stats['evicted_lru'] + agent_stats['evicted_idle']}, "
+                f"恢复 {agent_stats['restores']}, "
+                f"约 {agent_stats['estimated_bytes'] / 1024 / 1024:.1f}MB"
+            )
+
         return "\n".join(lines)
 
     # ------------------------------------------------------------------
@@ -618,11 +648,11 @@ class CowCliPlugin(Plugin):
     _REMOTE_PAGE_SIZE = 10
 
     def _skill_list_remote(self, page: int = 1) -> str:
-        import requests
+        from common import http_client
         from cli.utils import SKILL_HUB_API, load_skills_config
         page_size = self._REMOTE_PAGE_SIZE
         try:
-            resp = requests.get(
+            resp = http_client.get(
                 f"{SKILL_HUB_API}/skills",
                 params={"page": page, "limit": page_size},
                 timeout=10,
@@ -670,10 +700,10 @@ class CowCliPlugin(Plugin):
         if not query:
             return "请指定搜索关键词: /skill search <关键词>"
 
-        import requests
+        from common import http_client
         from cli.utils import SKILL_HUB_API, load_skills_config
         try:
-            resp = requests.get(f"{SKILL_HUB_API}/skills/search", params={"q": query}, timeout=10)
+            resp = http_client.get(f"{SKILL_HUB_API}/skills/search", params={"q": query}, timeout=10)
             resp.raise_for_status()
             skills = resp.json().get("skills", [])
         except Exception as e:
@@ -1173,5 +1203,15 @@ class CowCliPlugin(Plugin):
         except Exception:
             return None
 
+    def _get_agent_cache_stats(self):
+        try:
+            from bridge.bridge import Bridge
+            agent_bridge = Bridge()._agent_bridge
+            if not agent_bridge:
+                return None
+            return agent_bridge.agents.stats()
+        except Exception:
+            return None
+
     def get_help_text(self, **kwargs):
         return "在对话中使用 /help 或 cow help 查看可用命令"
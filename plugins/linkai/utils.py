@@ -1,5 +1,5 @@
-import requests
 from common.log import logger
+from common import http_client
 from config import global_config
 from bridge.reply import Reply, ReplyType
 from plugins.event import EventContext, EventAction
@@ -36,7 +36,7 @@ class Util:
             # do http request
             base_url = conf().get("linkai_api_base", "https://api.link-ai.tech")
             params = {"app_code": app_code}
-            res = requests.get(url=base_url + "/v1/app/info", params=params, headers=headers, timeout=(5, 10))
+            res = http_client.get(url=base_url + "/v1/app/info", params=params, headers=headers, timeout=(5, 10))
             if res.status_code == 200:
                 plugins = res.json().get("data").get("plugins")
                 for plugin in plugins:
@@ -0,0 +1,89 @@
+# encoding:utf-8
+"""
+Benchmark: first-message latency of a brand-new agent session.
+
+Builds a throwaway workspace (HOME redirected to a temp dir) with --skills
+custom skills and a filled-in AGENT.md / USER.md / MEMORY.md and knowledge
+index. Then creates --sessions new sessions through AgentBridge.get_agent.
+Each one is followed by Agent.get_full_system_prompt(), the rebuild the first
+run of a session performs. No model is called.
+
+Usage:
+    python tests/benchmarks/bench_agent_bootstrap.py [--sessions 50] [--skills 40]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+_HOME = tempfile.mkdtemp(prefix="cow_bench_home_")
+os.environ["HOME"] = _HOME
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from config import conf  # noqa: E402
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _make_workspace(root, skills):
+    _write(os.path.join(root, "AGENT.md"), "# Agent\n\nName: Cow\nStyle: concise, friendly.\n" * 5)
+    _write(os.path.join(root, "USER.md"), "# User\n\nPrefers short answers. Lives in Hangzhou.\n" * 5)
+    _write(os.path.join(root, "MEMORY.md"), "".join(f"- fact {i}: something worth remembering\n" for i in range(150)))
+    _write(os.path.join(root, "knowledge", "index.md"), "".join(f"- [page {i}](pages/{i}.md)\n" for i in range(60)))
+    for i in range(skills):
+        _write(os.path.join(root, "skills", f"skill-{i}", "SKILL.md"), (
+            "---\n"
+            f"name: skill-{i}\n"
+            f"description: Handles task family {i}; use when the user asks about topic {i} or related reports.\n"
+            "metadata:\n"
+            "  cow:\n"
+            "    emoji: \"🛠\"\n"
+            "    requires:\n"
+            "      bins: [\"python3\"]\n"
+            "user-invocable: true\n"
+            "---\n\n"
+            f"# Skill {i}\n\n" + "Step-by-step instructions.\n" * 40
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--skills", type=int, default=40)
+    args = parser.parse_args()
+
+    workspace = os.path.join(_HOME, "cow")
+    _make_workspace(workspace, args.skills)
+    conf()["agent_workspace"] = workspace
+
+    from bridge.agent_bridge import AgentBridge
+
+    class _Bridge:
+        pass
+
+    agent_bridge = AgentBridge(_Bridge())
+    t0 = time.perf_counter()
+    agent_bridge.get_agent(None)
+    print(f"default agent: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    samples = []
+    for i in range(args.sessions):
+        t0 = time.perf_counter()
+        agent = agent_bridge.get_agent(f"bench_session_{i}")
+        agent.get_full_system_prompt()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    print(f"new session + first prompt ({args.sessions} sessions, {args.skills} skills): "
+          f"p50 {statistics.median(samples):.1f} ms   "
+          f"p95 {samples[int(len(samples) * 0.95) - 1]:.1f} ms   mean {statistics.mean(samples):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# encoding:utf-8
+"""
+Soak benchmark: per-session agents kept in a plain dict vs. bridge.agent_cache.AgentCache.
+
+Drives --sessions distinct sessions (plus --revisit returning ones) through
+the same get-or-build path AgentBridge uses. Each turn is appended to a real
+ConversationStore in a temp directory, and a fresh agent restores its recent
+history from it the way AgentInitializer._restore_conversation_history does.
+Agents are lightweight stand-ins: a message list plus a --agent-kb blob
+for the prompt, tool schemas and per-session memory state a real Agent holds.
+
+Reports traced peak memory, the live agent count, and whether restored sessions
+saw their earlier turns.
+
+Usage:
+    python tests/benchmarks/bench_agent_cache_soak.py [--sessions 50000] [--max-size 500] [--agent-kb 32]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.memory.conversation_store import ConversationStore  # noqa: E402
+from bridge.agent_cache import AgentCache  # noqa: E402
+
+
+class _SoakAgent:
+    def __init__(self, session_id, agent_kb):
+        self.session_id = session_id
+        self.messages = []
+        self.messages_lock = threading.Lock()
+        self.system_prompt = "You are a helpful agent. " * 20
+        self.state = bytearray(agent_kb * 1024)
+
+
+def _run(label, agents, store, args):
+    rng = random.Random(11)
+    order = [f"user_{i}" for i in range(args.sessions)]
+    order += [f"user_{rng.randrange(args.sessions)}" for _ in range(args.revisit)]
+    restored_ok = restored = 0
+    cached = isinstance(agents, AgentCache)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for sid in order:
+        agent = agents.lookup(sid, pin=True) if cached else agents.get(sid)
+        if agent is None:
+            agent = _SoakAgent(sid, args.agent_kb)
+            saved = store.load_messages(sid, max_turns=3)
+            if saved:
+                agent.messages = saved
+                restored += 1
+                restored_ok += saved[0]["content"].startswith(f"hello from {sid}")
+            if cached:
+                agent = agents.put(sid, agent, pin=True)
+            else:
+                agents[sid] = agent
+        turn = [
+            {"role": "user", "content": f"hello from {sid}"},
+            {"role": "assistant", "content": "ok " * 30},
+        ]
+        with agent.messages_lock:
+            agent.messages.extend(turn)
+        store.append_messages(sid, turn, channel_type="bench")
+        if cached:
+            agents.unpin(sid)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:>7}: {len(order)} turns in {elapsed:.1f}s   live agents {len(agents):>6}   "
+          f"peak {peak / 1024 / 1024:8.1f} MiB   restored {restored_ok}/{restored}")
+    if cached:
+        stats = agents.stats()
+        print(f"         evicted lru={stats['evicted_lru']} idle={stats['evicted_idle']} "
+              f"restores={stats['restores']} avg/agent={stats['avg_bytes_per_agent']} B")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50000)
+    parser.add_argument("--revisit", type=int, default=5000, help="extra turns from returning sessions")
+    parser.add_argument("--max-size", type=int, default=500)
+    parser.add_argument("--agent-kb", type=int, default=32, help="per-agent payload beyond messages")
+    args = parser.parse_args()
+
+    for label, factory in (
+        ("dict", dict),
+        ("cache", lambda: AgentCache(max_size=args.max_size, idle_ttl=3600)),
+    ):
+        tmp = tempfile.mkdtemp(prefix="cow_bench_agents_")
+        try:
+            store = ConversationStore(Path(tmp) / "conversations.db")
+            _run(label, factory(), store, args)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# encoding:utf-8
+"""
+Benchmark: executor overhead per agent step on a long history.
+
+Runs AgentStreamExecutor.run_stream against an in-process model that answers
+with one tool call per step for --steps steps and then a final text, and a
+no-op tool, so the time measured is the executor's own bookkeeping (trim,
+validation, turn counting) rather than the LLM or the tool. The restored
+history has --history turns of --tools tool calls each; the context limits
+are set high enough that no trimming happens. Reports the whole run and the
+marginal cost of one more step ((run(steps) - run(1)) / (steps - 1)).
+
+Usage:
+    python tests/benchmarks/bench_agent_steps.py [--history 100,1000,3000] [--tools 4] [--steps 20]
+"""
+import argparse
+import gc
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.protocol.agent_stream import AgentStreamExecutor  # noqa: E402
+from agent.protocol.models import LLMModel  # noqa: E402
+from agent.protocol.tokenizer import TokenCounter, approximate_tokens  # noqa: E402
+from agent.tools.base_tool import BaseTool, ToolResult  # noqa: E402
+from common.log import logger  # noqa: E402
+
+
+class _EchoTool(BaseTool):
+    name = "echo"
+    description = "echo"
+    params = {"type": "object", "properties": {"n": {"type": "integer"}}}
+
+    def execute(self, params):
+        return ToolResult.success(f"step {params.get('n')} output\n" * 20)
+
+
+class _ScriptedModel(LLMModel):
+    def __init__(self, steps):
+        super().__init__(model="bench-model")
+        self.steps = steps
+        self.calls = 0
+
+    def call_stream(self, request):
+        self.calls += 1
+        if self.calls <= self.steps:
+            yield {"choices": [{"delta": {"tool_calls": [{
+                "index": 0, "id": f"call_{self.calls}",
+                "function": {"name": "echo", "arguments": f'{{"n": {self.calls}}}'}}]}}]}
+        else:
+            yield {"choices": [{"delta": {"content": "done"}, "finish_reason": "stop"}]}
+
+
+class _Agent:
+    memory_manager = None
+    max_context_tokens = 10 ** 9
+
+    def __init__(self):
+        self._counter = TokenCounter("approx", approximate_tokens)
+
+    def _estimate_message_tokens(self, msg):
+        return self._counter.count_message(msg)
+
+    def _get_model_context_window(self):
+        return 10 ** 9
+
+
+def _history(turns, tools):
+    msgs = []
+    for i in range(turns):
+        msgs.append({"role": "user", "content": [{"type": "text", "text": f"question {i}"}]})
+        for t in range(tools):
+            tool_id = f"h_{i}_{t}"
+            msgs.append({"role": "assistant", "content": [
+                {"type": "tool_use", "id": tool_id, "name": "echo", "input": {"n": t}}]})
+            msgs.append({"role": "user", "content": [
+                {"type": "tool_result", "tool_use_id": tool_id, "content": "x" * 300}]})
+        msgs.append({"role": "assistant", "content": [{"type": "text", "text": f"answer {i}"}]})
+    return msgs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", default="100,1000,3000", help="comma-separated history sizes in turns")
+    parser.add_argument("--tools", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+
+    agent = _Agent()
+
+    def run(history, steps):
+        best = None
+        for _ in range(5):
+            gc.collect()
+            executor = AgentStreamExecutor(
+                agent=agent, model=_ScriptedModel(steps), system_prompt="system",
+                tools=[_EchoTool()], max_turns=steps + 5, messages=list(history),
+                max_context_turns=10 ** 6,
+            )
+            t0 = time.perf_counter()
+            executor.run_stream("go")
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000
+
+    for turns in (int(h) for h in args.history.split(",")):
+        history = _history(turns, args.tools)
+        full = run(history, args.steps)
+        single = run(history, 1)
+        per_step = (full - single) / max(1, args.steps - 1)
+        print(f"  {turns:>5} turns ({len(history):>6} messages): {args.steps}-step run {full:8.1f} ms, "
+              f"per extra step {per_step:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# encoding:utf-8
+"""
+Benchmark: the bash tool on commands with large or slow output.
+
+Runs Bash.execute on a few commands (a 1M-line seq, a chatty build-like
+loop, `find` over --find-root, a command that never stops writing) and
+reports wall time, peak Python memory (tracemalloc) and, when the tool
+reports progress, the delay before the first update. --env-vars writes a
+.env file of that many variables for the tool to load on every call.
+
+Usage:
+    python tests/benchmarks/bench_bash_output.py [--find-root /usr] [--env-vars 50] [--calls 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.tools.bash import bash as bash_module  # noqa: E402
+from agent.tools.bash.bash import Bash  # noqa: E402
+
+
+def _measure(tool, command, timeout):
+    first_update = []
+    start = time.perf_counter()
+    tool.on_update = lambda data: first_update or first_update.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = tool.execute({"command": command, "timeout": timeout})
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+    output = result.result
+    if isinstance(output, dict):
+        path = (output.get("details") or {}).get("full_output_path")
+        if path:
+            os.remove(path)
+        output = output["output"]
+    return elapsed, peak, first_update[0] if first_update else None, result.status, len(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--find-root", default="/usr")
+    parser.add_argument("--env-vars", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=200, help="short commands timed for the per-call overhead")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env_file = os.path.join(tmp, ".env")
+    with open(env_file, "w") as f:
+        f.writelines(f"BENCH_KEY_{i}=value-{i}\n" for i in range(args.env_vars))
+    patcher = mock.patch.object(bash_module, "expand_path", return_value=env_file)
+    patcher.start()
+    try:
+        tool = Bash({"cwd": tmp, "timeout": 60})
+        commands = [
+            ("seq 1M lines", "seq 1 1000000", 60),
+            ("chatty build", "for i in $(seq 1 6); do echo \"[$i/6] compiling module $i\"; sleep 0.5; done", 60),
+            ("find", f"find {args.find_root} 2>/dev/null", 120),
+            ("endless output", "yes 'a fairly long line of output, the kind a runaway loop prints'", 20),
+        ]
+        for label, command, timeout in commands:
+            elapsed, peak, first, status, out_len = _measure(tool, command, timeout)
+            first_str = f"{first * 1000:7.0f} ms" if first is not None else "      -   "
+            print(f"  {label:15s} {elapsed * 1000:9.1f} ms  peak {peak / 1e6:7.1f} MB  "
+                  f"first update {first_str}  {status:7s} result {out_len / 1024:.1f} KB")
+
+        tool.on_update = None
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            tool.execute({"command": "true"})
+        elapsed = time.perf_counter() - start
+        print(f"  {args.calls} x 'true'     {elapsed * 1000:9.1f} ms  ({elapsed * 1e6 / args.calls:.0f} us/call, "
+              f"{args.env_vars} .env variables)")
+    finally:
+        patcher.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
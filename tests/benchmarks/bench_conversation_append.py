@@ -0,0 +1,78 @@
+# encoding:utf-8
+"""
+Benchmark: append latency against session length.
+
+Pre-fills one session per --sizes entry with that many messages, then times
+--appends further single-turn appends (user text, tool_use, tool_result,
+final answer) to each. A constant-cost append path shows the same latency
+for the 1k- and the 100k-message session.
+
+Usage:
+    python tests/benchmarks/bench_conversation_append.py [--sizes 1000,10000,100000] [--appends 200]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.memory.conversation_store import ConversationStore  # noqa: E402
+
+
+def _turn(i):
+    tool_id = f"call_{i}"
+    return [
+        {"role": "user", "content": [{"type": "text", "text": f"question {i}"}]},
+        {"role": "assistant", "content": [
+            {"type": "tool_use", "id": tool_id, "name": "read", "input": {"path": f"notes/{i}.md"}}]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": tool_id, "content": "x" * 200}]},
+        {"role": "assistant", "content": [{"type": "text", "text": f"answer {i}"}]},
+    ]
+
+
+def _fill(store, session_id, size):
+    batch, i = [], 0
+    while i * 4 < size:
+        batch.extend(_turn(i))
+        i += 1
+        if len(batch) >= 4000:
+            store.append_messages(session_id, batch)
+            batch = []
+    store.append_messages(session_id, batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated session lengths")
+    parser.add_argument("--appends", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="cow_bench_append_")
+    try:
+        store = ConversationStore(Path(tmp) / "index.db")
+        for size in (int(s) for s in args.sizes.split(",")):
+            sid = f"session_{size}"
+            _fill(store, sid, size)
+            samples = []
+            for i in range(args.appends):
+                msgs = _turn(size + i)
+                t0 = time.perf_counter()
+                store.append_messages(sid, msgs)
+                samples.append(time.perf_counter() - t0)
+            samples.sort()
+            print(f"  {size:>7} messages: append p50 {samples[len(samples) // 2] * 1000:7.3f} ms  "
+                  f"p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000:7.3f} ms  "
+                  f"mean {statistics.mean(samples) * 1000:.3f} ms")
+        if hasattr(store, "close"):
+            store.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
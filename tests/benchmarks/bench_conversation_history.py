@@ -0,0 +1,82 @@
+# encoding:utf-8
+"""
+Benchmark: restore / UI-page latency on a long, tool-heavy session.
+
+Fills one session with --turns turns of --tools tool calls each (user text,
+assistant tool_use, tool_result, ..., final answer), then times
+load_messages(max_turns=3), the restore AgentInitializer performs, and
+load_history_page for the newest page and a deep page.
+
+Usage:
+    python tests/benchmarks/bench_conversation_history.py [--turns 2000] [--tools 4] [--repeat 20]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.memory.conversation_store import ConversationStore  # noqa: E402
+
+
+def _turn(i, tools):
+    msgs = [{"role": "user", "content": [{"type": "text", "text": f"question {i}"}]}]
+    for t in range(tools):
+        tool_id = f"call_{i}_{t}"
+        msgs.append({"role": "assistant", "content": [
+            {"type": "tool_use", "id": tool_id, "name": "bash", "input": {"command": f"ls {t}"}}]})
+        msgs.append({"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": tool_id, "content": "file.txt\n" * 40}]})
+    msgs.append({"role": "assistant", "content": [{"type": "text", "text": f"answer {i} " * 20}]})
+    return msgs
+
+
+def _time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--tools", type=int, default=4, help="tool calls per turn")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="cow_bench_history_")
+    try:
+        store = ConversationStore(Path(tmp) / "index.db")
+        batch = []
+        for i in range(args.turns):
+            batch.extend(_turn(i, args.tools))
+            if len(batch) >= 2000:
+                store.append_messages("long", batch)
+                batch = []
+        store.append_messages("long", batch)
+        total = store.get_stats()["total_messages"]
+        print(f"session: {args.turns} turns, {total} messages")
+
+        deep = max(1, args.turns // 20)
+        for label, fn in (
+            ("load_messages(max_turns=3)", lambda: store.load_messages("long", max_turns=3)),
+            ("load_history_page(page=1)", lambda: store.load_history_page("long", page=1, page_size=20)),
+            (f"load_history_page(page={deep})", lambda: store.load_history_page("long", page=deep, page_size=20)),
+        ):
+            print(f"  {label:<32} {_time(fn, args.repeat):8.2f} ms")
+        if hasattr(store, "close"):
+            store.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# encoding:utf-8
+"""
+Benchmark: ConversationStore throughput under concurrent sessions.
+
+--threads worker threads each own one session and run --turns agent turns:
+append the turn's messages (user, assistant tool_use, tool_result, final
+answer), then load the session back with load_messages(max_turns=...), the
+way AgentBridge persists a run and AgentInitializer restores history. The
+store lives in a temp directory. Reports turns/s and append / load latency
+percentiles.
+
+Usage:
+    python tests/benchmarks/bench_conversation_store.py [--threads 64] [--turns 50] [--max-turns 10]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.memory.conversation_store import ConversationStore  # noqa: E402
+
+
+def _turn(session_id, i):
+    tool_id = f"call_{session_id}_{i}"
+    return [
+        {"role": "user", "content": [{"type": "text", "text": f"question {i} from {session_id}"}]},
+        {"role": "assistant", "content": [
+            {"type": "text", "text": "Let me check."},
+            {"type": "tool_use", "id": tool_id, "name": "read", "input": {"path": f"notes/{i}.md"}},
+        ]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": tool_id, "content": "x" * 400}]},
+        {"role": "assistant", "content": [{"type": "text", "text": "answer " * 40}]},
+    ]
+
+
+def _pct(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--max-turns", type=int, default=10)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="cow_bench_store_")
+    try:
+        store = ConversationStore(Path(tmp) / "index.db")
+        append_lat, load_lat, errors = [], [], []
+        lock = threading.Lock()
+        start = threading.Barrier(args.threads + 1)
+
+        def worker(n):
+            sid = f"session_{n}"
+            local_append, local_load = [], []
+            start.wait()
+            try:
+                for i in range(args.turns):
+                    t0 = time.perf_counter()
+                    store.append_messages(sid, _turn(sid, i), channel_type="bench")
+                    t1 = time.perf_counter()
+                    msgs = store.load_messages(sid, max_turns=args.max_turns)
+                    local_load.append(time.perf_counter() - t1)
+                    local_append.append(t1 - t0)
+                    assert msgs[-1]["role"] == "assistant"
+            except Exception as e:
+                errors.append(e)
+            with lock:
+                append_lat.extend(local_append)
+                load_lat.extend(local_load)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+        for t in threads:
+            t.start()
+        start.wait()
+        t0 = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        turns = args.threads * args.turns
+        print(f"{args.threads} sessions x {args.turns} turns: {elapsed:.2f}s, {turns / elapsed:.0f} turns/s"
+              f"{f', {len(errors)} errors ({errors[0]})' if errors else ''}")
+        if append_lat:
+            print(f"  append p50 {_pct(append_lat, 0.5):7.2f} ms  p99 {_pct(append_lat, 0.99):7.2f} ms  "
+                  f"mean {statistics.mean(append_lat) * 1000:.2f} ms")
+            print(f"  load   p50 {_pct(load_lat, 0.5):7.2f} ms  p99 {_pct(load_lat, 0.99):7.2f} ms  "
+                  f"mean {statistics.mean(load_lat) * 1000:.2f} ms")
+        stats = store.get_stats()
+        if "group_commits" in stats:
+            print(f"  {stats['writes_committed']} writes in {stats['group_commits']} group commits")
+        if hasattr(store, "close"):
+            store.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
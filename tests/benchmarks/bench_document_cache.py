@@ -0,0 +1,84 @@
+# encoding:utf-8
+"""
+Benchmark: an agent paging through a long PDF with the read tool.
+
+Builds a --pages page PDF (--lines text lines per page) and calls
+Read.execute --steps times, each asking for the next --window lines (the
+way the agent follows "Use offset=N to continue"), against a fresh on-disk
+cache. Reports the first call, the mean of the following calls, and a
+second pass over the same windows (everything cached).
+
+Usage:
+    python tests/benchmarks/bench_document_cache.py [--pages 300] [--lines 40] [--steps 10] [--window 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.tools.read import Read  # noqa: E402
+
+try:
+    from common import document_cache  # noqa: E402
+except ImportError:
+    document_cache = None
+
+
+def _make_pdf(path, pages, lines):
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for i in range(pages):
+        page = writer.add_blank_page(612, 792)
+        body = " T* ".join(f"(Section {i + 1}.{j}: the quick brown fox jumps over the lazy dog) Tj"
+                           for j in range(lines))
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 10 Tf 12 TL 40 760 Td {body} ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--window", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "book.pdf")
+        _make_pdf(path, args.pages, args.lines)
+        if document_cache is not None:
+            document_cache._default_cache = document_cache.DocumentCache(root=os.path.join(tmp, "cache"))
+        tool = Read({"cwd": tmp})
+        for label in ("pass 1", "pass 2"):
+            timings = []
+            for step in range(args.steps):
+                t0 = time.perf_counter()
+                result = tool.execute({"path": "book.pdf", "offset": step * args.window + 1, "limit": args.window})
+                timings.append((time.perf_counter() - t0) * 1000)
+                assert result.status == "success", result.result
+            rest = sum(timings[1:]) / max(1, len(timings) - 1)
+            print(f"  {label}: first call {timings[0]:8.1f} ms, later calls {rest:8.1f} ms each, "
+                  f"total {sum(timings):8.1f} ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# encoding:utf-8
+"""
+Benchmark: ExpiredDict under the access patterns of its callers.
+
+dedupe    channel message-id dedupe: get(msg_id) then [msg_id] = True for
+          --ops unique ids (wecom / feishu / qq / weixin channels)
+session   SessionManager-style lookups: `in`, [] and get over --keys keys
+keys      one keys() / items() scan of a --keys entry cache
+retained  entries still held after --ops one-off writes have all expired
+          and one more write happens (expired entries nobody reads again)
+
+Usage:
+    python tests/benchmarks/bench_expired_dict.py [--ops 200000] [--keys 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from common.expired_dict import ExpiredDict  # noqa: E402
+
+
+def _stored(d):
+    data = getattr(d, "_data", None)
+    return len(data) if data is not None else dict.__len__(d)
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=10000)
+    args = parser.parse_args()
+
+    d = ExpiredDict(3600)
+
+    def dedupe():
+        for i in range(args.ops):
+            if d.get(i):
+                continue
+            d[i] = True
+
+    elapsed = _timed(dedupe)
+    print(f"  dedupe    {args.ops / elapsed / 1000:8.0f} k msgs/s")
+
+    d = ExpiredDict(3600)
+    for i in range(args.keys):
+        d[i] = i
+
+    def session():
+        for n in range(args.ops):
+            key = n % args.keys
+            if key in d:
+                d[key]
+            d.get(key)
+
+    elapsed = _timed(session)
+    print(f"  session   {args.ops / elapsed / 1000:8.0f} k lookups/s")
+
+    elapsed = _timed(lambda: (d.keys(), d.items()))
+    print(f"  keys      {elapsed * 1000:8.1f} ms for keys()+items() over {args.keys} entries")
+
+    d = ExpiredDict(0.05)
+    for i in range(args.ops):
+        d[i] = True
+    time.sleep(0.1)
+    d["one-more"] = True
+    print(f"  retained  {_stored(d):8d} entries held after {args.ops} writes expired")
+
+
+if __name__ == "__main__":
+    main()
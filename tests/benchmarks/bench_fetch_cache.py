@@ -0,0 +1,127 @@
+# encoding:utf-8
+"""
+Benchmark: an agent re-fetching the same web pages across turns.
+
+Serves --pages HTML pages (~--kb KB each, with ETags) from a local server
+that adds --latency ms per request, and calls WebFetch.execute for every
+page --rounds times. Between rounds the clock moves past the cache TTL
+every --stale-every rounds (so entries are revalidated) and --changed
+pages get new content. Reports time per round, requests that carried a
+body, and the cache hit rate, against a fresh on-disk cache.
+
+Usage:
+    python tests/benchmarks/bench_fetch_cache.py [--pages 20] [--rounds 5] [--kb 80] [--latency 150]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.tools.web_fetch.web_fetch import WebFetch  # noqa: E402
+
+try:
+    from agent.tools.web_fetch import fetch_cache  # noqa: E402
+except ImportError:
+    fetch_cache = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = {}  # path -> (etag, body)
+    latency = 0.0
+    full = 0
+    not_modified = 0
+
+    def do_GET(self):
+        time.sleep(_Handler.latency)
+        etag, body = _Handler.pages[self.path]
+        if self.headers.get("If-None-Match") == etag:
+            _Handler.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        _Handler.full += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _make_page(i, version, kb):
+    paragraphs = "".join(f"<p>Paragraph {j} of page {i} (v{version}): the quick brown fox jumps over "
+                         f"the lazy dog, again and again, for the benefit of the benchmark.</p>\n"
+                         for j in range(kb * 1024 // 130))
+    html = f"<html><head><title>Page {i}</title><script>var x = {i};</script></head><body>{paragraphs}</body></html>"
+    return f'"{i}-{version}"', html.encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--kb", type=int, default=80)
+    parser.add_argument("--latency", type=float, default=150, help="server latency per request, ms")
+    parser.add_argument("--stale-every", type=int, default=2, help="rounds after which the TTL has passed")
+    parser.add_argument("--changed", type=int, default=2, help="pages changed between rounds")
+    args = parser.parse_args()
+
+    _Handler.latency = args.latency / 1000
+    _Handler.pages = {f"/p{i}": _make_page(i, 0, args.kb) for i in range(args.pages)}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    tmp = tempfile.mkdtemp()
+    now = [1000.0]
+    patcher = None
+    if fetch_cache is not None:
+        cache = fetch_cache.FetchCache(db_path=os.path.join(tmp, "fetch.db"), default_ttl=600,
+                                       clock=lambda: now[0])
+        patcher = mock.patch.object(fetch_cache, "_default_cache", cache)
+        patcher.start()
+    try:
+        tool = WebFetch({"cwd": tmp})
+        total = 0.0
+        for r in range(args.rounds):
+            if r:
+                for i in range(args.changed):
+                    page = (r * args.changed + i) % args.pages
+                    _Handler.pages[f"/p{page}"] = _make_page(page, r, args.kb)
+                if r % args.stale_every == 0:
+                    now[0] += 601
+            full, not_modified = _Handler.full, _Handler.not_modified
+            t0 = time.perf_counter()
+            for i in range(args.pages):
+                result = tool.execute({"url": f"{base}/p{i}"})
+                assert result.status == "success", result.result
+            elapsed = time.perf_counter() - t0
+            total += elapsed
+            print(f"  round {r + 1}: {elapsed * 1000:8.1f} ms, "
+                  f"{_Handler.full - full:3d} full responses, {_Handler.not_modified - not_modified:3d} 304s")
+        line = f"  total: {total * 1000:8.1f} ms for {args.pages * args.rounds} fetches"
+        if fetch_cache is not None:
+            line += f", hit rate {cache.stats()['hit_rate']:.0%}"
+        print(line)
+    finally:
+        if patcher is not None:
+            patcher.stop()
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
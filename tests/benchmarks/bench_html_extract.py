@@ -0,0 +1,119 @@
+# encoding:utf-8
+"""
+Benchmark: web_fetch on a corpus of saved HTML pages.
+
+Serves every *.html file under --corpus (recursively, at most --limit files)
+from a local server and times WebFetch.execute on each with the fetch
+cache off, reporting total time, the slowest page, output size and (in a
+second pass under tracemalloc) the largest peak Python memory of a call. Without --corpus a few
+synthetic pages are generated (an article, a docs page with tables and
+code, a script-heavy app shell and a 5 MB log-style listing).
+
+Usage:
+    python tests/benchmarks/bench_html_extract.py [--corpus DIR] [--limit 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.tools.web_fetch.web_fetch import WebFetch  # noqa: E402
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # clients that stop reading early reset the connection
+
+
+def _synthetic_corpus(root):
+    para = "<p>The <b>quick</b> brown fox &amp; the <a href='/dog'>lazy dog</a> &mdash; again.</p>\n"
+    pages = {
+        "article.html": "<html><head><title>Article</title><style>" + "p{margin:0}" * 2000 + "</style></head>"
+                        "<body><nav><ul>" + "<li><a href='/x'>Nav</a></li>" * 200 + "</ul></nav>"
+                        "<h1>Headline</h1>" + para * 1500 + "</body></html>",
+        "docs.html": "<html><head><title>Docs</title></head><body>" + (
+            "<h2>Section</h2><table><tr><th>Key</th><th>Value</th></tr>" + "<tr><td>k</td><td>v</td></tr>" * 50 +
+            "</table><pre>fn main() {\n    println!(\"hi\");\n}</pre>" + para * 20) * 60 + "</body></html>",
+        "app.html": "<html><head><title>App</title>" + "<script>" + "var a = '<div>' + 1;\n" * 40000 +
+                    "</script></head><body><div id='root'>Loading&hellip;</div></body></html>",
+        "listing.html": "<html><head><title>Listing</title></head><body><div>" +
+                        "<div class='row'><span>2024-01-01 12:00:00</span> <span>INFO request ok</span></div>\n"
+                        * 60000 + "</div></body></html>",
+    }
+    for name, html in pages.items():
+        with open(os.path.join(root, name), "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved .html pages")
+    parser.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    root = args.corpus
+    if not root:
+        root = os.path.join(tmp, "corpus")
+        os.makedirs(root)
+        _synthetic_corpus(root)
+    files = []
+    for dirpath, _, names in os.walk(root):
+        files.extend(os.path.relpath(os.path.join(dirpath, n), root) for n in names if n.endswith(".html"))
+    files = sorted(files)[:args.limit]
+    corpus_bytes = sum(os.path.getsize(os.path.join(root, f)) for f in files)
+
+    server = _Server(("127.0.0.1", 0), partial(_Handler, directory=root))
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    patcher = mock.patch("agent.tools.web_fetch.fetch_cache._default_cache", False)
+    patcher.start()
+    try:
+        tool = WebFetch({"cwd": tmp})
+        total = 0.0
+        out_chars = 0
+        slowest = (0.0, "")
+        peak = (0.0, "")
+        for name in files:
+            t0 = time.perf_counter()
+            result = tool.execute({"url": base + name.replace(os.sep, "/")})
+            elapsed = time.perf_counter() - t0
+            assert result.status == "success", result.result
+            total += elapsed
+            out_chars += len(result.result)
+            slowest = max(slowest, (elapsed, name))
+        for name in files:
+            tracemalloc.start()
+            tool.execute({"url": base + name.replace(os.sep, "/")})
+            peak = max(peak, (tracemalloc.get_traced_memory()[1] / 1e6, name))
+            tracemalloc.stop()
+        print(f"  corpus: {len(files)} pages, {corpus_bytes / 1e6:.1f} MB")
+        print(f"  total {total * 1000:9.1f} ms, {total * 1000 / max(1, len(files)):7.1f} ms/page, "
+              f"output {out_chars / 1e6:.2f} M chars")
+        print(f"  slowest {slowest[0] * 1000:9.1f} ms  ({slowest[1]})")
+        print(f"  peak mem {peak[0]:8.1f} MB  ({peak[1]})")
+    finally:
+        patcher.stop()
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
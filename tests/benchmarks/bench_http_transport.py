@@ -0,0 +1,122 @@
+# encoding:utf-8
+"""
+Benchmark: per-call requests.post vs. the shared pooled transport.
+
+Starts a local keep-alive stub server (plain HTTP, or HTTPS with a throw-away
+self-signed certificate when --tls is given and the openssl CLI is available)
+and times simulated agent turns. Each turn makes --calls-per-turn sequential
+POSTs, standing in for LLM round-trips and tool requests. The stub answers
+immediately, so the difference is the connection setup that pooling saves.
+On real networks the saving per call is roughly one RTT (TCP) plus one or two
+RTTs (TLS).
+
+Usage:
+    python tests/benchmarks/bench_http_transport.py [--turns 200] [--calls-per-turn 6] [--tls]
+"""
+import argparse
+import os
+import shutil
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import requests  # noqa: E402
+
+from common import http_client  # noqa: E402
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # second write waits on the client's delayed ACK on reused connections
+    disable_nagle_algorithm = True
+    body = b'{"choices": [{"message": {"role": "assistant", "content": "ok"}}]}'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server(tls: bool, tmp: str):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    scheme = "http"
+    if tls:
+        cert, key = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+            check=True, capture_output=True,
+        )
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(cert, key)
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+def _run(post, url, turns, calls):
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+    per_call, per_turn = [], []
+    for _ in range(turns):
+        t_turn = time.perf_counter()
+        for _ in range(calls):
+            t0 = time.perf_counter()
+            resp = post(url, json=payload, timeout=10, verify=False)
+            resp.json()
+            per_call.append((time.perf_counter() - t0) * 1000)
+        per_turn.append((time.perf_counter() - t_turn) * 1000)
+    return per_call, per_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--calls-per-turn", type=int, default=6)
+    parser.add_argument("--tls", action="store_true", help="serve HTTPS with a self-signed cert")
+    args = parser.parse_args()
+
+    if args.tls and not shutil.which("openssl"):
+        sys.exit("--tls needs the openssl CLI")
+    warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, url = _start_server(args.tls, tmp)
+        try:
+            print(f"{url}  turns={args.turns} calls/turn={args.calls_per_turn}")
+            results = {}
+            for label, post in (("requests.post", requests.post), ("pooled", http_client.post)):
+                http_client.reset_session()
+                http_client.reset_http_stats()
+                _run(post, url, 5, 2)  # warm-up
+                per_call, per_turn = _run(post, url, args.turns, args.calls_per_turn)
+                results[label] = statistics.median(per_turn)
+                print(f"{label:<14} call p50 {statistics.median(per_call):7.3f} ms   "
+                      f"p95 {sorted(per_call)[int(len(per_call) * 0.95)]:7.3f} ms   "
+                      f"turn p50 {results[label]:8.3f} ms")
+            stats = http_client.get_http_stats()
+            print(f"pooled transport: {stats['requests']} requests over "
+                  f"{stats['connections_opened']} connection(s), reuse {stats['reuse_ratio']:.1%}")
+            print(f"saved per agent turn: {results['requests.post'] - results['pooled']:.3f} ms")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
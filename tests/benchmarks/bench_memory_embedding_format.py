@@ -0,0 +1,86 @@
+# encoding:utf-8
+"""
+Benchmark: JSON text vs. binary embeddings in the chunks table.
+
+Reports database size (after VACUUM), time to load all embeddings into the
+vector index (the cold-start cost of the first vector search) and time to
+decode every row via _row_to_chunk, for:
+  - json:    the legacy TEXT encoding
+  - float32: tagged little-endian float32 BLOBs
+  - int8:    tagged int8 BLOBs with a per-row scale
+
+Usage:
+    python tests/benchmarks/bench_memory_embedding_format.py [--chunks 20000] [--dim 1536]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.memory import vector_index  # noqa: E402
+from agent.memory.embedding_codec import FORMAT_FLOAT32, FORMAT_INT8, encode_embedding  # noqa: E402
+from agent.memory.storage import MemoryStorage  # noqa: E402
+
+
+def _fill(storage, fmt, embeddings):
+    rows = []
+    for i, emb in enumerate(embeddings):
+        value = json.dumps(emb) if fmt == "json" else encode_embedding(emb, fmt)
+        rows.append((f"c{i}", f"memory/f{i // 20}.md", "lorem ipsum dolor " * 30, value))
+    storage.conn.executemany("""
+        INSERT INTO chunks (id, scope, source, path, start_line, end_line, text, embedding, hash)
+        VALUES (?, 'shared', 'memory', ?, 1, 10, ?, ?, 'h')
+    """, rows)
+    storage.conn.commit()
+    storage.conn.execute("VACUUM")
+
+
+def bench(fmt, embeddings, query):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "index.db"
+        vector_index._indexes.clear()
+        storage = MemoryStorage(db_path)
+        _fill(storage, fmt, embeddings)
+        size_mb = os.path.getsize(db_path) / 1024 / 1024
+
+        t0 = time.perf_counter()
+        storage.vector_index.ensure_loaded(storage._load_index_rows)
+        load_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for row in storage.conn.execute("SELECT * FROM chunks"):
+            storage._row_to_chunk(row)
+        decode_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for _ in range(20):
+            storage.search_vector(query, limit=20)
+        search_ms = (time.perf_counter() - t0) / 20 * 1000
+        storage.close()
+    return size_mb, load_ms, decode_ms, search_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    embeddings = [[rng.gauss(0, 0.05) for _ in range(args.dim)] for _ in range(args.chunks)]
+    query = embeddings[0]
+    print(f"chunks={args.chunks} dim={args.dim}")
+    print(f"{'format':<8} {'db size':>10} {'index load':>12} {'row decode':>12} {'search':>10}")
+    for fmt in ("json", FORMAT_FLOAT32, FORMAT_INT8):
+        size_mb, load_ms, decode_ms, search_ms = bench(fmt, embeddings, query)
+        print(f"{fmt:<8} {size_mb:>8.1f}MB {load_ms:>10.0f}ms {decode_ms:>10.0f}ms {search_ms:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
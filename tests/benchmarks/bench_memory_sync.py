@@ -0,0 +1,155 @@
+# encoding:utf-8
+"""
+Benchmark: MemoryManager.sync on a workspace of many markdown files.
+
+Compares the legacy per-file sync (read + hash every file, delete all of a
+changed file's chunks and re-embed them) with the incremental sync
+(size/mtime skip, chunk-level diff, optional parallel preparation) for:
+  - cold:  empty index
+  - warm:  nothing changed
+  - edit:  one section edited in --edit-ratio of the files
+
+The embedding provider is a stub that sleeps --embed-latency-ms per request,
+so the cost of re-embedding unchanged chunks is visible without network access.
+
+Usage:
+    python tests/benchmarks/bench_memory_sync.py [--files 5000] [--sections 6] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.memory import embedding, vector_index  # noqa: E402
+from agent.memory.config import MemoryConfig  # noqa: E402
+from agent.memory.embedding import EmbeddingProvider  # noqa: E402
+from agent.memory.manager import MemoryManager  # noqa: E402
+from agent.memory.storage import MemoryChunk, MemoryStorage  # noqa: E402
+
+
+class _SleepyProvider(EmbeddingProvider):
+    provider_name = "bench"
+    model = "bench-1"
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+        self.texts = 0
+
+    def embed(self, text):
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):
+        time.sleep(self.latency_s)
+        self.texts += len(texts)
+        return [[float(len(t) % 7), 1.0, float(hash(t) % 13)] for t in texts]
+
+    @property
+    def dimensions(self):
+        return 3
+
+
+async def _legacy_sync(manager):
+    """The pre-incremental algorithm, kept here for comparison"""
+    for file_path, rel_path, source, scope, user_id in manager._collect_sync_targets():
+        content = file_path.read_text(encoding="utf-8")
+        file_hash = MemoryStorage.compute_hash(content)
+        if manager.storage.get_file_hash(rel_path) == file_hash:
+            continue
+        manager.storage.delete_by_path(rel_path)
+        chunks = manager.chunker.chunk_text(content)
+        if not chunks:
+            continue
+        texts = [c.text for c in chunks]
+        hashes = [MemoryStorage.compute_hash(t) for t in texts]
+        embeddings = manager._embed_texts(texts, hashes)
+        manager.storage.save_chunks_batch([
+            MemoryChunk(
+                id=manager._generate_chunk_id(rel_path, c.start_line, c.end_line),
+                user_id=user_id, scope=scope, source=source, path=rel_path,
+                start_line=c.start_line, end_line=c.end_line, text=c.text,
+                embedding=e, hash=h,
+            )
+            for c, e, h in zip(chunks, embeddings, hashes)
+        ])
+        stat = file_path.stat()
+        manager.storage.update_file_metadata(rel_path, source, file_hash, int(stat.st_mtime), stat.st_size)
+
+
+def _make_workspace(root, files, sections):
+    rng = random.Random(7)
+    words = ["memory", "agent", "note", "meeting", "plan", "task", "idea", "user", "report", "draft"]
+    for i in range(files):
+        sub = f"users/u{i % 20}" if i % 3 else "shared"
+        path = root / "memory" / sub / f"note{i}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        body = [f"## Section {s}\n" + " ".join(rng.choice(words) for _ in range(60)) for s in range(sections)]
+        path.write_text("\n\n".join(body), encoding="utf-8")
+
+
+def _edit(root, ratio):
+    paths = sorted((root / "memory").rglob("note*.md"))
+    for path in paths[::max(1, int(1 / ratio))]:
+        text = path.read_text(encoding="utf-8")
+        path.write_text(text.replace("## Section 1\n", "## Section 1\nedited ", 1), encoding="utf-8")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+def run(label, root, args, legacy, workers):
+    embedding._caches.clear()
+    vector_index._indexes.clear()
+    config = MemoryConfig(
+        workspace_root=str(root),
+        chunk_max_tokens=100,
+        chunk_overlap_tokens=0,
+        embedding_cache_max_entries=0,
+        sync_workers=workers,
+    )
+    provider = _SleepyProvider(args.embed_latency_ms / 1000)
+    manager = MemoryManager(config=config, embedding_provider=provider)
+    sync = (lambda: _legacy_sync(manager)) if legacy else manager.sync
+
+    results = []
+    for phase in ("cold", "warm", "edit"):
+        if phase == "edit":
+            _edit(root, args.edit_ratio)
+        provider.texts = 0
+        t0 = time.perf_counter()
+        asyncio.run(sync())
+        results.append((phase, (time.perf_counter() - t0) * 1000, provider.texts))
+    manager.close()
+
+    for phase, ms, texts in results:
+        print(f"{label:<22} {phase:<5} {ms:>10.1f} ms   embedded={texts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--edit-ratio", type=float, default=0.01)
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"files={args.files} sections={args.sections} edit_ratio={args.edit_ratio} "
+              f"embed_latency={args.embed_latency_ms}ms")
+        for label, legacy, workers in (
+            ("legacy", True, 1),
+            ("incremental", False, 1),
+            (f"incremental x{args.workers}", False, args.workers),
+        ):
+            root = Path(tmp) / label.replace(" ", "_")
+            _make_workspace(root, args.files, args.sections)
+            run(label, root, args, legacy, workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# encoding:utf-8
+"""
+Benchmark: MemoryStorage.search_vector vs. the previous full-table scan.
+
+For each size the chunks table is filled with random embeddings, then
+queries are timed against:
+  - legacy: SELECT * + json.loads + pure-Python cosine per row
+  - index (flat): the in-memory vector index, exact scan
+  - index (ivf): the in-memory vector index, IVF mode
+Sizes above --db-max skip SQLite and time the index alone.
+
+Usage:
+    python tests/benchmarks/bench_memory_vector_search.py [--sizes 10000,100000,1000000] [--dim 256]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.memory import vector_index  # noqa: E402
+from agent.memory.storage import MemoryChunk, MemoryStorage  # noqa: E402
+from agent.memory.vector_index import VectorIndex  # noqa: E402
+
+
+def _legacy_search(storage, query, limit=20):
+    rows = storage.conn.execute(
+        "SELECT * FROM chunks WHERE scope IN ('shared') AND embedding IS NOT NULL"
+    ).fetchall()
+    results = []
+    for row in rows:
+        similarity = MemoryStorage._cosine_similarity(query, json.loads(row["embedding"]))
+        if similarity > 0:
+            results.append((similarity, row))
+    results.sort(key=lambda x: x[0], reverse=True)
+    return results[:limit]
+
+
+def _random_vectors(rng, n, dim):
+    if vector_index.np is not None:
+        return vector_index.np.random.default_rng(rng.randint(0, 1 << 30)).standard_normal((n, dim), dtype="float32")
+    return [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(n)]
+
+
+def _time_queries(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def bench_db(size, dim, queries, legacy):
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        vector_index._indexes.clear()
+        storage = MemoryStorage(Path(tmp) / "index.db")
+        batch = 5000
+        for start in range(0, size, batch):
+            vectors = _random_vectors(rng, min(batch, size - start), dim)
+            storage.save_chunks_batch([
+                MemoryChunk(
+                    id=f"c{start + i}", user_id=None, scope="shared", source="memory",
+                    path=f"memory/f{(start + i) // 20}.md", start_line=1, end_line=10,
+                    text="lorem ipsum " * 20, embedding=[float(x) for x in vec], hash="h",
+                )
+                for i, vec in enumerate(vectors)
+            ])
+        row = {}
+        if legacy:
+            row["legacy"] = _time_queries(lambda q: _legacy_search(storage, q), queries[:3])
+        t0 = time.perf_counter()
+        storage.vector_index.ensure_loaded(storage._load_index_rows)
+        row["index load"] = (time.perf_counter() - t0) * 1000
+        storage.vector_index.mode = "flat"
+        row["index (flat)"] = _time_queries(lambda q: storage.search_vector(q, limit=20), queries)
+        if vector_index.np is not None:
+            storage.vector_index.mode = "ivf"
+            storage.search_vector(queries[0], limit=20)  # build clusters outside the timing
+            row["index (ivf)"] = _time_queries(lambda q: storage.search_vector(q, limit=20), queries)
+        storage.close()
+    return row
+
+
+def bench_index_only(size, dim, queries):
+    rng = random.Random(size)
+    row = {}
+    for mode in ("flat", "ivf") if vector_index.np is not None else ("flat",):
+        index = VectorIndex(mode=mode)
+        vectors = _random_vectors(rng, size, dim)
+        index.ensure_loaded(lambda: ((f"c{i}", "shared", None, "p", v) for i, v in enumerate(vectors)))
+        index.search(queries[0], ["shared"], limit=20)
+        row[f"index ({mode})"] = _time_queries(lambda q: index.search(q, ["shared"], limit=20), queries)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--db-max", type=int, default=100000, help="largest size stored in SQLite")
+    parser.add_argument("--legacy-max", type=int, default=100000, help="largest size timed on the legacy path")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    queries = [[rng.gauss(0, 1) for _ in range(args.dim)] for _ in range(args.queries)]
+    print(f"numpy: {'yes' if vector_index.np is not None else 'no'}, dim={args.dim}, ms per query")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        if size <= args.db_max:
+            row = bench_db(size, args.dim, queries, legacy=size <= args.legacy_max)
+        else:
+            row = bench_index_only(size, args.dim, queries)
+        print(f"{size:>9,}  " + "  ".join(f"{k}={v:.2f}" for k, v in row.items()))
+
+
+if __name__ == "__main__":
+    main()
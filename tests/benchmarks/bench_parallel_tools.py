@@ -0,0 +1,101 @@
+# encoding:utf-8
+"""
+Benchmark: wall time of one agent step that issues several independent tool
+calls.
+
+An in-process model answers the first request with --calls calls of a
+read-only tool that sleeps --latency ms (standing in for web_fetch /
+web_search round trips) and the second with a final text. --mix inserts a
+side-effecting call (a sleeping "write") every N calls, which splits the
+step into barriers. Reports the best of --repeat runs per tool_parallelism;
+parallelism 1 runs every call in order, as before parallel execution.
+
+Usage:
+    python tests/benchmarks/bench_parallel_tools.py [--calls 1,4,8] [--latency 200] [--mix 0] [--parallelism 1,4]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.protocol.agent_stream import AgentStreamExecutor  # noqa: E402
+from agent.protocol.models import LLMModel  # noqa: E402
+from agent.tools.base_tool import BaseTool, ToolResult  # noqa: E402
+from common.log import logger  # noqa: E402
+
+
+class _SleepTool(BaseTool):
+    description = "sleep"
+    params = {"type": "object", "properties": {"n": {"type": "integer"}}}
+
+    def __init__(self, name, latency, parallel_safe):
+        self.name = name
+        self.latency = latency
+        self.parallel_safe = parallel_safe
+
+    def execute(self, params):
+        time.sleep(self.latency)
+        return ToolResult.success(f"{self.name} {params.get('n')} ok")
+
+
+class _ScriptedModel(LLMModel):
+    def __init__(self, names):
+        super().__init__(model="bench-model")
+        self.names = names
+        self.calls = 0
+
+    def call_stream(self, request):
+        self.calls += 1
+        if self.calls == 1:
+            yield {"choices": [{"delta": {"tool_calls": [
+                {"index": i, "id": f"call_{i}", "function": {"name": name, "arguments": f'{{"n": {i}}}'}}
+                for i, name in enumerate(self.names)]}}]}
+        else:
+            yield {"choices": [{"delta": {"content": "done"}, "finish_reason": "stop"}]}
+
+
+class _Agent:
+    memory_manager = None
+    skill_manager = None
+    max_context_tokens = None
+
+    def _estimate_message_tokens(self, msg):
+        return 1
+
+    def _get_model_context_window(self):
+        return 10 ** 9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", default="1,4,8", help="comma-separated tool calls per step")
+    parser.add_argument("--latency", type=float, default=200, help="tool latency in ms")
+    parser.add_argument("--mix", type=int, default=0, help="make every Nth call side-effecting (0 = none)")
+    parser.add_argument("--parallelism", default="1,4", help="comma-separated tool_parallelism values")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+
+    latency = args.latency / 1000
+    tools = [_SleepTool("web_fetch", latency, True), _SleepTool("write", latency, False)]
+    for calls in (int(c) for c in args.calls.split(",")):
+        names = ["write" if args.mix and (i + 1) % args.mix == 0 else "web_fetch" for i in range(calls)]
+        for parallelism in (int(p) for p in args.parallelism.split(",")):
+            best = None
+            for _ in range(args.repeat):
+                executor = AgentStreamExecutor(
+                    agent=_Agent(), model=_ScriptedModel(names), system_prompt="system",
+                    tools=tools, max_turns=5, tool_parallelism=parallelism,
+                )
+                t0 = time.perf_counter()
+                executor.run_stream("go")
+                elapsed = time.perf_counter() - t0
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"  {calls:>3} calls x {args.latency:.0f} ms, parallelism {parallelism}: step {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
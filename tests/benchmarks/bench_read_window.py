@@ -0,0 +1,66 @@
+# encoding:utf-8
+"""
+Benchmark: read tool windows on a large log file.
+
+Writes a --lines line log (~40 bytes per line) and times Read.execute for a
+head read, a 100-line window at 90% of the file and a 20-line tail, each
+first call (index build) and repeat call (cached index), with the peak
+Python memory of the call. Also reports whether the window came back with
+the requested lines.
+
+Usage:
+    python tests/benchmarks/bench_read_window.py [--lines 1000000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.tools.read import Read  # noqa: E402
+
+
+def _line(i):
+    return f"2024-01-01 12:00:00 INFO request {i:08d} ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1000000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "big.log")
+        with open(path, "w") as f:
+            for i in range(1, args.lines + 1):
+                f.write(_line(i) + "\n")
+        print(f"  file: {args.lines} lines, {os.path.getsize(path) / 1e6:.1f} MB")
+        tool = Read({"cwd": tmp})
+        deep = int(args.lines * 0.9)
+        cases = [
+            ("head", {}, 1),
+            (f"offset={deep} limit=100", {"offset": deep, "limit": 100}, deep),
+            ("offset=-20", {"offset": -20}, args.lines - 18),
+        ]
+        for label, extra, first_line in cases:
+            for attempt in ("first", "repeat"):
+                tracemalloc.start()
+                t0 = time.perf_counter()
+                result = tool.execute(dict(path="big.log", **extra))
+                elapsed = (time.perf_counter() - t0) * 1000
+                peak = tracemalloc.get_traced_memory()[1] / 1e6
+                tracemalloc.stop()
+                ok = result.status == "success" and _line(first_line) in str(result.result)
+                print(f"  {label:<24} {attempt:<6} {elapsed:8.2f} ms  peak {peak:7.2f} MB  "
+                      f"{'correct' if ok else 'WRONG: ' + str(result.result)[:60]}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# encoding:utf-8
+"""
+Benchmark: Session.discard_exceeding on long chat histories.
+
+steady   a session kept full at --budget tokens of history: each round adds a
+         query and a reply, and trims after each (as SessionManager does);
+         reported per discard_exceeding call
+shrink   a history of N messages trimmed once to a tenth of its size (e.g.
+         after conversation_max_tokens was lowered)
+
+Sessions: DoubaoSession (character counts, like most providers) and
+ChatGPTSession with a tiktoken model when tiktoken's encoding can be loaded.
+
+Usage:
+    python tests/benchmarks/bench_session_trim.py [--messages 200,2000,10000] [--rounds 200]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from common.log import logger  # noqa: E402
+from models.chatgpt.chat_gpt_session import ChatGPTSession  # noqa: E402
+from models.doubao.doubao_session import DoubaoSession  # noqa: E402
+
+
+def _make_sessions():
+    sessions = [("doubao", lambda: DoubaoSession("bench", "system prompt"))]
+    try:
+        ChatGPTSession("probe", "s", model="gpt-4").calc_tokens()
+        sessions.append(("chatgpt gpt-4", lambda: ChatGPTSession("bench", "system prompt", model="gpt-4")))
+    except Exception:
+        print("  (tiktoken encoding unavailable, skipping ChatGPTSession gpt-4)")
+    return sessions
+
+
+def _fill(session, count):
+    for i in range(count // 2):
+        session.add_query(f"question {i}: " + "请解释一下这个问题 " * 5)
+        session.add_reply(f"answer {i}: " + "here is a fairly long answer " * 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", default="200,2000,10000", help="comma-separated history sizes")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+
+    for label, make in _make_sessions():
+        for count in (int(c) for c in args.messages.split(",")):
+            session = make()
+            _fill(session, count)
+            budget = session.calc_tokens()
+            session.discard_exceeding(budget)
+            t0 = time.perf_counter()
+            for i in range(args.rounds):
+                session.add_query(f"new question {i} " + "请解释 " * 5)
+                session.discard_exceeding(budget)
+                session.add_reply(f"new answer {i} " + "answer text " * 10)
+                session.discard_exceeding(budget)
+            steady = (time.perf_counter() - t0) / (2 * args.rounds)
+
+            session = make()
+            _fill(session, count)
+            target = session.calc_tokens() // 10
+            t0 = time.perf_counter()
+            session.discard_exceeding(target)
+            shrink = time.perf_counter() - t0
+            print(f"  {label:<14} {count:>6} messages: steady {steady * 1000:8.3f} ms/call, "
+                  f"shrink to 1/10 {shrink * 1000:9.1f} ms ({len(session.messages)} left)")
+
+
+if __name__ == "__main__":
+    main()
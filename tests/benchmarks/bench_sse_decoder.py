@@ -0,0 +1,110 @@
+# encoding:utf-8
+"""
+Benchmark: legacy SSE event splitting vs. common.sse.SSEDecoder.
+
+Builds a recorded-style OpenAI chat-completion stream of --tokens delta
+events (mixed ASCII / CJK content, CRLF framing like many proxies emit) and
+feeds it to both decoders in network-sized chunks. The legacy decoder is the
+former OpenAIHTTPClient._iter_sse_events: ``buf += raw`` plus three
+``find()`` scans from the buffer start per event.
+
+Usage:
+    python tests/benchmarks/bench_sse_decoder.py [--tokens 50000] [--chunk 64] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from common.sse import iter_sse  # noqa: E402
+
+
+def _legacy_iter(chunks):
+    buf = b""
+    for raw in chunks:
+        if not raw:
+            continue
+        buf += raw
+        while True:
+            idx_nn = buf.find(b"\n\n")
+            idx_rr = buf.find(b"\r\r")
+            idx_rnrn = buf.find(b"\r\n\r\n")
+            candidates = [i for i in (idx_nn, idx_rr, idx_rnrn) if i != -1]
+            if not candidates:
+                break
+            end_pos = min(candidates)
+            term_len = 4 if end_pos == idx_rnrn else 2
+            event_bytes = buf[:end_pos]
+            buf = buf[end_pos + term_len:]
+            event_text = event_bytes.decode("utf-8", errors="replace")
+            data_lines = []
+            for line in event_text.splitlines():
+                if not line or line.startswith(":"):
+                    continue
+                field, _, value = line.partition(":")
+                if value.startswith(" "):
+                    value = value[1:]
+                if field == "data":
+                    data_lines.append(value)
+            if data_lines:
+                yield "\n".join(data_lines)
+
+
+def _new_iter(chunks):
+    for event in iter_sse(chunks):
+        yield event.data
+
+
+def _record_stream(tokens):
+    rng = random.Random(3)
+    vocab = ["the", " agent", " tool", " 记忆", "，", " call", "你好", " result", "\n", " done"]
+    out = []
+    for i in range(tokens):
+        chunk = {
+            "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 1700000000,
+            "model": "gpt-bench",
+            "choices": [{"index": 0, "delta": {"content": rng.choice(vocab)}, "finish_reason": None}],
+        }
+        out.append(b"data: " + json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\r\n\r\n")
+        if i % 500 == 0:
+            out.append(b": keep-alive\r\n\r\n")
+    out.append(b"data: [DONE]\r\n\r\n")
+    return b"".join(out)
+
+
+def _chunks(stream, size):
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=50000)
+    parser.add_argument("--chunk", type=int, default=64, help="bytes per network chunk")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    stream = _record_stream(args.tokens)
+    print(f"stream: {args.tokens} events, {len(stream) / 1024 / 1024:.1f} MiB")
+    for size in sorted({args.chunk, 8, 4096, 1 << 20}):
+        chunks = _chunks(stream, size)
+        results = {}
+        for label, fn in (("legacy", _legacy_iter), ("decoder", _new_iter)):
+            best = None
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                events = list(fn(chunks))
+                elapsed = time.perf_counter() - t0
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = (best, events)
+        assert results["legacy"][1] == results["decoder"][1]
+        legacy, new = results["legacy"][0], results["decoder"][0]
+        print(f"chunk {size:>8} B   legacy {legacy * 1000:9.1f} ms   decoder {new * 1000:8.1f} ms   "
+              f"x{legacy / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# encoding:utf-8
+"""
+Benchmark: TokenBucket threads, rate accuracy and get_token overhead.
+
+- threads: extra threads alive after creating --buckets buckets
+- accuracy: tokens granted in --seconds to a caller looping on get_token,
+  against the configured rate, for each --rates value (tokens per minute);
+  the bucket is drained first so only the refill rate counts
+- overhead: cost of one get_token call on a bucket that never runs dry
+
+Usage:
+    python tests/benchmarks/bench_token_bucket.py [--buckets 100] [--rates 600,60000,600000] [--seconds 1]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from common.token_bucket import TokenBucket  # noqa: E402
+
+
+def _drain(bucket, deadline):
+    bucket.timeout = 0.001
+    while time.monotonic() < deadline and bucket.get_token():
+        pass
+    bucket.timeout = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buckets", type=int, default=100)
+    parser.add_argument("--rates", default="600,60000,600000", help="comma-separated tokens per minute")
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    before = threading.active_count()
+    buckets = [TokenBucket(20) for _ in range(args.buckets)]
+    print(f"  threads: {threading.active_count() - before} extra for {args.buckets} buckets")
+    for bucket in buckets:
+        bucket.close()
+
+    for tpm in (int(r) for r in args.rates.split(",")):
+        bucket = TokenBucket(tpm)
+        _drain(bucket, time.monotonic() + 2)
+        granted = 0
+        t0 = time.monotonic()
+        deadline = t0 + args.seconds
+        while time.monotonic() < deadline:
+            bucket.get_token()
+            granted += 1
+        elapsed = time.monotonic() - t0
+        bucket.close()
+        expected = tpm / 60 * elapsed
+        print(f"  accuracy: {tpm:>7} tpm -> {granted:>6} granted in {elapsed:.2f}s "
+              f"(expected {expected:8.0f}, {granted / expected * 100:5.1f}%)")
+
+    bucket = TokenBucket(10 ** 12)
+    time.sleep(0.05)
+    t0 = time.perf_counter()
+    for _ in range(args.calls):
+        bucket.get_token()
+    per_call = (time.perf_counter() - t0) / args.calls * 1e6
+    bucket.close()
+    print(f"  overhead: {per_call:.2f} us per get_token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# encoding:utf-8
+"""
+Benchmark: token counting accuracy and per-turn cost against the legacy
+per-character heuristic.
+
+Accuracy: the repository's own .py / .md files, cut into --chunk character
+pieces, are counted by the legacy heuristic and by the approximate counter
+(default and per-family calibrated rates) and compared with every reference
+tokenizer that loads here (Qwen's BPE via dashscope, tiktoken cl100k_base /
+o200k_base when their encodings are available).
+
+Speed: a session of --turns tool-heavy turns is re-counted in full before
+each turn, the way AgentStreamExecutor._trim_messages does, and the
+cumulative counting time is reported per counter.
+
+Usage:
+    python tests/benchmarks/bench_tokenizer.py [--turns 200] [--chunk 2000]
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, ROOT)
+
+from agent.protocol.tokenizer import (  # noqa: E402
+    TokenCounter, _approx_backend, _load_backend, approximate_tokens, get_token_counter,
+)
+
+
+def legacy_text_tokens(text):
+    """The pre-tokenizer heuristic: one Python-level check per character."""
+    if not text:
+        return 0
+    non_ascii = sum(1 for c in text if ord(c) > 127)
+    ascii_count = len(text) - non_ascii
+    return int(non_ascii * 1.5 + ascii_count * 0.25) + 1
+
+
+def legacy_message_tokens(message):
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return max(1, legacy_text_tokens(content))
+    total = 0
+    for part in content:
+        block_type = part.get("type", "")
+        if block_type == "text":
+            total += legacy_text_tokens(part.get("text", ""))
+        elif block_type == "tool_use":
+            total += 50 + legacy_text_tokens(json.dumps(part.get("input", {}), ensure_ascii=False))
+        elif block_type == "tool_result":
+            total += 30 + legacy_text_tokens(part.get("content", ""))
+        else:
+            total += 10
+    return max(1, total)
+
+
+def _corpus(chunk):
+    pieces = []
+    for pattern in ("**/*.py", "**/*.md"):
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern), recursive=True)):
+            if "/tmp/" in path:
+                continue
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+            pieces.extend(text[i:i + chunk] for i in range(0, len(text), chunk) if len(text) >= 200)
+    return pieces
+
+
+def _history(pieces, turns):
+    msgs = []
+    for i in range(turns):
+        body = pieces[i % len(pieces)]
+        tool_id = f"call_{i}"
+        msgs.append({"role": "user", "content": [{"type": "text", "text": f"第{i}个问题: {body[:80]}"}]})
+        msgs.append({"role": "assistant", "content": [
+            {"type": "tool_use", "id": tool_id, "name": "read", "input": {"path": f"docs/{i}.md", "limit": 200}}]})
+        msgs.append({"role": "user", "content": [{"type": "tool_result", "tool_use_id": tool_id, "content": body}]})
+        msgs.append({"role": "assistant", "content": [{"type": "text", "text": body[:600]}]})
+    return msgs
+
+
+def _error(estimate, pieces, reference):
+    errs, est_total, ref_total = [], 0, 0
+    for p in pieces:
+        ref = reference(p)
+        est = estimate(p)
+        errs.append(abs(est - ref) / max(ref, 1))
+        est_total += est
+        ref_total += ref
+    return statistics.mean(errs), (est_total - ref_total) / ref_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--chunk", type=int, default=2000)
+    args = parser.parse_args()
+
+    pieces = _corpus(args.chunk)
+    print(f"accuracy on {len(pieces)} chunks of {args.chunk} chars (mean |error|, total bias):")
+    for key in ("qwen", "tiktoken:cl100k_base", "tiktoken:o200k_base"):
+        ref = _load_backend(key)
+        if ref is None:
+            print(f"  vs {key:<22} unavailable")
+            continue
+        for label, fn in (("legacy heuristic", legacy_text_tokens), ("approx counter", approximate_tokens),
+                          ("approx calibrated", _approx_backend(key)._encode_len)):
+            mean_err, bias = _error(fn, pieces, ref._encode_len)
+            print(f"  vs {key:<22} {label:<17} {mean_err * 100:6.1f}%  {bias * 100:+6.1f}%")
+
+    history = _history(pieces, args.turns)
+    print(f"\nre-count before each of {args.turns} turns ({len(history)} messages at the end):")
+    counters = [("legacy heuristic", legacy_message_tokens),
+                ("approx counter", TokenCounter("approx", approximate_tokens).count_message)]
+    qwen = get_token_counter("qwen-max")
+    if qwen.exact:
+        counters.append(("qwen exact", qwen.count_message))
+    for label, count in counters:
+        t0 = time.perf_counter()
+        for turn in range(1, args.turns + 1):
+            sum(count(m) for m in history[:turn * 4])
+        elapsed = time.perf_counter() - t0
+        print(f"  {label:<17} total {elapsed * 1000:9.1f} ms   last turn "
+              f"{_time_once(count, history) * 1000:7.3f} ms")
+
+
+def _time_once(count, history):
+    t0 = time.perf_counter()
+    sum(count(m) for m in history)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# encoding:utf-8
+"""
+Benchmark: per-step cost of preparing the tool definitions of an LLM request.
+
+Every tool class the ToolManager loads is instantiated, and renamed copies
+are added until --tools tools are loaded. One step is what happens between
+the executor and the socket for each LLM call:
+
+  legacy    build the Claude-format schema list from the tools, convert it
+            with the bot's converter, serialize the request body with
+            json.dumps (what requests does for json=)
+  compiled  look up the agent's ToolCatalog, take the memoized conversion,
+            build the body with http_client's EncodedJSON splicing
+
+The request body also carries --messages short chat messages. Reported per
+provider format as the mean over --steps steps.
+
+Usage:
+    python tests/benchmarks/bench_tool_catalog.py [--tools 12,36,60] [--messages 20] [--steps 2000]
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from agent.protocol.agent_stream import AgentStreamExecutor  # noqa: E402
+from agent.tools import ToolManager  # noqa: E402
+from common import http_client  # noqa: E402
+from common.log import logger  # noqa: E402
+from models.gemini.google_gemini_bot import GoogleGeminiBot  # noqa: E402
+from models.openai_compatible_bot import OpenAICompatibleBot  # noqa: E402
+
+
+class _Agent:
+    memory_manager = None
+    skill_manager = None
+
+
+def _load_tools(count):
+    manager = ToolManager()
+    manager.load_tools()
+    base = [t for t in (manager.create_tool(name) for name in sorted(manager.tool_classes)) if t]
+    tools = list(base)
+    while len(tools) < count:
+        tool = copy.copy(base[len(tools) % len(base)])
+        tool.name = f"{tool.name}_{len(tools)}"
+        tools.append(tool)
+    return tools[:count]
+
+
+def _legacy_schema(tools):
+    return [{"name": t.name, "description": t.description, "input_schema": t.params} for t in tools.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", default="12,36,60", help="comma-separated tool counts")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=2000)
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+
+    messages = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " * 20}
+                for i in range(args.messages)]
+    openai_bot = OpenAICompatibleBot.__new__(OpenAICompatibleBot)
+    gemini_bot = GoogleGeminiBot.__new__(GoogleGeminiBot)
+    formats = [
+        ("openai", openai_bot._convert_tools_to_openai_format),
+        ("gemini", gemini_bot._convert_tools_to_gemini_rest_format),
+    ]
+
+    for count in (int(c) for c in args.tools.split(",")):
+        tools = _load_tools(count)
+        executor = AgentStreamExecutor(agent=_Agent(), model=None, system_prompt="", tools=tools)
+        body_size = None
+        for label, convert in formats:
+            legacy_convert = convert.__wrapped__.__get__(convert.__self__)
+
+            t0 = time.perf_counter()
+            for _ in range(args.steps):
+                payload = {"model": "m", "messages": messages, "tools": legacy_convert(_legacy_schema(executor.tools))}
+                json.dumps(payload, allow_nan=False).encode("utf-8")
+            legacy = (time.perf_counter() - t0) / args.steps
+
+            t0 = time.perf_counter()
+            for _ in range(args.steps):
+                payload = {"model": "m", "messages": messages, "tools": convert(executor._tool_catalog())}
+                body = http_client._encode_json_body(payload)
+            compiled = (time.perf_counter() - t0) / args.steps
+            body_size = len(body)
+
+            print(f"  {count:>3} tools, {label:<6} (body {body_size / 1024:5.1f} KB): "
+                  f"legacy {legacy * 1e6:8.1f} us/step, compiled {compiled * 1e6:7.1f} us/step")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# encoding:utf-8
+"""
+Unit tests for the bounded per-session agent cache:
+  - LRU eviction over max_size hibernates the least recently used session
+  - idle TTL eviction (fake clock), and pinned agents are never evicted
+  - releasing a pin marks the session recently used
+  - a hibernated session rebuilt later counts as a restore, drained or not
+  - drain_hibernated returns each hibernation once
+  - a concurrent duplicate put keeps the first agent and releases the other
+  - the dict surface existing callers use (in, [], del, items)
+  - a hibernated agent's memory is closed only after its in-flight flushes
+"""
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bridge.agent_cache import AgentCache
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeAgent:
+    def __init__(self, name):
+        self.name = name
+        self.messages = [{"role": "user", "content": name * 10}]
+        self.system_prompt = "prompt"
+
+
+class TestAgentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _FakeClock()
+        self.released = []
+        self.cache = AgentCache(
+            max_size=2, idle_ttl=60,
+            on_evict=lambda sid, agent: self.released.append(sid),
+            clock=self.clock,
+        )
+
+    def test_lru_eviction(self):
+        for sid in ("a", "b"):
+            self.cache.put(sid, _FakeAgent(sid))
+        self.cache.lookup("a")  # "b" becomes least recently used
+        self.cache.put("c", _FakeAgent("c"))
+        self.assertEqual(self.released, ["b"])
+        self.assertEqual(sorted(self.cache.keys()), ["a", "c"])
+        self.assertEqual([sid for sid, _ in self.cache.drain_hibernated()], ["b"])
+        self.assertEqual(self.cache.stats()["evicted_lru"], 1)
+
+    def test_idle_ttl_and_pinning(self):
+        self.cache.put("a", _FakeAgent("a"), pin=True)
+        self.cache.put("b", _FakeAgent("b"))
+        self.clock.now = 61
+        self.assertEqual(self.cache.evict_idle(), 1)
+        self.assertEqual(self.released, ["b"])
+        self.assertIn("a", self.cache)
+
+        # Over the cap while pinned: evicted only once the run releases it
+        self.cache.put("c", _FakeAgent("c"), pin=True)
+        self.cache.put("d", _FakeAgent("d"), pin=True)
+        self.assertEqual(len(self.cache), 3)
+        self.cache.unpin("a")
+        self.assertNotIn("a", self.cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_unpin_marks_recently_used(self):
+        self.cache.put("a", _FakeAgent("a"), pin=True)
+        self.clock.now = 30
+        self.cache.put("b", _FakeAgent("b"))
+        self.clock.now = 50
+        self.cache.unpin("a")  # "a" just finished a run, "b" is now the oldest
+        self.assertEqual(self.cache.keys(), ["b", "a"])
+        self.clock.now = 60
+        self.cache.put("c", _FakeAgent("c"))
+        self.assertEqual(self.released, ["b"])
+        self.clock.now = 111
+        self.assertEqual(self.cache.evict_idle(), 1)
+        self.assertEqual(self.released, ["b", "a"])
+
+    def test_restore_is_counted(self):
+        for sid in ("a", "b", "c"):
+            self.cache.put(sid, _FakeAgent(sid))
+        self.assertIsNone(self.cache.lookup("a"))
+        self.cache.put("a", _FakeAgent("a"))
+        stats = self.cache.stats()
+        self.assertEqual(stats["restores"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertGreater(stats["avg_bytes_per_agent"], 0)
+
+    def test_drain_keeps_restore_stats(self):
+        for sid in ("a", "b", "c"):
+            self.cache.put(sid, _FakeAgent(sid))
+        self.assertEqual([sid for sid, _ in self.cache.drain_hibernated()], ["a"])
+        self.assertEqual(self.cache.drain_hibernated(), [])
+        self.assertEqual(self.cache.stats()["hibernated"], 1)
+
+        self.cache.put("a", _FakeAgent("a"))  # evicts "b"
+        self.assertEqual(self.cache.stats()["restores"], 1)
+        self.assertEqual([sid for sid, _ in self.cache.drain_hibernated()], ["b"])
+        self.cache.put("d", _FakeAgent("d"))  # evicts "c"
+        self.cache.put("e", _FakeAgent("e"))  # evicts "a" again
+        self.assertEqual(sorted(sid for sid, _ in self.cache.drain_hibernated()), ["a", "c"])
+
+    def test_duplicate_put_keeps_first(self):
+        first, second = _FakeAgent("x"), _FakeAgent("x")
+        self.assertIs(self.cache.put("x", first), first)
+        self.assertIs(self.cache.put("x", second), first)
+        self.assertEqual(self.released, ["x"])
+        self.assertIs(self.cache.lookup("x"), first)
+
+    def test_dict_surface(self):
+        agent = _FakeAgent("a")
+        self.cache["a"] = agent
+        self.assertTrue("a" in self.cache)
+        self.assertIs(self.cache["a"], agent)
+        self.assertEqual(self.cache.items(), [("a", agent)])
+        del self.cache["a"]
+        self.assertNotIn("a", self.cache)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.drain_hibernated(), [])
+        self.assertEqual(self.released, [])
+
+
+class TestHibernateAgent(unittest.TestCase):
+
+    def test_close_waits_for_flush(self):
+        from agent.memory.summarizer import MemoryFlushManager
+        from bridge.agent_bridge import AgentBridge
+
+        gate = threading.Event()
+        with tempfile.TemporaryDirectory() as workspace:
+            flush_manager = MemoryFlushManager(workspace_dir=Path(workspace))
+            with mock.patch.object(flush_manager, "_flush_worker", side_effect=lambda *a: gate.wait(5)):
+                self.assertTrue(flush_manager.flush_from_messages([{"role": "user", "content": "hello"}]))
+                closed = threading.Event()
+                memory_manager = SimpleNamespace(flush_manager=flush_manager, close=closed.set)
+                bridge = AgentBridge.__new__(AgentBridge)
+                bridge.default_agent = None
+
+                bridge._hibernate_agent("s", SimpleNamespace(memory_manager=memory_manager))
+                self.assertFalse(closed.wait(0.1))
+                gate.set()
+                self.assertTrue(closed.wait(5))
+                self.assertEqual(flush_manager.pending_flushes(), [])
+
+    def test_close_right_away_when_idle(self):
+        from bridge.agent_bridge import AgentBridge
+
+        closed = []
+        memory_manager = SimpleNamespace(flush_manager=SimpleNamespace(pending_flushes=list),
+                                         close=lambda: closed.append(True))
+        bridge = AgentBridge.__new__(AgentBridge)
+        bridge.default_agent = None
+        bridge._hibernate_agent("s", SimpleNamespace(memory_manager=memory_manager))
+        self.assertEqual(closed, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+# encoding:utf-8
+"""
+Unit tests for the streaming bash tool:
+  - OutputBuffer keeps the first and last bytes, rendered on whole lines
+  - long output shows its first and last lines, the full copy goes to a file
+  - the command is killed with its children on timeout or past max_output_bytes
+  - progress reaches on_update while the command runs
+  - output written after the read grace period does not reach the result
+  - the .env file is parsed again only when it changes
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.tools.bash import bash as bash_module
+from agent.tools.bash.bash import Bash
+from agent.tools.bash.runner import OutputBuffer, run_command
+
+_POSIX = sys.platform != "win32"
+
+
+class TestOutputBuffer(unittest.TestCase):
+
+    def test_small_output_kept_whole(self):
+        buf = OutputBuffer(head_bytes=16, tail_bytes=32)
+        for piece in (b"one\n", b"two\nthr", b"ee\n"):
+            buf.write(piece)
+        self.assertTrue(buf.complete)
+        self.assertEqual(buf.render(), ("one\ntwo\nthree\n", ""))
+
+    def test_head_and_tail_on_whole_lines(self):
+        buf = OutputBuffer(head_bytes=20, tail_bytes=30)
+        data = b"".join(b"line %03d\n" % i for i in range(100))
+        for i in range(0, len(data), 7):
+            buf.write(data[i:i + 7])
+        self.assertFalse(buf.complete)
+        self.assertEqual((buf.total, buf.lines), (len(data), 101))
+        self.assertEqual(buf.tail, data[-30:])
+        text, notice = buf.render()
+        head, tail = text.split("\n\n... [")
+        self.assertEqual(head, "line 000\nline 001")
+        self.assertTrue(tail.endswith("] ...\n\nline 097\nline 098\nline 099\n"))
+        self.assertEqual(notice, "Showing lines 1-2 and 98-101 of 101 (900B total)")
+
+    def test_line_limit_when_complete(self):
+        buf = OutputBuffer()
+        buf.write(b"\n".join(b"%d" % i for i in range(5000)))
+        text, notice = buf.render(max_lines=10)
+        self.assertEqual(text.split("\n"), [str(i) for i in range(4990, 5000)])
+        self.assertEqual(notice, "Showing lines 4991-5000 of 5000")
+
+
+@unittest.skipUnless(_POSIX, "uses sh syntax")
+class TestBashTool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.tool = Bash({"cwd": self.tmp})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _run(self, command, timeout=30):
+        result = self.tool.execute({"command": command, "timeout": timeout})
+        output = result.result if isinstance(result.result, str) else result.result["output"]
+        return result, output
+
+    def test_stdout_and_stderr(self):
+        result, output = self._run("echo out; echo err >&2")
+        self.assertEqual((result.status, output), ("success", "out\n"))
+        result, output = self._run("echo out; echo err >&2; exit 3")
+        self.assertEqual(result.status, "error")
+        self.assertEqual(output, "out\n\nerr\n\n\nCommand exited with code 3")
+
+    def test_long_output_saved_to_file(self):
+        result, output = self._run("seq 1 100000")
+        self.assertEqual(result.status, "success")
+        self.assertTrue(output.startswith("1\n2\n3\n"))
+        self.assertIn("\n99999\n100000\n\n\n[Showing lines 1-200 and ", output)
+        self.assertLessEqual(len(output.encode("utf-8")), 51 * 1024)
+        path = result.result["details"]["full_output_path"]
+        self.addCleanup(os.remove, path)
+        with open(path) as f:
+            self.assertEqual(f.read(), "".join(f"{i}\n" for i in range(1, 100001)))
+
+    def test_output_cap_kills_command(self):
+        self.tool.max_output_bytes = 1024 * 1024
+        start = time.monotonic()
+        result, output = self._run("yes")
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(result.status, "error")
+        self.assertIn("Command killed after writing 1.0MB of output", output)
+        os.remove(result.result["details"]["full_output_path"])
+
+    def test_timeout_kills_process_tree(self):
+        marker = os.path.join(self.tmp, "late")
+        start = time.monotonic()
+        result, output = self._run(f"echo started; (sleep 2; touch {marker}) & sleep 5", timeout=1)
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertEqual(output, "Error: Command timed out after 1 seconds. Output so far:\nstarted\n")
+        time.sleep(1.5)
+        self.assertFalse(os.path.exists(marker))  # the background child was killed too
+
+    def test_progress_updates(self):
+        updates = []
+        self.tool.on_update = updates.append
+        result, _ = self._run("for i in 1 2 3; do echo step $i; sleep 0.6; done")
+        self.assertEqual(result.status, "success")
+        self.assertTrue(updates)
+        self.assertTrue(updates[0]["output"].startswith("step 1\n"))
+        self.assertGreaterEqual(updates[0]["elapsed"], 1.0)
+
+    def test_result_frozen_after_grace(self):
+        # The background job keeps the pipes open and writes after the grace period
+        result = run_command("echo started; (sleep 1; echo late) &", cwd=self.tmp, env=None, timeout=10)
+        self.assertEqual(result.stdout.text(), "started\n")
+        time.sleep(1.5)
+        self.assertEqual((result.stdout.text(), result.stdout.total), ("started\n", 8))
+
+    def test_env_file_cached_by_mtime(self):
+        env_file = os.path.join(self.tmp, ".env")
+        with open(env_file, "w") as f:
+            f.write("COW_TEST_KEY=one\n")
+        with mock.patch.object(bash_module, "expand_path", return_value=env_file), \
+                mock.patch("dotenv.dotenv_values", wraps=__import__("dotenv").dotenv_values) as parse:
+            self.assertEqual(self._run("echo $COW_TEST_KEY")[1], "one\n")
+            self.assertEqual(self._run("echo $COW_TEST_KEY")[1], "one\n")
+            self.assertEqual(parse.call_count, 1)
+            with open(env_file, "w") as f:
+                f.write("COW_TEST_KEY=two-changed\n")
+            self.assertEqual(self._run("echo $COW_TEST_KEY")[1], "two-changed\n")
+            self.assertEqual(parse.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# encoding:utf-8
+"""
+Unit tests for the workspace-wide pieces shared between new agent sessions:
+  - parsed skills are reused across SkillManager instances and re-parsed on edit
+  - skills_config.json is not rewritten when nothing changed
+  - context files are served from cache until the file changes or is removed
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.prompt.workspace import read_cached_text
+from agent.skills import frontmatter as skill_frontmatter
+from agent.skills.manager import SkillManager
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+class TestBootstrapCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.custom = os.path.join(self.tmp, "skills")
+        self.builtin = os.path.join(self.tmp, "builtin")
+        os.makedirs(self.builtin)
+        self.skill_md = os.path.join(self.custom, "demo", "SKILL.md")
+        _write(self.skill_md, "---\nname: demo\ndescription: first\n---\nbody\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_skills_parsed_once_and_invalidated(self):
+        with mock.patch("agent.skills.loader.parse_frontmatter",
+                        wraps=skill_frontmatter.parse_frontmatter) as parse:
+            first = SkillManager(builtin_dir=self.builtin, custom_dir=self.custom)
+            second = SkillManager(builtin_dir=self.builtin, custom_dir=self.custom)
+            self.assertEqual(parse.call_count, 1)
+            self.assertIs(first.skills["demo"].skill, second.skills["demo"].skill)
+
+            _write(self.skill_md, "---\nname: demo\ndescription: second version\n---\nbody\n")
+            _bump_mtime(self.skill_md)
+            second.refresh_skills()
+            self.assertEqual(parse.call_count, 2)
+            self.assertEqual(second.skills["demo"].skill.description, "second version")
+
+    def test_skills_config_written_only_on_change(self):
+        manager = SkillManager(builtin_dir=self.builtin, custom_dir=self.custom)
+        config_path = os.path.join(self.custom, "skills_config.json")
+        mtime = os.stat(config_path).st_mtime_ns
+        time.sleep(0.01)
+        manager.refresh_skills()
+        self.assertEqual(os.stat(config_path).st_mtime_ns, mtime)
+
+        manager.set_skill_enabled("demo", False)
+        manager.refresh_skills()
+        self.assertFalse(manager.is_skill_enabled("demo"))
+
+    def test_read_cached_text(self):
+        path = os.path.join(self.tmp, "AGENT.md")
+        _write(path, "  hello  \n")
+        self.assertEqual(read_cached_text(path), "hello")
+        with mock.patch("builtins.open", side_effect=AssertionError("re-read")):
+            self.assertEqual(read_cached_text(path), "hello")
+
+        _write(path, "changed")
+        _bump_mtime(path)
+        self.assertEqual(read_cached_text(path), "changed")
+        os.remove(path)
+        self.assertIsNone(read_cached_text(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+# encoding:utf-8
+"""
+Unit tests for the event-driven session dispatcher in ChatChannel:
+  - per-session ordering with concurrency_in_session = 1
+  - '#' admin commands jump the queue via Dequeue.putleft
+  - idle sessions are removed once their work finishes
+  - cancel_session drops queued messages
+  - a bot type switched at runtime routes new messages to its own pool
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bridge.context import Context, ContextType
+from channel.chat_channel import ChatChannel
+from common import handler_pool
+
+
+class _RecordingChannel(ChatChannel):
+    channel_type = "test"
+
+    def __init__(self):
+        self.handled = []
+        self.gate = threading.Event()
+        self.gate.set()
+        super().__init__()
+
+    def _handle(self, context):
+        self.gate.wait(5)
+        self.handled.append(context.content)
+
+
+def _ctx(content, session_id="s1"):
+    context = Context(ContextType.TEXT, content)
+    context["session_id"] = session_id
+    return context
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestChatChannelDispatch(unittest.TestCase):
+
+    def test_messages_in_one_session_keep_order(self):
+        channel = _RecordingChannel()
+        for i in range(20):
+            channel.produce(_ctx(str(i)))
+        self.assertTrue(_wait_for(lambda: len(channel.handled) == 20))
+        self.assertEqual(channel.handled, [str(i) for i in range(20)])
+
+    def test_admin_command_is_prioritized(self):
+        channel = _RecordingChannel()
+        channel.gate.clear()
+        channel.produce(_ctx("first"))
+        self.assertTrue(_wait_for(lambda: channel.sessions["s1"][0].empty()))
+        channel.produce(_ctx("second"))
+        channel.produce(_ctx("#help"))
+        channel.gate.set()
+        self.assertTrue(_wait_for(lambda: len(channel.handled) == 3))
+        self.assertEqual(channel.handled, ["first", "#help", "second"])
+
+    def test_idle_session_is_cleaned_up(self):
+        channel = _RecordingChannel()
+        channel.produce(_ctx("hello", session_id="s2"))
+        self.assertTrue(_wait_for(lambda: "s2" not in channel.sessions))
+        self.assertNotIn("s2", channel.futures)
+        self.assertEqual(channel.handled, ["hello"])
+
+    def test_cancel_session_drops_queued_messages(self):
+        channel = _RecordingChannel()
+        channel.gate.clear()
+        channel.produce(_ctx("running"))
+        self.assertTrue(_wait_for(lambda: channel.sessions["s1"][0].empty()))
+        channel.produce(_ctx("queued-1"))
+        channel.produce(_ctx("queued-2"))
+        channel.cancel_session("s1")
+        channel.gate.set()
+        self.assertTrue(_wait_for(lambda: "s1" not in channel.sessions))
+        self.assertEqual(channel.handled, ["running"])
+
+    def test_bot_type_switch_uses_new_pool(self):
+        bridge = mock.Mock()
+        bridge.get_bot_type.return_value = "bot-a"
+        with mock.patch.object(handler_pool, "_pools", {}), \
+                mock.patch("channel.chat_channel.Bridge", return_value=bridge):
+            channel = _RecordingChannel()
+            channel.gate.clear()
+            channel.produce(_ctx("running"))
+            self.assertTrue(_wait_for(lambda: channel.sessions["s1"][0].empty()))
+            channel.produce(_ctx("queued"))
+            pool_a = channel.handler_pool
+            bridge.get_bot_type.return_value = "bot-b"
+            pool_b = channel.handler_pool
+            self.assertIsNot(pool_a, pool_b)
+            channel.produce(_ctx("switched"))
+            self.assertEqual((pool_a.stats()["queued"], pool_b.stats()["queued"]), (1, 1))
+            channel.cancel_session("s1")
+            self.assertEqual((pool_a.stats()["queued"], pool_b.stats()["queued"]), (0, 0))
+            channel.gate.set()
+            self.assertTrue(_wait_for(lambda: "s1" not in channel.sessions))
+            channel.produce(_ctx("after"))
+            self.assertTrue(_wait_for(lambda: channel.handled == ["running", "after"]))
+            self.assertEqual((pool_a.stats()["submitted"], pool_b.stats()["submitted"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+# encoding:utf-8
+"""
+Unit tests for the pooled ConversationStore:
+  - concurrent appends from many threads keep per-session seqs contiguous
+  - append_messages_async resolves after commit; close() drains the queue
+  - a failing write in a group commit does not roll back its neighbours
+  - title / context boundary behave as before
+  - rows before the first turn are kept unless older turns are cut off
+  - turn-index tail loading and history pages match a full-history scan,
+    including databases migrated from before the turn index existed, with
+    and without thinking steps
+  - a failed turn index migration raises instead of leaving a broken store
+  - the next_seq / msg_count counters track MAX(seq) / COUNT(*) through
+    appends, prunes and the migration that introduces them
+"""
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.memory.conversation_store import (
+    ConversationStore, _group_into_display_turns, _is_visible_user_message,
+)
+
+
+def _random_turn(rng, i):
+    tool_id = f"t{i}"
+    msgs = [{"role": "user", "content": rng.choice([
+        f"plain {i}", [{"type": "text", "text": f"block {i}"}], [{"type": "text", "text": ""}],
+    ])}]
+    for _ in range(rng.randint(0, 2)):
+        msgs.append({"role": "assistant", "content": [
+            {"type": "tool_use", "id": tool_id, "name": "read", "input": {}}]})
+        msgs.append({"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": tool_id, "content": "ok"}]})
+    msgs.append({"role": "assistant", "content": rng.choice([
+        [{"type": "text", "text": f"answer {i}"}],
+        [{"type": "thinking", "thinking": "hmm"}],
+        [{"type": "text", "text": "  "}],
+        f"str answer {i}",
+    ])})
+    return msgs
+
+
+def _reference_page(rows, page, page_size, include_thinking=False):
+    """Full-scan pagination (the pre-index behaviour)."""
+    visible = _group_into_display_turns([(r, c, t) for _s, r, c, t in rows], include_thinking)
+    offset = (page - 1) * page_size
+    items = list(reversed(list(reversed(visible))[offset: offset + page_size]))
+    return [(t["role"], t["content"]) for t in items], len(visible)
+
+
+def _reference_tail(rows, max_turns):
+    visible = [s for s, r, c, _t in rows if r == "user" and _is_visible_user_message(json.loads(c))]
+    cutoff = visible[-max_turns] if len(visible) > max_turns else 0
+    return [{"role": r, "content": json.loads(c)} for s, r, c, _t in rows if s >= cutoff]
+
+
+def _turn(text):
+    return [
+        {"role": "user", "content": [{"type": "text", "text": text}]},
+        {"role": "assistant", "content": [{"type": "text", "text": f"re: {text}"}]},
+    ]
+
+
+class TestConversationStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = Path(self.tmp) / "index.db"
+        self.store = ConversationStore(self.db_path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_concurrent_appends(self):
+        def worker(n):
+            for i in range(20):
+                self.store.append_messages(f"s{n % 4}", _turn(f"{n}-{i}"))
+                self.store.load_messages(f"s{n % 4}", max_turns=3)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        conn = self.store._reader()
+        for sid in ("s0", "s1", "s2", "s3"):
+            seqs = [r[0] for r in conn.execute(
+                "SELECT seq FROM messages WHERE session_id = ? ORDER BY seq", (sid,))]
+            self.assertEqual(seqs, list(range(160)))
+        sessions = self.store.list_sessions()["sessions"]
+        self.assertEqual(sorted(s["msg_count"] for s in sessions), [160] * 4)
+        self.assertLess(self.store.get_stats()["group_commits"], 320)
+
+    def test_async_append_and_close(self):
+        futures = [self.store.append_messages_async("a", _turn(str(i))) for i in range(50)]
+        futures[0].result(timeout=10)
+        self.assertGreaterEqual(len(self.store.load_messages("a", max_turns=100)), 2)
+
+        more = [self.store.append_messages_async("a", _turn(f"late {i}")) for i in range(10)]
+        self.store.close()
+        self.assertTrue(all(f.done() and f.exception() is None for f in futures + more))
+        reopened = ConversationStore(self.db_path)
+        try:
+            self.assertEqual(len(reopened.load_messages("a", max_turns=100)), 120)
+        finally:
+            reopened.close()
+
+    def test_failed_write_is_isolated(self):
+        def broken(conn):
+            conn.execute("INSERT INTO sessions (session_id, created_at, last_active) VALUES ('x', 0, 0)")
+            raise ValueError("boom")
+
+        bad = self.store._submit(broken)
+        good = self.store.append_messages_async("ok", _turn("hi"))
+        self.assertIsNone(good.result(timeout=10))
+        with self.assertRaises(ValueError):
+            bad.result(timeout=10)
+        self.assertEqual(len(self.store.load_messages("ok")), 2)
+        ids = [s["session_id"] for s in self.store.list_sessions()["sessions"]]
+        self.assertEqual(ids, ["ok"])
+
+    def test_title_and_context_boundary(self):
+        self.store.append_messages("t", _turn("first question\nsecond line"))
+        self.store.append_messages("t", _turn("another"))
+        self.assertEqual(self.store.list_sessions()["sessions"][0]["title"], "first question")
+        self.assertEqual(self.store.clear_context("t"), 4)
+        self.assertEqual(self.store.get_context_start_seq("t"), 4)
+        self.assertEqual(self.store.load_messages("t"), [])
+        self.store.clear_session("t")
+        self.assertEqual(self.store.get_stats()["total_sessions"], 0)
+
+    def test_leading_rows_before_first_turn(self):
+        leading = [
+            {"role": "assistant", "content": [{"type": "tool_use", "id": "t0", "name": "read", "input": {}}]},
+            {"role": "user", "content": [{"type": "tool_result", "tool_use_id": "t0", "content": "ok"}]},
+        ]
+        self.store.append_messages("l", _turn("old"))
+        self.store.clear_context("l")
+        self.store.append_messages("l", leading)
+        for i in range(3):
+            self.store.append_messages("l", _turn(f"q{i}"))
+        since_boundary = leading + _turn("q0") + _turn("q1") + _turn("q2")
+        for max_turns in (3, 4, 30):
+            self.assertEqual(self.store.load_messages("l", max_turns=max_turns), since_boundary, max_turns)
+        self.assertEqual(self.store.load_messages("l", max_turns=2), _turn("q1") + _turn("q2"))
+
+    def _assert_matches_full_scan(self, store, sid):
+        rows = store._reader().execute(
+            "SELECT seq, role, content, created_at FROM messages WHERE session_id = ? ORDER BY seq",
+            (sid,)).fetchall()
+        for max_turns in (1, 3, 10, 1000):
+            expected = _reference_tail(rows, max_turns)
+            for m in expected:
+                if m["role"] == "assistant" and isinstance(m["content"], list):
+                    m["content"] = [b for b in m["content"] if b.get("type") != "thinking"]
+            self.assertEqual(store.load_messages(sid, max_turns=max_turns), expected)
+        for thinking in (False, True):
+            with mock.patch("config.conf", return_value={"enable_thinking": thinking}):
+                for page_size in (1, 3, 7):
+                    for page in range(1, 12):
+                        expected, total = _reference_page(rows, page, page_size, thinking)
+                        result = store.load_history_page(sid, page=page, page_size=page_size)
+                        self.assertEqual([(t["role"], t["content"]) for t in result["messages"]], expected,
+                                         (page, page_size, thinking))
+                        self.assertEqual(result["total"], total)
+                        self.assertEqual(result["has_more"], page * page_size < total)
+
+    def test_turn_index_matches_full_scan(self):
+        rng = random.Random(5)
+        for i in range(25):
+            msgs = _random_turn(rng, i)
+            # Split some turns across appends, as a run persisting in stages would
+            cut = rng.randint(1, len(msgs))
+            self.store.append_messages("r", msgs[:cut])
+            self.store.append_messages("r", msgs[cut:])
+        self._assert_matches_full_scan(self.store, "r")
+
+        self.store.prune_scheduled_messages("r", keep_last_n=0, markers=["plain 1"])
+        self._assert_matches_full_scan(self.store, "r")
+
+    def _assert_counters(self, store, sid):
+        conn = store._reader()
+        next_seq, msg_count = conn.execute(
+            "SELECT next_seq, msg_count FROM sessions WHERE session_id = ?", (sid,)).fetchone()
+        max_seq, count = conn.execute(
+            "SELECT MAX(seq), COUNT(*) FROM messages WHERE session_id = ?", (sid,)).fetchone()
+        self.assertEqual(msg_count, count)
+        self.assertGreater(next_seq, max_seq)
+
+    def test_counters_follow_appends_and_prune(self):
+        for i in range(10):
+            self.store.append_messages("c", _turn(f"plain {i}"))
+        self._assert_counters(self.store, "c")
+        self.assertEqual(self.store.prune_scheduled_messages("c", keep_last_n=0, markers=["plain 3"]), 2)
+        self._assert_counters(self.store, "c")
+        self.store.append_messages("c", _turn("after prune"))
+        self._assert_counters(self.store, "c")
+        self.assertEqual(self.store.load_messages("c", max_turns=1)[0]["content"][0]["text"], "after prune")
+        self.assertEqual(self.store.clear_context("c"), 22)
+
+    def test_migration_backfills_turn_index(self):
+        legacy_path = Path(self.tmp) / "legacy.db"
+        conn = sqlite3.connect(str(legacy_path))
+        conn.executescript("""
+            CREATE TABLE sessions (session_id TEXT PRIMARY KEY, channel_type TEXT NOT NULL DEFAULT '',
+                created_at INTEGER NOT NULL, last_active INTEGER NOT NULL, msg_count INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, created_at INTEGER NOT NULL,
+                UNIQUE (session_id, seq));
+        """)
+        rng = random.Random(9)
+        seq = 0
+        for i in range(15):
+            for m in _random_turn(rng, i):
+                conn.execute("INSERT INTO messages (session_id, seq, role, content, created_at) VALUES (?,?,?,?,?)",
+                             ("old", seq, m["role"], json.dumps(m["content"]), i))
+                seq += 1
+        conn.execute("INSERT INTO sessions (session_id, created_at, last_active) VALUES ('old', 0, 0)")
+        conn.commit()
+        conn.close()
+
+        store = ConversationStore(legacy_path)
+        try:
+            self._assert_matches_full_scan(store, "old")
+            self._assert_counters(store, "old")
+            store.append_messages("old", _turn("new"))
+            self._assert_counters(store, "old")
+            self.assertEqual(store.load_messages("old", max_turns=1)[0]["content"][0]["text"], "new")
+        finally:
+            store.close()
+
+    def test_migration_adds_item_counts(self):
+        rng = random.Random(3)
+        for i in range(12):
+            self.store.append_messages("m", _random_turn(rng, i))
+        self.store.close()
+        # A database from before the item-count columns existed
+        conn = sqlite3.connect(str(self.db_path))
+        conn.executescript("""
+            DROP INDEX idx_messages_turn_items;
+            DROP INDEX idx_messages_turn_items_thinking;
+            ALTER TABLE messages DROP COLUMN items_before;
+            ALTER TABLE messages DROP COLUMN items_before_thinking;
+        """)
+        conn.close()
+
+        with mock.patch.object(ConversationStore, "_backfill_turn_items", side_effect=sqlite3.OperationalError("disk")):
+            with self.assertRaises(sqlite3.OperationalError):
+                ConversationStore(self.db_path)
+        self.store = ConversationStore(self.db_path)
+        self._assert_matches_full_scan(self.store, "m")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+# encoding:utf-8
+"""
+Unit tests for the on-disk document extraction cache and its users:
+  - read on a PDF extracts only the pages its window reaches, matches the
+    text of a full extraction, and supports negative (tail) offsets
+  - repeated reads are served from disk; a changed file is re-extracted
+  - PDF pages extracted on the process pool match in-process extraction
+  - Office text (docx / xlsx) is unchanged, parsed once per file version
+  - a slow parse blocks only other opens of the same source
+  - web_fetch skips the download when the server's ETag matches
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from common import document_cache
+from common.document_cache import DocumentCache
+
+
+def _make_pdf(path, pages, lines_per_page=30, tag="page"):
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for i in range(pages):
+        page = writer.add_blank_page(612, 792)
+        if i % 7 == 3:
+            continue  # a blank page now and then
+        body = " T* ".join(f"({tag} {i + 1} line {j}) Tj" for j in range(lines_per_page))
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 10 Tf 12 TL 40 760 Td {body} ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def _legacy_pdf_lines(path):
+    from pypdf import PdfReader
+    parts = []
+    for page_num, page in enumerate(PdfReader(path).pages, 1):
+        text = page.extract_text()
+        if text.strip():
+            parts.append(f"--- Page {page_num} ---\n{text}")
+    return "\n\n".join(parts).split("\n")
+
+
+class TestDocumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = DocumentCache(root=os.path.join(self.tmp, "cache"), workers=1)
+        patcher = mock.patch.object(document_cache, "_default_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # keep web_fetch on the download path; the fetch cache has its own tests
+        patcher = mock.patch("agent.tools.web_fetch.fetch_cache._default_cache", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        from agent.tools.read import Read
+        self.tool = Read({"cwd": self.tmp})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _read(self, name, **args):
+        result = self.tool.execute(dict(path=name, **args))
+        self.assertEqual(result.status, "success", result.result)
+        return result.result
+
+    def _extracted_pages(self, path):
+        doc = self.cache.open(path)
+        return sum(1 for i in range(doc.count) if os.path.exists(doc._unit_path(i)))
+
+    def test_pdf_window_extracts_only_needed_pages(self):
+        path = os.path.join(self.tmp, "book.pdf")
+        _make_pdf(path, 120)
+        expected = _legacy_pdf_lines(path)
+
+        result = self._read("book.pdf", limit=50)
+        self.assertEqual(result["content"].split("\n\n[")[0], "\n".join(expected[:50]))
+        self.assertIn("through page 2 of 120", result["content"])
+        self.assertNotIn("total_lines", result)
+        self.assertLessEqual(self._extracted_pages(path), 8)
+
+        result = self._read("book.pdf", offset=1000, limit=40)
+        self.assertEqual(result["content"].split("\n\n[")[0], "\n".join(expected[999:1039]))
+        self.assertLess(self._extracted_pages(path), 120)
+
+        result = self._read("book.pdf", offset=-10)
+        self.assertEqual(result["content"], "\n".join(expected[-10:]))
+        self.assertEqual(result["total_lines"], len(expected))
+        self.assertEqual(result["start_line"], len(expected) - 9)
+
+        result = self._read("book.pdf", offset=len(expected) - 5, limit=3)
+        self.assertEqual(result["content"], "\n".join(expected[-6:-3]) + "\n\n[3 more lines in file. Use offset="
+                         f"{len(expected) - 2} to continue.]")
+        self.assertEqual(self.tool.execute({"path": "book.pdf", "offset": len(expected) + 1}).status, "error")
+
+    def test_pdf_served_from_disk_and_invalidated(self):
+        path = os.path.join(self.tmp, "doc.pdf")
+        _make_pdf(path, 10)
+        first = self._read("doc.pdf")
+        with mock.patch.object(document_cache, "_extract_pdf_pages", side_effect=AssertionError("re-extracted")):
+            self.assertEqual(self._read("doc.pdf"), first)
+            # a fresh process sees the pages stored on disk
+            self.cache = DocumentCache(root=self.cache.root, workers=1)
+            with mock.patch.object(document_cache, "_default_cache", self.cache):
+                self.assertEqual(self._read("doc.pdf"), first)
+
+        _make_pdf(path, 4, tag="changed")
+        os.utime(path, ns=(1, 10 ** 18))
+        self.assertIn("changed 1 line 0", self._read("doc.pdf")["content"])
+
+    def test_pool_extraction_matches(self):
+        path = os.path.join(self.tmp, "pool.pdf")
+        _make_pdf(path, 12, lines_per_page=5)
+        pooled = DocumentCache(root=os.path.join(self.tmp, "pooled"), workers=2)
+        try:
+            doc = pooled.open(path)
+            doc.ensure(range(doc.count))
+            self.assertIsNotNone(pooled._pool)
+            self.assertEqual([u["text"] for u in doc.units()],
+                             document_cache._extract_pdf_pages(path, list(range(12))))
+        finally:
+            if pooled._pool is not None:
+                pooled._pool.shutdown()
+
+    def test_office_text_unchanged(self):
+        from docx import Document
+        from openpyxl import Workbook
+
+        docx_path = os.path.join(self.tmp, "a.docx")
+        document = Document()
+        document.add_paragraph("first")
+        document.add_paragraph("")
+        table = document.add_table(rows=2, cols=2)
+        table.cell(1, 1).text = "cell"
+        document.save(docx_path)
+        self.assertEqual(self.tool._extract_office_text(docx_path, ".docx"), "first\n\n\t\n\tcell")
+
+        xlsx_path = os.path.join(self.tmp, "b.xlsx")
+        wb = Workbook()
+        wb.active.title = "One"
+        wb.active.append(["a", None, 3])
+        wb.create_sheet("Two").append(["x"])
+        wb.save(xlsx_path)
+        text = "--- Sheet: One ---\na\t\t3\n--- Sheet: Two ---\nx"
+        self.assertEqual(self.tool._extract_office_text(xlsx_path, ".xlsx"), text)
+        with mock.patch.object(document_cache, "_extract_office", side_effect=AssertionError("re-parsed")):
+            self.assertEqual(self.tool._extract_office_text(xlsx_path, ".xlsx"), text)
+
+    def test_parse_locks_only_its_source(self):
+        paths = []
+        for name in ("slow.docx", "fast.docx"):
+            paths.append(os.path.join(self.tmp, name))
+            with open(paths[-1], "wb") as f:
+                f.write(name.encode())
+        release = threading.Event()
+        parsed = []
+
+        def parse(path, kind):
+            parsed.append(os.path.basename(path))
+            if path == paths[0]:
+                self.assertTrue(release.wait(5))
+            return [{"paragraphs": [os.path.basename(path)], "table_rows": []}]
+
+        with mock.patch.object(document_cache, "_extract_office", side_effect=parse):
+            slow = [threading.Thread(target=self.cache.open, args=(paths[0],)) for _ in range(2)]
+            for t in slow:
+                t.start()
+            # opens while the slow parse is still running
+            self.assertEqual(self.cache.open(paths[1]).unit(0)["paragraphs"], ["fast.docx"])
+            release.set()
+            for t in slow:
+                t.join(5)
+        self.assertEqual(sorted(parsed), ["fast.docx", "slow.docx"])
+        self.assertEqual(self.cache.open(paths[0]).unit(0)["paragraphs"], ["slow.docx"])
+        self.assertEqual(self.cache._opening, {})
+
+    def test_web_fetch_reuses_unchanged_download(self):
+        from agent.tools.web_fetch.web_fetch import WebFetch
+
+        src = os.path.join(self.tmp, "remote.pdf")
+        _make_pdf(src, 3, lines_per_page=3)
+        with open(src, "rb") as f:
+            body = f.read()
+        downloads = []
+
+        class _Response:
+            headers = {"ETag": '"v1"', "Content-Length": str(len(body))}
+
+            def raise_for_status(self):
+                pass
+
+            def iter_content(self, chunk_size):
+                downloads.append(1)
+                yield body
+
+            def close(self):
+                pass
+
+        tool = WebFetch({"cwd": self.tmp})
+        with mock.patch("common.http_client.get", return_value=_Response()):
+            first = tool.execute({"url": "https://example.com/remote.pdf"})
+            second = tool.execute({"url": "https://example.com/remote.pdf"})
+        self.assertEqual(first.status, "success")
+        self.assertIn("--- Page 1/3 ---\npage 1 line 0", first.result)
+        self.assertEqual(second.result, first.result)
+        self.assertEqual(len(downloads), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# encoding:utf-8
+"""
+Unit tests for ExpiredDict:
+  - entries expire a fixed time after their last read or write
+  - expired entries are swept without being read, on any access
+  - max_size evicts the least recently used entry
+  - iteration does not extend lifetimes; stats count hits / misses /
+    evictions / expirations
+  - background_sweep dicts are swept by the shared thread while unused and
+    dropped from it once garbage collected
+"""
+import gc
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from common import expired_dict
+from common.expired_dict import ExpiredDict
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestExpiredDict(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+
+    def test_sliding_expiry(self):
+        d = ExpiredDict(10, clock=self.clock)
+        d["a"] = 1
+        d["b"] = 2
+        self.clock.now += 8
+        self.assertEqual(d["a"], 1)          # touch: a lives until +18
+        self.clock.now += 5
+        self.assertNotIn("b", d)
+        self.assertEqual(d.get("a"), 1)
+        self.assertIsNone(d.get("b"))
+        with self.assertRaises(KeyError):
+            d["b"]
+        self.clock.now += 11                 # last touch was the get() above
+        self.assertNotIn("a", d)
+
+    def test_expired_entries_swept_on_write(self):
+        d = ExpiredDict(10, clock=self.clock)
+        for i in range(1000):
+            d[i] = i
+        self.clock.now += 11
+        d["fresh"] = True
+        self.assertEqual(len(d._data), 1)
+        self.assertEqual(d.stats()["expirations"], 1000)
+
+        for i in range(5):
+            d[i] = i
+        self.clock.now += 11
+        self.assertEqual(d.sweep(), 6)
+        self.assertEqual(len(d), 0)
+
+    def test_max_size_lru(self):
+        d = ExpiredDict(100, max_size=3, clock=self.clock)
+        for k in "abc":
+            d[k] = k
+        self.assertEqual(d["a"], "a")        # b is now least recently used
+        d["d"] = "d"
+        self.assertEqual(sorted(d.keys()), ["a", "c", "d"])
+        d["c"] = "C"                         # overwrite does not evict
+        self.assertEqual(len(d), 3)
+        self.assertEqual(d.stats()["evictions"], 1)
+
+    def test_mapping_api(self):
+        d = ExpiredDict(10, clock=self.clock)
+        d.update({"x": 1, "y": 2})
+        self.assertEqual(sorted(d), ["x", "y"])
+        self.assertEqual(sorted(d.items()), [("x", 1), ("y", 2)])
+        self.assertEqual(sorted(d.values()), [1, 2])
+        self.assertEqual(d.pop("x"), 1)
+        self.assertEqual(d.setdefault("z", 3), 3)
+        del d["y"]
+        self.assertEqual(dict(d.items()), {"z": 3})
+        d.clear()
+        self.assertEqual(len(d), 0)
+
+    def test_iteration_does_not_touch(self):
+        d = ExpiredDict(10, clock=self.clock)
+        d["a"] = 1
+        self.clock.now += 6
+        d.keys(), d.items(), list(d)
+        self.clock.now += 6
+        self.assertEqual(d.keys(), [])
+
+    def test_stats(self):
+        d = ExpiredDict(10, clock=self.clock)
+        d["a"] = 1
+        d.get("a")
+        d.get("missing")
+        self.assertIn("a", d)
+        stats = d.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (2, 1, 1))
+
+    def test_background_sweep(self):
+        d = ExpiredDict(10, clock=self.clock, background_sweep=True)
+        plain = ExpiredDict(10, clock=self.clock)
+        d["a"] = plain["a"] = 1
+        self.clock.now += 11
+        expired_dict._sweep_registered()
+        self.assertEqual((d.stats()["size"], d.expirations), (0, 1))
+        self.assertEqual(plain.stats()["size"], 1)  # not registered, left for its next access
+        self.assertTrue(expired_dict._sweeper.is_alive())
+
+        registered = len(expired_dict._swept)
+        del d
+        gc.collect()
+        expired_dict._sweep_registered()
+        self.assertEqual(len(expired_dict._swept), registered - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+# encoding:utf-8
+"""
+Unit tests for the web_fetch response cache, against a local HTTP server:
+  - a fresh entry is answered without a request, also by a new process
+  - a stale entry is revalidated with If-None-Match; a 304 reuses the text,
+    a changed page is fetched and stored again
+  - no-store responses are not cached, no-cache ones are always revalidated
+  - per-domain TTL rules (longest suffix wins) and Cache-Control max-age
+  - text from an older extractor version is rebuilt from the stored body
+  - the store is bounded by size, evicting the least recently used entries
+  - downloaded documents are cached while their saved file exists
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.tools.web_fetch import fetch_cache
+from agent.tools.web_fetch.fetch_cache import FetchCache
+from agent.tools.web_fetch.web_fetch import TEXT_VERSION, WebFetch
+from common import document_cache, http_client
+from common.document_cache import DocumentCache
+
+
+def _page(title, text):
+    return f"<html><head><title>{title}</title></head><body><p>{text}</p></body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = {}  # path -> (body, etag, extra headers)
+    hits = []  # (path, If-None-Match)
+
+    def do_GET(self):
+        _Handler.hits.append((self.path, self.headers.get("If-None-Match")))
+        body, etag, extra = _Handler.pages[self.path]
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", extra.get("Content-Type", "text/html; charset=utf-8"))
+        self.send_header("Content-Length", str(len(data)))
+        if etag:
+            self.send_header("ETag", etag)
+        for k, v in extra.items():
+            if k != "Content-Type":
+                self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFetchCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Handler.pages = {}
+        _Handler.hits = []
+        http_client.reset_session()
+        self.tmp = tempfile.mkdtemp()
+        self.now = 1000.0
+        self.cache = self._new_cache()
+        for target, value in ((fetch_cache, self.cache),
+                              (document_cache, DocumentCache(root=os.path.join(self.tmp, "docs"), workers=1))):
+            patcher = mock.patch.object(target, "_default_cache", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.tool = WebFetch({"cwd": self.tmp})
+
+    def tearDown(self):
+        http_client.reset_session()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _new_cache(self, **kwargs):
+        kwargs.setdefault("default_ttl", 60)
+        return FetchCache(db_path=os.path.join(self.tmp, "fetch.db"), clock=lambda: self.now, **kwargs)
+
+    def _serve(self, path, body, etag=None, **headers):
+        _Handler.pages[path] = (body, etag, headers)
+
+    def _fetch(self, path):
+        result = self.tool.execute({"url": self.base + path})
+        self.assertEqual(result.status, "success", result.result)
+        return result.result
+
+    def test_fresh_entry_served_without_request(self):
+        self._serve("/a", _page("A", "alpha"), etag='"a1"')
+        first = self._fetch("/a")
+        self.assertTrue(first.startswith("Title: A\n\nContent:\n"))
+        self.assertIn("alpha", first)
+        self.now += 30
+        self.assertEqual(self._fetch("/a"), first)
+        self.assertEqual(len(_Handler.hits), 1)
+
+        # the entry survives a restart
+        with mock.patch.object(fetch_cache, "_default_cache", self._new_cache()):
+            self.assertEqual(self._fetch("/a"), first)
+        self.assertEqual(len(_Handler.hits), 1)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["lookups"], stats["hits"], stats["misses"], stats["stores"]), (2, 1, 1, 1))
+        self.assertEqual(stats["entries"], 1)
+        self.assertAlmostEqual(stats["hit_rate"], 0.5)
+
+    def test_stale_entry_revalidated(self):
+        self._serve("/b", _page("B", "version one"), etag='"b1"')
+        first = self._fetch("/b")
+        self.now += 61
+        self.assertEqual(self._fetch("/b"), first)
+        self.assertEqual(_Handler.hits[-1], ("/b", '"b1"'))
+        self.now += 30  # the 304 made it fresh again
+        self._fetch("/b")
+        self.assertEqual(len(_Handler.hits), 2)
+
+        self._serve("/b", _page("B", "version two"), etag='"b2"')
+        self.now += 61
+        self.assertIn("version two", self._fetch("/b"))
+        self.assertEqual(len(_Handler.hits), 3)
+        self.assertIn("version two", self._fetch("/b"))
+        self.assertEqual(len(_Handler.hits), 3)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["revalidated"], stats["misses"]), (2, 1, 2))
+
+    def test_cache_control(self):
+        self._serve("/private", _page("P", "secret"), etag='"p"', **{"Cache-Control": "no-store"})
+        self._fetch("/private")
+        self._fetch("/private")
+        self.assertEqual([h[1] for h in _Handler.hits], [None, None])
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+        _Handler.hits = []
+        self._serve("/live", _page("L", "ticker"), etag='"l"', **{"Cache-Control": "no-cache"})
+        self._fetch("/live")
+        self._fetch("/live")
+        self.assertEqual([h[1] for h in _Handler.hits], [None, '"l"'])
+
+        self.assertEqual(self.cache.ttl_for("https://x.org/", {"Cache-Control": "public, max-age=5"}), 5)
+        self.assertEqual(self.cache.ttl_for("https://x.org/", {"Cache-Control": "max-age=86400"}), 60)
+
+    def test_domain_ttl_rules(self):
+        cache = self._new_cache(domain_ttls={"example.com": 3600, "news.example.com": 10, "127.0.0.1": 0})
+        self.assertEqual(cache.ttl_for("https://example.com/x", {}), 3600)
+        self.assertEqual(cache.ttl_for("https://docs.example.com/x", {"Cache-Control": "no-cache"}), 3600)
+        self.assertEqual(cache.ttl_for("https://a.news.example.com/x", {}), 10)
+        self.assertEqual(cache.ttl_for("https://notexample.com/x", {}), 60)
+
+        self._serve("/c", _page("C", "always check"), etag='"c"')
+        with mock.patch.object(fetch_cache, "_default_cache", cache):
+            self._fetch("/c")
+            self._fetch("/c")
+        self.assertEqual([h[1] for h in _Handler.hits], [None, '"c"'])
+
+    def test_text_rebuilt_from_body_after_extractor_change(self):
+        self._serve("/d", _page("D", "delta"), etag='"d"')
+        first = self._fetch("/d")
+        self.cache.update_text(self.base + "/d", "outdated", TEXT_VERSION - 1)
+        self.assertEqual(self._fetch("/d"), first)
+        self.assertEqual(len(_Handler.hits), 1)
+        entry, _ = self.cache.lookup(self.base + "/d")
+        self.assertEqual((entry.text, entry.text_version), (first, TEXT_VERSION))
+
+    def test_size_bounded_lru(self):
+        cache = self._new_cache(max_bytes=3000)
+        body = os.urandom(900)  # incompressible
+        for name in ("one", "two", "three"):
+            cache.store(f"https://x.org/{name}", {}, "t", body=body)
+            self.now += 1
+        cache.lookup("https://x.org/one")  # now more recent than "two"
+        self.now += 1
+        cache.store("https://x.org/four", {}, "t", body=body)
+
+        self.assertIsNone(cache.lookup("https://x.org/two")[0])
+        for name in ("one", "three", "four"):
+            self.assertEqual(cache.lookup(f"https://x.org/{name}")[0].body, body)
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["evictions"]), (3, 1))
+        self.assertLessEqual(stats["bytes"], 3000)
+        self.assertFalse(cache.store("https://x.org/huge", {}, "t", body=os.urandom(4000)))
+
+    def test_document_cached_while_download_exists(self):
+        self._serve("/notes.md", "# Notes\nline", etag='"n1"', **{"Content-Type": "text/markdown"})
+        first = self._fetch("/notes.md")
+        self.assertIn("# Notes\nline", first)
+        self.assertEqual(self._fetch("/notes.md"), first)
+        self.assertEqual(len(_Handler.hits), 1)
+
+        self.now += 61
+        self.assertEqual(self._fetch("/notes.md"), first)
+        self.assertEqual(_Handler.hits[-1], ("/notes.md", '"n1"'))
+
+        # the saved copy is gone: download again
+        saved = self.cache.lookup(self.base + "/notes.md")[0].path
+        os.remove(saved)
+        self.assertIn("# Notes\nline", self._fetch("/notes.md"))
+        self.assertEqual(_Handler.hits[-1], ("/notes.md", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# encoding:utf-8
+"""
+Unit tests for common.handler_pool:
+  - admission limit rejects when the queue is full
+  - gauges track queued / active / completed
+  - per-channel pools are isolated and honour config overrides, including
+    a bot-type override when another caller created a pool first
+"""
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from common import handler_pool
+from common.handler_pool import HandlerPool
+
+
+class TestHandlerPool(unittest.TestCase):
+
+    def test_admit_rejects_when_queue_full(self):
+        pool = HandlerPool("t1", max_workers=1, max_queue=2)
+        self.assertTrue(pool.admit())
+        self.assertTrue(pool.admit())
+        self.assertFalse(pool.admit())
+        self.assertTrue(pool.admit(force=True))
+        self.assertEqual(pool.stats()["rejected"], 1)
+        pool.discard(3)
+        self.assertEqual(pool.stats()["queued"], 0)
+        pool.shutdown()
+
+    def test_gauges(self):
+        pool = HandlerPool("t2", max_workers=1)
+        gate = threading.Event()
+        started = threading.Event()
+
+        def blocker():
+            started.set()
+            gate.wait(5)
+
+        pool.admit()
+        first = pool.submit(blocker)
+        pool.admit()
+        second = pool.submit(lambda: None)
+        started.wait(5)
+        stats = pool.stats()
+        self.assertEqual(stats["active"], 1)
+        self.assertEqual(stats["queued"], 1)
+        gate.set()
+        first.result(5)
+        second.result(5)
+        stats = pool.stats()
+        self.assertEqual(stats["active"], 0)
+        self.assertEqual(stats["queued"], 0)
+        self.assertEqual(stats["completed"], 2)
+        pool.shutdown()
+
+    def test_cancelled_task_frees_slot(self):
+        pool = HandlerPool("t3", max_workers=1, max_queue=1)
+        gate = threading.Event()
+        pool.admit(force=True)
+        running = pool.submit(gate.wait, 5)
+        self.assertTrue(pool.admit())
+        queued = pool.submit(lambda: None)
+        self.assertTrue(queued.cancel())
+        self.assertEqual(pool.stats()["queued"], 0)
+        gate.set()
+        running.result(5)
+        pool.shutdown()
+
+    def test_pools_are_per_channel_with_overrides(self):
+        settings = {
+            "handler_pool_workers": 3,
+            "handler_pool_max_queue": 10,
+            "handler_pool_overrides": {"feishu": {"workers": 2}, "claudeAPI": {"max_queue": 5}},
+        }
+        mock_conf = MagicMock()
+        mock_conf.get = MagicMock(side_effect=lambda key, default=None: settings.get(key, default))
+        with patch.object(handler_pool, "_pools", {}), patch.object(handler_pool, "conf", return_value=mock_conf):
+            web = handler_pool.get_handler_pool("web")
+            web_claude = handler_pool.get_handler_pool("web", "claudeAPI")
+            feishu = handler_pool.get_handler_pool("feishu", "claudeAPI")
+            self.assertIsNot(feishu, web_claude)
+            self.assertIs(feishu, handler_pool.get_handler_pool("feishu", "claudeAPI"))
+            self.assertEqual((feishu.max_workers, feishu.max_queue), (2, 5))
+            self.assertEqual((web.max_workers, web.max_queue), (3, 10))
+            self.assertEqual((web_claude.max_workers, web_claude.max_queue), (3, 5))
+            stats = {s["name"]: (s["channel_type"], s["bot_type"]) for s in handler_pool.get_all_pool_stats()}
+            self.assertEqual(stats, {"web": ("web", None), "web:claudeAPI": ("web", "claudeAPI"),
+                                     "feishu:claudeAPI": ("feishu", "claudeAPI")})
+
+
+if __name__ == "__main__":
+    unittest.main()
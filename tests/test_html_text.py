@@ -0,0 +1,209 @@
+# encoding:utf-8
+"""
+Unit tests for the streaming HTML to text extractor used by web_fetch:
+  - headings, lists, links, tables and <pre> come out as light markdown
+  - links resolve as urljoin would, runs of block tags act like the tags one by one
+  - script / style / svg content is dropped, all entities are decoded
+  - the text does not depend on how the page is cut into chunks
+  - extraction stops at max_chars, and web_fetch stops reading the body
+  - layout tables become plain blocks, a row cut by max_chars is still written
+  - the charset comes from the header, the <meta> tag, or detection
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.tools.web_fetch.html_text import HtmlTextExtractor, html_to_text
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Caf&eacute;   menu</title>
+<style>p { color: red } </style>
+<script type="text/javascript">if (a < b && c > d) { document.write("<p>no</p>"); }</script>
+</head><body>
+<!-- <p>commented out</p> -->
+<nav><ul><li><a href="/">Home</a></li><li><a href='/menu?day=1&amp;lang=fr'>Menu</a></li></ul></nav>
+<H1>Today's   <em>specials</em></H1>
+<p>Fresh <b>bread</b>, see <a href="https://example.org/bread">our bakery</a> &mdash; &#x4e2d;&#25991; &nbsp;ok.
+</p>
+<p>first line<br>second line</p>
+<ol><li>soup</li><li>mains<ul><li>fish</li><li>pasta</li></ul></li></ol>
+<table><tr><th>Dish</th><th>Price</th></tr><tr><td>Soup | small</td><td><a href="p/1">4</a></td></tr></table>
+<pre>
+def f(x):
+    return x &lt; 1</pre>
+<svg><text>drawing</text></svg><noscript>enable js</noscript>
+<div>tail<span> end</span></div>
+</body></html>"""
+
+EXPECTED = """- [Home](https://cafe.test/)
+- [Menu](https://cafe.test/menu?day=1&lang=fr)
+
+# Today's specials
+
+Fresh bread, see [our bakery](https://example.org/bread) — 中文 ok.
+
+first line
+second line
+
+1. soup
+2. mains
+  - fish
+  - pasta
+
+| Dish | Price |
+| --- | --- |
+| Soup \\| small | [4](https://cafe.test/dir/p/1) |
+
+```
+def f(x):
+    return x < 1
+```
+
+tail end"""
+
+
+class TestHtmlTextExtractor(unittest.TestCase):
+
+    def test_markdown_structure(self):
+        extractor = html_to_text(PAGE, base_url="https://cafe.test/dir/page")
+        self.assertEqual(extractor.title, "Café menu")
+        self.assertEqual(extractor.text(), EXPECTED)
+        self.assertFalse(extractor.done)
+
+    def test_chunking_does_not_change_text(self):
+        for size in (1, 2, 3, 7, 16, 100):
+            extractor = HtmlTextExtractor(base_url="https://cafe.test/dir/page")
+            for i in range(0, len(PAGE), size):
+                extractor.feed(PAGE[i:i + size])
+            extractor.close()
+            with self.subTest(size=size):
+                self.assertEqual(extractor.text(), EXPECTED)
+                self.assertEqual(extractor.title, "Café menu")
+
+    def test_malformed_markup(self):
+        text = html_to_text("<p>1 < 2 and 3 > 2</p><p>AT&T &unknown; <b>bold</p><div>x<!-- unterminated").text()
+        self.assertEqual(text, "1 < 2 and 3 > 2\n\nAT&T &unknown; bold\n\nx")
+        self.assertEqual(html_to_text("<script>never closed <p>hidden").text(), "")
+        self.assertEqual(html_to_text("plain text, no tags").text(), "plain text, no tags")
+
+    def test_links_resolve_like_urljoin(self):
+        base = "https://docs.test/std/vec/struct.Vec.html"
+        hrefs = ["../index.html", "../../../up.html", "iter.html#method.map", "./a/../b.html", "x.html?", "../?q",
+                 "/root.html", "//cdn.test/x", "https://other.test/p;v?q#f", "http:///x", "HTTP://Up.test", "a:b"]
+        page = "".join(f"<p><a href='{href}'>{i}</a></p>" for i, href in enumerate(hrefs))
+        text = html_to_text(page, base_url=base).text()
+        self.assertEqual(text, "\n\n".join(f"[{i}]({urljoin(base, href)})" for i, href in enumerate(hrefs)))
+        text = html_to_text("<a href='mailto:x@y.test'>mail</a> <a href='#top'>top</a> <a href='//[x'>bad</a>",
+                            base_url=base).text()
+        self.assertEqual(text, "mail top [bad](//[x)")  # urljoin raises on the broken host
+
+    def test_block_tag_runs(self):
+        page = ("<title>a<div> </div>b</title><div>one</div>\n  <section>\n<div>two</div></section>"
+                "<pre>x<div> </div>\n<div>y</div></pre>"
+                "<table><tr><td>c<div></div> <div>d</div></td></tr></table>")
+        extractor = html_to_text(page)
+        self.assertEqual(extractor.title, "a b")
+        self.assertEqual(extractor.text(), "one\ntwo\n\n```\nx \ny\n```\n\nc\nd")
+
+    def test_stops_at_max_chars(self):
+        html = "<p>" + "word " * 10000 + "</p><p>after</p>"
+        extractor = HtmlTextExtractor(max_chars=1000)
+        fed = 0
+        for i in range(0, len(html), 512):
+            extractor.feed(html[i:i + 512])
+            fed += 512
+            if extractor.done:
+                break
+        self.assertTrue(extractor.done)
+        self.assertEqual(len(extractor.text()), 999)  # trailing space stripped
+        self.assertLess(fed, 2000)
+
+    def test_layout_table(self):
+        body = "".join(f"<p>Paragraph {i} of the article.</p>" for i in range(3000))
+        page = f"<table><tr><td><a href='/'>home</a> | menu</td><td><h1>Title</h1>{body}</td></tr></table>"
+        extractor = html_to_text(page, base_url="https://site.test/")
+        self.assertTrue(extractor.done)
+        text = extractor.text()
+        self.assertTrue(text.startswith("[home](https://site.test/) | menu\n\n# Title\n\nParagraph 0 of the article.\n\n"))
+        self.assertEqual(len(text), extractor.max_chars)
+
+    def test_cap_inside_data_cell(self):
+        html = "<table><tr><th>k</th><th>v</th></tr><tr><td>a</td><td>" + "word " * 20000 + "</td></tr></table>"
+        extractor = HtmlTextExtractor(max_chars=1000)
+        for i in range(0, len(html), 100):
+            extractor.feed(html[i:i + 100])
+            if extractor.done:
+                break
+        extractor.close()
+        text = extractor.text()
+        self.assertTrue(text.startswith("| k | v |\n| --- | --- |\n| a | word word "))
+        self.assertEqual(len(text), 999)  # trailing space stripped
+
+
+class _StreamResponse:
+    """Minimal streamed requests.Response stand-in."""
+
+    def __init__(self, body: bytes, content_type="text/html", url="https://site.test/page"):
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+        self.url = url
+        self.status_code = 200
+        self.read = 0
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            self.read += len(self.body[i:i + chunk_size])
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class TestWebFetchExtraction(unittest.TestCase):
+
+    def setUp(self):
+        from agent.tools.web_fetch.web_fetch import WebFetch
+        patcher = mock.patch("agent.tools.web_fetch.fetch_cache._default_cache", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tool = WebFetch({"cwd": os.path.dirname(__file__)})
+
+    def _fetch(self, response):
+        with mock.patch("common.http_client.get", return_value=response):
+            result = self.tool.execute({"url": "https://site.test/page"})
+        self.assertEqual(result.status, "success", result.result)
+        return result.result
+
+    def test_large_page_read_only_until_cap(self):
+        body = ("<html><head><title>Log</title></head><body>" +
+                "<div>2024-01-01 12:00:00 INFO request ok</div>\n" * 200000 + "</body></html>").encode()
+        response = _StreamResponse(body, content_type="text/html; charset=utf-8")
+        text = self._fetch(response)
+        self.assertTrue(text.startswith("Title: Log\n\nContent:\n2024-01-01 12:00:00 INFO request ok\n"))
+        self.assertTrue(text.endswith("[Content truncated at 50000 characters]"))
+        self.assertLess(response.read, len(body) // 10)
+        self.assertTrue(response.closed)
+
+    def test_charset_detection(self):
+        html = "<html><head><title>新闻</title></head><body><p>今天天气很好，我们去公园散步。</p></body></html>"
+        cases = [
+            ("header", html.encode("gbk"), "text/html; charset=gbk"),
+            ("meta", html.replace("<head>", '<head><meta charset="gb2312">').encode("gbk"), "text/html"),
+            ("utf-8 fallback", html.encode("utf-8"), "text/html"),
+        ]
+        for label, body, content_type in cases:
+            with self.subTest(label):
+                text = self._fetch(_StreamResponse(body, content_type))
+                self.assertEqual(text, "Title: 新闻\n\nContent:\n今天天气很好，我们去公园散步。")
+
+
+if __name__ == "__main__":
+    unittest.main()
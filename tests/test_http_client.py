@@ -0,0 +1,115 @@
+# encoding:utf-8
+"""
+Unit tests for the shared pooled HTTP transport:
+  - consecutive calls to one host reuse a keep-alive connection
+  - cookies set by a response are not replayed to later callers
+  - 503 is retried for GET but a POST body is never resent
+  - EncodedJSON payload values are sent from their cached bytes
+"""
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from common import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    hits = []
+    bodies = []
+
+    def _reply(self, status=200, extra_headers=None):
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (extra_headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        _Handler.hits.append((self.command, self.path, self.headers.get("Cookie")))
+        if self.path == "/set-cookie":
+            self._reply(extra_headers={"Set-Cookie": "sid=secret; Path=/"})
+        elif self.path.startswith("/flaky"):
+            self._reply(503 if len([h for h in _Handler.hits if h[1] == self.path]) == 1 else 200)
+        else:
+            self._reply()
+
+    def do_POST(self):
+        _Handler.bodies.append((self.headers.get("Content-Type"),
+                                self.rfile.read(int(self.headers.get("Content-Length") or 0))))
+        _Handler.hits.append((self.command, self.path, self.headers.get("Cookie")))
+        self._reply(503 if self.path.startswith("/flaky") else 200)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Handler.hits = []
+        _Handler.bodies = []
+        http_client.reset_session()
+        http_client.reset_http_stats()
+
+    def tearDown(self):
+        http_client.reset_session()
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            self.assertEqual(http_client.post(f"{self.base}/chat", json={"a": 1}, timeout=5).status_code, 200)
+        stats = http_client.get_http_stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["hosts"]["127.0.0.1"]["connections_reused"], 4)
+
+    def test_cookies_are_not_shared(self):
+        http_client.get(f"{self.base}/set-cookie", timeout=5)
+        http_client.get(f"{self.base}/next", timeout=5)
+        self.assertIsNone(_Handler.hits[-1][2])
+        self.assertEqual(len(http_client.get_session().cookies), 0)
+
+    def test_retry_policy(self):
+        self.assertEqual(http_client.get(f"{self.base}/flaky-get", timeout=5).status_code, 200)
+        self.assertEqual(len([h for h in _Handler.hits if h[1] == "/flaky-get"]), 2)
+
+        self.assertEqual(http_client.post(f"{self.base}/flaky-post", json={}, timeout=5).status_code, 503)
+        self.assertEqual(len([h for h in _Handler.hits if h[1] == "/flaky-post"]), 1)
+
+    def test_encoded_json_values(self):
+        tools = http_client.EncodedJSON([{"name": "读取", "params": {"n": 1}}])
+        payload = {"model": "m", "tools": tools, "stream": True}
+        self.assertEqual(json.loads(http_client._encode_json_body(payload)), payload)
+        self.assertEqual(json.loads(http_client._encode_json_body({"tools": tools})), {"tools": tools})
+
+        tools.encoded  # cached from here on
+        tools.append({"name": "ignored"})
+        http_client.post(f"{self.base}/chat", json=payload, timeout=5)
+        content_type, body = _Handler.bodies[-1]
+        self.assertEqual(content_type, "application/json")
+        self.assertEqual(json.loads(body)["tools"], [{"name": "读取", "params": {"n": 1}}])
+        self.assertEqual(json.loads(body)["model"], "m")
+
+
+if __name__ == "__main__":
+    unittest.main()
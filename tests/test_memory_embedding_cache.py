@@ -0,0 +1,109 @@
+# encoding:utf-8
+"""
+Unit tests for the persistent embedding cache:
+  - editing one chunk of a file only embeds that chunk again
+  - cached vectors survive a new cache instance (restart)
+  - LRU eviction keeps the table within max_entries
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.memory import embedding, vector_index
+from agent.memory.config import MemoryConfig
+from agent.memory.embedding import EmbeddingCache, EmbeddingProvider
+from agent.memory.manager import MemoryManager
+
+
+class _CountingProvider(EmbeddingProvider):
+    provider_name = "fake"
+    model = "fake-1"
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed(self, text):
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    @property
+    def dimensions(self):
+        return 2
+
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.workspace = Path(self._tmp.name)
+        embedding._caches.clear()
+        vector_index._indexes.clear()
+
+    def tearDown(self):
+        for cache in embedding._caches.values():
+            cache.close()
+        embedding._caches.clear()
+        vector_index._indexes.clear()
+        self._tmp.cleanup()
+
+    def test_sync_reuses_vectors_of_unchanged_chunks(self):
+        provider = _CountingProvider()
+        config = MemoryConfig(workspace_root=str(self.workspace), chunk_max_tokens=20, chunk_overlap_tokens=0)
+        manager = MemoryManager(config=config, embedding_provider=provider)
+        memory_file = self.workspace / "memory" / "notes.md"
+        sections = [f"section {i} " + "x" * 60 for i in range(5)]
+        memory_file.write_text("\n".join(sections))
+
+        asyncio.run(manager.sync())
+        first_pass = len(provider.embedded)
+        self.assertGreater(first_pass, 1)
+
+        sections[2] = "section 2 edited " + "y" * 60
+        memory_file.write_text("\n".join(sections))
+        provider.embedded.clear()
+        asyncio.run(manager.sync())
+
+        self.assertEqual(len(provider.embedded), 1)
+        self.assertIn("edited", provider.embedded[0])
+
+        # A renamed file gets new chunk ids but the same texts: all cache hits
+        memory_file.rename(self.workspace / "memory" / "renamed.md")
+        provider.embedded.clear()
+        asyncio.run(manager.sync())
+
+        self.assertEqual(provider.embedded, [])
+        stats = manager.get_status()["embedding_cache"]
+        self.assertGreaterEqual(stats["hits"], first_pass)
+        manager.close()
+
+    def test_cache_persists_and_evicts(self):
+        db_path = self.workspace / "cache.db"
+        provider = _CountingProvider()
+        cache = EmbeddingCache(db_path, max_entries=3)
+        cache.embed_batch(provider, ["a", "bb", "ccc"])
+        cache.close()
+
+        cache = EmbeddingCache(db_path, max_entries=3)
+        provider.embedded.clear()
+        self.assertEqual(cache.embed_batch(provider, ["bb"]), [[2.0, 1.0]])
+        self.assertEqual(provider.embedded, [])
+        self.assertEqual(cache.get_stats()["api_calls_saved"], 1)
+
+        cache.embed_batch(provider, ["dddd", "eeeee"])
+        self.assertEqual(cache.get_stats()["entries"], 3)
+        provider.embedded.clear()
+        cache.embed_batch(provider, ["bb", "dddd", "eeeee"])
+        self.assertEqual(provider.embedded, [])
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
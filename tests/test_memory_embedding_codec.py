@@ -0,0 +1,93 @@
+# encoding:utf-8
+"""
+Unit tests for binary embedding storage:
+  - float32 / int8 round trips
+  - legacy JSON text rows are still readable
+  - the online migration converts JSON rows to BLOBs
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.memory import vector_index
+from agent.memory.embedding_codec import (
+    FORMAT_INT8, TAG_FLOAT32, decode_embedding, encode_embedding,
+)
+from agent.memory.storage import MemoryStorage
+
+
+class TestEmbeddingCodec(unittest.TestCase):
+
+    def test_float32_round_trip(self):
+        vec = [0.5, -1.25, 3.0, 0.0]
+        blob = encode_embedding(vec)
+        self.assertEqual(blob[0], TAG_FLOAT32)
+        self.assertEqual(len(blob), 1 + 4 * len(vec))
+        self.assertEqual(decode_embedding(blob), vec)
+
+    def test_int8_round_trip_within_scale(self):
+        vec = [0.1, -0.5, 0.25, 0.0, 0.49]
+        blob = encode_embedding(vec, FORMAT_INT8)
+        self.assertEqual(len(blob), 1 + 4 + len(vec))
+        for original, decoded in zip(vec, decode_embedding(blob)):
+            self.assertAlmostEqual(original, decoded, delta=0.5 / 127)
+
+    def test_legacy_json_and_empty(self):
+        self.assertEqual(decode_embedding("[1.0, 2.0]"), [1.0, 2.0])
+        self.assertIsNone(decode_embedding(None))
+        self.assertIsNone(encode_embedding([]))
+
+    @unittest.skipIf(vector_index.np is None, "numpy not installed")
+    def test_array_view_is_zero_copy(self):
+        blob = encode_embedding([1.0, 2.0, 3.0])
+        arr = decode_embedding(blob, as_array=True)
+        self.assertFalse(arr.flags.owndata)
+        self.assertEqual(arr.tolist(), [1.0, 2.0, 3.0])
+
+
+class TestEmbeddingMigration(unittest.TestCase):
+
+    def test_json_rows_are_migrated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "index.db"
+            # a database written by an older version: TEXT column, JSON values
+            conn = sqlite3.connect(str(db_path))
+            conn.execute("""
+                CREATE TABLE chunks (
+                    id TEXT PRIMARY KEY, user_id TEXT, scope TEXT NOT NULL DEFAULT 'shared',
+                    source TEXT NOT NULL DEFAULT 'memory', path TEXT NOT NULL,
+                    start_line INTEGER NOT NULL, end_line INTEGER NOT NULL, text TEXT NOT NULL,
+                    embedding TEXT, hash TEXT NOT NULL, metadata TEXT,
+                    created_at INTEGER, updated_at INTEGER
+                )
+            """)
+            conn.executemany("""
+                INSERT INTO chunks (id, scope, source, path, start_line, end_line, text, embedding, hash)
+                VALUES (?, 'shared', 'memory', ?, 1, 1, ?, ?, 'h')
+            """, [(f"c{i}", f"{i}.md", f"text {i}", json.dumps([float(i), 1.0])) for i in range(1200)])
+            conn.commit()
+            conn.close()
+
+            vector_index._indexes.clear()
+            storage = MemoryStorage(db_path)
+            deadline = time.time() + 5
+            while time.time() < deadline:
+                kinds = {r[0] for r in storage.conn.execute("SELECT typeof(embedding) FROM chunks")}
+                if kinds == {"blob"}:
+                    break
+                time.sleep(0.05)
+            self.assertEqual(kinds, {"blob"})
+            self.assertEqual(storage.get_chunk("c7").embedding, [7.0, 1.0])
+            self.assertEqual([r.snippet for r in storage.search_vector([0.0, 1.0], limit=1)], ["text 0"])
+            storage.close()
+            vector_index._indexes.clear()
+
+if __name__ == "__main__":
+    unittest.main()
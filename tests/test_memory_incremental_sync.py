@@ -0,0 +1,169 @@
+# encoding:utf-8
+"""
+Unit tests for incremental memory sync:
+  - files with unchanged size/mtime are not read again
+  - editing one section rewrites only the affected chunks
+  - touching a file without changing it only refreshes its metadata
+  - parallel and sequential sync produce the same index
+  - concurrent searches on dirty memory run one sync, never two at once
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.memory import embedding, vector_index
+from agent.memory.config import MemoryConfig
+from agent.memory.manager import MemoryManager
+
+
+def _sections(n, tag="x"):
+    return [f"section {i} " + tag * 60 for i in range(n)]
+
+
+class TestIncrementalSync(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.workspace = Path(self._tmp.name)
+        embedding._caches.clear()
+        vector_index._indexes.clear()
+
+    def tearDown(self):
+        vector_index._indexes.clear()
+        self._tmp.cleanup()
+
+    def _manager(self, workspace=None, sync_workers=1):
+        config = MemoryConfig(
+            workspace_root=str(workspace or self.workspace),
+            chunk_max_tokens=20,
+            chunk_overlap_tokens=0,
+            sync_workers=sync_workers,
+        )
+        with mock.patch.dict(os.environ, {}, clear=True):
+            return MemoryManager(config=config)
+
+    def _write(self, name, sections, workspace=None):
+        path = (workspace or self.workspace) / "memory" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(sections), encoding="utf-8")
+        return path
+
+    def _rows(self, manager):
+        rows = manager.storage.conn.execute("SELECT id, hash, path FROM chunks").fetchall()
+        return sorted(tuple(r) for r in rows)
+
+    def test_unchanged_files_are_not_read(self):
+        manager = self._manager()
+        for i in range(3):
+            self._write(f"note{i}.md", _sections(3))
+        asyncio.run(manager.sync())
+
+        with mock.patch.object(manager, "_prepare_sync_file", wraps=manager._prepare_sync_file) as prepare:
+            asyncio.run(manager.sync())
+            self.assertEqual(prepare.call_count, 0)
+            asyncio.run(manager.sync(force=True))
+            self.assertGreaterEqual(prepare.call_count, 3)
+        manager.close()
+
+    def test_edit_rewrites_only_changed_chunks(self):
+        manager = self._manager()
+        sections = _sections(5)
+        path = self._write("notes.md", sections)
+        asyncio.run(manager.sync())
+        before = self._rows(manager)
+        self.assertEqual(len(before), 5)
+
+        sections[2] = "section 2 edited " + "y" * 60
+        self._write("notes.md", sections)
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9))
+
+        with mock.patch.object(manager.storage, "apply_file_updates",
+                               wraps=manager.storage.apply_file_updates) as apply:
+            asyncio.run(manager.sync())
+        update = apply.call_args[0][0][0]
+        self.assertEqual(len(update.delete_ids), 1)
+        self.assertEqual([c.text for c in update.chunks], [sections[2]])
+
+        after = self._rows(manager)
+        self.assertEqual(len(after), 5)
+        self.assertEqual(len(set(before) & set(after)), 4)
+        texts = [r.snippet for r in manager.storage.search_keyword("edited", scopes=["shared"])]
+        self.assertTrue(any("edited" in t for t in texts))
+        manager.close()
+
+    def test_touch_refreshes_metadata_only(self):
+        manager = self._manager()
+        path = self._write("notes.md", _sections(3))
+        asyncio.run(manager.sync())
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        with mock.patch.object(manager.storage, "apply_file_updates",
+                               wraps=manager.storage.apply_file_updates) as apply:
+            asyncio.run(manager.sync())
+        update = apply.call_args[0][0][0]
+        self.assertEqual((update.delete_ids, update.chunks), ([], []))
+        meta = manager.storage.get_all_file_meta()["memory/notes.md"]
+        self.assertEqual(meta["mtime"], path.stat().st_mtime_ns)
+        manager.close()
+
+    def test_parallel_matches_sequential(self):
+        seq_root = self.workspace / "seq"
+        par_root = self.workspace / "par"
+        for root in (seq_root, par_root):
+            for i in range(30):
+                self._write(f"users/u{i % 3}/note{i}.md", _sections(4, tag=str(i % 10)), workspace=root)
+        sequential = self._manager(seq_root, sync_workers=1)
+        parallel = self._manager(par_root, sync_workers=4)
+        asyncio.run(sequential.sync())
+        asyncio.run(parallel.sync())
+
+        self.assertEqual(self._rows(sequential), self._rows(parallel))
+        self.assertEqual(parallel.get_status()["files"], sequential.get_status()["files"])
+        user_rows = parallel.storage.conn.execute(
+            "SELECT DISTINCT scope, user_id FROM chunks ORDER BY user_id").fetchall()
+        self.assertEqual([tuple(r) for r in user_rows], [("user", "u0"), ("user", "u1"), ("user", "u2")])
+        sequential.close()
+        parallel.close()
+
+    def test_concurrent_searches_sync_once(self):
+        manager = self._manager()
+        self._write("note.md", _sections(3))
+        manager.mark_dirty()
+        active, peak, calls = [0], [0], []
+        lock = threading.Lock()
+        real_sync = manager._sync
+
+        def tracked(force):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                calls.append(force)
+            time.sleep(0.05)
+            try:
+                real_sync(force)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        with mock.patch.object(manager, "_sync", side_effect=tracked):
+            threads = [threading.Thread(target=lambda: asyncio.run(manager.search("section")))
+                       for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(10)
+        self.assertEqual((calls, peak[0]), ([False], 1))
+        self.assertFalse(manager._dirty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# encoding:utf-8
+"""
+Unit tests for the memory vector index:
+  - search_vector matches brute-force cosine ranking
+  - scope / user filtering matches the previous SQL semantics
+  - save_chunks_batch and delete_by_path keep the index in sync
+  - a chunk id repeated within one batch keeps only its last row
+  - IVF mode finds the nearest neighbours of clustered data
+"""
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.memory import vector_index
+from agent.memory.storage import MemoryChunk, MemoryStorage
+from agent.memory.vector_index import VectorIndex
+
+
+def _chunk(chunk_id, embedding, path="memory/a.md", scope="shared", user_id=None):
+    return MemoryChunk(
+        id=chunk_id, user_id=user_id, scope=scope, source="memory", path=path,
+        start_line=1, end_line=2, text=f"text {chunk_id}", embedding=embedding,
+        hash=chunk_id, metadata=None,
+    )
+
+
+class TestMemoryVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        vector_index._indexes.clear()
+        self.storage = MemoryStorage(Path(self._tmp.name) / "index.db")
+
+    def tearDown(self):
+        self.storage.close()
+        vector_index._indexes.clear()
+        self._tmp.cleanup()
+
+    def test_ranking_matches_brute_force(self):
+        rng = random.Random(1)
+        chunks = [_chunk(f"c{i}", [rng.uniform(-1, 1) for _ in range(16)]) for i in range(300)]
+        self.storage.save_chunks_batch(chunks)
+        query = [rng.uniform(-1, 1) for _ in range(16)]
+
+        expected = sorted(
+            ((MemoryStorage._cosine_similarity(query, c.embedding), c.text) for c in chunks),
+            reverse=True,
+        )
+        expected = [text for score, text in expected if score > 0][:10]
+        results = self.storage.search_vector(query, limit=10)
+        self.assertEqual([r.snippet for r in results], expected)
+
+    def test_user_scope_filtering(self):
+        self.storage.save_chunks_batch([
+            _chunk("shared", [1.0, 0.0]),
+            _chunk("alice", [1.0, 0.1], path="memory/users/alice/a.md", scope="user", user_id="alice"),
+            _chunk("bob", [1.0, 0.2], path="memory/users/bob/b.md", scope="user", user_id="bob"),
+        ])
+        results = self.storage.search_vector([1.0, 0.0], user_id="alice", scopes=["shared", "user"])
+        self.assertEqual(sorted(r.snippet for r in results), ["text alice", "text shared"])
+        results = self.storage.search_vector([1.0, 0.0])
+        self.assertEqual([r.snippet for r in results], ["text shared"])
+
+    def test_index_follows_writes_and_deletes(self):
+        self.storage.save_chunks_batch([_chunk("a", [1.0, 0.0]), _chunk("b", [0.0, 1.0], path="memory/b.md")])
+        self.assertEqual(len(self.storage.search_vector([1.0, 1.0])), 2)
+
+        # a second storage on the same db shares the index
+        other = MemoryStorage(self.storage.db_path)
+        other.save_chunks_batch([_chunk("c", [1.0, 1.0], path="memory/c.md")])
+        self.assertEqual(len(self.storage.search_vector([1.0, 1.0])), 3)
+
+        self.storage.delete_by_path("memory/a.md")
+        self.assertEqual(sorted(r.snippet for r in self.storage.search_vector([1.0, 1.0])), ["text b", "text c"])
+
+        # replacing a chunk id moves it to its new vector
+        self.storage.save_chunks_batch([_chunk("b", [-1.0, 0.0], path="memory/b.md")])
+        self.assertEqual([r.snippet for r in self.storage.search_vector([0.0, 1.0])], ["text c"])
+        other.close()
+
+    def test_duplicate_ids_in_one_batch(self):
+        index = VectorIndex(mode="flat")
+        index.ensure_loaded(lambda: iter([
+            ("a", "shared", None, "memory/a.md", [1.0, 0.0]),
+            ("b", "shared", None, "memory/b.md", [1.0, 1.0]),
+            ("a", "shared", None, "memory/a2.md", [0.0, 1.0]),
+        ]))
+        self.assertEqual(index.stats()["vectors"], 2)
+        self.assertEqual([cid for _, cid in index.search([0.0, 1.0], ["shared"])], ["a", "b"])
+        self.assertEqual([cid for _, cid in index.search([1.0, -1.0], ["shared"])], [])
+
+        index.add([("b", "shared", None, "memory/b.md", [1.0, 0.0]), ("b", "shared", None, "memory/b.md", None)])
+        self.assertEqual(index.stats()["vectors"], 1)
+        index.remove_path("memory/a.md")
+        self.assertEqual(index.stats()["vectors"], 1)
+        index.remove_path("memory/a2.md")
+        self.assertEqual(index.stats()["vectors"], 0)
+        self.assertEqual(index.search([0.0, 1.0], ["shared"]), [])
+
+    @unittest.skipIf(vector_index.np is None, "numpy not installed")
+    def test_ivf_mode_recall(self):
+        rng = random.Random(7)
+        centers = [[rng.gauss(0, 1) for _ in range(8)] for _ in range(20)]
+        rows = []
+        for i in range(4000):
+            center = centers[i % 20]
+            rows.append((f"c{i}", "shared", None, f"p{i}", [v + rng.gauss(0, 0.05) for v in center]))
+        flat = VectorIndex(mode="flat")
+        ivf = VectorIndex(mode="ivf", nprobe=4)
+        for index in (flat, ivf):
+            index.ensure_loaded(lambda: iter(rows))
+        query = [v + 0.01 for v in centers[3]]
+        expected = {cid for _, cid in flat.search(query, ["shared"], limit=10)}
+        found = {cid for _, cid in ivf.search(query, ["shared"], limit=10)}
+        self.assertGreaterEqual(len(expected & found), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
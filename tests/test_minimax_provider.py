@@ -107,6 +107,13 @@ class TestMinimaxVoice(unittest.TestCase):
     def test_text_to_voice_success(self):
         """Test textToVoice with mocked SSE stream response."""
         import os
+        import tempfile
+        # textToVoice writes into ./tmp, keep it out of the repo
+        cwd = os.getcwd()
+        workdir = tempfile.TemporaryDirectory()
+        os.chdir(workdir.name)
+        self.addCleanup(workdir.cleanup)
+        self.addCleanup(os.chdir, cwd)
         os.makedirs("tmp", exist_ok=True)
 
         # Build fake SSE stream bytes
@@ -130,7 +137,7 @@ class TestMinimaxVoice(unittest.TestCase):
         mock_conf.get = conf_get
 
         with patch("voice.minimax.minimax_voice.conf", return_value=mock_conf):
-            with patch("voice.minimax.minimax_voice.requests.post", return_value=mock_response):
+            with patch("voice.minimax.minimax_voice.http_client.post", return_value=mock_response):
                 from voice.minimax import minimax_voice
                 import importlib
                 importlib.reload(minimax_voice)
@@ -156,7 +163,7 @@ class TestMinimaxVoice(unittest.TestCase):
         mock_conf.get = conf_get
 
         with patch("voice.minimax.minimax_voice.conf", return_value=mock_conf):
-            with patch("voice.minimax.minimax_voice.requests.post", return_value=mock_response):
+            with patch("voice.minimax.minimax_voice.http_client.post", return_value=mock_response):
                 from voice.minimax import minimax_voice
                 import importlib
                 importlib.reload(minimax_voice)
@@ -0,0 +1,219 @@
+# encoding:utf-8
+"""
+Unit tests for parallel execution of tool calls within one agent step:
+  - tool_result blocks keep the order of the tool calls
+  - consecutive parallel-safe calls overlap, bounded by tool_parallelism
+  - side-effecting tools are barriers and run alone, in order
+  - every start event has its end event, emitted from the run thread
+  - only tools that run alone get on_update, reported as tool_execution_update,
+    and it is cleared when the call returns
+  - retry protection checks each batched call against the results before it
+  - a critical error in a batch ends the calls after it as cancelled
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.protocol.agent_stream import AgentStreamExecutor
+from agent.protocol.models import LLMModel
+from agent.tools.base_tool import BaseTool, ToolResult
+
+
+class _Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.log = []
+
+    def enter(self, name):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.log.append(("start", name))
+
+    def leave(self, name):
+        with self.lock:
+            self.active -= 1
+            self.log.append(("end", name))
+
+
+class _SleepTool(BaseTool):
+    description = "sleep"
+    params = {"type": "object", "properties": {"tag": {"type": "string"}}}
+
+    def __init__(self, name, recorder, parallel_safe, delay=0.05):
+        self.name = name
+        self.parallel_safe = parallel_safe
+        self.recorder = recorder
+        self.delay = delay
+
+    def execute(self, params):
+        tag = f"{self.name}:{params['tag']}"
+        self.recorder.enter(tag)
+        if self.on_update:
+            self.on_update({"output": tag})
+        time.sleep(self.delay)
+        self.recorder.leave(tag)
+        if params.get("fail"):
+            return ToolResult.fail(f"{tag} failed")
+        return ToolResult.success(f"{tag} done")
+
+
+class _ScriptedModel(LLMModel):
+    """First call answers with the given tool calls, the next one with text."""
+
+    def __init__(self, calls):
+        super().__init__(model="test-model")
+        self.script = calls
+        self.calls = 0
+
+    def call_stream(self, request):
+        self.calls += 1
+        if self.calls == 1:
+            yield {"choices": [{"delta": {"tool_calls": [
+                {"index": i, "id": f"call_{i}", "function": {"name": name, "arguments": args}}
+                for i, (name, args) in enumerate(self.script)
+            ]}}]}
+        else:
+            yield {"choices": [{"delta": {"content": "done"}, "finish_reason": "stop"}]}
+
+
+class _FakeAgent:
+    memory_manager = None
+    skill_manager = None
+    max_context_tokens = None
+
+    def _estimate_message_tokens(self, msg):
+        return 1
+
+    def _get_model_context_window(self):
+        return 1_000_000
+
+
+def _run(script, parallelism=4, delay=0.05, history=()):
+    recorder = _Recorder()
+    tools = [
+        _SleepTool("read", recorder, True, delay),
+        _SleepTool("web_fetch", recorder, True, delay),
+        _SleepTool("write", recorder, False, delay),
+    ]
+    recorder.tools = tools
+    events = []
+    executor = AgentStreamExecutor(
+        agent=_FakeAgent(), model=_ScriptedModel(script), system_prompt="sys", tools=tools,
+        on_event=lambda e: events.append((e["type"], e["data"], threading.current_thread())),
+        tool_parallelism=parallelism,
+    )
+    executor.tool_failure_history = list(history)
+    t0 = time.perf_counter()
+    executor.run_stream("go")
+    elapsed = time.perf_counter() - t0
+    results = next(m for m in executor.messages
+                   if m["role"] == "user" and isinstance(m["content"], list)
+                   and m["content"][0].get("type") == "tool_result")["content"]
+    return recorder, events, results, elapsed
+
+
+def _call(name, tag, **extra):
+    args = ", ".join([f'"tag": "{tag}"'] + [f'"{k}": {str(v).lower()}' for k, v in extra.items()])
+    return name, "{" + args + "}"
+
+
+class TestParallelTools(unittest.TestCase):
+
+    def test_results_in_call_order(self):
+        script = [_call("web_fetch", "a"), _call("read", "b"), _call("web_fetch", "c", fail=True),
+                  _call("read", "d")]
+        recorder, events, results, elapsed = _run(script)
+        self.assertEqual([r["tool_use_id"] for r in results], ["call_0", "call_1", "call_2", "call_3"])
+        self.assertEqual(results[1]["content"], "read:b done")
+        self.assertTrue(results[2]["is_error"])
+        self.assertEqual(recorder.peak, 4)
+        self.assertLess(elapsed, 0.05 * 4)
+
+    def test_parallelism_bound(self):
+        script = [_call("read", str(i)) for i in range(6)]
+        recorder, _, results, _ = _run(script, parallelism=2)
+        self.assertEqual(recorder.peak, 2)
+        self.assertEqual([r["content"] for r in results], [f"read:{i} done" for i in range(6)])
+
+        recorder, _, _, _ = _run(script, parallelism=1)
+        self.assertEqual(recorder.peak, 1)
+
+    def test_side_effecting_tool_is_barrier(self):
+        script = [_call("read", "a"), _call("read", "b"), _call("write", "w"), _call("read", "c")]
+        recorder, _, results, _ = _run(script)
+        log = recorder.log
+        w_start, w_end = log.index(("start", "write:w")), log.index(("end", "write:w"))
+        self.assertEqual(w_end, w_start + 1)
+        self.assertEqual({e for e in log[:w_start]},
+                         {("start", "read:a"), ("end", "read:a"), ("start", "read:b"), ("end", "read:b")})
+        self.assertEqual(log[w_end + 1:], [("start", "read:c"), ("end", "read:c")])
+        self.assertEqual([r["content"] for r in results], ["read:a done", "read:b done", "write:w done", "read:c done"])
+
+    def test_events_paired_on_run_thread(self):
+        script = [_call("read", "a"), _call("web_fetch", "b"), _call("write", "c"), _call("nope", "d")]
+        _, events, results, _ = _run(script)
+        run_thread = threading.current_thread()
+        starts = [d["tool_call_id"] for t, d, _ in events if t == "tool_execution_start"]
+        ends = [d["tool_call_id"] for t, d, _ in events if t == "tool_execution_end"]
+        self.assertEqual(starts, ["call_0", "call_1", "call_2", "call_3"])
+        self.assertEqual(ends, starts)
+        self.assertTrue(all(th is run_thread for _, _, th in events))
+        self.assertIn("not found", results[3]["content"])
+
+    def test_progress_of_tools_run_alone(self):
+        script = [_call("read", "a"), _call("write", "b"), _call("web_fetch", "c")]
+        recorder, events, _, _ = _run(script)
+        self.assertTrue(all(tool.on_update is None for tool in recorder.tools))
+        self.assertEqual([(t, d["tool_call_id"]) for t, d, _ in events if t.startswith("tool_execution")], [
+            ("tool_execution_start", "call_0"), ("tool_execution_end", "call_0"),
+            ("tool_execution_start", "call_1"), ("tool_execution_update", "call_1"),
+            ("tool_execution_end", "call_1"),
+            ("tool_execution_start", "call_2"), ("tool_execution_end", "call_2"),
+        ])
+        update = next(d for t, d, _ in events if t == "tool_execution_update")
+        self.assertEqual((update["tool_name"], update["output"]), ("write", "write:b"))
+
+    def test_retry_protection_sees_earlier_batch_results(self):
+        # Four earlier read(a) calls: the batch's first read(a) is the fifth
+        # and runs, the second is the sixth and is stopped, as when run alone
+        from agent.protocol.agent_stream import AgentStreamExecutor as E
+        prior = [("read", E._hash_args(None, {"tag": "a"}), True)] * 4
+        script = [_call("read", "a"), _call("read", "a"), _call("web_fetch", "b")]
+        _, events, results, _ = _run(script, history=prior)
+        self.assertEqual(results[0]["content"], "read:a done")
+        self.assertTrue(results[1]["is_error"])
+        self.assertIn("5 次", results[1]["content"])
+        self.assertEqual(results[2]["content"], "web_fetch:b done")
+        ends = [d["tool_call_id"] for t, d, _ in events if t == "tool_execution_end"]
+        self.assertEqual(ends, ["call_0", "call_1", "call_2"])
+
+    def test_critical_error_cancels_rest_of_batch(self):
+        # Eight failed reads in a row: the batch's first read is critical and
+        # aborts the run, the calls already started are ended as cancelled
+        from agent.protocol.agent_stream import AgentStreamExecutor as E
+        prior = [("read", E._hash_args(None, {"tag": str(i)}), False) for i in range(8)]
+        script = [_call("read", "a"), _call("web_fetch", "b"), _call("web_fetch", "c")]
+        recorder = _Recorder()
+        events = []
+        executor = AgentStreamExecutor(
+            agent=_FakeAgent(), model=_ScriptedModel(script), system_prompt="sys",
+            tools=[_SleepTool("read", recorder, True), _SleepTool("web_fetch", recorder, True)],
+            on_event=lambda e: events.append((e["type"], e["data"])), tool_parallelism=4,
+        )
+        executor.tool_failure_history = prior
+        executor.run_stream("go")
+        starts = [d["tool_call_id"] for t, d in events if t == "tool_execution_start"]
+        ends = [(d["tool_call_id"], d["status"]) for t, d in events if t == "tool_execution_end"]
+        self.assertEqual(starts, ["call_0", "call_1", "call_2"])
+        self.assertEqual(ends, [("call_0", "critical_error"), ("call_1", "cancelled"), ("call_2", "cancelled")])
+
+
+if __name__ == "__main__":
+    unittest.main()
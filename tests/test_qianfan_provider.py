@@ -168,7 +168,7 @@ class TestQianfanBot(unittest.TestCase):
                 from models.qianfan.qianfan_bot import QianfanBot
 
                 bot = QianfanBot()
-                with patch("models.qianfan.qianfan_bot.requests.post", return_value=fake_response) as post:
+                with patch("models.qianfan.qianfan_bot.http_client.post", return_value=fake_response) as post:
                     result = bot.reply_text(session)
 
         self.assertEqual(result["content"], "你好，我是文心。")
@@ -196,7 +196,7 @@ class TestQianfanBot(unittest.TestCase):
                 from models.qianfan.qianfan_bot import QianfanBot
 
                 bot = QianfanBot()
-                with patch("models.qianfan.qianfan_bot.requests.post", return_value=fake_response):
+                with patch("models.qianfan.qianfan_bot.http_client.post", return_value=fake_response):
                     result = bot.reply_text(session)
 
         self.assertEqual(result["completion_tokens"], 0)
@@ -216,7 +216,7 @@ class TestQianfanBot(unittest.TestCase):
                 from models.qianfan.qianfan_bot import QianfanBot
 
                 bot = QianfanBot()
-                with patch("models.qianfan.qianfan_bot.requests.post", return_value=fake_response) as post:
+                with patch("models.qianfan.qianfan_bot.http_client.post", return_value=fake_response) as post:
                     result = bot.reply_text(session)
 
         self.assertEqual(result["completion_tokens"], 0)
@@ -269,7 +269,7 @@ class TestQianfanBot(unittest.TestCase):
                 from models.qianfan.qianfan_bot import QianfanBot
 
                 bot = QianfanBot()
-                with patch("models.qianfan.qianfan_bot.requests.post", return_value=fake_response) as post:
+                with patch("models.qianfan.qianfan_bot.http_client.post", return_value=fake_response) as post:
                     result = bot.call_vision(
                         image_url="data:image/png;base64,AAAA",
                         question="这张图里有什么？",
@@ -313,7 +313,7 @@ class TestQianfanBot(unittest.TestCase):
                 from models.qianfan.qianfan_bot import QianfanBot
 
                 bot = QianfanBot()
-                with patch("models.qianfan.qianfan_bot.requests.post", return_value=fake_response) as post:
+                with patch("models.qianfan.qianfan_bot.http_client.post", return_value=fake_response) as post:
                     result = bot.call_vision(
                         image_url="data:image/jpeg;base64,BBBB",
                         question="识别文字",
@@ -337,7 +337,7 @@ class TestQianfanBot(unittest.TestCase):
                 from models.qianfan.qianfan_bot import QianfanBot
 
                 bot = QianfanBot()
-                with patch("models.qianfan.qianfan_bot.requests.post", return_value=fake_response):
+                with patch("models.qianfan.qianfan_bot.http_client.post", return_value=fake_response):
                     result = bot.call_vision(
                         image_url="data:image/png;base64,AAAA",
                         question="这张图里有什么？",
@@ -0,0 +1,126 @@
+# encoding:utf-8
+"""
+Unit tests for the read tool's line-offset index and windowed text reads:
+  - line offsets match a full split for every line, across block boundaries
+  - offset/limit windows (including negative tail offsets) deep into a large
+    file return exactly the requested lines with the full file's line count
+  - the character cap ends a window on a line boundary with a continue hint
+  - BOM / CRLF handling and an over-long first line
+  - a huge line after the first is never read whole
+  - the cached index is rebuilt when the file changes
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.tools.read import Read
+from agent.tools.read.line_index import LineIndex, get_line_index
+
+
+class TestLineIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.tool = Read({"cwd": self.tmp})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wb") as f:
+            f.write(data if isinstance(data, bytes) else data.encode("utf-8"))
+        return path
+
+    def _read(self, name, **args):
+        result = self.tool.execute(dict(path=name, **args))
+        self.assertEqual(result.status, "success", result.result)
+        return result.result
+
+    def test_offsets_match_split(self):
+        rng = random.Random(5)
+        text = "\n".join("x" * rng.choice([0, 1, 3, 20, 70]) + "中" * rng.randint(0, 3) for _ in range(2000))
+        for suffix in ("", "\n"):
+            path = self._write("a.txt", text + suffix)
+            raw = (text + suffix).encode("utf-8")
+            index = LineIndex(path, block_size=64)
+            expected = (text + suffix).split("\n")
+            self.assertEqual(index.total_lines, len(expected))
+            with open(path, "rb") as f:
+                pos = 0
+                for line, content in enumerate(expected):
+                    self.assertEqual(index.line_offset(f, line), pos)
+                    pos += len(content.encode("utf-8")) + 1
+                self.assertEqual(index.read_lines(f, 1500, 30, 10 ** 6)[0], expected[1500:1530])
+            self.assertEqual(len(raw), os.path.getsize(path))
+
+    def test_window_deep_in_large_file(self):
+        lines = [f"line {i:06d} " + "y" * (i % 50) for i in range(1, 100001)]
+        self._write("big.log", "\n".join(lines) + "\n")
+        result = self._read("big.log", offset=90000, limit=101)
+        self.assertEqual(result["total_lines"], 100001)
+        self.assertEqual(result["start_line"], 90000)
+        body, hint = result["content"].split("\n\n")
+        self.assertEqual(body.split("\n"), lines[89999:90100])
+        self.assertEqual(hint, "[9901 more lines in file. Use offset=90101 to continue.]")
+
+        tail = self._read("big.log", offset=-21)
+        self.assertEqual(tail["content"], "\n".join(lines[-20:]) + "\n")
+        self.assertEqual(tail["start_line"], 99981)
+
+        self.assertEqual(self.tool.execute({"path": "big.log", "offset": 100002}).status, "error")
+
+    def test_char_cap_ends_on_line_boundary(self):
+        lines = ["z" * 99 for _ in range(1000)]
+        self._write("wide.txt", "\n".join(lines))
+        result = self._read("wide.txt")
+        body, hint = result["content"].split("\n\n")
+        self.assertEqual(body.split("\n"), lines[:204])
+        self.assertEqual(hint, "[Showing lines 1-204 of 1000 (20.0KB limit). Use offset=205 to continue.]")
+        self.assertEqual(self._read("wide.txt", offset=205, limit=2)["content"].split("\n\n")[0],
+                         "\n".join(lines[204:206]))
+
+    def test_bom_crlf_and_long_first_line(self):
+        self._write("win.txt", b"\xef\xbb\xbfone\r\ntwo\r\nthree")
+        result = self._read("win.txt")
+        self.assertEqual(result["content"], "one\ntwo\nthree")
+        self.assertEqual(self._read("win.txt", offset=-1)["content"], "three")
+
+        self._write("long.txt", "a" * 100000 + "\nnext")
+        result = self._read("long.txt")
+        self.assertTrue(result["content"].startswith("a" * 20480 + "\n\n[Line 1 is longer than"))
+        self.assertEqual(result["total_lines"], 2)
+        self.assertEqual(self._read("long.txt", offset=2)["content"], "next")
+
+    def test_huge_later_line_read_bounded(self):
+        path = self._write("huge.txt", "first\n" + "x" * 3_000_000 + "\nlast")
+        index = LineIndex(path)
+        with open(path, "rb") as f:
+            self.assertEqual(index.read_lines(f, 0, 3, 1000), (["first"], True, False))
+            self.assertLess(f.tell(), 10_000)
+            self.assertEqual(index.read_lines(f, 1, 3, 1000), (["x" * 1000], True, True))
+            self.assertLess(f.tell(), 10_000)
+
+    def test_index_follows_file_changes(self):
+        path = self._write("grow.log", "a\nb\n")
+        first = get_line_index(path)
+        self.assertIs(get_line_index(path), first)
+        with open(path, "ab") as f:
+            f.write(b"c\n")
+        self.assertEqual(get_line_index(path).total_lines, 4)
+        self.assertEqual(self._read("grow.log", offset=-2)["content"], "c\n")
+
+    def test_invalid_utf8(self):
+        self._write("bin.txt", b"ok\n\xff\xfe\x00bad\n")
+        result = self.tool.execute({"path": "bin.txt"})
+        self.assertEqual(result.status, "error")
+        self.assertIn("not a valid text file", result.result)
+
+
+if __name__ == "__main__":
+    unittest.main()
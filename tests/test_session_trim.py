@@ -0,0 +1,181 @@
+# encoding:utf-8
+"""
+Equivalence tests for the shared Session trimming against the per-provider
+loops it replaced (pop one message, re-count the whole history, repeat):
+  - the same messages survive and the same token total is returned, for
+    every provider session, over random histories and budgets
+  - the estimated path (token counting unavailable) matches as well
+  - appends, resets and replaced message lists keep the cached counts right
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.baidu.baidu_wenxin_session import BaiduWenxinSession
+from models.chatgpt.chat_gpt_session import ChatGPTSession
+from models.dashscope.dashscope_session import DashscopeSession
+from models.deepseek.deepseek_session import DeepSeekSession
+from models.doubao.doubao_session import DoubaoSession
+from models.minimax.minimax_session import MinimaxSession
+from models.modelscope.modelscope_session import ModelScopeSession
+from models.moonshot.moonshot_session import MoonshotSession
+from models.openai.open_ai_session import OpenAISession
+from models.qianfan.qianfan_session import QianfanSession
+from models.zhipuai.zhipu_ai_session import ZhipuAISession
+
+
+def _legacy_pop_after_system(session, max_tokens, cur_tokens, reply, query, estimate=None):
+    """The loop shared by the ChatGPT-style sessions (and Minimax with sender_type)."""
+    precise = True
+    try:
+        cur_tokens = session._count_tokens(session.messages)
+    except Exception:
+        precise = False
+        if cur_tokens is None:
+            raise
+    messages = session.messages
+    while cur_tokens > max_tokens:
+        if len(messages) > 2:
+            messages.pop(1)
+        elif len(messages) == 2 and reply(messages[1]):
+            messages.pop(1)
+            cur_tokens = session._count_tokens(messages) if precise else cur_tokens - max_tokens
+            break
+        else:
+            break
+        cur_tokens = session._count_tokens(messages) if precise else cur_tokens - max_tokens
+    return cur_tokens
+
+
+def _legacy_baidu(session, max_tokens, cur_tokens):
+    cur_tokens = session._count_tokens(session.messages)
+    messages = session.messages
+    while cur_tokens > max_tokens:
+        if len(messages) >= 2:
+            messages.pop(0)
+            messages.pop(0)
+        else:
+            break
+        cur_tokens = session._count_tokens(messages)
+    return cur_tokens
+
+
+def _legacy_openai_estimated(session, max_tokens, cur_tokens):
+    messages = session.messages
+    while cur_tokens > max_tokens:
+        if len(messages) > 1:
+            messages.pop(0)
+        elif len(messages) == 1 and messages[0]["role"] == "assistant":
+            messages.pop(0)
+            cur_tokens = len(str(session))
+            break
+        else:
+            break
+        cur_tokens = len(str(session))
+    return cur_tokens
+
+
+def _role_reply(msg):
+    return msg.get("role") == "assistant"
+
+
+_ROLE_SESSIONS = [
+    lambda: ChatGPTSession("s", "system prompt", model="wenxin"),
+    lambda: DashscopeSession("s", "system prompt"),
+    lambda: DeepSeekSession("s", "system prompt"),
+    lambda: DoubaoSession("s", "system prompt"),
+    lambda: ModelScopeSession("s", "system prompt"),
+    lambda: MoonshotSession("s", "system prompt"),
+    lambda: QianfanSession("s", "system prompt"),
+    lambda: ZhipuAISession("s", "system prompt"),
+]
+
+
+def _fill(session, rng, turns):
+    for i in range(turns):
+        session.add_query("问" * rng.randint(1, 40) + f" q{i}")
+        if rng.random() < 0.9:
+            session.add_reply("answer " * rng.randint(1, 30))
+
+
+def _clone(session):
+    twin = type(session).__new__(type(session))
+    twin.__dict__.update(session.__dict__)
+    twin.messages = list(session.messages)
+    twin._forget_counts()
+    return twin
+
+
+class TestSessionTrim(unittest.TestCase):
+
+    def _check(self, make, legacy, seed_count=60):
+        rng = random.Random(7)
+        for seed in range(seed_count):
+            session = make()
+            _fill(session, rng, rng.randint(0, 30))
+            reference = _clone(session)
+            max_tokens = rng.choice([1, 10, 50, 200, 400, 10 ** 6])
+            expected = legacy(reference, max_tokens, None)
+            self.assertEqual(session.discard_exceeding(max_tokens, None), expected)
+            self.assertEqual(session.messages, reference.messages)
+            self.assertEqual(session.calc_tokens(), session._count_tokens(session.messages))
+
+    def test_role_sessions_match_legacy(self):
+        for make in _ROLE_SESSIONS:
+            with self.subTest(session=type(make()).__name__):
+                self._check(make, lambda s, m, c: _legacy_pop_after_system(
+                    s, m, c, _role_reply, None))
+
+    def test_minimax_matches_legacy(self):
+        self._check(lambda: MinimaxSession("s"), lambda s, m, c: _legacy_pop_after_system(
+            s, m, c, lambda msg: msg["sender_type"] == "BOT", None))
+
+    def test_baidu_matches_legacy(self):
+        self._check(lambda: BaiduWenxinSession("s"), _legacy_baidu)
+
+    def test_estimated_path_matches_legacy(self):
+        def failing(messages):
+            raise RuntimeError("tokenizer unavailable")
+
+        rng = random.Random(11)
+        for seed in range(60):
+            turns = rng.randint(0, 20)
+            max_tokens = rng.choice([5, 50, 500])
+            cur_tokens = rng.randint(0, 5000)
+
+            session = ChatGPTSession("s", "system prompt")
+            _fill(session, rng, turns)
+            reference = _clone(session)
+            session._count_tokens = failing
+            reference._count_tokens = failing
+            expected = _legacy_pop_after_system(reference, max_tokens, cur_tokens, _role_reply, None)
+            self.assertEqual(session.discard_exceeding(max_tokens, cur_tokens), expected)
+            self.assertEqual(session.messages, reference.messages)
+
+            session = OpenAISession("s", "system prompt")
+            _fill(session, rng, turns)
+            reference = _clone(session)
+            session._count_tokens = failing
+            expected = _legacy_openai_estimated(reference, max_tokens, cur_tokens)
+            self.assertEqual(session.discard_exceeding(max_tokens, cur_tokens), expected)
+            self.assertEqual(session.messages, reference.messages)
+
+    def test_cached_counts_follow_history(self):
+        session = DoubaoSession("s", "sys")
+        _fill(session, random.Random(1), 10)
+        self.assertEqual(session.calc_tokens(), session._count_tokens(session.messages))
+        session.add_query("x" * 100)
+        self.assertEqual(session.calc_tokens(), session._count_tokens(session.messages))
+        session.messages[3] = {"role": "assistant", "content": "replaced"}
+        self.assertEqual(session.calc_tokens(), session._count_tokens(session.messages))
+        session.messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "new list"}]
+        self.assertEqual(session.calc_tokens(), 3 + 8)
+        session.reset()
+        self.assertEqual(session.calc_tokens(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# encoding:utf-8
+"""
+Unit tests for the incremental SSE decoder:
+  - \\n\\n, \\r\\r and \\r\\n\\r\\n terminators, including a CRLF split across chunks
+  - UTF-8 characters split across chunks decode intact
+  - byte-by-byte feeding yields the same events as one big chunk
+  - comments, event/id fields, multi-line data and an unterminated tail
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from common.sse import SSEDecoder, SSEEvent, iter_sse
+
+
+def _decode(chunks):
+    return list(iter_sse(chunks))
+
+
+class TestSSEDecoder(unittest.TestCase):
+
+    def test_all_terminators(self):
+        for sep in (b"\n", b"\r", b"\r\n"):
+            stream = b"data: one" + sep + sep + b"data: two" + sep + sep
+            self.assertEqual([e.data for e in _decode([stream])], ["one", "two"], sep)
+
+    def test_crlf_split_across_chunks(self):
+        decoder = SSEDecoder()
+        events = decoder.feed(b"data: a\r")
+        events += decoder.feed(b"\n\r")
+        events += decoder.feed(b"\ndata: b\r\n\r\n")
+        self.assertEqual(events, [SSEEvent("a"), SSEEvent("b")])
+        self.assertEqual(decoder.flush(), [])
+
+        # A bare "\r" ending switches to the slower path mid-stream
+        self.assertEqual([e.data for e in _decode([b"data: a\r\n\r\n", b"data: b\r", b"\rdata: c\r\r"])],
+                         ["a", "b", "c"])
+
+    def test_multibyte_split(self):
+        raw = 'data: {"content": "你好，世界"}\n\n'.encode("utf-8")
+        events = _decode([raw[:12], raw[12:13], raw[13:]])
+        self.assertEqual(events[0].data, '{"content": "你好，世界"}')
+
+    def test_byte_by_byte_matches_whole(self):
+        stream = (
+            b": keep-alive\n\n"
+            b"event: content_block_delta\r\ndata: {\"x\": 1}\r\n\r\n"
+            b"id: 7\ndata: first\ndata:second\n\n"
+            b"retry: 100\nunknown: field\ndata\n\n"
+            b"data: [DONE]\n\n"
+        )
+        whole = _decode([stream])
+        single = _decode([stream[i:i + 1] for i in range(len(stream))])
+        self.assertEqual(whole, single)
+        self.assertEqual(whole, [
+            SSEEvent('{"x": 1}', "content_block_delta", None),
+            SSEEvent("first\nsecond", "message", "7"),
+            SSEEvent("", "message", "7"),
+            SSEEvent("[DONE]", "message", "7"),
+        ])
+
+    def test_unterminated_tail_is_flushed(self):
+        self.assertEqual([e.data for e in _decode([b"data: a\n\ndata: b"])], ["a", "b"])
+        self.assertEqual(_decode([b": only a comment"]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
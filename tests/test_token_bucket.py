@@ -0,0 +1,198 @@
+# encoding:utf-8
+"""
+Unit tests for the lazy-refill TokenBucket and RateLimiter:
+  - a bucket starts full, refills from elapsed time and never exceeds capacity
+  - reservations wait for the deficit, are refused beyond the timeout without
+    taking tokens, and queue up in arrival order
+  - weighted costs, including costs above the capacity
+  - RateLimiter reserves from all limits of a key together, keys are separate
+  - async waiting
+  - OpenAI-compatible bots and the agent bots with their own call_with_tools
+    (DeepSeek, Moonshot, Doubao, ModelScope, MiniMax) enforce the limits
+    configured for their provider
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from common import token_bucket
+from common.token_bucket import RateLimiter, TokenBucket, get_rate_limiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_refill_from_elapsed_time(self):
+        clock = _Clock()
+        bucket = TokenBucket(60, clock=clock)  # 1 token per second
+        self.assertEqual(bucket.tokens, 60)
+        for _ in range(60):
+            self.assertTrue(bucket.try_get_token())
+        self.assertFalse(bucket.try_get_token())
+        clock.now += 2.5
+        self.assertAlmostEqual(bucket.tokens, 2.5)
+        clock.now += 3600
+        self.assertEqual(bucket.tokens, 60)
+
+    def test_reserve_waits_for_deficit(self):
+        clock = _Clock()
+        bucket = TokenBucket(60, clock=clock)
+        bucket.reserve(60)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        self.assertAlmostEqual(bucket.reserve(), 2.0)  # queued behind the first waiter
+        self.assertIsNone(bucket.reserve(1, timeout=2.5))
+        self.assertAlmostEqual(bucket.tokens, -2)  # the refused reservation took nothing
+        clock.now += 3
+        self.assertAlmostEqual(bucket.reserve(1, timeout=0), 0.0)
+
+    def test_weighted_costs(self):
+        clock = _Clock()
+        bucket = TokenBucket(6000, clock=clock)  # 100 per second
+        self.assertEqual(bucket.reserve(4000), 0)
+        self.assertAlmostEqual(bucket.reserve(2500), 5.0)
+        clock.now += 5
+        self.assertAlmostEqual(bucket.reserve(9000), 90.0)  # above capacity: waits, still succeeds
+
+    def test_get_token_blocks_and_times_out(self):
+        bucket = TokenBucket(600, timeout=0.05)  # 10 per second
+        bucket.reserve(600)
+        self.assertFalse(bucket.get_token())
+        t0 = time.monotonic()
+        self.assertTrue(bucket.get_token(timeout=1))
+        self.assertGreaterEqual(time.monotonic() - t0, 0.08)
+
+    def test_no_threads(self):
+        before = threading.active_count()
+        buckets = [TokenBucket(20) for _ in range(50)]
+        self.assertEqual(threading.active_count(), before)
+        for bucket in buckets:
+            bucket.close()
+
+    def test_async_wait(self):
+        bucket = TokenBucket(600)
+        bucket.reserve(600)
+
+        async def run():
+            t0 = time.monotonic()
+            ok = await asyncio.gather(bucket.get_token_async(), bucket.get_token_async(timeout=0))
+            return ok, time.monotonic() - t0
+
+        (first, second), elapsed = asyncio.run(run())
+        self.assertTrue(first)
+        self.assertFalse(second)
+        self.assertGreaterEqual(elapsed, 0.08)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_all_limits_reserved_together(self):
+        clock = _Clock()
+        limiter = RateLimiter({"rpm": 60, "tpm": 600, "off": 0}, clock=clock)
+        self.assertEqual(limiter.reserve("a", {"tpm": 500}), 0)
+        # rpm has room, tpm needs 50 more tokens at 10/s
+        self.assertIsNone(limiter.reserve("a", {"tpm": 150}, timeout=1))
+        self.assertAlmostEqual(limiter.reserve("a", {"tpm": 150}), 5.0)
+        buckets = limiter._buckets["a"]
+        self.assertAlmostEqual(buckets["rpm"].tokens, 58)
+        self.assertAlmostEqual(buckets["tpm"].tokens, -50)
+        self.assertEqual(limiter.reserve("b", {"tpm": 600}), 0)  # other keys are independent
+        self.assertNotIn("off", buckets)
+
+    def test_rpm_limit(self):
+        clock = _Clock()
+        limiter = RateLimiter({"rpm": 3}, timeout=0, clock=clock)
+        self.assertEqual([limiter.acquire() for _ in range(4)], [True, True, True, False])
+        clock.now += 20
+        self.assertTrue(limiter.acquire())
+
+    def test_async_acquire(self):
+        limiter = RateLimiter({"rpm": 6000})
+        limiter.reserve(costs={"rpm": 6000})
+        self.assertTrue(asyncio.run(limiter.acquire_async(costs={"rpm": 2})))
+
+    def test_shared_limiter_follows_config(self):
+        first = get_rate_limiter("test-provider", {"rpm": 10})
+        self.assertIs(get_rate_limiter("test-provider", {"rpm": 10}), first)
+        self.assertIsNot(get_rate_limiter("test-provider", {"rpm": 20}), first)
+        self.assertEqual(get_rate_limiter("test-provider", {"rpm": 0, "tpm": None}).limits, {})
+
+
+class TestBotRateLimit(unittest.TestCase):
+
+    def setUp(self):
+        token_bucket._limiters.clear()
+
+    def _bot(self):
+        from models.openai_compatible_bot import OpenAICompatibleBot
+
+        class _Bot(OpenAICompatibleBot):
+            rate_limit_provider = "fake"
+            calls = 0
+
+            def get_api_config(self):
+                return {"api_key": "k", "model": "fake-model"}
+
+            def _handle_sync_response(self, request_params, api_key, api_base):
+                _Bot.calls += 1
+                return {"choices": []}
+
+        return _Bot()
+
+    def test_configured_limits_enforced(self):
+        bot = self._bot()
+        messages = [{"role": "user", "content": "hello"}]
+        config = {"rate_limits": {"fake": {"rpm": 2}}, "rate_limit_timeout": 0}
+        with mock.patch("models.rate_limit.conf", return_value=config):
+            results = [bot.call_with_tools(messages) for _ in range(3)]
+        self.assertEqual(type(bot).calls, 2)
+        self.assertEqual(results[:2], [{"choices": []}] * 2)
+        self.assertTrue(results[2]["error"])
+        self.assertIn("rate limit", results[2]["message"])
+
+    def test_tpm_charges_prompt_and_max_tokens(self):
+        bot = self._bot()
+        config = {"rate_limits": {"fake": {"tpm": 1000}}, "rate_limit_timeout": 0}
+        with mock.patch("models.rate_limit.conf", return_value=config):
+            self.assertFalse(bot._acquire_rate_limit([{"role": "user", "content": "hi"}], max_tokens=1000))
+            self.assertTrue(bot._acquire_rate_limit([{"role": "user", "content": "hi"}], max_tokens=900))
+            limiter = get_rate_limiter("fake", {"tpm": 1000}, 0)
+            self.assertLess(limiter._buckets[None]["tpm"].tokens, 100)
+
+    def test_agent_bots_limited(self):
+        from models.deepseek.deepseek_bot import DeepSeekBot
+        from models.doubao.doubao_bot import DoubaoBot
+        from models.minimax.minimax_bot import MinimaxBot
+        from models.modelscope.modelscope_bot import ModelScopeBot
+        from models.moonshot.moonshot_bot import MoonshotBot
+
+        messages = [{"role": "user", "content": "hello"}]
+        for cls in (DeepSeekBot, MoonshotBot, DoubaoBot, ModelScopeBot, MinimaxBot):
+            bot = cls.__new__(cls)  # no config or session setup needed to be refused
+            bot.args = {"model": "fake-model"}
+            config = {"rate_limits": {cls.rate_limit_provider: {"tpm": 10}}, "rate_limit_timeout": 0}
+            with mock.patch("models.rate_limit.conf", return_value=config):
+                chunks = list(bot.call_with_tools(messages, stream=True, max_tokens=100))
+            self.assertIn("rate limit", chunks[0]["message"], cls.__name__)
+
+    def test_unconfigured_provider_is_unlimited(self):
+        bot = self._bot()
+        with mock.patch("models.rate_limit.conf", return_value={}):
+            self.assertTrue(all(bot._acquire_rate_limit([]) for _ in range(100)))
+        self.assertEqual(token_bucket._limiters, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
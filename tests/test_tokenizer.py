@@ -0,0 +1,115 @@
+# encoding:utf-8
+"""
+Unit tests for agent.protocol.tokenizer:
+  - the approximate counter follows the ASCII / non-ASCII character mix
+  - families without a calibrated non-ASCII rate keep the conservative one
+  - texts are tokenized once and served from the cache afterwards
+  - the cache keeps counts only, never the texts themselves
+  - tool_use inputs are counted without serializing, close to the JSON count
+  - a family whose tokenizer fails to load falls back to approximate counts once
+  - Qwen models get exact counts from the dashscope tokenizer when installed
+"""
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.protocol import tokenizer
+from agent.protocol.tokenizer import TokenCounter, approximate_tokens, get_token_counter
+
+try:
+    import dashscope  # noqa: F401
+    _HAS_DASHSCOPE = True
+except ImportError:
+    _HAS_DASHSCOPE = False
+
+
+class TestTokenizer(unittest.TestCase):
+
+    def test_approximate_tokens(self):
+        self.assertEqual(approximate_tokens(""), 0)
+        self.assertEqual(approximate_tokens("a" * 400), 89)
+        self.assertEqual(approximate_tokens("中" * 100), 151)
+        self.assertEqual(approximate_tokens("中" * 100, non_ascii_rate=1.0), 101)
+        self.assertEqual(approximate_tokens("ab中文"), 4)
+
+    def test_approximate_rate_per_family(self):
+        text = "中文" * 100
+        with mock.patch.dict(tokenizer._counters, {"approx": tokenizer._APPROX}, clear=True), \
+                mock.patch.dict(tokenizer._model_counters, clear=True), \
+                mock.patch.object(tokenizer, "_load_backend", return_value=None):
+            qwen = get_token_counter("qwen-max")
+            self.assertFalse(qwen.exact)
+            self.assertEqual(qwen.count_text(text), 201)
+            self.assertIs(get_token_counter("deepseek-chat"), tokenizer._APPROX)
+            self.assertEqual(get_token_counter("deepseek-chat").count_text(text), 301)
+
+    def test_text_counted_once(self):
+        calls = []
+
+        def encode_len(text):
+            calls.append(text)
+            return len(text)
+
+        counter = TokenCounter("test", encode_len)
+        history = [{"role": "user", "content": [{"type": "tool_result", "tool_use_id": "t",
+                                                  "content": "line of output\n" * 50}]},
+                   {"role": "assistant", "content": "x" * 100}]
+        first = counter.count_messages(history)
+        for _ in range(10):
+            self.assertEqual(counter.count_messages(history), first)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(counter.cache_info().hits, 20)
+
+    def test_cache_does_not_keep_texts(self):
+        counter = TokenCounter("test", len, exact=True)
+        text = "tool output line\n" * 1000
+        self.assertEqual(counter.count_text(text), len(text))
+        self.assertEqual(counter.count_text(text), len(text))
+        self.assertEqual(counter.cache_info().hits, 1)
+        self.assertEqual(sys.getrefcount(text), 2)
+        self.assertEqual(list(counter._cache.values()), [(len(text), len(text))])
+
+    def test_tool_input_close_to_json_count(self):
+        inputs = [
+            {"command": "ls -la /tmp && cat notes.md | head -n 20"},
+            {"path": "memory/2026-01-01.md", "content": "今天讨论了项目进度。\n" * 20, "append": True},
+            {"query": "weather", "options": {"limit": 5, "tags": ["a", "b", "c"]}},
+        ]
+        counters = [TokenCounter("approx", approximate_tokens)]
+        if _HAS_DASHSCOPE:
+            counters.append(get_token_counter("qwen-max"))
+        for counter in counters:
+            for data in inputs:
+                serialized = counter.count_text(json.dumps(data, ensure_ascii=False))
+                walked = counter._count_json(data)
+                # Never far below the serialized count; exact backends stay close to it
+                self.assertGreater(walked, serialized * 0.8, (counter.name, data))
+                if counter.exact:
+                    self.assertLess(walked, serialized * 1.2, (counter.name, data))
+
+    def test_failed_backend_falls_back_once(self):
+        with mock.patch.dict(tokenizer._counters, {"approx": tokenizer._APPROX}, clear=True), \
+                mock.patch.dict(tokenizer._model_counters, clear=True), \
+                mock.patch.object(tokenizer, "_load_backend", return_value=None) as load:
+            first = get_token_counter("gpt-4.1")
+            second = get_token_counter("gpt-4.1-mini")
+            self.assertIs(first, tokenizer._APPROX)
+            self.assertIs(second, tokenizer._APPROX)
+            self.assertEqual(load.call_count, 1)
+            self.assertIs(get_token_counter("claude-sonnet-4-5"), tokenizer._APPROX)
+
+    @unittest.skipUnless(_HAS_DASHSCOPE, "dashscope not installed")
+    def test_qwen_exact(self):
+        counter = get_token_counter("qwen3-max")
+        self.assertTrue(counter.exact)
+        from dashscope import get_tokenizer
+        text = "你好，世界! Hello world, this is a token counting test. " * 4
+        self.assertEqual(counter.count_text(text), len(get_tokenizer("qwen-turbo").encode(text)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+# encoding:utf-8
+"""
+Unit tests for the compiled tool catalog:
+  - the catalog is the Claude-format schema list of its tools
+  - decorated bot converters run once per catalog and converter
+  - plain tool lists are still converted on every call
+  - the executor reuses the agent's catalog until its tool set changes
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.protocol.agent_stream import AgentStreamExecutor
+from agent.tools.base_tool import BaseTool, ToolResult
+from common.http_client import EncodedJSON
+from common.tool_catalog import ToolCatalog, compiled_tool_format
+
+
+class _Tool(BaseTool):
+    def __init__(self, name):
+        self.name = name
+        self.description = f"{name} tool"
+        self.params = {"type": "object", "properties": {"x": {"type": "string"}}}
+
+    def execute(self, params):
+        return ToolResult.success("ok")
+
+
+class _Bot:
+    conversions = 0
+
+    @compiled_tool_format
+    def _convert_tools_to_openai_format(self, tools):
+        _Bot.conversions += 1
+        return [{"type": "function", "function": {
+            "name": t["name"], "description": t["description"], "parameters": t["input_schema"]}}
+            for t in tools]
+
+
+class _OtherBot(_Bot):
+    @compiled_tool_format
+    def _convert_tools_to_openai_format(self, tools):
+        return [{"other": t["name"]} for t in tools]
+
+
+class _Agent:
+    memory_manager = None
+    skill_manager = None
+
+
+class TestToolCatalog(unittest.TestCase):
+
+    def setUp(self):
+        _Bot.conversions = 0
+        self.tools = [_Tool(f"t{i}") for i in range(3)]
+
+    def test_catalog_is_claude_schema(self):
+        catalog = ToolCatalog(self.tools)
+        self.assertEqual(catalog, [{"name": t.name, "description": t.description, "input_schema": t.params}
+                                   for t in self.tools])
+        self.assertEqual(json.loads(catalog.encoded), list(catalog))
+        self.assertTrue(catalog.matches(list(self.tools)))
+        self.assertFalse(catalog.matches(self.tools[:2]))
+        self.assertFalse(catalog.matches(self.tools[:2] + [_Tool("t2")]))
+
+    def test_conversions_memoized_per_converter(self):
+        catalog = ToolCatalog(self.tools)
+        first = _Bot()._convert_tools_to_openai_format(catalog)
+        second = _Bot()._convert_tools_to_openai_format(catalog)
+        self.assertIs(first, second)
+        self.assertIsInstance(first, EncodedJSON)
+        self.assertEqual(_Bot.conversions, 1)
+        self.assertEqual(first[0]["function"]["name"], "t0")
+        self.assertEqual(_OtherBot()._convert_tools_to_openai_format(catalog), [{"other": "t0"}, {"other": "t1"},
+                                                                                 {"other": "t2"}])
+
+        plain = list(catalog)
+        self.assertIsNot(_Bot()._convert_tools_to_openai_format(plain),
+                         _Bot()._convert_tools_to_openai_format(plain))
+        self.assertEqual(_Bot.conversions, 3)
+
+    def test_executor_reuses_agent_catalog(self):
+        agent = _Agent()
+
+        def catalog_for(tools):
+            return AgentStreamExecutor(agent=agent, model=None, system_prompt="", tools=tools)._tool_catalog()
+
+        catalog = catalog_for(self.tools)
+        self.assertIs(catalog_for(list(self.tools)), catalog)
+        self.tools.append(_Tool("web_search"))
+        rebuilt = catalog_for(self.tools)
+        self.assertIsNot(rebuilt, catalog)
+        self.assertEqual([t["name"] for t in rebuilt], ["t0", "t1", "t2", "web_search"])
+        self.assertIs(catalog_for(self.tools), rebuilt)
+
+
+if __name__ == "__main__":
+    unittest.main()
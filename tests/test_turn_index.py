@@ -0,0 +1,167 @@
+# encoding:utf-8
+"""
+Unit tests for the executor's running turn index:
+  - turn boundaries and token sums match a full rescan through appends,
+    in-place edits, pops and front trims
+  - _trim_messages keeps the newest turns under the turn / token limits
+  - historical tool_result truncation skips the current turn
+  - overflow recovery truncates large blocks and keeps the last 5 turns
+  - validation skips the full sanitize pass only for self-contained appends
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.protocol.agent_stream import AgentStreamExecutor
+from agent.protocol.message_utils import is_closed_tool_segment
+from agent.protocol.turn_index import TurnIndex, is_user_query, payload_chars
+
+
+def _tokens(msg):
+    content = msg.get("content", "")
+    if isinstance(content, str):
+        return len(content)
+    return sum(len(str(b.get("text") or b.get("content") or b.get("input") or "")) for b in content)
+
+
+def _reference_turns(messages):
+    turns, current = [], []
+    for msg in messages:
+        if is_user_query(msg) and current:
+            turns.append(current)
+            current = []
+        current.append(msg)
+    if current:
+        turns.append(current)
+    return turns
+
+
+def _turn(i, result_chars=10):
+    tool_id = f"call_{i}"
+    return [
+        {"role": "user", "content": [{"type": "text", "text": f"question {i}"}]},
+        {"role": "assistant", "content": [{"type": "tool_use", "id": tool_id, "name": "read", "input": {"p": i}}]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": tool_id, "content": "r" * result_chars}]},
+        {"role": "assistant", "content": [{"type": "text", "text": f"answer {i}"}]},
+    ]
+
+
+class _FakeAgent:
+    memory_manager = None
+
+    def __init__(self, max_context_tokens=None):
+        self.max_context_tokens = max_context_tokens
+
+    def _estimate_message_tokens(self, msg):
+        return _tokens(msg)
+
+    def _get_model_context_window(self):
+        return 1_000_000
+
+
+def _executor(messages, max_context_turns=30, max_context_tokens=None):
+    return AgentStreamExecutor(
+        agent=_FakeAgent(max_context_tokens), model=None, system_prompt="sys", tools=[],
+        messages=messages, max_context_turns=max_context_turns,
+    )
+
+
+class TestTurnIndex(unittest.TestCase):
+
+    def _assert_consistent(self, index, messages):
+        expected = _reference_turns(messages)
+        self.assertEqual([t["messages"] for t in index.turns()], expected)
+        self.assertEqual(index.tokens(), sum(_tokens(m) for m in messages))
+        for first in range(len(expected)):
+            self.assertEqual(index.tokens(first), sum(_tokens(m) for t in expected[first:] for m in t))
+
+    def test_incremental_matches_rescan(self):
+        rng = random.Random(3)
+        messages = [{"role": "assistant", "content": "leftover"}]
+        index = TurnIndex(_tokens, large_chars=50)
+        for step in range(200):
+            op = rng.random()
+            if op < 0.6:
+                messages.extend(_turn(step, rng.choice([5, 80]))[:rng.randint(1, 4)])
+            elif op < 0.7 and messages:
+                messages.pop(rng.randrange(len(messages)))
+            elif op < 0.8 and len(index.sync(messages).turns()) > 2:
+                messages[:] = messages[index.turn_start(1):]
+                index.drop_turns(1, messages)
+            elif op < 0.9:
+                index.sync(messages)
+                replies = [i for i, m in enumerate(messages) if m["role"] == "assistant"]
+                i = rng.choice(replies)
+                messages[i]["content"] = "edited " * rng.randint(1, 20)
+                index.refresh(i)
+            self._assert_consistent(index.sync(messages), messages)
+            self.assertEqual(index.large_messages(),
+                             [i for i, m in enumerate(messages) if payload_chars(m) > 50])
+
+    def test_trim_by_turn_limit(self):
+        messages = [m for i in range(12) for m in _turn(i)]
+        executor = _executor(messages, max_context_turns=10)
+        executor._trim_messages()
+        self.assertEqual(executor.messages, [m for i in range(6, 12) for m in _turn(i)])
+        self.assertEqual(len(executor._identify_complete_turns()), 6)
+
+    def test_trim_by_token_limit(self):
+        messages = [m for i in range(8) for m in _turn(i, result_chars=100)]
+        per_turn = sum(_tokens(m) for m in _turn(0, result_chars=100))
+        executor = _executor(messages, max_context_tokens=per_turn * 6)
+        executor._trim_messages()
+        self.assertEqual(executor.messages, [m for i in range(4, 8) for m in _turn(i, result_chars=100)])
+
+        few = [m for i in range(3) for m in _turn(i, result_chars=100)]
+        executor = _executor(few, max_context_tokens=per_turn)
+        executor._trim_messages()
+        self.assertEqual([m["role"] for m in executor.messages], ["user", "assistant"] * 3)
+
+    def test_historical_tool_results_truncated(self):
+        messages = _turn(0, result_chars=30000) + _turn(1, result_chars=30000)
+        executor = _executor(messages)
+        executor._truncate_historical_tool_results()
+        self.assertTrue(messages[2]["content"][0]["content"].startswith("r" * 20000 + "\n\n[Historical"))
+        self.assertEqual(len(messages[6]["content"][0]["content"]), 30000)
+        index = executor._turn_index_synced()
+        self.assertEqual(index.tokens(), sum(_tokens(m) for m in messages))
+
+    def test_aggressive_trim(self):
+        messages = [m for i in range(8) for m in _turn(i, result_chars=15000)]
+        messages[-1]["content"] = "x" * 12000
+        executor = _executor(messages)
+        self.assertTrue(executor._aggressive_trim_for_overflow())
+        self.assertEqual(len(executor._identify_complete_turns()), 5)
+        self.assertEqual(executor.messages[0]["content"][0]["text"], "question 3")
+        for msg in executor.messages:
+            content = msg["content"]
+            if isinstance(content, list) and content[0]["type"] == "tool_result":
+                self.assertIn("[Truncated for context recovery", content[0]["content"])
+        self.assertEqual(executor.messages[-1]["content"], "x" * 12000)  # assistant text untouched
+        index = executor._turn_index_synced()
+        self.assertEqual(index.tokens(), sum(_tokens(m) for m in executor.messages))
+
+    def test_closed_tool_segment(self):
+        turn = _turn(1)
+        self.assertTrue(is_closed_tool_segment(turn))
+        self.assertTrue(is_closed_tool_segment(turn[1:]))
+        self.assertFalse(is_closed_tool_segment(turn[2:]))      # opens with a tool_result
+        self.assertFalse(is_closed_tool_segment(turn[:2]))      # unanswered tool_use
+        self.assertFalse(is_closed_tool_segment([turn[0], turn[2]]))  # result for an outside tool_use
+
+    def test_validation_repairs_broken_append(self):
+        messages = [m for i in range(3) for m in _turn(i)]
+        executor = _executor(messages)
+        executor._validate_and_fix_messages()
+        executor.messages.extend(_turn(3)[:2])   # tool_use without its result
+        executor._validate_and_fix_messages()
+        self.assertEqual(executor.messages[-1]["content"][0]["tool_use_id"], "call_3")
+        self.assertTrue(executor.messages[-1]["content"][0]["is_error"])
+        self.assertEqual(len(executor._identify_complete_turns()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -140,7 +140,7 @@ class TestYoudaoTranslatorTranslate(unittest.TestCase):
         mock_response.raise_for_status = MagicMock()
 
         with patch(
-            "translate.youdao.youdao_translate.requests.post",
+            "translate.youdao.youdao_translate.http_client.post",
             return_value=mock_response,
         ) as mock_post:
             result = translator.translate("hello", from_lang="en", to_lang="zh")
@@ -169,7 +169,7 @@ class TestYoudaoTranslatorTranslate(unittest.TestCase):
         mock_response.raise_for_status = MagicMock()
 
         with patch(
-            "translate.youdao.youdao_translate.requests.post",
+            "translate.youdao.youdao_translate.http_client.post",
             return_value=mock_response,
         ):
             result = translator.translate("multi\nline")
@@ -178,7 +178,7 @@ class TestYoudaoTranslatorTranslate(unittest.TestCase):
     def test_translate_empty_query_returns_empty(self):
         translator = self._make_translator()
         # Should not even hit the network for an empty query
-        with patch("translate.youdao.youdao_translate.requests.post") as mock_post:
+        with patch("translate.youdao.youdao_translate.http_client.post") as mock_post:
             self.assertEqual(translator.translate(""), "")
             mock_post.assert_not_called()
 
@@ -192,7 +192,7 @@ class TestYoudaoTranslatorTranslate(unittest.TestCase):
         mock_response.raise_for_status = MagicMock()
 
         with patch(
-            "translate.youdao.youdao_translate.requests.post",
+            "translate.youdao.youdao_translate.http_client.post",
             return_value=mock_response,
         ):
             with self.assertRaises(Exception) as ctx:
@@ -207,7 +207,7 @@ class TestYoudaoTranslatorTranslate(unittest.TestCase):
         mock_response.raise_for_status = MagicMock()
 
         with patch(
-            "translate.youdao.youdao_translate.requests.post",
+            "translate.youdao.youdao_translate.http_client.post",
             return_value=mock_response,
         ):
             with self.assertRaises(Exception):
@@ -220,7 +220,7 @@ class TestYoudaoTranslatorTranslate(unittest.TestCase):
         mock_response.raise_for_status = MagicMock()
 
         with patch(
-            "translate.youdao.youdao_translate.requests.post",
+            "translate.youdao.youdao_translate.http_client.post",
             return_value=mock_response,
         ) as mock_post:
             translator.translate("你好")  # no from/to provided
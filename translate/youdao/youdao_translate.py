@@ -14,7 +14,7 @@ import time
 import uuid
 from hashlib import sha256
 
-import requests
+from common import http_client
 
 from config import conf
 from translate.translator import Translator
@@ -67,7 +67,7 @@ class YoudaoTranslator(Translator):
         }
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-        response = requests.post(self.API_URL, data=payload, headers=headers, timeout=10)
+        response = http_client.post(self.API_URL, data=payload, headers=headers, timeout=10)
         response.raise_for_status()
         result = response.json()
 
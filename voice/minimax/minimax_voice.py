@@ -4,10 +4,10 @@ MiniMax TTS voice service
 """
 import datetime
 import random
-import requests
 
 from bridge.reply import Reply, ReplyType
 from common.log import logger
+from common import http_client
 from config import conf
 from voice.voice import Voice
 
@@ -65,7 +65,7 @@ class MinimaxVoice(Voice):
                 },
             }
 
-            response = requests.post(url, headers=headers, json=payload, stream=True, timeout=60)
+            response = http_client.post(url, headers=headers, json=payload, stream=True, timeout=60)
             response.raise_for_status()
 
             # Parse SSE stream and collect hex-encoded audio chunks